@@ -10,7 +10,7 @@ import numpy as np
 from mav_sim.chap3.mav_dynamics import DynamicState
 from mav_sim.chap4.run_sim import run_sim
 from mav_sim.chap5.compute_models import compute_ss_model
-from mav_sim.chap5.trim import compute_trim
+from mav_sim.chap5.trim_cache import default_trim_cache
 from mav_sim.message_types.msg_delta import MsgDelta
 from mav_sim.message_types.msg_sim_params import MsgSimParams
 
@@ -22,11 +22,14 @@ def main() -> None:
     sim_params = MsgSimParams(end_time=100.) # Sim ending in 10 seconds
     state = DynamicState()
 
-    # use compute_trim function to compute trim state and trim input
+    # use compute_trim function to compute trim state and trim input, the solution is reused on later runs
     Va_trim = 25.
     gamma_trim = 0.1
     radius_trim = np.inf
-    trim_state, trim_input = compute_trim(state0=state.convert_to_numpy(), Va=Va_trim, gamma=gamma_trim, R=radius_trim)
+    trim_cache = default_trim_cache()
+    trim_state, trim_input = trim_cache.compute_trim(state0=state.convert_to_numpy(), Va=Va_trim, gamma=gamma_trim,
+                                                     R=radius_trim)
+    print(trim_cache.stats)
 
     # Compute the SS models
     A_lon, B_lon, A_lat, B_lat = compute_ss_model(trim_state, trim_input)
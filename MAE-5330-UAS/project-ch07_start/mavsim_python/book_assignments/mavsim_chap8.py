@@ -16,23 +16,34 @@ from mav_sim.chap6.autopilot import Autopilot
 from mav_sim.chap7.mav_dynamics import MavDynamics
 from mav_sim.chap8.observer import Observer
 from mav_sim.message_types.msg_autopilot import MsgAutopilot
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.message_types.msg_sim_params import MsgSimParams
+from mav_sim.message_types.msg_state import MsgState
 
 #from mav_sim.chap8.observer_analyt import Observer
 #from mav_sim.chap8.observer_simple import Observer
+from mav_sim.tools.scheduler import simulation_schedule
 from mav_sim.tools.signals import Signals
 
 # initialize the visualization
 mav_view = MavViewer()  # initialize the mav viewer
 data_view = DataViewer()  # initialize view of data plots
 
+# timing of the simulation, the observer runs at the control rate
+sim = MsgSimParams(ts_simulation=SIM.ts_simulation, start_time=SIM.start_time, end_time=SIM.end_time,
+                   ts_plotting=SIM.ts_plotting, ts_control=SIM.ts_control)
+
 # initialize elements of the architecture
-wind = WindSimulation(SIM.ts_simulation)
-mav = MavDynamics(SIM.ts_simulation)
-autopilot = Autopilot(SIM.ts_simulation)
+wind = WindSimulation(sim.ts_simulation)
+mav = MavDynamics(sim.ts_simulation)
+autopilot = Autopilot(sim.ts_control)
 initial_state = copy.deepcopy(mav.true_state)
 initial_measurements = copy.deepcopy(mav.sensors())
-observer = Observer(SIM.ts_simulation, initial_state,initial_measurements)
-#observer = Observer(SIM.ts_simulation) #, initial_state,initial_measurements)
+observer = Observer(sim.ts_observer, initial_state,initial_measurements)
+#observer = Observer(sim.ts_observer) #, initial_state,initial_measurements)
+
+# schedule of the components, each runs once every whole number of simulation steps
+schedule = simulation_schedule(sim)
 
 
 # autopilot commands
@@ -50,12 +61,16 @@ chi_command = Signals(dc_offset=np.radians(0.0),
                       start_time=10.0,
                       frequency=0.015)
 
-# initialize the simulation time
-sim_time = SIM.start_time
+# outputs of the components that run slower than the dynamics, held between their updates
+measurements = initial_measurements
+estimated_state = initial_state
+delta = MsgDelta()
+commanded_state = MsgState()
 
 # main simulation loop
 print("Press Command-Q to exit...")
-while sim_time < SIM.end_time:
+for k in range(schedule.num_ticks(sim.end_time)):
+    sim_time = schedule.time(k)
 
     # -------autopilot commands-------------
     commands.airspeed_command = Va_command.polynomial(sim_time)
@@ -63,20 +78,22 @@ while sim_time < SIM.end_time:
     commands.altitude_command = h_command.polynomial(sim_time)
 
     # -------autopilot-------------
-    measurements = mav.sensors()  # get sensor measurements
-    estimated_state = observer.update(measurements)  # estimate states from measurements
-    delta, commanded_state = autopilot.update(commands, estimated_state)
+    if schedule.due("sensors", k):
+        measurements = mav.sensors()  # get sensor measurements
+    if schedule.due("observer", k):
+        estimated_state = observer.update(measurements)  # estimate states from measurements
+    if schedule.due("control", k):
+        delta, commanded_state = autopilot.update(commands, estimated_state)
 
     # -------physical system-------------
     current_wind = wind.update()  # get the new wind vector
     mav.update(delta, current_wind)  # propagate the MAV dynamics
 
     # -------update viewer-------------
-    mav_view.update(mav.true_state)  # plot body of MAV
-    data_view.update(mav.true_state,  # true states
-                     estimated_state,  # estimated states
-                     commanded_state,  # commanded states
-                     delta,  # input to aircraft
-                     SIM.ts_simulation)
-    # -------increment time-------------
-    sim_time += SIM.ts_simulation
+    if schedule.due("plot", k):
+        mav_view.update(mav.true_state)  # plot body of MAV
+        data_view.update(mav.true_state,  # true states
+                         estimated_state,  # estimated states
+                         commanded_state,  # commanded states
+                         delta,  # input to aircraft
+                         sim.ts_plotting)
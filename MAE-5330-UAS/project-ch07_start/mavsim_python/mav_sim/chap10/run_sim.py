@@ -6,18 +6,28 @@ mavsim_python
         2/22 - GND
 """
 
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Callable, Optional
 
-from mav_sim.chap3.data_viewer import DataViewer
 from mav_sim.chap3.mav_dynamics import DynamicState
 from mav_sim.chap4.wind_simulation import WindSimulation
 from mav_sim.chap6.autopilot import Autopilot
 from mav_sim.chap7.mav_dynamics import MavDynamics
 from mav_sim.chap10.path_follower import PathFollower
-from mav_sim.chap10.path_viewer import PathViewer
+from mav_sim.message_types.msg_autopilot import MsgAutopilot
+from mav_sim.message_types.msg_delta import MsgDelta
 from mav_sim.message_types.msg_path import MsgPath
+from mav_sim.message_types.msg_sensors import MsgSensors
 from mav_sim.message_types.msg_sim_params import MsgSimParams
 from mav_sim.message_types.msg_state import MsgState
+from mav_sim.tools.random_streams import Seed, component_generators
+from mav_sim.tools.scheduler import simulation_schedule
+from mav_sim.tools.sim_trajectory import SimTrajectory
+from mav_sim.tools.trajectory_recorder import TrajectoryRecorder
+
+# The viewers are only imported when used so that the headless simulation does not need Qt
+if TYPE_CHECKING:
+    from mav_sim.chap3.data_viewer import DataViewer
+    from mav_sim.chap10.path_viewer import PathViewer
 
 # pylint: disable=too-many-arguments
 
@@ -25,8 +35,8 @@ from mav_sim.message_types.msg_state import MsgState
 PathFunction = Callable[ [float, MsgState], MsgPath]
 
 def run_sim(sim: MsgSimParams, path_fnc: PathFunction, init_state: Optional[DynamicState] = None, \
-        path_view: Optional[PathViewer] = None, data_view: Optional[DataViewer] = None) \
-        -> tuple[PathViewer, DataViewer]:
+        path_view: Optional['PathViewer'] = None, data_view: Optional['DataViewer'] = None, \
+        recorder: Optional[TrajectoryRecorder] = None) -> tuple['PathViewer', 'DataViewer']:
     """Runs the chapter 10 simulation
 
     Args:
@@ -35,11 +45,15 @@ def run_sim(sim: MsgSimParams, path_fnc: PathFunction, init_state: Optional[Dyna
         init_state: Initial state of the MAV
         path_view: Viewing window to be used for the mav and its associated path
         data_view: Viewing window to be used for the states
+        recorder: Stores every simulation step when given
 
     Returns:
         path_view: Viewing window to be used for the mav and its associated path
         data_view: Viewing window to be used for the states
     """
+    # pylint: disable=import-outside-toplevel
+    from mav_sim.chap3.data_viewer import DataViewer
+    from mav_sim.chap10.path_viewer import PathViewer
 
     # initialize the visualization
     if path_view is None:
@@ -50,29 +64,38 @@ def run_sim(sim: MsgSimParams, path_fnc: PathFunction, init_state: Optional[Dyna
     # initialize elements of the architecture
     wind = WindSimulation(sim.ts_simulation)
     mav = MavDynamics(sim.ts_simulation, init_state)
-    autopilot = Autopilot(sim.ts_simulation)
+    autopilot = Autopilot(sim.ts_control)
     path_follower = PathFollower()
 
-    # initialize the simulation time
-    sim_time = sim.start_time
-    next_plot_time = sim.ts_plotting
+    # schedule of the components, each runs once every whole number of simulation steps
+    schedule = simulation_schedule(sim)
 
+    # outputs of the components that run slower than the dynamics, held between their updates
+    delta = MsgDelta()
+    commanded_state = MsgState()
+    autopilot_commands = MsgAutopilot()
 
     # main simulation loop
-    while sim_time < sim.end_time:
+    for k in range(schedule.num_ticks(sim.end_time)):
+        sim_time = schedule.time(k)
+
         # -------path follower-------------
-        current_path = path_fnc(sim_time, mav.true_state)
-        autopilot_commands = path_follower.update(current_path, mav.true_state)
+        if schedule.due("path", k):
+            current_path = path_fnc(sim_time, mav.true_state)
+            autopilot_commands = path_follower.update(current_path, mav.true_state)
 
         # -------autopilot-------------
-        delta, commanded_state = autopilot.update(autopilot_commands, mav.true_state)
+        if schedule.due("control", k):
+            delta, commanded_state = autopilot.update(autopilot_commands, mav.true_state)
 
         # -------physical system-------------
-        mav.update(delta, wind.update() )  # propagate the MAV dynamics
+        wind_vec = wind.update()
+        if recorder is not None:
+            recorder.record(sim_time, mav.true_state, delta, wind_vec, commanded_state)
+        mav.update(delta, wind_vec)  # propagate the MAV dynamics
 
         # -------update viewer-------------
-        if next_plot_time <= sim_time:
-            next_plot_time += sim.ts_plotting
+        if schedule.due("plot", k):
             path_view.update(mav.true_state, current_path)  # plot path and MAV
             data_view.update(   mav.true_state,  # true states
                                 mav.true_state,  # estimated states
@@ -80,7 +103,58 @@ def run_sim(sim: MsgSimParams, path_fnc: PathFunction, init_state: Optional[Dyna
                                 delta,  # input to aircraft
                                 sim.ts_plotting)
 
-        # -------increment time-------------
-        sim_time += sim.ts_simulation
-
     return (path_view, data_view)
+
+def run_sim_headless(sim: MsgSimParams, path_fnc: PathFunction, init_state: Optional[DynamicState] = None, \
+        recorder: Optional[TrajectoryRecorder] = None, seed: Seed = None) -> SimTrajectory:
+    """Runs the chapter 10 simulation without any viewers
+
+    Args:
+        sim: Timing and file parameters for the simulation
+        path_fnc: Function that takes in time and state and returns the path to be followed by uav
+        init_state: Initial state of the MAV
+        recorder: Also stores every simulation step when given
+        seed: Seeds an independent generator for each random component, the global numpy state is used when None
+
+    Returns:
+        trajectory: True and commanded states, inputs, wind, and sensors at every simulation step
+    """
+    # initialize elements of the architecture
+    streams = component_generators(seed) if seed is not None else {}
+    wind = WindSimulation(sim.ts_simulation, rng=streams.get("wind"))
+    mav = MavDynamics(sim.ts_simulation, init_state, rng=streams.get("sensors"))
+    autopilot = Autopilot(sim.ts_control)
+    path_follower = PathFollower()
+    schedule = simulation_schedule(sim)
+    num_steps = schedule.num_ticks(sim.end_time)
+    trajectory = SimTrajectory(num_steps, sensors=True)
+
+    # outputs of the components that run slower than the dynamics, held between their updates
+    delta = MsgDelta()
+    commanded_state = MsgState()
+    measurements = MsgSensors()
+    autopilot_commands = MsgAutopilot()
+
+    # main simulation loop
+    for k in range(num_steps):
+        sim_time = schedule.time(k)
+
+        # -------path follower-------------
+        if schedule.due("path", k):
+            current_path = path_fnc(sim_time, mav.true_state)
+            autopilot_commands = path_follower.update(current_path, mav.true_state)
+
+        # -------autopilot-------------
+        if schedule.due("sensors", k):
+            measurements = mav.sensors()  # get sensor measurements
+        if schedule.due("control", k):
+            delta, commanded_state = autopilot.update(autopilot_commands, mav.true_state)
+
+        # -------physical system-------------
+        current_wind = wind.update()
+        trajectory.record(sim_time, mav.true_state, delta, current_wind, commanded_state, measurements)
+        if recorder is not None:
+            recorder.record(sim_time, mav.true_state, delta, current_wind, commanded_state, measurements)
+        mav.update(delta, current_wind)  # propagate the MAV dynamics
+
+    return trajectory
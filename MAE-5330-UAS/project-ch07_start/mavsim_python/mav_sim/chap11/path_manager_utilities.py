@@ -3,6 +3,7 @@
 
 import numpy as np
 from mav_sim.message_types.msg_waypoints import MsgWaypoints
+from mav_sim.tools.events import POSITION, Event
 from mav_sim.tools.types import NP_MAT
 
 IND_OOB = (
@@ -137,3 +138,23 @@ def inHalfSpace(pos: NP_MAT, hs: HalfSpaceParams) -> bool:
     # This means position is on the positive side of the halfspace
     diff = pos - hs.point
     return bool(np.dot(diff.T, hs.normal).item() >= 0)
+
+
+def half_space_event(hs: HalfSpaceParams, terminal: bool = False) -> Event:
+    """Event of the position entering the half-space, the crossing of inHalfSpace from False to True
+
+    The half-space is read at every evaluation, so the event follows updates made with hs.set()
+
+    Args:
+        hs: halfspace parameters
+        terminal: True => the integration stops at the entry
+
+    Returns:
+        Event to watch with a DynamicsIntegrator
+    """
+    return Event(
+        "half-space entry",
+        lambda state: float(np.dot((state[POSITION] - hs.point).T, hs.normal).item()),
+        terminal,
+        1,
+    )
@@ -9,11 +9,9 @@ mavsim_python
         3/31/2020 - RWB
         4/2022 - GND
 """
+from typing import TYPE_CHECKING
+
 import numpy as np
-import pyqtgraph as pg
-import pyqtgraph.opengl as gl
-from mav_sim.chap11.draw_waypoints import DrawWaypoints
-from mav_sim.chap12.draw_map import DrawMap
 from mav_sim.chap12.planner_utilities import (
     column,
     distance,
@@ -28,6 +26,10 @@ from mav_sim.message_types.msg_waypoints import MsgWaypoints
 from mav_sim.message_types.msg_world_map import MsgWorldMap
 from mav_sim.tools.types import NP_MAT
 
+# The plotting is only imported when used so that planning does not need Qt
+if TYPE_CHECKING:
+    import pyqtgraph as pg
+    import pyqtgraph.opengl as gl
 
 class RRTStraightLine:
     """RRT planner for straight line plans
@@ -36,8 +38,8 @@ class RRTStraightLine:
         """Initialize parameters
         """
         self.segment_length = 300 # standard length of path segments
-        self.plot_window: gl.GLViewWidget
-        self.plot_app: pg.QtGui.QApplication
+        self.plot_window: 'gl.GLViewWidget'
+        self.plot_app: 'pg.QtGui.QApplication'
 
 
     def plot_map(self, world_map: MsgWorldMap, tree: MsgWaypoints, waypoints: MsgWaypoints, \
@@ -51,6 +53,12 @@ class RRTStraightLine:
             smoothed_waypoints: The path (waypoints) after smoothing
             radius: minimum radius circle for the mav
         """
+        # pylint: disable=import-outside-toplevel
+        import pyqtgraph as pg
+        import pyqtgraph.opengl as gl
+        from mav_sim.chap11.draw_waypoints import DrawWaypoints
+        from mav_sim.chap12.draw_map import DrawMap
+
         scale = 4000
         # initialize Qt gui application and window
         self.plot_app = pg.QtGui.QApplication([])  # initialize QT
@@ -128,7 +136,7 @@ def create_rrt_plan(start_pose: NP_MAT, end_pose: NP_MAT, Va: float, \
 
     return waypoints
 
-def draw_tree(tree: MsgWaypoints, color: NP_MAT, window: gl.GLViewWidget) -> None:
+def draw_tree(tree: MsgWaypoints, color: NP_MAT, window: 'gl.GLViewWidget') -> None:
     """Draw the tree in the given window
 
     Args:
@@ -136,6 +144,7 @@ def draw_tree(tree: MsgWaypoints, color: NP_MAT, window: gl.GLViewWidget) -> Non
         color: color of tree
         window: window in which to plot the tree
     """
+    import pyqtgraph.opengl as gl  # pylint: disable=import-outside-toplevel,redefined-outer-name
     R = np.array([[0, 1, 0], [1, 0, 0], [0, 0, -1]])
     points = R @ tree.ned
     for i in range(points.shape[1]):
@@ -6,10 +6,9 @@ mavsim_python
         4/22 - GND
 """
 
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import mav_sim.parameters.planner_parameters as PLAN
-from mav_sim.chap3.data_viewer import DataViewer
 from mav_sim.chap3.mav_dynamics import DynamicState
 from mav_sim.chap4.wind_simulation import WindSimulation
 from mav_sim.chap6.autopilot import Autopilot
@@ -17,16 +16,28 @@ from mav_sim.chap7.mav_dynamics import MavDynamics
 from mav_sim.chap10.path_follower import PathFollower
 from mav_sim.chap11.path_manager import PathManager
 from mav_sim.chap12.path_planner import PathPlanner, PlannerType
-from mav_sim.chap12.world_viewer import WorldViewer
+from mav_sim.message_types.msg_autopilot import MsgAutopilot
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.message_types.msg_sensors import MsgSensors
 from mav_sim.message_types.msg_sim_params import MsgSimParams
+from mav_sim.message_types.msg_state import MsgState
 from mav_sim.message_types.msg_world_map import MsgWorldMap
+from mav_sim.tools.random_streams import Seed, component_generators
+from mav_sim.tools.scheduler import simulation_schedule
+from mav_sim.tools.sim_trajectory import SimTrajectory
+from mav_sim.tools.trajectory_recorder import TrajectoryRecorder
 from mav_sim.tools.types import NP_MAT
 
+# The viewers are only imported when used so that the headless simulation does not need Qt
+if TYPE_CHECKING:
+    from mav_sim.chap3.data_viewer import DataViewer
+    from mav_sim.chap12.world_viewer import WorldViewer
+
 # pylint: disable=too-many-arguments
 
 def run_sim(sim: MsgSimParams, end_pose: NP_MAT, init_state: Optional[DynamicState] = None, \
-        world_view: Optional[WorldViewer] = None, data_view: Optional[DataViewer] = None) \
-        -> tuple[WorldViewer, DataViewer]:
+        world_view: Optional['WorldViewer'] = None, data_view: Optional['DataViewer'] = None, \
+        recorder: Optional[TrajectoryRecorder] = None) -> tuple['WorldViewer', 'DataViewer']:
     """Runs the chapter 12 simulation
 
     Args:
@@ -35,11 +46,15 @@ def run_sim(sim: MsgSimParams, end_pose: NP_MAT, init_state: Optional[DynamicSta
         init_state: Initial state of the MAV
         waypoint_view: Viewing window to be used for the mav and its associated path
         data_view: Viewing window to be used for the states
+        recorder: Stores every simulation step when given
 
     Returns:
         waypoint_view: Viewing window to be used for the mav and its associated path
         data_view: Viewing window to be used for the states
     """
+    # pylint: disable=import-outside-toplevel
+    from mav_sim.chap3.data_viewer import DataViewer
+    from mav_sim.chap12.world_viewer import WorldViewer
 
     # initialize the visualization
     if world_view is None:
@@ -50,15 +65,14 @@ def run_sim(sim: MsgSimParams, end_pose: NP_MAT, init_state: Optional[DynamicSta
     # initialize elements of the architecture
     wind = WindSimulation(sim.ts_simulation)
     mav = MavDynamics(sim.ts_simulation, init_state)
-    autopilot = Autopilot(sim.ts_simulation)
+    autopilot = Autopilot(sim.ts_control)
     path_follower = PathFollower()
     path_manager = PathManager()
     path_planner = PathPlanner()
     world_map = MsgWorldMap()
 
-    # initialize the simulation time
-    sim_time = sim.start_time
-    next_plot_time = sim.ts_plotting
+    # schedule of the components, each runs once every whole number of simulation steps
+    schedule = simulation_schedule(sim)
 
     # Initialize the waypoint planning with the desired end pose
     waypoints = path_planner.update(world_map=world_map, \
@@ -66,30 +80,40 @@ def run_sim(sim: MsgSimParams, end_pose: NP_MAT, init_state: Optional[DynamicSta
         end_pose_in=end_pose)
     path_manager.set_waypoints(waypoints)
 
+    # outputs of the components that run slower than the dynamics, held between their updates
+    delta = MsgDelta()
+    commanded_state = MsgState()
+    autopilot_commands = MsgAutopilot()
+
     # main simulation loop
-    while sim_time < sim.end_time:
-        # -------path planner - use default end-point when end received - ----
-        if path_manager.manager_requests_waypoints() is True:
+    for k in range(schedule.num_ticks(sim.end_time)):
+        sim_time = schedule.time(k)
 
-            waypoints = path_planner.update(world_map=world_map, \
-                state=mav.true_state, planner_type=PlannerType.rrt_straight)
-            path_manager.set_waypoints(waypoints)
+        # -------path planner - use default end-point when end received - ----
+        if schedule.due("path", k):
+            if path_manager.manager_requests_waypoints() is True:
+                waypoints = path_planner.update(world_map=world_map, \
+                    state=mav.true_state, planner_type=PlannerType.rrt_straight)
+                path_manager.set_waypoints(waypoints)
 
-        # -------path manager-------------
-        path = path_manager.update(PLAN.R_min, mav.true_state)
+            # -------path manager-------------
+            path = path_manager.update(PLAN.R_min, mav.true_state)
 
-        # -------path follower-------------
-        autopilot_commands = path_follower.update(path, mav.true_state)
+            # -------path follower-------------
+            autopilot_commands = path_follower.update(path, mav.true_state)
 
         # -------autopilot-------------
-        delta, commanded_state = autopilot.update(autopilot_commands, mav.true_state)
+        if schedule.due("control", k):
+            delta, commanded_state = autopilot.update(autopilot_commands, mav.true_state)
 
         # -------physical system-------------
-        mav.update(delta, wind.update() )  # propagate the MAV dynamics
+        wind_vec = wind.update()
+        if recorder is not None:
+            recorder.record(sim_time, mav.true_state, delta, wind_vec, commanded_state)
+        mav.update(delta, wind_vec)  # propagate the MAV dynamics
 
         # -------update viewer-------------
-        if next_plot_time <= sim_time:
-            next_plot_time += sim.ts_plotting
+        if schedule.due("plot", k):
             world_view.update(mav.true_state, path, waypoints, world_map)  # plot path and MAV
             data_view.update(   mav.true_state,  # true states
                                 mav.true_state,  # estimated states
@@ -97,7 +121,75 @@ def run_sim(sim: MsgSimParams, end_pose: NP_MAT, init_state: Optional[DynamicSta
                                 delta,  # input to aircraft
                                 sim.ts_plotting)
 
-        # -------increment time-------------
-        sim_time += sim.ts_simulation
-
     return (world_view, data_view)
+
+def run_sim_headless(sim: MsgSimParams, end_pose: NP_MAT, init_state: Optional[DynamicState] = None, \
+        recorder: Optional[TrajectoryRecorder] = None, seed: Seed = None) -> SimTrajectory:
+    """Runs the chapter 12 simulation without any viewers
+
+    Args:
+        sim: Timing and file parameters for the simulation
+        end_pose: The desired final set of waypoints
+        init_state: Initial state of the MAV
+        recorder: Also stores every simulation step when given
+        seed: Seeds an independent generator for each random component, the global numpy state is used when None
+
+    Returns:
+        trajectory: True and commanded states, inputs, wind, and sensors at every simulation step
+    """
+    # initialize elements of the architecture
+    streams = component_generators(seed) if seed is not None else {}
+    wind = WindSimulation(sim.ts_simulation, rng=streams.get("wind"))
+    mav = MavDynamics(sim.ts_simulation, init_state, rng=streams.get("sensors"))
+    autopilot = Autopilot(sim.ts_control)
+    path_follower = PathFollower()
+    path_manager = PathManager()
+    path_planner = PathPlanner()
+    world_map = MsgWorldMap(rng=streams.get("world_map"))
+    schedule = simulation_schedule(sim)
+    num_steps = schedule.num_ticks(sim.end_time)
+    trajectory = SimTrajectory(num_steps, sensors=True)
+
+    # Initialize the waypoint planning with the desired end pose
+    waypoints = path_planner.update(world_map=world_map, \
+        state=mav.true_state, planner_type=PlannerType.rrt_straight, \
+        end_pose_in=end_pose)
+    path_manager.set_waypoints(waypoints)
+
+    # outputs of the components that run slower than the dynamics, held between their updates
+    delta = MsgDelta()
+    commanded_state = MsgState()
+    measurements = MsgSensors()
+    autopilot_commands = MsgAutopilot()
+
+    # main simulation loop
+    for k in range(num_steps):
+        sim_time = schedule.time(k)
+
+        # -------path planner - use default end-point when end received - ----
+        if schedule.due("path", k):
+            if path_manager.manager_requests_waypoints() is True:
+                waypoints = path_planner.update(world_map=world_map, \
+                    state=mav.true_state, planner_type=PlannerType.rrt_straight)
+                path_manager.set_waypoints(waypoints)
+
+            # -------path manager-------------
+            path = path_manager.update(PLAN.R_min, mav.true_state)
+
+            # -------path follower-------------
+            autopilot_commands = path_follower.update(path, mav.true_state)
+
+        # -------autopilot-------------
+        if schedule.due("sensors", k):
+            measurements = mav.sensors()  # get sensor measurements
+        if schedule.due("control", k):
+            delta, commanded_state = autopilot.update(autopilot_commands, mav.true_state)
+
+        # -------physical system-------------
+        current_wind = wind.update()
+        trajectory.record(sim_time, mav.true_state, delta, current_wind, commanded_state, measurements)
+        if recorder is not None:
+            recorder.record(sim_time, mav.true_state, delta, current_wind, commanded_state, measurements)
+        mav.update(delta, current_wind)  # propagate the MAV dynamics
+
+    return trajectory
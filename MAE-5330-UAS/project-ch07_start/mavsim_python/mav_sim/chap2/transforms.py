@@ -24,6 +24,9 @@ Functions:
         rot_v_to_b: calculates the rotation from vehicle to body frame
         rot_b_to_v: calculates the rotation from body frame to vehicle frame
 
+    Each rotation function has a *_batch counterpart taking arrays of N angles and returning
+    the N matrices stacked in an (N, 3, 3) array
+
     This module also computes a number of functions for calculating the transforms of points
         trans_i_to_v: transforms a point from inertial frame to the vehicle frame
         trans_v_to_i: transforms a point from vehicle frame to the inertial frame
@@ -32,7 +35,8 @@ Functions:
 """
 
 import numpy as np
-from mav_sim.tools.types import Points, Pose, RotMat
+import numpy.typing as npt
+from mav_sim.tools.types import Points, Pose, RotMat, RotMats
 
 
 # Elementary rotation matrices
@@ -204,6 +208,130 @@ def rot_b_to_v(psi: float, theta: float, phi: float) -> RotMat:
     rot = R_v_to_b.T
     return rot
 
+# Batch rotation matrices, one matrix per angle
+def rot_x_batch(angles: npt.ArrayLike) -> RotMats:
+    """Elementary rotations about x-axis
+
+    Args:
+        angles: N angles of rotation
+
+    Returns:
+        rot: (N, 3, 3) rotation matrices about x-axis
+    """
+    c, s = _cos_sin(angles)
+    rot = np.zeros((c.size, 3, 3))
+    rot[:, 0, 0] = 1.
+    rot[:, 1, 1] = c
+    rot[:, 1, 2] = s
+    rot[:, 2, 1] = -s
+    rot[:, 2, 2] = c
+    return rot
+
+def rot_y_batch(angles: npt.ArrayLike) -> RotMats:
+    """Elementary rotations about y-axis
+
+    Args:
+        angles: N angles of rotation
+
+    Returns:
+        rot: (N, 3, 3) rotation matrices about y-axis
+    """
+    c, s = _cos_sin(angles)
+    rot = np.zeros((c.size, 3, 3))
+    rot[:, 0, 0] = c
+    rot[:, 0, 2] = -s
+    rot[:, 1, 1] = 1.
+    rot[:, 2, 0] = s
+    rot[:, 2, 2] = c
+    return rot
+
+def rot_z_batch(angles: npt.ArrayLike) -> RotMats:
+    """Elementary rotations about z-axis
+
+    Args:
+        angles: N angles of rotation
+
+    Returns:
+        rot: (N, 3, 3) rotation matrices about z-axis
+    """
+    c, s = _cos_sin(angles)
+    rot = np.zeros((c.size, 3, 3))
+    rot[:, 0, 0] = c
+    rot[:, 0, 1] = s
+    rot[:, 1, 0] = -s
+    rot[:, 1, 1] = c
+    rot[:, 2, 2] = 1.
+    return rot
+
+def rot_v_to_v1_batch(psi: npt.ArrayLike) -> RotMats:
+    """Rotations from frame v to v1, see rot_v_to_v1"""
+    return rot_z_batch(psi)
+
+def rot_v1_to_v2_batch(theta: npt.ArrayLike) -> RotMats:
+    """Rotations from frame v1 to v2, see rot_v1_to_v2"""
+    return rot_y_batch(theta)
+
+def rot_v2_to_b_batch(phi: npt.ArrayLike) -> RotMats:
+    """Rotations from frame v2 to body, see rot_v2_to_b"""
+    return rot_x_batch(phi)
+
+def rot_b_to_s_batch(alpha: npt.ArrayLike) -> RotMats:
+    """Rotations from body frame to stability frame, see rot_b_to_s"""
+    return rot_y_batch(-np.asarray(alpha, dtype=float))
+
+def rot_s_to_w_batch(beta: npt.ArrayLike) -> RotMats:
+    """Rotations from stability frame to wind frame, see rot_s_to_w"""
+    return rot_z_batch(beta)
+
+def rot_v_to_b_batch(psi: npt.ArrayLike, theta: npt.ArrayLike, phi: npt.ArrayLike) -> RotMats:
+    """
+    calculates the rotation matrices from vehicle frame to body frame, see rot_v_to_b
+
+    Args:
+        psi: N yaw angles about k^v axis
+        theta: N pitch angles about j^{v1} axis
+        phi: N roll angles about i^{v2} axis
+
+    Returns:
+        rot: (N, 3, 3) rotation matrices from vehicle frame to body frame
+    """
+    # Calculate the trig functions
+    cpsi, spsi = _cos_sin(psi)
+    cth, sth = _cos_sin(theta)
+    cphi, sphi = _cos_sin(phi)
+
+    # Calculate the rotation matrices
+    rot = np.empty((cpsi.size, 3, 3))
+    rot[:, 0, 0] = cth*cpsi
+    rot[:, 0, 1] = cth*spsi
+    rot[:, 0, 2] = -sth
+    rot[:, 1, 0] = sphi*sth*cpsi-cphi*spsi
+    rot[:, 1, 1] = sphi*sth*spsi+cphi*cpsi
+    rot[:, 1, 2] = sphi*cth
+    rot[:, 2, 0] = cpsi*sth*cphi+sphi*spsi
+    rot[:, 2, 1] = cphi*sth*spsi-sphi*cpsi
+    rot[:, 2, 2] = cphi*cth
+    return rot
+
+def rot_b_to_v_batch(psi: npt.ArrayLike, theta: npt.ArrayLike, phi: npt.ArrayLike) -> RotMats:
+    """
+    calculates the rotation matrices from body frame to vehicle frame, see rot_b_to_v
+
+    Args:
+        psi: N yaw angles about k^v axis
+        theta: N pitch angles about j^{v1} axis
+        phi: N roll angles about i^{v2} axis
+
+    Returns:
+        rot: (N, 3, 3) rotation matrices from body frame to vehicle frame
+    """
+    return np.ascontiguousarray(rot_v_to_b_batch(psi, theta, phi).transpose(0, 2, 1))
+
+def _cos_sin(angles: npt.ArrayLike) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Returns the cosines and sines of the angles as flat arrays"""
+    flat = np.ravel(np.asarray(angles, dtype=float))
+    return np.cos(flat), np.sin(flat)
+
 # Calculating the transforms of points
 def trans_i_to_v(pose: Pose, p_i: Points) -> Points:
     """
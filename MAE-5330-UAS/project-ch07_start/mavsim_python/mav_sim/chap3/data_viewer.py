@@ -14,6 +14,10 @@ from mav_sim.message_types.msg_state import MsgState
 from mav_sim.state_plotter.plotter import Plotter
 from mav_sim.state_plotter.plotter_args import PlotboxArgs
 
+# Elements of the MsgState array in the order of the 'true_state' and 'estimated_state' vectors
+PLOT_STATE_INDICES = [MsgState.FIELDS.index(field) for field in
+                      ("north", "east", "altitude", "Va", "alpha", "beta", "phi", "theta", "chi",
+                       "p", "q", "r", "Vg", "wn", "we", "psi", "bx", "by", "bz")]
 
 class DataViewer:
     """Plotting capabilities for viewing states, inputs, noise, etc
@@ -149,19 +153,9 @@ class DataViewer:
                     commanded_state.chi] # chi_c
         ## Add the state data in vectors
         # the order has to match the order in lines 72-76
-        true_state_list = [true_state.north, true_state.east, true_state.altitude,
-                           true_state.Va, true_state.alpha, true_state.beta,
-                           true_state.phi, true_state.theta, true_state.chi,
-                           true_state.p, true_state.q, true_state.r,
-                           true_state.Vg, true_state.wn, true_state.we, true_state.psi,
-                           true_state.bx, true_state.by, true_state.bz]
-        estimated_state_list = [estimated_state.north, estimated_state.east, estimated_state.altitude,
-                                estimated_state.Va, estimated_state.alpha, estimated_state.beta,
-                                estimated_state.phi, estimated_state.theta, estimated_state.chi,
-                                estimated_state.p, estimated_state.q, estimated_state.r,
-                                estimated_state.Vg, estimated_state.wn, estimated_state.we, estimated_state.psi,
-                                estimated_state.bx, estimated_state.by, estimated_state.bz]
-        delta_list = [delta.elevator, delta.aileron, delta.rudder, delta.throttle]
+        true_state_list = true_state.as_array()[PLOT_STATE_INDICES].tolist()
+        estimated_state_list = estimated_state.as_array()[PLOT_STATE_INDICES].tolist()
+        delta_list = delta.as_array().tolist()
         self.plotter.add_vector_measurement('true_state', true_state_list, self.time)
         self.plotter.add_vector_measurement('estimated_state', estimated_state_list, self.time)
         self.plotter.add_vector_measurement('commands', commands, self.time)
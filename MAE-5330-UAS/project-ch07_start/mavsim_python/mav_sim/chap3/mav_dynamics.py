@@ -10,14 +10,16 @@ part of mavsimPy
         1/14/2019 - RWB
         12/21 - GND
 """
-from typing import Optional, cast
+from typing import Any, Callable, Optional, cast
 
 import mav_sim.parameters.aerosonde_parameters as MAV
 import numpy as np
+import numpy.typing as npt
 
 # load message types
 from mav_sim.message_types.msg_state import MsgState
 from mav_sim.tools import types
+from mav_sim.tools.events import Event, EventCrossing
 from mav_sim.tools.rotations import (
     Euler2Quaternion,
     Quaternion2Euler,
@@ -47,6 +49,14 @@ class StateIndices:
     NUM_STATES: int = 13 # Number of states
 IND = StateIndices()
 
+class IntegratorType:
+    """Defines the integration scheme used to propagate the dynamics
+    """
+    rk4 = 1 # Runge-Kutta 4, new arrays are created for every stage
+    rk4_workspace = 2 # Runge-Kutta 4 evaluated in place on preallocated buffers
+    dopri45 = 3 # Adaptive Dormand-Prince 5(4) with dense output
+    rkmk4 = 4 # Runge-Kutta-Munthe-Kaas 4, the attitude is advanced by the exponential map of the body rates
+
 class DynamicState:
     """Struct for the dynamic state
     """
@@ -191,15 +201,334 @@ class ForceMoments:
 
 
 
+ForcesFunction = Callable[[types.DynamicState], types.ForceMoment]
+DerivativesFunction = Callable[[npt.NDArray[Any], npt.NDArray[Any]], npt.NDArray[Any]]
+
+# Dormand-Prince 5(4) coefficients, see Hairer, Norsett, Wanner, "Solving Ordinary Differential Equations I"
+_DP_A = ((),
+         (1/5,),
+         (3/40, 9/40),
+         (44/45, -56/15, 32/9),
+         (19372/6561, -25360/2187, 64448/6561, -212/729),
+         (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+         (35/384, 0., 500/1113, 125/192, -2187/6784, 11/84))
+_DP_E = (71/57600, 0., -71/16695, 71/1920, -17253/339200, 22/525, -1/40) # fifth minus fourth order weights
+_DP_D = (-12715105075/11282082432, 0., 87487479700/32700410799, -10690763975/1880347072,
+         701980252875/199316789632, -1453857185/822651844, 69997945/29380423) # dense output
+
+class IntegratorStats:
+    """Counts of the work performed by a DynamicsIntegrator
+    """
+    def __init__(self) -> None:
+        self.accepted_steps: int = 0 # Number of accepted (sub)steps
+        self.rejected_steps: int = 0 # Number of steps rejected by the error control
+        self.derivative_evaluations: int = 0 # Number of calls to the dynamics
+
+    def reset(self) -> None:
+        """Sets all of the counts to zero"""
+        self.accepted_steps = 0
+        self.rejected_steps = 0
+        self.derivative_evaluations = 0
+
+    def __str__(self) -> str:
+        """Create a string from the statistics"""
+        return "accepted_steps: " + str(self.accepted_steps) + \
+            "\nrejected_steps: " + str(self.rejected_steps) + \
+            "\nderivative_evaluations: " + str(self.derivative_evaluations)
+
+class DynamicsIntegrator:
+    """Propagates the 13x1 state forward in time
+
+    The rk4 scheme reproduces the original MavDynamics.update integration. The rk4_workspace
+    scheme computes the same update, but evaluates the stages with derivatives_into() on
+    buffers allocated once at construction and normalizes the quaternion in place. Both hold
+    the forces and moments constant over the step.
+
+    The dopri45 scheme covers the requested time step with as many adaptive Dormand-Prince
+    steps as the tolerances require. Because these steps may be long, the forces and moments
+    are re-evaluated at every stage when a forces function is given. The step size is carried
+    over between calls and the state can be interpolated anywhere inside the last call with
+    state_at().
+
+    The rkmk4 scheme treats the attitude as an element of the unit quaternion group: the
+    quaternion is advanced by the exponential of a rotation vector integrated from the body
+    rates, while the remaining states use the RK4 weights, see rkmk4_step().
+
+    Events are checked at the end of every step. When an event function changes sign over the
+    step, its root is found to within event_tol on the integrated solution: the dense output of
+    the dopri45 scheme, or a single step of the fixed step schemes from the start of the step to
+    each trial time. So long steps can be taken without missing the time of a crossing. A
+    terminal event ends the step at the crossing.
+    """
+    def __init__(self, integrator: int = IntegratorType.rk4, rtol: float = 1e-6, atol: float = 1e-8,
+                 max_step: float = np.inf, events: Optional[list[Event]] = None, event_tol: float = 1e-9) -> None:
+        """Allocate the buffers for the integration
+
+        Args:
+            integrator: One of the IntegratorType values
+            rtol: Relative error tolerance of the adaptive scheme
+            atol: Absolute error tolerance of the adaptive scheme
+            max_step: Largest step the adaptive scheme may take
+            events: Events to watch, more can be appended to the events attribute
+            event_tol: Accuracy of the crossing times
+        """
+        if integrator not in (IntegratorType.rk4, IntegratorType.rk4_workspace, IntegratorType.dopri45,
+                              IntegratorType.rkmk4):
+            raise ValueError("Unknown integrator type " + str(integrator))
+        if rtol <= 0. or atol <= 0. or max_step <= 0. or event_tol <= 0.:
+            raise ValueError("Tolerances and max_step must be positive")
+        self.integrator = integrator
+        self.rtol = rtol
+        self.atol = atol
+        self.max_step = max_step
+        self.stats = IntegratorStats()
+
+        # event detection
+        self.events: list[Event] = [] if events is None else list(events)
+        self.event_tol = event_tol
+        self.crossings: list[EventCrossing] = [] # every crossing found, in order, cleared by the caller
+        self.terminated = False # True => the last step was ended by a terminal event
+        self.time = 0. # total integrated time
+
+        # workspace for the in-place integration
+        self._k1 = np.zeros((IND.NUM_STATES, 1))
+        self._k2 = np.zeros((IND.NUM_STATES, 1))
+        self._k3 = np.zeros((IND.NUM_STATES, 1))
+        self._k4 = np.zeros((IND.NUM_STATES, 1))
+        self._x_stage = np.zeros((IND.NUM_STATES, 1))
+
+        # adaptive step data
+        self._h: Optional[float] = None # step size carried between calls
+        self._dense: list[tuple[float, float, list[types.DynamicState]]] = [] # (t0, h, coefficients)
+
+    def step(self, state: types.DynamicState, forces_moments: types.ForceMoment, time_step: float,
+             forces_fnc: Optional[ForcesFunction] = None) -> float:
+        """Integrates the state over a single time step and normalizes the quaternion. The state is
+        modified in place.
+
+        Args:
+            state: 13x1 state to be propagated
+            forces_moments: 6x1 array containing [fx, fy, fz, Mx, My, Mz]^T held over the step
+            time_step: Length of the integration step
+            forces_fnc: Forces and moments as a function of the state. Only used by the dopri45 scheme,
+                where it replaces forces_moments
+
+        Returns:
+            time: Time integrated, shorter than time_step when a terminal event ended the step
+        """
+        self.terminated = False
+        if not self.events:
+            self._advance(state, forces_moments, time_step, forces_fnc)
+            self.time += time_step
+            return time_step
+
+        start = state.copy()
+        start_values = [event.function(start) for event in self.events]
+        self._advance(state, forces_moments, time_step, forces_fnc)
+        time_step = self._locate_events(start, start_values, state, forces_moments, time_step)
+        self.time += time_step
+        return time_step
+
+    def _advance(self, state: types.DynamicState, forces_moments: types.ForceMoment, time_step: float,
+                 forces_fnc: Optional[ForcesFunction]) -> None:
+        """Integrates the state over time_step with the selected scheme"""
+        if self.integrator == IntegratorType.dopri45:
+            self._dopri45(state, forces_moments, time_step, forces_fnc)
+            return
+
+        self.stats.accepted_steps += 1
+        self.stats.derivative_evaluations += 4
+        self._fixed_step(state, forces_moments, time_step)
+
+    def _fixed_step(self, state: types.DynamicState, forces_moments: types.ForceMoment, time_step: float) -> None:
+        """Single step of one of the fixed step schemes"""
+        if self.integrator == IntegratorType.rk4_workspace:
+            self._rk4_in_place(state, forces_moments, time_step)
+            return
+        if self.integrator == IntegratorType.rkmk4:
+            rkmk4_step(state, forces_moments, time_step, derivatives)
+            return
+
+        # Integrate ODE using Runge-Kutta RK4 algorithm
+        k1 = derivatives(state, forces_moments)
+        k2 = derivatives(state + time_step/2.*k1, forces_moments)
+        k3 = derivatives(state + time_step/2.*k2, forces_moments)
+        k4 = derivatives(state + time_step*k3, forces_moments)
+        state += time_step/6 * (k1 + 2*k2 + 2*k3 + k4)
+
+        # normalize the quaternion
+        e0 = state.item(IND.E0)
+        e1 = state.item(IND.E1)
+        e2 = state.item(IND.E2)
+        e3 = state.item(IND.E3)
+        norm_e = np.sqrt(e0**2+e1**2+e2**2+e3**2)
+        state[IND.E0][0] = state.item(IND.E0)/norm_e
+        state[IND.E1][0] = state.item(IND.E1)/norm_e
+        state[IND.E2][0] = state.item(IND.E2)/norm_e
+        state[IND.E3][0] = state.item(IND.E3)/norm_e
+
+    def _locate_events(self, start: types.DynamicState, start_values: list[float], state: types.DynamicState,
+                       forces_moments: types.ForceMoment, time_step: float) -> float:
+        """Records the events crossed over the step that just ended in state, and moves state back to
+        the first terminal crossing. Returns the time integrated."""
+        def state_after(time: float) -> types.DynamicState:
+            if self.integrator == IntegratorType.dopri45:
+                return self.state_at(time)
+            trial = start.copy()
+            self.stats.derivative_evaluations += 4
+            self._fixed_step(trial, forces_moments, time)
+            return trial
+
+        found = []
+        for event, start_value in zip(self.events, start_values):
+            end_value = event.function(state)
+            if event.crossed(start_value, end_value):
+                found.append((self._find_crossing(event, (start_value, end_value), state_after, time_step), event))
+        found.sort(key=lambda crossing: crossing[0])
+
+        for time, event in found:
+            self.crossings.append(EventCrossing(event, self.time + time, state_after(time)))
+            if event.terminal:
+                state[:] = self.crossings[-1].state
+                self.terminated = True
+                return time
+        return time_step
+
+    def _find_crossing(self, event: Event, values: tuple[float, float],
+                       state_after: Callable[[float], types.DynamicState], time_step: float) -> float:
+        """Brackets the root of the event between its values at the start and end of the step by the
+        Illinois variant of regula falsi. Returns the end of the bracket past the crossing, so that the
+        event is not found again from there."""
+        increasing = values[0] < 0.
+        lower, lower_value = 0., values[0]
+        upper, upper_value = time_step, values[1]
+        moved = 0 # 1 => the lower end moved last, -1 => the upper end moved last
+        for _ in range(200): # the bracket stops shrinking once event_tol is below the float resolution
+            if upper - lower <= self.event_tol or upper_value == 0.:
+                break
+            time = (lower*upper_value - upper*lower_value) / (upper_value - lower_value)
+            if not lower < time < upper:
+                time = 0.5*(lower + upper)
+            value = event.function(state_after(time))
+            if (value >= 0.) if increasing else (value <= 0.):
+                upper, upper_value = time, value
+                if moved == -1:
+                    lower_value *= 0.5
+                moved = -1
+            else:
+                lower, lower_value = time, value
+                if moved == 1:
+                    upper_value *= 0.5
+                moved = 1
+        return upper
+
+    def state_at(self, time: float) -> types.DynamicState:
+        """Interpolates the state inside the interval covered by the last call to step()
+
+        Args:
+            time: Time since the start of the last step, 0 <= time <= time_step
+
+        Returns:
+            state: Interpolated 13x1 state with a unit quaternion
+        """
+        if not self._dense:
+            raise ValueError("Dense output is only available after a dopri45 step")
+        if time < self._dense[0][0] or time > self._dense[-1][0] + self._dense[-1][1]:
+            raise ValueError("Requested time is outside of the last step")
+
+        t0, h, rcont = next(step for step in self._dense if time <= step[0] + step[1])
+        theta = (time - t0) / h
+        state = rcont[0] + theta*(rcont[1] + (1.-theta)*(rcont[2] + theta*(rcont[3] + (1.-theta)*rcont[4])))
+        state[IND.QUAT] /= np.linalg.norm(state[IND.QUAT])
+        return cast(types.DynamicState, state)
+
+    def _rk4_in_place(self, state: types.DynamicState, forces_moments: types.ForceMoment, time_step: float) -> None:
+        """Runge-Kutta 4 integration without allocating intermediate arrays"""
+        k1, k2, k3, k4, x_stage = self._k1, self._k2, self._k3, self._k4, self._x_stage
+
+        derivatives_into(k1, state, forces_moments)
+        np.multiply(k1, time_step/2., out=x_stage)
+        x_stage += state
+        derivatives_into(k2, x_stage, forces_moments)
+        np.multiply(k2, time_step/2., out=x_stage)
+        x_stage += state
+        derivatives_into(k3, x_stage, forces_moments)
+        np.multiply(k3, time_step, out=x_stage)
+        x_stage += state
+        derivatives_into(k4, x_stage, forces_moments)
+
+        # state += time_step/6 * (k1 + 2*k2 + 2*k3 + k4)
+        k2 += k3
+        k2 *= 2.
+        k1 += k2
+        k1 += k4
+        k1 *= time_step/6.
+        state += k1
+
+        # normalize the quaternion
+        quat = state[IND.E0:IND.E3+1]
+        quat /= np.sqrt(quat.item(0)**2 + quat.item(1)**2 + quat.item(2)**2 + quat.item(3)**2)
+
+    def _dopri45(self, state: types.DynamicState, forces_moments: types.ForceMoment, time_step: float,
+                 forces_fnc: Optional[ForcesFunction]) -> None:
+        """Adaptive Dormand-Prince integration over time_step"""
+        def f(x: types.DynamicState) -> types.DynamicState:
+            self.stats.derivative_evaluations += 1
+            return derivatives(x, forces_moments if forces_fnc is None else forces_fnc(x))
+
+        self._dense = []
+        t = 0.
+        y = state.copy()
+        k = [f(y)]
+        h = min(time_step, self.max_step) if self._h is None else min(self._h, self.max_step)
+        while time_step - t > 1e-12 * time_step:
+            h_step = min(h, time_step - t)
+            for a_row in _DP_A[1:]:
+                y_stage = y + h_step*sum(a*k_i for a, k_i in zip(a_row, k) if a != 0.)
+                k.append(f(cast(types.DynamicState, y_stage)))
+            y_new = y_stage # the last stage is evaluated at the fifth order solution (FSAL)
+
+            # error control
+            err_vec = h_step*sum(e*k_i for e, k_i in zip(_DP_E, k) if e != 0.)
+            scale = self.atol + self.rtol*np.maximum(np.abs(y), np.abs(y_new))
+            err = float(np.sqrt(np.mean((err_vec/scale)**2)))
+            factor = 10. if err == 0. else min(10., max(0.2, 0.9*err**-0.2))
+            if err > 1.:
+                self.stats.rejected_steps += 1
+                h = h_step*min(1., factor)
+                del k[1:]
+                continue
+
+            # store the dense output coefficients
+            diff = y_new - y
+            rcont3 = h_step*k[0] - diff
+            rcont4 = diff - h_step*k[6] - rcont3
+            rcont5 = cast(types.DynamicState, h_step*sum(d*k_i for d, k_i in zip(_DP_D, k) if d != 0.))
+            self._dense.append((t, h_step, [y, diff, rcont3, rcont4, rcont5]))
+
+            self.stats.accepted_steps += 1
+            t += h_step
+            y = y_new
+            k = [k[6]]
+            if h_step == h: # do not let the final shortened step shrink the carried step size
+                h = h_step*factor
+        self._h = h
+
+        # normalize the quaternion
+        state[:] = y
+        state[IND.QUAT] /= np.linalg.norm(state[IND.QUAT])
+
 class MavDynamics:
     """Implements the dynamics of the MAV assuming forces and moments are directly input
     """
 
-    def __init__(self, Ts: float, state: Optional[DynamicState] = None) -> None:
+    def __init__(self, Ts: float, state: Optional[DynamicState] = None, integrator: int = IntegratorType.rk4) -> None:
         """Initialize the dynamic variables
 
         Args:
             Ts: Time step in the simulation between function calls
+            state: Initial state of the MAV
+            integrator: Integration scheme used to propagate the state (see IntegratorType)
         """
         self.ts_simulation = Ts
         # set initial states based on parameter file
@@ -209,11 +538,32 @@ class MavDynamics:
             self._state = DynamicState().convert_to_numpy()
         else:
             self._state = state.convert_to_numpy()
-        self.true_state = MsgState()
+        self._integrator = DynamicsIntegrator(integrator)
+        self._terminated = False # True => a terminal event stopped the integration
+        self._true_state = MsgState()
+        self._true_state_stale = False
+
+    @property
+    def true_state(self) -> MsgState:
+        """True state message, computed on the first access after an update"""
+        if self._true_state_stale:
+            self._update_true_state()
+        return self._true_state
+
+    @property
+    def integrator(self) -> DynamicsIntegrator:
+        """Getter for the integrator (tolerances, step statistics, dense output, and events)"""
+        return self._integrator
+
+    @property
+    def terminated(self) -> bool:
+        """True once a terminal event of the integrator has stopped an update. Later updates leave
+        the state at the event and return True until a new state is loaded with external_set_state"""
+        return self._terminated
 
     ###################################
     # public functions
-    def update(self, forces_moments: types.ForceMoment, time_step: Optional[float] = None) -> None:
+    def update(self, forces_moments: types.ForceMoment, time_step: Optional[float] = None) -> bool:
         '''Update states.
 
         Integrate the differential equations defining dynamics.
@@ -221,33 +571,34 @@ class MavDynamics:
 
         Args:
             forces_moments: 6x1 array containing [fx, fy, fz, Mx, My, Mz]^T
+            time_step: Length of the update, defaults to ts_simulation
 
+        Returns:
+            terminated: True when a terminal event stopped the integration, see terminated
         '''
+        if self._terminated:
+            return True
 
         # Get the timestep
         if time_step is None:
             time_step = self.ts_simulation
 
-        # Integrate ODE using Runge-Kutta RK4 algorithm
-        k1 = derivatives(self._state, forces_moments)
-        k2 = derivatives(self._state + time_step/2.*k1, forces_moments)
-        k3 = derivatives(self._state + time_step/2.*k2, forces_moments)
-        k4 = derivatives(self._state + time_step*k3, forces_moments)
-        self._state += time_step/6 * (k1 + 2*k2 + 2*k3 + k4)
+        # Integrate the ODE and normalize the quaternion
+        self._integrator.step(self._state, forces_moments, time_step)
+        self._terminated = self._integrator.terminated
 
-        # normalize the quaternion
-        e0 = self._state.item(IND.E0)
-        e1 = self._state.item(IND.E1)
-        e2 = self._state.item(IND.E2)
-        e3 = self._state.item(IND.E3)
-        norm_e = np.sqrt(e0**2+e1**2+e2**2+e3**2)
-        self._state[IND.E0][0] = self._state.item(IND.E0)/norm_e
-        self._state[IND.E1][0] = self._state.item(IND.E1)/norm_e
-        self._state[IND.E2][0] = self._state.item(IND.E2)/norm_e
-        self._state[IND.E3][0] = self._state.item(IND.E3)/norm_e
+        # the message class for the true state is updated when next read
+        self._true_state_stale = True
+        return self._terminated
 
-        # update the message class for the true state
-        self._update_true_state()
+    def external_set_state(self, new_state: types.DynamicState) -> None:
+        """Loads a new state and clears terminated, the true state keeps the values of the previous
+        state until the next update
+        """
+        if self._true_state_stale:
+            self._update_true_state()
+        self._state = new_state
+        self._terminated = False
 
     def get_state(self) ->DynamicState:
         '''Returns the current state in a struct format
@@ -269,16 +620,17 @@ class MavDynamics:
     # private functions
     def _update_true_state(self) -> None:
         # update the true state message:
+        self._true_state_stale = False
         phi, theta, psi = Quaternion2Euler(self._state[IND.QUAT])
-        self.true_state.north = self._state.item(IND.NORTH)
-        self.true_state.east = self._state.item(IND.EAST)
-        self.true_state.altitude = -self._state.item(IND.DOWN)
-        self.true_state.phi = phi
-        self.true_state.theta = theta
-        self.true_state.psi = psi
-        self.true_state.p = self._state.item(IND.P)
-        self.true_state.q = self._state.item(IND.Q)
-        self.true_state.r = self._state.item(IND.R)
+        self._true_state.north = self._state.item(IND.NORTH)
+        self._true_state.east = self._state.item(IND.EAST)
+        self._true_state.altitude = -self._state.item(IND.DOWN)
+        self._true_state.phi = phi
+        self._true_state.theta = theta
+        self._true_state.psi = psi
+        self._true_state.p = self._state.item(IND.P)
+        self._true_state.q = self._state.item(IND.Q)
+        self._true_state.r = self._state.item(IND.R)
 
 def derivatives(state: types.DynamicState, forces_moments: types.ForceMoment) -> types.DynamicState:
     """Implements the dynamics xdot = f(x, u) where u is the force/moment vector
@@ -335,3 +687,119 @@ def derivatives(state: types.DynamicState, forces_moments: types.ForceMoment) ->
     x_dot[IND.R] = r_dot
 
     return x_dot
+
+def derivatives_into(x_dot: types.DynamicState, state: types.DynamicState, forces_moments: types.ForceMoment) -> None:
+    """Implements the same dynamics as derivatives(), writing the result into a preallocated array
+
+    No intermediate structs or arrays are created, which makes this version suitable for
+    integrators that reuse their buffers between steps.
+
+    Args:
+        x_dot: 13x1 array in which the time derivative of the state is stored
+        state: Current state of the vehicle
+        forces_moments: 6x1 array containing [fx, fy, fz, Mx, My, Mz]^T
+    """
+    # extract the states
+    u = state.item(IND.U)
+    v = state.item(IND.V)
+    w = state.item(IND.W)
+    e0 = state.item(IND.E0)
+    e1 = state.item(IND.E1)
+    e2 = state.item(IND.E2)
+    e3 = state.item(IND.E3)
+    p = state.item(IND.P)
+    q = state.item(IND.Q)
+    r = state.item(IND.R)
+
+    #   extract forces/moments
+    fx = forces_moments.item(ForceMoments.IND_FX)
+    fy = forces_moments.item(ForceMoments.IND_FY)
+    fz = forces_moments.item(ForceMoments.IND_FZ)
+    l = forces_moments.item(ForceMoments.IND_L)
+    m = forces_moments.item(ForceMoments.IND_M)
+    n = forces_moments.item(ForceMoments.IND_N)
+
+    # position kinematics (Equation B.3), the rotation is scaled by 1/det(R) as in Quaternion2Rotation
+    e00, e11, e22, e33 = e0*e0, e1*e1, e2*e2, e3*e3
+    scale = 1. / (e00 + e11 + e22 + e33)**3
+    x_dot[IND.NORTH, 0] = scale*((e11 + e00 - e22 - e33)*u + 2.*(e1*e2 - e3*e0)*v + 2.*(e1*e3 + e2*e0)*w)
+    x_dot[IND.EAST, 0] = scale*(2.*(e1*e2 + e3*e0)*u + (e22 + e00 - e11 - e33)*v + 2.*(e2*e3 - e1*e0)*w)
+    x_dot[IND.DOWN, 0] = scale*(2.*(e1*e3 - e2*e0)*u + 2.*(e2*e3 + e1*e0)*v + (e33 + e00 - e11 - e22)*w)
+
+    # translational dynamics (Equation B.4)
+    x_dot[IND.U, 0] = r*v - q*w + fx/MAV.mass
+    x_dot[IND.V, 0] = p*w - r*u + fy/MAV.mass
+    x_dot[IND.W, 0] = q*u - p*v + fz/MAV.mass
+
+    # rotational kinematics (Equation B.5)
+    x_dot[IND.E0, 0] = 0.5 * (-p*e1 - q*e2 - r*e3)
+    x_dot[IND.E1, 0] = 0.5 * (p*e0 + r*e2 - q*e3)
+    x_dot[IND.E2, 0] = 0.5 * (q*e0 - r*e1 + p*e3)
+    x_dot[IND.E3, 0] = 0.5 * (r*e0 + q*e1 - p*e2)
+
+    # rotatonal dynamics (Equation B.6)
+    x_dot[IND.P, 0] = MAV.gamma1*p*q - MAV.gamma2*q*r + MAV.gamma3*l + MAV.gamma4*n
+    x_dot[IND.Q, 0] = MAV.gamma5*p*r - MAV.gamma6*(p**2-r**2) + m/MAV.Jy
+    x_dot[IND.R, 0] = MAV.gamma7*p*q - MAV.gamma1*q*r + MAV.gamma4*l + MAV.gamma8*n
+
+def rkmk4_step(states: npt.NDArray[Any], forces_moments: npt.NDArray[Any], time_step: float,
+               derivatives_fnc: DerivativesFunction) -> None:
+    """Runge-Kutta-Munthe-Kaas 4 step of the states stored in the columns of an array, in place
+
+    The attitude is written as e(t) = e_0 * exp(theta(t)), with * the quaternion product and theta
+    a rotation vector in the body frame. theta is integrated with the RK4 weights from
+    theta_dot = dexp^-1(omega), truncated after the terms that matter at fourth order, so
+    the attitude stays on the unit sphere and a constant body rate is propagated exactly.
+    The remaining states use the classical RK4 update, the quaternion rows of the derivatives
+    are not used. The forces and moments are held constant over the step.
+
+    Args:
+        states: (13, N) states, one aircraft per column
+        forces_moments: (6, N) forces and moments held over the step
+        time_step: Length of the integration step
+        derivatives_fnc: Dynamics f(x, u) evaluated on the (13, N) array, e.g., derivatives
+    """
+    # the attitude is updated row by row, as floats for a single aircraft to avoid small array overhead
+    def rows(block: npt.NDArray[Any]) -> list[Any]:
+        return cast(list[Any], block[:, 0].tolist()) if block.shape[1] == 1 else list(block)
+
+    quat0 = rows(states[IND.E0:IND.E3+1])
+    x_stage = states
+    k_sum = np.zeros(np.shape(states))
+    theta_sum: list[Any] = [0., 0., 0.]
+    theta: list[Any] = [0., 0., 0.]
+    for stage_step, weight in ((0.5, 1.), (0.5, 2.), (1., 2.), (0., 1.)):
+        k = derivatives_fnc(x_stage, forces_moments)
+        theta_dot = _dexpinv(theta, rows(x_stage[IND.P:IND.R+1]))
+        k_sum += weight*k
+        theta_sum = [total + weight*rate for total, rate in zip(theta_sum, theta_dot)]
+        if stage_step > 0.:
+            x_stage = states + stage_step*time_step*k
+            theta = [stage_step*time_step*rate for rate in theta_dot]
+            x_stage[IND.E0:IND.E3+1] = np.reshape(_quaternion_exp_product(quat0, theta), (4, -1))
+
+    states += time_step/6. * k_sum
+    quat = np.reshape(_quaternion_exp_product(quat0, [time_step/6. * total for total in theta_sum]), (4, -1))
+    states[IND.E0:IND.E3+1] = quat / np.sqrt(np.sum(quat**2, axis=0))
+
+def _dexpinv(theta: list[Any], omega: list[Any]) -> list[Any]:
+    """Rate of the rotation vector theta for body rates omega, omega + theta x omega/2 + theta x (theta x omega)/12"""
+    t1, t2, t3 = theta
+    w1, w2, w3 = omega
+    c1, c2, c3 = t2*w3 - t3*w2, t3*w1 - t1*w3, t1*w2 - t2*w1 # theta x omega
+    return [w1 + 0.5*c1 + (t2*c3 - t3*c2)/12.,
+            w2 + 0.5*c2 + (t3*c1 - t1*c3)/12.,
+            w3 + 0.5*c3 + (t1*c2 - t2*c1)/12.]
+
+def _quaternion_exp_product(quat: list[Any], theta: list[Any]) -> list[Any]:
+    """Quaternion product of quat with the unit quaternion exp(theta) = (cos|theta/2|, theta/|theta| sin|theta/2|)"""
+    t1, t2, t3 = theta
+    half_angle = np.maximum(0.5*np.sqrt(t1*t1 + t2*t2 + t3*t3), 1e-300) # sin(x)/x is exact at the bound
+    d0 = np.cos(half_angle)
+    scale = np.sin(half_angle)/(2.*half_angle) # sin(|theta|/2)/|theta|
+    d1, d2, d3 = scale*t1, scale*t2, scale*t3
+    e0, e1, e2, e3 = quat
+    return [e0*d0 - e1*d1 - e2*d2 - e3*d3,
+            e0*d1 + e1*d0 + e2*d3 - e3*d2,
+            e0*d2 - e1*d3 + e2*d0 + e3*d1,
+            e0*d3 + e1*d2 - e2*d1 + e3*d0]
@@ -7,24 +7,34 @@ run_sim.py
         12/21 - GND
 """
 
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from mav_sim.chap2.mav_viewer import MavViewer
-from mav_sim.chap3.data_viewer import DataViewer
+import numpy as np
 from mav_sim.chap3.mav_dynamics import DynamicState, ForceMoments, MavDynamics
 from mav_sim.message_types.msg_delta import MsgDelta
 from mav_sim.message_types.msg_sim_params import MsgSimParams
+from mav_sim.tools.sim_trajectory import SimTrajectory, num_sim_steps
+from mav_sim.tools.trajectory_recorder import TrajectoryRecorder
 
+# The viewers are only imported when used so that the headless simulation does not need Qt
+if TYPE_CHECKING:
+    from mav_sim.chap2.mav_viewer import MavViewer
+    from mav_sim.chap3.data_viewer import DataViewer
 
-def run_sim(sim: MsgSimParams, init_state: DynamicState, fm: ForceMoments, mav_view: Optional[MavViewer] = None, \
-    data_view: Optional[DataViewer] = None) -> tuple[MavViewer, DataViewer]:
+def run_sim(sim: MsgSimParams, init_state: DynamicState, fm: ForceMoments, mav_view: Optional['MavViewer'] = None, \
+    data_view: Optional['DataViewer'] = None, recorder: Optional[TrajectoryRecorder] = None) \
+    -> tuple['MavViewer', 'DataViewer']:
     """Runs the chapter 3 simulation
 
     Args:
         sim: Timing and file parameters for the simulation
         init_state: Initial state of the MAV
         fm: forces and moments (constant) being input to the system
+        recorder: Stores every simulation step when given
     """
+    # pylint: disable=import-outside-toplevel
+    from mav_sim.chap2.mav_viewer import MavViewer
+    from mav_sim.chap3.data_viewer import DataViewer
 
     # initialize the visualization
     if mav_view is None:
@@ -47,6 +57,8 @@ def run_sim(sim: MsgSimParams, init_state: DynamicState, fm: ForceMoments, mav_v
         forces_moments = fm.to_array()
 
         # -------physical system-------------
+        if recorder is not None:
+            recorder.record(sim_time, mav.true_state, delta, np.zeros((6,1)))
         mav.update(forces_moments)  # propagate the MAV dynamics
 
         # -------update viewer-------------
@@ -63,3 +75,34 @@ def run_sim(sim: MsgSimParams, init_state: DynamicState, fm: ForceMoments, mav_v
         sim_time += sim.ts_simulation
 
     return (mav_view, data_view)
+
+def run_sim_headless(sim: MsgSimParams, init_state: DynamicState, fm: ForceMoments, \
+    recorder: Optional[TrajectoryRecorder] = None) -> SimTrajectory:
+    """Runs the chapter 3 simulation without any viewers
+
+    Args:
+        sim: Timing and file parameters for the simulation
+        init_state: Initial state of the MAV
+        fm: forces and moments (constant) being input to the system
+        recorder: Also stores every simulation step when given
+
+    Returns:
+        trajectory: States at every simulation step
+    """
+    # initialize elements of the architecture
+    mav = MavDynamics(sim.ts_simulation, init_state)
+    delta = MsgDelta()
+    wind = np.zeros((6,1))
+    num_steps = num_sim_steps(sim)
+    trajectory = SimTrajectory(num_steps, commanded=False)
+
+    # main simulation loop
+    forces_moments = fm.to_array()
+    for k in range(num_steps):
+        sim_time = sim.start_time + k*sim.ts_simulation
+        trajectory.record(sim_time, mav.true_state, delta, wind)
+        if recorder is not None:
+            recorder.record(sim_time, mav.true_state, delta, wind)
+        mav.update(forces_moments)  # propagate the MAV dynamics
+
+    return trajectory
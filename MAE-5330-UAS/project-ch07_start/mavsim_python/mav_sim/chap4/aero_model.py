@@ -0,0 +1,194 @@
+"""
+aero_model
+    - Table driven backend for the angle of attack dependent aerodynamic coefficients
+    - The lift, drag, and pitching moment coefficients of aerosonde_parameters, including the
+      stall blending of (4.9) - (4.10), are evaluated once on a dense alpha grid along with the
+      body frame coefficients of (4.19), so evaluating them costs an interpolation instead of the
+      exponentials, sign, sine, and cosine of the analytic model
+    - AeroTable.from_data builds a table from external coefficient data instead of the analytic model
+    - Pass an AeroTable as the aero argument of the chapter 4 forces and moments (or of
+      MavDynamics / BatchMavDynamics) to select it, the analytic model is used otherwise
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+from typing import Any, Callable, Mapping, Optional, Sequence, Union
+
+import mav_sim.parameters.aerosonde_parameters as MAV
+import numpy as np
+import numpy.typing as npt
+
+# Names of the coefficients, in the order of the rows returned by analytic_coefficients, the body
+# frame coefficients follow (4.19), e.g., C_X = -C_D cos(alpha) + C_L sin(alpha)
+AERO_FIELDS: tuple[str, ...] = ("C_L", "C_D", "C_m", "C_X", "C_X_q", "C_X_delta_e", "C_Z", "C_Z_q", "C_Z_delta_e",
+                                "C_m_q", "C_m_delta_e")
+NUM_AERO_FIELDS = len(AERO_FIELDS)
+
+# Airframe parameters evaluated by analytic_coefficients
+AERO_PARAMETERS: tuple[str, ...] = ("M", "alpha0", "C_L_0", "C_L_alpha", "C_D_p", "e", "AR", "C_m_0", "C_m_alpha",
+                                    "C_L_q", "C_D_q", "C_m_q", "C_L_delta_e", "C_D_delta_e", "C_m_delta_e")
+
+# Coefficients accepted by AeroTable.from_data, in the stability frame of (4.6) - (4.7)
+DATA_FIELDS: tuple[str, ...] = ("C_L", "C_D", "C_m", "C_L_q", "C_D_q", "C_m_q", "C_L_delta_e", "C_D_delta_e", "C_m_delta_e")
+
+# Coefficients that from_data requires, the others default to the constants of aerosonde_parameters
+REQUIRED_DATA_FIELDS: tuple[str, ...] = ("C_L", "C_D", "C_m")
+
+# Row of each coefficient
+C_L: int = 0
+C_D: int = 1
+C_M: int = 2
+C_X: int = 3
+C_X_Q: int = 4
+C_X_DELTA_E: int = 5
+C_Z: int = 6
+C_Z_Q: int = 7
+C_Z_DELTA_E: int = 8
+C_M_Q: int = 9
+C_M_DELTA_E: int = 10
+
+# Maps an array of angles of attack to the (NUM_AERO_FIELDS, N) coefficients of a table
+CoefficientSource = Callable[[npt.NDArray[Any]], npt.NDArray[Any]]
+
+def analytic_coefficients(alpha: Union[float, npt.NDArray[Any]]) -> npt.NDArray[Any]:
+    """Evaluates the angle of attack dependent coefficients of aerosonde_parameters
+
+    Args:
+        alpha: Angle of attack, a scalar or an array of N angles
+
+    Returns:
+        coefficients: (NUM_AERO_FIELDS,) or (NUM_AERO_FIELDS, N) array, rows ordered as AERO_FIELDS
+    """
+    alpha = np.asarray(alpha, dtype=float)
+    ca = np.cos(alpha)
+    sa = np.sin(alpha)
+
+    # lift and drag coefficients (see (4.9) - (4.11))
+    tmp1 = np.exp(-MAV.M * (alpha - MAV.alpha0))
+    tmp2 = np.exp(MAV.M * (alpha + MAV.alpha0))
+    sigma = (1 + tmp1 + tmp2) / ((1 + tmp1) * (1 + tmp2))
+    CL = (1 - sigma) * (MAV.C_L_0 + MAV.C_L_alpha * alpha) \
+            + sigma * 2 * np.sign(alpha) * sa**2 * ca
+    CD = MAV.C_D_p + ((MAV.C_L_0 + MAV.C_L_alpha * alpha)**2)/(np.pi * MAV.e * MAV.AR)
+    Cm = MAV.C_m_0 + MAV.C_m_alpha * alpha
+    return _table_rows(alpha, (CL, CD, Cm, MAV.C_L_q, MAV.C_D_q, MAV.C_m_q,
+                               MAV.C_L_delta_e, MAV.C_D_delta_e, MAV.C_m_delta_e))
+
+def _table_rows(alpha: Any, data: Sequence[Any]) -> npt.NDArray[Any]:
+    """Stacks the stability frame coefficients, given in the order of DATA_FIELDS, and the body frame
+    coefficients of (4.19) in the order of AERO_FIELDS"""
+    CL, CD, Cm, CL_q, CD_q, Cm_q, CL_delta_e, CD_delta_e, Cm_delta_e = data
+    ca = np.cos(alpha)
+    sa = np.sin(alpha)
+    return np.array(np.broadcast_arrays(
+        CL, CD, Cm,
+        -CD * ca + CL * sa, -CD_q * ca + CL_q * sa, -CD_delta_e * ca + CL_delta_e * sa,
+        -CD * sa - CL * ca, -CD_q * sa - CL_q * ca, -CD_delta_e * sa - CL_delta_e * ca,
+        Cm_q, Cm_delta_e))
+
+class AeroTable:
+    """The coefficients of analytic_coefficients, or of external data, on an evenly spaced alpha grid
+
+    Each grid cell stores the coefficients at its lower end followed by their slope across the
+    cell, as a column of one (2*NUM_AERO_FIELDS, num_points - 1) array, so an interpolation reads
+    a single column and a batch comes out with one contiguous row per coefficient. The cell is
+    found arithmetically. Angles outside of the grid are clamped to its ends,
+    the default grid covers every angle of attack that update_velocity_data returns.
+    """
+    def __init__(self, num_points: int = 2**16 + 1, alpha_min: float = -np.pi, alpha_max: float = np.pi,
+                 source: CoefficientSource = analytic_coefficients) -> None:
+        """Evaluates the coefficients on the grid
+
+        Args:
+            num_points: Number of grid points, the error of the interpolation falls with its square
+            alpha_min: First angle of attack of the grid
+            alpha_max: Last angle of attack of the grid
+            source: Coefficients of the grid angles, the analytic model by default
+        """
+        if num_points < 2 or alpha_max <= alpha_min:
+            raise ValueError("The grid needs at least two points and an increasing alpha range")
+        self.alpha = np.linspace(alpha_min, alpha_max, num_points)
+        values = source(self.alpha).T
+        self.cells = np.ascontiguousarray(np.hstack((values[:-1], np.diff(values, axis=0))).T)
+        self._alpha_min = alpha_min
+        self._scale = (num_points - 1) / (alpha_max - alpha_min) # grid cells per radian
+        self._last = float(num_points - 1)
+
+    @classmethod
+    def from_data(cls, alpha: npt.ArrayLike, coefficients: Mapping[str, npt.ArrayLike],
+                  num_points: int = 2**16 + 1) -> 'AeroTable':
+        """Builds a table from tabulated coefficients, e.g., wind tunnel or CFD data
+
+        The data is interpolated linearly onto an evenly spaced grid spanning alpha, where the body
+        frame coefficients of (4.19) are formed. Angles beyond the data are clamped to its ends.
+
+        Args:
+            alpha: Increasing angles of attack of the data
+            coefficients: Values keyed by the names in DATA_FIELDS, one per angle or a single value
+                for every angle. C_L, C_D, and C_m are required, the others default to aerosonde_parameters.
+            num_points: Number of points of the grid
+
+        Returns:
+            table: Table of the data
+        """
+        alpha_data = np.asarray(alpha, dtype=float)
+        if alpha_data.ndim != 1 or alpha_data.size < 2 or np.any(np.diff(alpha_data) <= 0.):
+            raise ValueError("alpha must be a strictly increasing sequence of at least two angles")
+        unknown = set(coefficients) - set(DATA_FIELDS)
+        missing = set(REQUIRED_DATA_FIELDS) - set(coefficients)
+        if unknown or missing:
+            raise ValueError("Unknown coefficients " + str(sorted(unknown)) + ", missing coefficients " + str(sorted(missing)))
+
+        defaults = {"C_L_q": MAV.C_L_q, "C_D_q": MAV.C_D_q, "C_m_q": MAV.C_m_q,
+                    "C_L_delta_e": MAV.C_L_delta_e, "C_D_delta_e": MAV.C_D_delta_e, "C_m_delta_e": MAV.C_m_delta_e}
+        data = [np.broadcast_to(np.asarray(coefficients.get(name, defaults.get(name)), dtype=float), alpha_data.shape)
+                for name in DATA_FIELDS]
+
+        def source(grid: npt.NDArray[Any]) -> npt.NDArray[Any]:
+            """Coefficients of the data interpolated to the grid"""
+            return _table_rows(grid, [np.interp(grid, alpha_data, values) for values in data])
+        return cls(num_points, float(alpha_data[0]), float(alpha_data[-1]), source)
+
+    def coefficient_list(self, alpha: float) -> list[float]:
+        """Interpolates the coefficients of a single angle of attack
+
+        Args:
+            alpha: Angle of attack
+
+        Returns:
+            coefficients: NUM_AERO_FIELDS coefficients ordered as AERO_FIELDS
+        """
+        position = min(max((alpha - self._alpha_min) * self._scale, 0.), self._last)
+        index = min(int(position), self.cells.shape[1] - 1)
+        weight = position - index
+        cell = self.cells[:, index].tolist()
+        return [cell[field] + weight*cell[field + NUM_AERO_FIELDS] for field in range(NUM_AERO_FIELDS)]
+
+    def coefficients(self, alpha: Union[float, npt.NDArray[Any]]) -> npt.NDArray[Any]:
+        """Interpolates the coefficients
+
+        Args:
+            alpha: Angle of attack, a scalar or an array of N angles
+
+        Returns:
+            coefficients: (NUM_AERO_FIELDS,) or (NUM_AERO_FIELDS, N) array, rows ordered as AERO_FIELDS
+        """
+        if np.ndim(alpha) == 0:
+            return np.array(self.coefficient_list(float(alpha)))
+
+        position = np.clip((np.asarray(alpha, dtype=float) - self._alpha_min) * self._scale, 0., self._last)
+        index = np.minimum(position.astype(np.intp), self.cells.shape[1] - 1)
+        cells = np.take(self.cells, index, axis=1)
+        interpolated: npt.NDArray[Any] = cells[:NUM_AERO_FIELDS] + (position - index) * cells[NUM_AERO_FIELDS:]
+        return interpolated
+
+_DEFAULT_TABLE: Optional[tuple[tuple[Any, ...], AeroTable]] = None
+
+def default_aero_table() -> AeroTable:
+    """Table of aerosonde_parameters with the default grid, shared between calls. The table is rebuilt
+    when one of the AERO_PARAMETERS changed since it was built, e.g., after MAV.C_L_alpha *= 1.1."""
+    global _DEFAULT_TABLE # pylint: disable=global-statement
+    values = tuple(getattr(MAV, name) for name in AERO_PARAMETERS)
+    if _DEFAULT_TABLE is None or _DEFAULT_TABLE[0] != values:
+        _DEFAULT_TABLE = (values, AeroTable())
+    return _DEFAULT_TABLE[1]
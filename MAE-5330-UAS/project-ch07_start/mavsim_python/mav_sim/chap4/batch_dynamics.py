@@ -0,0 +1,528 @@
+"""
+batch_dynamics
+    - this file implements the dynamic equations of motion for N MAVs at once
+    - the states of all aircraft are stored as the columns of a (13, N) array
+    - use unit quaternion for the attitude state
+    - forces_moments_grid sweeps the forces, moments, and aerodynamic coefficients over a
+      labeled grid of flight conditions for envelope and stability maps
+
+Each function mirrors its scalar counterpart in mav_sim.chap3.mav_dynamics and
+mav_sim.chap4.mav_dynamics, but operates on every column in a single set of
+numpy operations rather than building per-aircraft structs.
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+from typing import Any, Optional
+
+import mav_sim.parameters.aerosonde_parameters as MAV
+import numpy as np
+import numpy.typing as npt
+from mav_sim.chap3.mav_dynamics import IND, DynamicState, IntegratorType, rkmk4_step
+from mav_sim.chap4.aero_model import (
+    C_M,
+    C_M_DELTA_E,
+    C_M_Q,
+    C_X,
+    C_X_DELTA_E,
+    C_X_Q,
+    C_Z,
+    C_Z_DELTA_E,
+    C_Z_Q,
+    AeroTable,
+)
+from mav_sim.chap4.propulsion_model import default_propulsion_model
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.tools.rotations import Euler2Quaternion_batch, quaternion_rotation_elements
+
+BatchArray = npt.NDArray[Any]  # array with one column per aircraft
+
+# Row indices of the (4, N) control input array, matching MsgDelta.to_array()
+DELTA_ELEVATOR: int = 0
+DELTA_AILERON: int = 1
+DELTA_RUDDER: int = 2
+DELTA_THROTTLE: int = 3
+
+
+class BatchMavDynamics:
+    """Implements the dynamics of N MAVs using vehicle inputs and wind
+
+    The integration matches mav_sim.chap4.mav_dynamics.MavDynamics.update: the forces and
+    moments are evaluated once per step from the latest airspeed data and held constant
+    through the RK4 stages. IntegratorType.rkmk4 selects the geometric attitude update of
+    rkmk4_step() instead, which allows longer steps for the same attitude accuracy.
+    """
+
+    def __init__(self, Ts: float, states: Optional[BatchArray] = None, num_aircraft: int = 1,
+                 aero: Optional[AeroTable] = None, integrator: int = IntegratorType.rk4) -> None:
+        """Initialize the dynamic variables
+
+        Args:
+            Ts: Time step in the simulation between function calls
+            states: (13, N) array of initial states. If None, num_aircraft copies of the
+                    default state in mav_sim.parameters.aerosonde_parameters are used
+            num_aircraft: Number of aircraft to create when states is None
+            aero: Table of the aerodynamic coefficients, the analytic model is used when None
+            integrator: IntegratorType.rk4 or IntegratorType.rkmk4
+        """
+        if integrator not in (IntegratorType.rk4, IntegratorType.rkmk4):
+            raise ValueError("Unsupported batch integrator type " + str(integrator))
+        self._ts_simulation = Ts
+        self._aero = aero
+        self._integrator = integrator
+        if states is None:
+            states = np.tile(DynamicState().convert_to_numpy(), (1, num_aircraft))
+        if np.ndim(states) != 2 or np.shape(states)[0] != IND.NUM_STATES:
+            raise ValueError("States should be a (" + str(IND.NUM_STATES) + ", N) array")
+        self._states: BatchArray = np.array(states, dtype=float)
+
+        # update velocity data
+        (self._Va, self._alpha, self._beta, self._wind) = update_velocity_data_batch(self._states)
+
+        # Update forces and moments data
+        fm = forces_moments_batch(self._states, default_deltas(self.num_aircraft),
+                                  self._Va, self._alpha, self._beta, self._aero)
+        self._forces: BatchArray = fm[0:3]
+        self._moments: BatchArray = fm[3:6]
+
+    @property
+    def num_aircraft(self) -> int:
+        """Number of aircraft being simulated"""
+        return int(self._states.shape[1])
+
+    @property
+    def ts_simulation(self) -> float:
+        """Getter for the ts_simulation"""
+        return self._ts_simulation
+
+    @property
+    def forces(self) -> BatchArray:
+        """(3, N) body forces from the latest update"""
+        return self._forces
+
+    @property
+    def moments(self) -> BatchArray:
+        """(3, N) body moments from the latest update"""
+        return self._moments
+
+    @property
+    def Va(self) -> BatchArray:
+        """(N,) airspeed of each aircraft"""
+        return self._Va
+
+    @property
+    def alpha(self) -> BatchArray:
+        """(N,) angle of attack of each aircraft"""
+        return self._alpha
+
+    @property
+    def beta(self) -> BatchArray:
+        """(N,) side slip angle of each aircraft"""
+        return self._beta
+
+    @property
+    def wind(self) -> BatchArray:
+        """(3, N) wind of each aircraft in the inertial frame"""
+        return self._wind
+
+    def update(self, deltas: BatchArray, winds: Optional[BatchArray] = None, time_step: Optional[float] = None) -> None:
+        """
+        Integrate the differential equations defining dynamics for every aircraft
+
+        Args:
+            deltas: (4, N) control inputs, rows ordered as MsgDelta.to_array()
+                    (elevator, aileron, rudder, throttle). A (4, 1) array is applied to all aircraft
+            winds: (6, N) wind for each aircraft (steady state in the inertial frame stacked on
+                   the gust in the body frame). A (6, 1) array is applied to all aircraft
+            time_step: Optional override of the simulation time step
+        """
+        # get forces and moments acting on rigid body
+        fm = forces_moments_batch(self._states, deltas, self._Va, self._alpha, self._beta, self._aero)
+        self._forces = fm[0:3]
+        self._moments = fm[3:6]
+
+        # Get the timestep
+        if time_step is None:
+            time_step = self._ts_simulation
+
+        if self._integrator == IntegratorType.rkmk4:
+            rkmk4_step(self._states, fm, time_step, derivatives_batch)
+        else:
+            # Integrate ODE using Runge-Kutta RK4 algorithm
+            k1 = derivatives_batch(self._states, fm)
+            k2 = derivatives_batch(self._states + time_step/2.*k1, fm)
+            k3 = derivatives_batch(self._states + time_step/2.*k2, fm)
+            k4 = derivatives_batch(self._states + time_step*k3, fm)
+            self._states += time_step/6 * (k1 + 2*k2 + 2*k3 + k4)
+
+            # normalize the quaternions
+            normalize_quaternions(self._states)
+
+        # update the airspeed, angle of attack, and side slip angles using new state
+        (self._Va, self._alpha, self._beta, self._wind) = update_velocity_data_batch(self._states, winds)
+
+    def external_set_states(self, new_states: BatchArray) -> None:
+        """Loads a new (13, N) state array
+        """
+        self._states = np.array(new_states, dtype=float)
+
+    def get_states(self) -> BatchArray:
+        """Returns the (13, N) state array
+        """
+        return self._states
+
+    def get_state(self, index: int) -> DynamicState:
+        '''Returns the current state of a single aircraft in a struct format
+
+        Args:
+            index: Column of the aircraft to extract
+        '''
+        return DynamicState(self._states[:, index:index+1])
+
+
+def default_deltas(num_aircraft: int) -> BatchArray:
+    """Creates a (4, N) input array filled with the MsgDelta defaults
+
+    Args:
+        num_aircraft: Number of columns to create
+    """
+    return np.tile(MsgDelta().to_array(), (1, num_aircraft))
+
+def deltas_from_msgs(deltas: list[MsgDelta]) -> BatchArray:
+    """Stacks a list of control messages into a (4, N) input array
+    """
+    return np.hstack([delta.to_array() for delta in deltas]).astype(float)
+
+def normalize_quaternions(states: BatchArray) -> None:
+    """Normalizes the quaternion of every column of the state array in place
+    """
+    quat = states[IND.E0:IND.E3+1]
+    quat /= np.sqrt(np.sum(quat**2, axis=0))
+
+def derivatives_batch(states: BatchArray, forces_moments: BatchArray) -> BatchArray:
+    """Implements the dynamics xdot = f(x, u) for every column, where u is the force/moment vector
+
+    Args:
+        states: (13, N) states of the vehicles
+        forces_moments: (6, N) array containing [fx, fy, fz, Mx, My, Mz]^T for each vehicle
+
+    Returns:
+        (13, N) time derivative of the states
+    """
+    # extract the states
+    u, v, w = states[IND.U], states[IND.V], states[IND.W]
+    e0, e1, e2, e3 = states[IND.E0], states[IND.E1], states[IND.E2], states[IND.E3]
+    p, q, r = states[IND.P], states[IND.Q], states[IND.R]
+
+    # extract forces/moments
+    fx, fy, fz = forces_moments[0], forces_moments[1], forces_moments[2]
+    l, m, n = forces_moments[3], forces_moments[4], forces_moments[5]
+
+    x_dot = np.empty(np.shape(states))
+
+    # position kinematics (Equation B.3)
+    r11, r12, r13, r21, r22, r23, r31, r32, r33 = quaternion_rotation_elements(states[IND.E0:IND.E3+1])
+    x_dot[IND.NORTH] = r11*u + r12*v + r13*w
+    x_dot[IND.EAST] = r21*u + r22*v + r23*w
+    x_dot[IND.DOWN] = r31*u + r32*v + r33*w
+
+    # translational dynamics (Equation B.4)
+    x_dot[IND.U] = r*v - q*w + fx/MAV.mass
+    x_dot[IND.V] = p*w - r*u + fy/MAV.mass
+    x_dot[IND.W] = q*u - p*v + fz/MAV.mass
+
+    # rotational kinematics (Equation B.5)
+    x_dot[IND.E0] = 0.5 * (-p*e1 - q*e2 - r*e3)
+    x_dot[IND.E1] = 0.5 * (p*e0 + r*e2 - q*e3)
+    x_dot[IND.E2] = 0.5 * (q*e0 - r*e1 + p*e3)
+    x_dot[IND.E3] = 0.5 * (r*e0 + q*e1 - p*e2)
+
+    # rotatonal dynamics (Equation B.6)
+    x_dot[IND.P] = MAV.gamma1*p*q - MAV.gamma2*q*r + MAV.gamma3*l + MAV.gamma4*n
+    x_dot[IND.Q] = MAV.gamma5*p*r - MAV.gamma6*(p**2 - r**2) + m/MAV.Jy
+    x_dot[IND.R] = MAV.gamma7*p*q - MAV.gamma1*q*r + MAV.gamma4*l + MAV.gamma8*n
+
+    return x_dot
+
+def _nondimensional_rate(rate: BatchArray, length: float, Va: BatchArray) -> BatchArray:
+    """Computes rate*length/(2 Va), returning zero wherever Va is zero
+    """
+    safe_Va = np.where(Va == 0., 1., Va)
+    return np.where(Va == 0., 0., rate * length / (2. * safe_Va))
+
+def forces_moments_batch(states: BatchArray, deltas: BatchArray,
+                         Va: BatchArray, alpha: BatchArray, beta: BatchArray,
+                         aero: Optional[AeroTable] = None) -> BatchArray:
+    """
+    Return the forces on each UAV based on the state, wind, and control surfaces
+
+    Args:
+        states: (13, N) current states of the aircraft
+        deltas: (4, N) control inputs, rows ordered (elevator, aileron, rudder, throttle)
+        Va: (N,) airspeeds
+        alpha: (N,) angles of attack
+        beta: (N,) side slip angles
+        aero: Table of the aerodynamic coefficients, the analytic model is used when None
+
+    Returns:
+        (6, N) forces and moments on each UAV (in body frame) (fx, fy, fz, Mx, My, Mz)
+    """
+    # Extract angular rates and inputs
+    p, q, r = states[IND.P], states[IND.Q], states[IND.R]
+    elevator = deltas[DELTA_ELEVATOR]
+    aileron = deltas[DELTA_AILERON]
+    rudder = deltas[DELTA_RUDDER]
+    throttle = deltas[DELTA_THROTTLE]
+
+    # intermediate variables
+    qbar_S = 0.5 * MAV.rho * Va**2 * MAV.S_wing
+    p_nondim = _nondimensional_rate(p, MAV.b, Va)
+    q_nondim = _nondimensional_rate(q, MAV.c, Va)
+    r_nondim = _nondimensional_rate(r, MAV.b, Va)
+
+    # gravitational force in body frame (see section 4.1), i.e. R^T [0, 0, mg]
+    _, _, _, _, _, _, r31, r32, r33 = quaternion_rotation_elements(states[IND.E0:IND.E3+1])
+    mg = MAV.mass * MAV.gravity
+
+    # longitudinal aerodynamic forces in the body frame
+    if aero is None:
+        f_lon_x, f_lon_z = _longitudinal_forces(qbar_S, alpha, q_nondim, elevator)
+        Cm = MAV.C_m_0 + MAV.C_m_alpha * alpha + MAV.C_m_q * q_nondim + MAV.C_m_delta_e * elevator
+    else:
+        coefficients = aero.coefficients(alpha)
+        f_lon_x = qbar_S * (coefficients[C_X] + coefficients[C_X_Q] * q_nondim + coefficients[C_X_DELTA_E] * elevator)
+        f_lon_z = qbar_S * (coefficients[C_Z] + coefficients[C_Z_Q] * q_nondim + coefficients[C_Z_DELTA_E] * elevator)
+        Cm = coefficients[C_M] + coefficients[C_M_Q] * q_nondim + coefficients[C_M_DELTA_E] * elevator
+
+    # propeller thrust and torque
+    thrust_prop, torque_prop = motor_thrust_torque_batch(Va, throttle)
+
+    fm = np.empty((6, np.shape(states)[1]))
+    fm[0] = mg*r31 + f_lon_x + thrust_prop
+    fm[1] = mg*r32 + qbar_S * (
+            MAV.C_Y_0
+            + MAV.C_Y_beta * beta
+            + MAV.C_Y_p * p_nondim
+            + MAV.C_Y_r * r_nondim
+            + MAV.C_Y_delta_a * aileron
+            + MAV.C_Y_delta_r * rudder)
+    fm[2] = mg*r33 + f_lon_z
+    fm[3] = qbar_S * MAV.b * (
+            MAV.C_ell_0
+            + MAV.C_ell_beta * beta
+            + MAV.C_ell_p * p_nondim
+            + MAV.C_ell_r * r_nondim
+            + MAV.C_ell_delta_a * aileron
+            + MAV.C_ell_delta_r * rudder) - torque_prop
+    fm[4] = qbar_S * MAV.c * Cm
+    fm[5] = qbar_S * MAV.b * (
+            MAV.C_n_0
+            + MAV.C_n_beta * beta
+            + MAV.C_n_p * p_nondim
+            + MAV.C_n_r * r_nondim
+            + MAV.C_n_delta_a * aileron
+            + MAV.C_n_delta_r * rudder)
+    return fm
+
+def _longitudinal_forces(qbar_S: BatchArray, alpha: BatchArray, q_nondim: BatchArray, elevator: BatchArray) \
+    -> tuple[BatchArray, BatchArray]:
+    """Body frame x and z aerodynamic forces of the analytic lift and drag model (see (4.6) - (4.11))"""
+    ca = np.cos(alpha)
+    sa = np.sin(alpha)
+    tmp1 = np.exp(-MAV.M * (alpha - MAV.alpha0))
+    tmp2 = np.exp(MAV.M * (alpha + MAV.alpha0))
+    sigma = (1 + tmp1 + tmp2) / ((1 + tmp1) * (1 + tmp2))
+    CL = (1 - sigma) * (MAV.C_L_0 + MAV.C_L_alpha * alpha) \
+            + sigma * 2 * np.sign(alpha) * sa**2 * ca
+    CD = MAV.C_D_p + ((MAV.C_L_0 + MAV.C_L_alpha * alpha)**2)/(np.pi * MAV.e * MAV.AR)
+    F_lift = qbar_S * (CL + MAV.C_L_q * q_nondim + MAV.C_L_delta_e * elevator)
+    F_drag = qbar_S * (CD + MAV.C_D_q * q_nondim + MAV.C_D_delta_e * elevator)
+    return -ca * F_drag + sa * F_lift, -sa * F_drag - ca * F_lift
+
+def motor_thrust_torque_batch(Va: BatchArray, delta_t: BatchArray) -> tuple[BatchArray, BatchArray]:
+    """ compute thrust and torque due to propeller for arrays of airspeed and throttle
+    (See addendum by McLain and mav_sim.chap4.mav_dynamics.motor_thrust_torque)
+
+    Args:
+        Va: Airspeeds
+        delta_t: Throttle commands
+
+    Returns:
+        T_p: Propeller thrusts
+        Q_p: Propeller torques
+    """
+    thrust_prop, torque_prop = default_propulsion_model().thrust_torque(Va, delta_t)
+    return thrust_prop, torque_prop
+
+def update_velocity_data_batch(states: BatchArray, winds: Optional[BatchArray] = None) \
+    -> tuple[BatchArray, BatchArray, BatchArray, BatchArray]:
+    """Calculates airspeed, angle of attack, sideslip, and wind for every column
+
+    Args:
+        states: (13, N) current states of the aircraft
+        winds: (6, N) or (6, 1) wind - steady state in the inertial frame stacked on the gust
+               in the body frame. None corresponds to no wind
+
+    Returns:
+        Va: (N,) airspeeds
+        alpha: (N,) angles of attack
+        beta: (N,) side slip angles
+        wind_inertial_frame: (3, N) wind vectors in inertial frame
+    """
+    num = np.shape(states)[1]
+    if winds is None:
+        winds = np.zeros((6, num))
+    steady_state = winds[0:3]
+    gust = winds[3:6]
+
+    # convert wind vector from world to body frame, R^T * steady_state + gust
+    r11, r12, r13, r21, r22, r23, r31, r32, r33 = quaternion_rotation_elements(states[IND.E0:IND.E3+1])
+    wn, we, wd = steady_state[0], steady_state[1], steady_state[2]
+    wind_body = np.empty((3, num))
+    wind_body[0] = r11*wn + r21*we + r31*wd + gust[0]
+    wind_body[1] = r12*wn + r22*we + r32*wd + gust[1]
+    wind_body[2] = r13*wn + r23*we + r33*wd + gust[2]
+
+    # Wind in the world frame
+    wind_inertial = np.empty((3, num))
+    wind_inertial[0] = r11*wind_body[0] + r12*wind_body[1] + r13*wind_body[2]
+    wind_inertial[1] = r21*wind_body[0] + r22*wind_body[1] + r23*wind_body[2]
+    wind_inertial[2] = r31*wind_body[0] + r32*wind_body[1] + r33*wind_body[2]
+
+    # velocity vector relative to the airmass (see page 20 and (2.6) )
+    ur = states[IND.U] - wind_body[0]
+    vr = states[IND.V] - wind_body[1]
+    wr = states[IND.W] - wind_body[2]
+
+    # compute airspeed, angle of attack and sideslip (see (2.8) and (2.9) )
+    Va = np.sqrt(ur**2 + vr**2 + wr**2)
+    alpha = np.arctan2(wr, ur)
+    beta = np.arctan2(vr, np.sqrt(ur**2 + wr**2))
+    return (Va, alpha, beta, wind_inertial)
+
+# Flight condition variables of forces_moments_grid and their values when not given
+GRID_DEFAULTS: dict[str, float] = {
+    "Va": float(MAV.Va0),   # air speed (m/s)
+    "alpha": 0.,            # angle of attack (rad)
+    "beta": 0.,             # side slip angle (rad)
+    "phi": 0.,              # roll angle (rad)
+    "theta": 0.,            # pitch angle (rad)
+    "p": 0.,                # roll rate (rad/s)
+    "q": 0.,                # pitch rate (rad/s)
+    "r": 0.,                # yaw rate (rad/s)
+    "elevator": MsgDelta().elevator,
+    "aileron": MsgDelta().aileron,
+    "rudder": MsgDelta().rudder,
+    "throttle": MsgDelta().throttle,
+}
+
+# Fields of a ForceMap, the forces and moments of forces_moments_batch followed by the total
+# aerodynamic coefficients, i.e., the aerodynamic forces and moments without gravity and the
+# propeller divided by qbar*S (and by b or c for the moments)
+FORCE_MAP_FIELDS: tuple[str, ...] = ("fx", "fy", "fz", "Mx", "My", "Mz", "C_L", "C_D", "C_Y", "C_ell", "C_m", "C_n")
+
+class ForceMap:
+    """Forces, moments, and aerodynamic coefficients over a grid of flight conditions
+
+    Each swept variable is one axis of the grid, in the order the axes were given, e.g., a sweep
+    of alpha and elevator gives field("C_L")[i, j] at axes["alpha"][i] and axes["elevator"][j].
+    """
+    def __init__(self, axes: dict[str, npt.NDArray[Any]], fixed: dict[str, float], data: npt.NDArray[Any]) -> None:
+        """Stores the grid
+
+        Args:
+            axes: Values of each swept variable, keyed by the names in GRID_DEFAULTS
+            fixed: Values of the remaining variables
+            data: (len(FORCE_MAP_FIELDS), *shape) values of the fields over the grid
+        """
+        self.axes = axes
+        self.fixed = fixed
+        self.data = data
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """Number of values along each axis"""
+        return tuple(axis.size for axis in self.axes.values())
+
+    def field(self, name: str) -> npt.NDArray[Any]:
+        """Values of one of FORCE_MAP_FIELDS over the grid"""
+        if name not in FORCE_MAP_FIELDS:
+            raise ValueError("Unknown field " + name + ", expected one of " + ", ".join(FORCE_MAP_FIELDS))
+        values: npt.NDArray[Any] = self.data[FORCE_MAP_FIELDS.index(name)]
+        return values
+
+def forces_moments_grid(sweep: dict[str, npt.ArrayLike], aero: Optional[AeroTable] = None,
+                        chunk: int = 2**16) -> ForceMap:
+    """Evaluates forces_moments_batch at every combination of the swept flight conditions
+
+    The aircraft flies in still air, so the body velocity follows from (Va, alpha, beta), and the
+    attitude from (phi, theta) with zero heading. The grid is evaluated chunk points at a time,
+    so the memory needed beyond the result does not grow with the size of the grid.
+
+    Args:
+        sweep: Values keyed by the names in GRID_DEFAULTS. A sequence becomes an axis of the grid,
+            a scalar fixes the variable, and variables that are not given take their default.
+        aero: Table of the aerodynamic coefficients, the analytic model is used when None
+        chunk: Number of grid points evaluated at once
+
+    Returns:
+        force_map: The fields over the grid. The coefficients are nan where Va is zero.
+    """
+    unknown = set(sweep) - set(GRID_DEFAULTS)
+    if unknown:
+        raise ValueError("Unknown sweep variables " + ", ".join(sorted(unknown)))
+    if chunk < 1:
+        raise ValueError("chunk must be positive")
+    axes: dict[str, npt.NDArray[Any]] = {}
+    fixed = dict(GRID_DEFAULTS)
+    for name, values in sweep.items():
+        if np.ndim(values) == 0:
+            fixed[name] = float(np.asarray(values, dtype=float))
+        elif np.ndim(values) == 1 and np.size(values) > 0:
+            axes[name] = np.asarray(values, dtype=float)
+            del fixed[name]
+        else:
+            raise ValueError(name + " must be a scalar or a non-empty sequence")
+
+    shape = tuple(axis.size for axis in axes.values())
+    data = np.empty((len(FORCE_MAP_FIELDS), int(np.prod(shape))))
+    for start in range(0, data.shape[1], chunk):
+        points = np.arange(start, min(start + chunk, data.shape[1]))
+        conditions = {name: np.full(points.size, value) for name, value in fixed.items()}
+        for (name, axis), index in zip(axes.items(), np.unravel_index(points, shape) if axes else ()):
+            conditions[name] = axis[index]
+        data[:, start:start + points.size] = _force_map_columns(conditions, aero)
+    return ForceMap(axes, {name: fixed[name] for name in GRID_DEFAULTS if name in fixed},
+                    data.reshape((len(FORCE_MAP_FIELDS),) + shape))
+
+def _force_map_columns(conditions: dict[str, BatchArray], aero: Optional[AeroTable]) -> BatchArray:
+    """Fields of FORCE_MAP_FIELDS at N flight conditions keyed by the names in GRID_DEFAULTS"""
+    Va, alpha, beta = conditions["Va"], conditions["alpha"], conditions["beta"]
+    states = np.zeros((IND.NUM_STATES, Va.size))
+    states[IND.U] = Va * np.cos(alpha) * np.cos(beta)
+    states[IND.V] = Va * np.sin(beta)
+    states[IND.W] = Va * np.sin(alpha) * np.cos(beta)
+    states[IND.E0:IND.E3+1] = Euler2Quaternion_batch(np.stack((conditions["phi"], conditions["theta"],
+                                                                np.zeros(Va.size))))
+    states[IND.P], states[IND.Q], states[IND.R] = conditions["p"], conditions["q"], conditions["r"]
+    deltas = np.stack((conditions["elevator"], conditions["aileron"], conditions["rudder"], conditions["throttle"]))
+
+    columns = np.empty((len(FORCE_MAP_FIELDS), Va.size))
+    columns[0:6] = forces_moments_batch(states, deltas, Va, alpha, beta, aero)
+
+    # remove gravity and the propeller to leave the aerodynamic forces and moments
+    _, _, _, _, _, _, r31, r32, r33 = quaternion_rotation_elements(states[IND.E0:IND.E3+1])
+    mg = MAV.mass * MAV.gravity
+    thrust_prop, torque_prop = motor_thrust_torque_batch(Va, conditions["throttle"])
+    f_x = columns[0] - mg*r31 - thrust_prop
+    f_z = columns[2] - mg*r33
+    with np.errstate(divide="ignore", invalid="ignore"):
+        qbar_S = np.where(Va == 0., np.nan, 0.5 * MAV.rho * Va**2 * MAV.S_wing)
+        # rotate the x and z forces into lift and drag, the inverse of (4.19)
+        columns[6] = (np.sin(alpha)*f_x - np.cos(alpha)*f_z) / qbar_S
+        columns[7] = -(np.cos(alpha)*f_x + np.sin(alpha)*f_z) / qbar_S
+        columns[8] = (columns[1] - mg*r32) / qbar_S
+        columns[9] = (columns[3] + torque_prop) / (qbar_S * MAV.b)
+        columns[10] = columns[4] / (qbar_S * MAV.c)
+        columns[11] = columns[5] / (qbar_S * MAV.b)
+    return columns
@@ -14,7 +14,26 @@ import mav_sim.parameters.aerosonde_parameters as MAV
 import numpy as np
 
 # load mav dynamics from previous chapter
-from mav_sim.chap3.mav_dynamics import IND, DynamicState, ForceMoments, derivatives
+from mav_sim.chap3.mav_dynamics import (
+    IND,
+    DynamicsIntegrator,
+    DynamicState,
+    ForceMoments,
+    IntegratorType,
+)
+from mav_sim.chap4.aero_model import (
+    C_M,
+    C_M_DELTA_E,
+    C_M_Q,
+    C_X,
+    C_X_DELTA_E,
+    C_X_Q,
+    C_Z,
+    C_Z_DELTA_E,
+    C_Z_Q,
+    AeroTable,
+)
+from mav_sim.chap4.propulsion_model import default_propulsion_model
 from mav_sim.message_types.msg_delta import MsgDelta
 
 # load message types
@@ -27,13 +46,17 @@ class MavDynamics:
     """Implements the dynamics of the MAV using vehicle inputs and wind
     """
 
-    def __init__(self, Ts: float, state: Optional[DynamicState] = None):
+    def __init__(self, Ts: float, state: Optional[DynamicState] = None, integrator: int = IntegratorType.rk4,
+                 aero: Optional[AeroTable] = None):
         self._ts_simulation = Ts
+        self._aero = aero # table of the aerodynamic coefficients, the analytic model is used when None
+        self._integrator = DynamicsIntegrator(integrator) # integration scheme, see IntegratorType
+        self._terminated = False # True => a terminal event stopped the integration
         # set initial states based on parameter file
         # _state is the 13x1 internal state of the aircraft that is being propagated:
         # _state = [pn, pe, pd, u, v, w, e0, e1, e2, e3, p, q, r]
         # We will also need a variety of other elements that are functions of the _state and the wind.
-        # self.true_state is a 19x1 vector that is estimated and used by the autopilot to control the aircraft:
+        # true_state is a 19x1 vector that is estimated and used by the autopilot to control the aircraft:
         # true_state = [pn, pe, h, Va, alpha, beta, phi, theta, chi, p, q, r, Vg, wn, we, psi, gyro_bx, gyro_by, gyro_bz]
         if state is None:
             self._state = DynamicState().convert_to_numpy()
@@ -49,7 +72,7 @@ class MavDynamics:
         # Update forces and moments data
         self._forces = np.array([[0.], [0.], [0.]]) # store forces to avoid recalculation in the sensors function (ch 7)
         self._moments = np.array([[0.], [0.], [0.]]) # store moments to avoid recalculation
-        forces_moments_vec = forces_moments(self._state, MsgDelta(), self._Va, self._beta, self._alpha)
+        forces_moments_vec = forces_moments(self._state, MsgDelta(), self._Va, self._beta, self._alpha, self._aero)
         self._forces[0] = forces_moments_vec.item(0)
         self._forces[1] = forces_moments_vec.item(1)
         self._forces[2] = forces_moments_vec.item(2)
@@ -58,9 +81,29 @@ class MavDynamics:
         self._moments[2] = forces_moments_vec.item(5)
 
 
-        # initialize true_state message
-        self.true_state = MsgState()
-        self._update_true_state()
+        # initialize true_state message, it is filled on first access
+        self._true_state = MsgState()
+        self._true_state_stale = True
+
+    @property
+    def true_state(self) -> MsgState:
+        """True state message. The derived quantities (Euler angles, ground speed, flight path and
+        course angles) are computed on the first access after an update and then reused, so steps
+        whose true state is never read skip that work. The same message object is always returned."""
+        if self._true_state_stale:
+            self._update_true_state()
+        return self._true_state
+
+    @property
+    def integrator(self) -> DynamicsIntegrator:
+        """Getter for the integrator (tolerances, step statistics, dense output, and events)"""
+        return self._integrator
+
+    @property
+    def terminated(self) -> bool:
+        """True once a terminal event of the integrator has stopped an update. Later updates leave
+        the state at the event and return True until a new state is loaded with external_set_state"""
+        return self._terminated
 
     @property
     def forces(self) -> types.Vector:
@@ -87,16 +130,23 @@ class MavDynamics:
 
     ###################################
     # public functions
-    def update(self, delta: MsgDelta, wind: types.WindVector, time_step: Optional[float] = None) -> None:
+    def update(self, delta: MsgDelta, wind: types.WindVector, time_step: Optional[float] = None) -> bool:
         """
         Integrate the differential equations defining dynamics, update sensors
 
         Args:
             delta : (delta_a, delta_e, delta_r, delta_t) are the control inputs
             wind: the wind vector in inertial coordinates
+            time_step: Length of the update, defaults to ts_simulation
+
+        Returns:
+            terminated: True when a terminal event stopped the integration, see terminated
         """
+        if self._terminated:
+            return True
+
         # get forces and moments acting on rigid bod
-        forces_moments_vec = forces_moments(self._state, delta, self._Va, self._beta, self._alpha)
+        forces_moments_vec = forces_moments(self._state, delta, self._Va, self._beta, self._alpha, self._aero)
         self._forces[0] = forces_moments_vec.item(0)
         self._forces[1] = forces_moments_vec.item(1)
         self._forces[2] = forces_moments_vec.item(2)
@@ -108,34 +158,27 @@ class MavDynamics:
         if time_step is None:
             time_step = self._ts_simulation
 
-        # Integrate ODE using Runge-Kutta RK4 algorithm
-        k1 = derivatives(self._state, forces_moments_vec)
-        k2 = derivatives(self._state + time_step/2.*k1, forces_moments_vec)
-        k3 = derivatives(self._state + time_step/2.*k2, forces_moments_vec)
-        k4 = derivatives(self._state + time_step*k3, forces_moments_vec)
-        self._state += time_step/6 * (k1 + 2*k2 + 2*k3 + k4)
-
-        # normalize the quaternion
-        e0 = self._state.item(IND.E0)
-        e1 = self._state.item(IND.E1)
-        e2 = self._state.item(IND.E2)
-        e3 = self._state.item(IND.E3)
-        norm_e = np.sqrt(e0**2+e1**2+e2**2+e3**2)
-        self._state[IND.E0][0] = self._state.item(IND.E0)/norm_e
-        self._state[IND.E1][0] = self._state.item(IND.E1)/norm_e
-        self._state[IND.E2][0] = self._state.item(IND.E2)/norm_e
-        self._state[IND.E3][0] = self._state.item(IND.E3)/norm_e
+        # Integrate ODE and normalize the quaternion
+        def forces_fnc(state: types.DynamicState) -> types.ForceMoment:
+            (Va, alpha, beta, _) = update_velocity_data(state, wind)
+            return forces_moments(state, delta, Va, beta, alpha, self._aero)
+        self._integrator.step(self._state, forces_moments_vec, time_step, forces_fnc)
+        self._terminated = self._integrator.terminated
 
         # update the airspeed, angle of attack, and side slip angles using new state
         (self._Va, self._alpha, self._beta, self._wind) = update_velocity_data(self._state, wind)
 
-        # update the message class for the true state
-        self._update_true_state()
+        # the message class for the true state is updated when next read
+        self._true_state_stale = True
+        return self._terminated
 
     def external_set_state(self, new_state: types.DynamicState) -> None:
-        """Loads a new state
+        """Loads a new state, the true state keeps the values of the previous state until the next update
         """
+        if self._true_state_stale:
+            self._update_true_state()
         self._state = new_state
+        self._terminated = False
 
     def get_state(self) -> types.DynamicState:
         """Returns the state
@@ -175,28 +218,20 @@ class MavDynamics:
         quat = self._state[IND.QUAT]
         phi, theta, psi = Quaternion2Euler(quat)
         pdot = Quaternion2Rotation(quat) @ self._state[IND.VEL]
-        self.true_state.north = self._state.item(IND.NORTH)
-        self.true_state.east = self._state.item(IND.EAST)
-        self.true_state.altitude = -self._state.item(IND.DOWN)
-        self.true_state.Va = self._Va
-        self.true_state.alpha = self._alpha
-        self.true_state.beta = self._beta
-        self.true_state.phi = phi
-        self.true_state.theta = theta
-        self.true_state.psi = psi
-        self.true_state.Vg = cast(float, np.linalg.norm(pdot))
-        if self.true_state.Vg != 0.:
-            self.true_state.gamma = np.arcsin(pdot.item(2) / self.true_state.Vg)
-        else:
-            self.true_state.gamma = 0.
-        self.true_state.chi = np.arctan2(pdot.item(1), pdot.item(0))
-        self.true_state.p = self._state.item(IND.P)
-        self.true_state.q = self._state.item(IND.Q)
-        self.true_state.r = self._state.item(IND.R)
-        self.true_state.wn = self._wind.item(0)
-        self.true_state.we = self._wind.item(1)
-
-def forces_moments(state: types.DynamicState, delta: MsgDelta, Va: float, beta: float, alpha: float) -> types.ForceMoment:
+        Vg = cast(float, np.linalg.norm(pdot))
+        gamma = np.arcsin(pdot.item(2) / Vg) if Vg != 0. else 0.
+        chi = np.arctan2(pdot.item(1), pdot.item(0))
+
+        # written in the order of MsgState.FIELDS, the gyro biases are not modeled
+        self._true_state_stale = False
+        self._true_state.as_array()[0:17] = (
+            self._state.item(IND.NORTH), self._state.item(IND.EAST), -self._state.item(IND.DOWN),
+            phi, theta, psi, self._Va, self._alpha, self._beta,
+            self._state.item(IND.P), self._state.item(IND.Q), self._state.item(IND.R),
+            Vg, gamma, chi, self._wind.item(0), self._wind.item(1))
+
+def forces_moments(state: types.DynamicState, delta: MsgDelta, Va: float, beta: float, alpha: float,
+                   aero: Optional[AeroTable] = None) -> types.ForceMoment:
     """
     Return the forces on the UAV based on the state, wind, and control surfaces
 
@@ -206,6 +241,7 @@ def forces_moments(state: types.DynamicState, delta: MsgDelta, Va: float, beta:
         Va: Airspeed
         beta: Side slip angle
         alpha: Angle of attack
+        aero: Table of the aerodynamic coefficients, the analytic model is used when None
 
 
     Returns:
@@ -220,33 +256,24 @@ def forces_moments(state: types.DynamicState, delta: MsgDelta, Va: float, beta:
     f_g = gravitational_force(state[IND.QUAT])
 
     # Compute the longitudinal aerodynamic force and torque
-    f_lon, torque_lon = longitudinal_aerodynamics(q=q,
-                                                  Va=Va, alpha=alpha,
-                                                  elevator=delta.elevator)
+    f_lon_x, f_lon_z, torque_lon_y = _longitudinal_forces_moments(q, Va, alpha, delta.elevator, aero)
 
     # Compute the lateral aerodynamic force and torque
-    f_lat, torque_lat = lateral_aerodynamics(p=p, r=r,
-                                             Va=Va, beta=beta,
-                                             aileron=delta.aileron, rudder=delta.rudder)
+    f_lat_y, torque_lat_x, torque_lat_z = _lateral_forces_moments(p, r, Va, beta, delta.aileron, delta.rudder)
 
     # Create the torque and thrust due to the prop (See final equation in section 4.3)
     thrust_prop, torque_prop = motor_thrust_torque(Va, delta.throttle)
-    f_p = np.array([[thrust_prop], [0.], [0.]])
-    torque_p = np.array([[-torque_prop], [0.], [0.]])
 
     # Add everything together (see first equation of chapter 4, note that we split aerodynamic
-    # forces and moments into lateral and longitudinal components)
-    f = f_g + f_lat + f_lon + f_p
-    torque = torque_lat + torque_lon + torque_p
-
-    # Return combined vector
+    # forces and moments into lateral and longitudinal components), the components are summed as
+    # scalars so that the result is the only array allocated
     force_torque_vec = np.array([
-        [f.item(0)],
-        [f.item(1)],
-        [f.item(2)],
-        [torque.item(0)],
-        [torque.item(1)],
-        [torque.item(2)]
+        [f_g.item(0) + f_lon_x + thrust_prop],
+        [f_g.item(1) + f_lat_y],
+        [f_g.item(2) + f_lon_z],
+        [torque_lat_x - torque_prop],
+        [torque_lon_y],
+        [torque_lat_z]
     ])
     return force_torque_vec
 
@@ -289,6 +316,15 @@ def lateral_aerodynamics(p: float, r: float,
             f_lat: The lateral aerodynamic force
             torque_lat: The lateral aerodynamic torque
     """
+    f_lat_y, torque_lat_x, torque_lat_z = _lateral_forces_moments(p, r, Va, beta, aileron, rudder)
+    f_lat = np.array([[0.], [f_lat_y], [0.]])
+    torque_lat = np.array([[torque_lat_x], [.0], [torque_lat_z]])
+
+    return (f_lat, torque_lat)
+
+def _lateral_forces_moments(p: float, r: float, Va: float, beta: float, aileron: float, rudder: float) \
+        -> tuple[float, float, float]:
+    """Body frame side force, roll moment, and yaw moment of lateral_aerodynamics"""
     # intermediate variables
     qbar = 0.5 * MAV.rho * Va**2
     if Va == 0.:
@@ -299,15 +335,14 @@ def lateral_aerodynamics(p: float, r: float,
         r_nondim = r * MAV.b / (2 * Va)  # nondimensionalize r
 
     # compute lateral forces in body frame (see (4.14))
-    f_lat = np.array([[0.], \
-        [qbar * MAV.S_wing * (
+    f_lat_y = qbar * MAV.S_wing * (
             MAV.C_Y_0
             + MAV.C_Y_beta * beta
             + MAV.C_Y_p * p_nondim
             + MAV.C_Y_r * r_nondim
             + MAV.C_Y_delta_a * aileron
             + MAV.C_Y_delta_r * rudder
-        )], [0.]  ])
+        )
 
     # compute lateral torques in body frame (see (4.15) and (4.16))
     torque_lat_x = qbar * MAV.S_wing * MAV.b * (
@@ -325,13 +360,12 @@ def lateral_aerodynamics(p: float, r: float,
             + MAV.C_n_delta_a * aileron
             + MAV.C_n_delta_r * rudder
     )
-    torque_lat = np.array([[torque_lat_x], [.0], [torque_lat_z]])
-
-    return (f_lat, torque_lat)
+    return (f_lat_y, torque_lat_x, torque_lat_z)
 
 def longitudinal_aerodynamics(q: float,
                          Va: float, alpha: float,
-                         elevator: float
+                         elevator: float,
+                         aero: Optional[AeroTable] = None
                          ) -> tuple[types.Vector, types.Vector]:
     """ Computes the longitudinal aerodynamic force and torque in the body frame, each as a 3x1 vector.
 
@@ -352,15 +386,26 @@ def longitudinal_aerodynamics(q: float,
         alpha: Angle of attack
         aileron: aileron command
         rudder: rudder command
+        aero: Table of the aerodynamic coefficients, the analytic model is used when None
 
     Returns:
         tuple[types.Vector, types.Vector]: (f_lon,torque_lon)
             f_lon: The lateral aerodynamic force
             torque_lon: The lateral aerodynamic torque
     """
+    f_lon_x, f_lon_z, torque_lon_y = _longitudinal_forces_moments(q, Va, alpha, elevator, aero)
+    f_lon = np.array([[f_lon_x], [0.], [f_lon_z]])
+    torque_lon = np.array([[0.], [torque_lon_y], [0.]])
+
+    return (f_lon, torque_lon)
 
+def _longitudinal_forces_moments(q: float, Va: float, alpha: float, elevator: float, aero: Optional[AeroTable]) \
+        -> tuple[float, float, float]:
+    """Body frame x force, z force, and pitching moment of longitudinal_aerodynamics"""
     # intermediate variables
     qbar = 0.5 * MAV.rho * Va**2
+    if aero is not None:
+        return _tabulated_longitudinal_forces_moments(q, Va, alpha, elevator, qbar, aero)
     ca = np.cos(alpha)
     sa = np.sin(alpha)
     if Va == 0.:
@@ -389,17 +434,27 @@ def longitudinal_aerodynamics(q: float,
     )
 
     # compute longitudinal forces in body frame (see equation before (4.12) )
-    f_lon = np.array([[-ca * F_drag + sa * F_lift], [0.], [-sa * F_drag - ca * F_lift]])
+    f_lon_x = -ca * F_drag + sa * F_lift
+    f_lon_z = -sa * F_drag - ca * F_lift
 
     # compute logitudinal torque in body frame (see (4.5) )
-    torque_lon = np.array([[0.], \
-        [qbar * MAV.S_wing * MAV.c * (
+    torque_lon_y = qbar * MAV.S_wing * MAV.c * (
             MAV.C_m_0
             + MAV.C_m_alpha * alpha
             + MAV.C_m_q * q_nondim
-            + MAV.C_m_delta_e * elevator) ], [0.]])
+            + MAV.C_m_delta_e * elevator)
 
-    return (f_lon, torque_lon)
+    return (f_lon_x, f_lon_z, torque_lon_y)
+
+def _tabulated_longitudinal_forces_moments(q: float, Va: float, alpha: float, elevator: float, qbar: float,
+                                           aero: AeroTable) -> tuple[float, float, float]:
+    """_longitudinal_forces_moments with the body frame coefficients of (4.19) interpolated from a table"""
+    q_nondim = 0. if Va == 0. else q * MAV.c / (2 * Va)  # nondimensionalize q
+    coefficients = aero.coefficient_list(alpha)
+    qbar_S = qbar * MAV.S_wing
+    return (qbar_S * (coefficients[C_X] + coefficients[C_X_Q] * q_nondim + coefficients[C_X_DELTA_E] * elevator),
+            qbar_S * (coefficients[C_Z] + coefficients[C_Z_Q] * q_nondim + coefficients[C_Z_DELTA_E] * elevator),
+            qbar_S * MAV.c * (coefficients[C_M] + coefficients[C_M_Q] * q_nondim + coefficients[C_M_DELTA_E] * elevator))
 
 def motor_thrust_torque(Va: float, delta_t: float) -> tuple[float, float]:
     """ compute thrust and torque due to propeller  (See addendum by McLain)
@@ -412,29 +467,8 @@ def motor_thrust_torque(Va: float, delta_t: float) -> tuple[float, float]:
         T_p: Propeller thrust
         Q_p: Propeller torque
     """
-    # map delta_t throttle command(0 to 1) into motor input voltage (4.22)
-    v_in = MAV.V_max * delta_t
-
-    # Quadratic formula to solve for motor speed (see equations prior to (4.21))
-    a = MAV.C_Q0 * MAV.rho * np.power(MAV.D_prop, 5) \
-        / ((2.*np.pi)**2)
-    b = (MAV.C_Q1 * MAV.rho * np.power(MAV.D_prop, 4)
-            / (2.*np.pi)) * Va + MAV.KQ**2/MAV.R_motor # Note that book mentions KQ and KT are equivalent.
-                                                       # MAV.KT takes a different form than in the book.
-                                                       # so KQ^2 is used here
-    c = MAV.C_Q2 * MAV.rho * np.power(MAV.D_prop, 3) \
-        * Va**2 - (MAV.KQ / MAV.R_motor) * v_in + MAV.KQ * MAV.i0
-
-    # Angular speed of propeller (see (4.21))
-    omega_p = (-b + np.sqrt(b**2 - 4*a*c)) / (2.*a)
-
-    # thrust and torque due to propeller (see (4.17) and (4.18) )
-    thrust_prop = (MAV.rho * np.power(MAV.D_prop,4) * MAV.C_T0 / (4 * np.pi**2)) * omega_p**2\
-                    + (MAV.rho * np.power(MAV.D_prop, 3) * MAV.C_T1 * Va / 2 / np.pi) * omega_p\
-                    + (MAV.rho * MAV.D_prop**2 * MAV.C_T2 * Va**2)
-    torque_prop = (MAV.rho * np.power(MAV.D_prop, 5) * MAV.C_Q0 / (4 * np.pi**2)) * omega_p**2\
-                    + (MAV.rho * np.power(MAV.D_prop, 4) * MAV.C_Q1 * Va / (2 * np.pi)) * omega_p\
-                    + (MAV.rho * np.power(MAV.D_prop, 3) * MAV.C_Q2 * Va**2)
+    # the constants of the quadratic for the motor speed and of (4.17) - (4.18) are folded once
+    thrust_prop, torque_prop = default_propulsion_model().thrust_torque(Va, delta_t)
     return thrust_prop, torque_prop
 
 def update_velocity_data(state: types.DynamicState,
@@ -0,0 +1,185 @@
+"""
+propulsion_model
+    - Propeller thrust and torque of the motor and propeller model (see addendum by McLain)
+    - The airframe constants are folded into polynomial coefficients once, evaluations work on
+      scalars or arrays of (Va, delta_t), and the partial derivatives are in closed form
+    - PropulsionSurface caches thrust and torque on a (Va, delta_t) grid for interpolated lookups
+    - default_propulsion_model follows the current aerosonde_parameters values
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+from functools import lru_cache
+from types import ModuleType
+from typing import Any, Optional, Union
+
+import mav_sim.parameters.aerosonde_parameters as MAV
+import numpy as np
+import numpy.typing as npt
+
+# Either a single value or an array of values
+Operand = Union[float, npt.NDArray[Any]]
+
+# Result of an evaluation, a float for scalar inputs and an array with the broadcast shape of the inputs otherwise
+Result = Any
+
+# Airframe parameters folded into a PropulsionModel
+PROPULSION_PARAMETERS: tuple[str, ...] = ("rho", "D_prop", "C_Q0", "C_Q1", "C_Q2", "KQ", "R_motor", "V_max", "i0",
+                                          "C_T0", "C_T1", "C_T2")
+
+class PropulsionModel:
+    """Thrust and torque of the propeller as a function of airspeed and throttle
+
+    The propeller speed is the positive root of a*omega^2 + b*omega + c = 0 (see the equations
+    prior to (4.21)) with
+        b = b_Va*Va + b_0,    c = c_Va*Va^2 + c_delta_t*delta_t + c_0
+    and the thrust and torque are t_2*omega^2 + t_1*Va*omega + t_0*Va^2 (see (4.17) and (4.18)).
+    """
+    def __init__(self, params: ModuleType = MAV) -> None:
+        """Folds the motor and propeller constants
+
+        Args:
+            params: Module defining the airframe, defaults to aerosonde_parameters
+        """
+        rho, D_prop = params.rho, params.D_prop
+        self.a = params.C_Q0 * rho * D_prop**5 / (2.*np.pi)**2
+        self.b_Va = params.C_Q1 * rho * D_prop**4 / (2.*np.pi)
+        self.b_0 = params.KQ**2 / params.R_motor # KQ^2 as in mav_dynamics.motor_thrust_torque
+        self.c_Va = params.C_Q2 * rho * D_prop**3
+        self.c_delta_t = -(params.KQ / params.R_motor) * params.V_max # throttle maps to voltage by (4.22)
+        self.c_0 = params.KQ * params.i0
+        self.thrust = (rho * D_prop**4 * params.C_T0 / (4 * np.pi**2), rho * D_prop**3 * params.C_T1 / (2 * np.pi),
+                       rho * D_prop**2 * params.C_T2)
+        self.torque = (rho * D_prop**5 * params.C_Q0 / (4 * np.pi**2), rho * D_prop**4 * params.C_Q1 / (2 * np.pi),
+                       rho * D_prop**3 * params.C_Q2)
+
+    def omega(self, Va: Operand, delta_t: Operand) -> Result:
+        """Angular speed of the propeller (see (4.21))"""
+        b = self.b_Va * Va + self.b_0
+        c = self.c_Va * Va**2 + self.c_delta_t * delta_t + self.c_0
+        omega = (-b + np.sqrt(b**2 - 4*self.a*c)) / (2.*self.a)
+        return omega
+
+    def thrust_torque(self, Va: Operand, delta_t: Operand) -> tuple[Result, Result]:
+        """Thrust and torque due to the propeller
+
+        Args:
+            Va: Airspeeds
+            delta_t: Throttle commands
+
+        Returns:
+            T_p: Propeller thrusts
+            Q_p: Propeller torques
+        """
+        omega_p = self.omega(Va, delta_t)
+        t_2, t_1, t_0 = self.thrust
+        q_2, q_1, q_0 = self.torque
+        thrust = (t_2 * omega_p + t_1 * Va) * omega_p + t_0 * Va**2
+        torque = (q_2 * omega_p + q_1 * Va) * omega_p + q_0 * Va**2
+        return thrust, torque
+
+    def partials(self, Va: Operand, delta_t: Operand) -> tuple[Result, Result, Result, Result]:
+        """Closed form partial derivatives of thrust_torque, by implicit differentiation of the quadratic
+
+        Args:
+            Va: Airspeeds
+            delta_t: Throttle commands
+
+        Returns:
+            dT_dVa, dT_ddelta_t, dQ_dVa, dQ_ddelta_t
+        """
+        omega_p = self.omega(Va, delta_t)
+        denominator = 2*self.a*omega_p + self.b_Va*Va + self.b_0
+        domega_dVa = -(self.b_Va*omega_p + 2*self.c_Va*Va) / denominator
+        domega_ddt = -self.c_delta_t / denominator
+
+        partials = []
+        for c_2, c_1, c_0 in (self.thrust, self.torque):
+            dout_domega = 2*c_2*omega_p + c_1*Va
+            partials += [dout_domega*domega_dVa + c_1*omega_p + 2*c_0*Va, dout_domega*domega_ddt]
+        return partials[0], partials[1], partials[2], partials[3]
+
+    def surface(self, Va_max: float = 50., num_Va: int = 501, num_delta_t: int = 201) -> 'PropulsionSurface':
+        """Returns the cached surface over airspeeds in [0, Va_max] and throttles in [0, 1]
+
+        Args:
+            Va_max: Largest airspeed of the grid
+            num_Va: Number of airspeeds of the grid
+            num_delta_t: Number of throttle settings of the grid
+        """
+        return _cached_surface(self, Va_max, num_Va, num_delta_t)
+
+class PropulsionSurface:
+    """Thrust and torque of a PropulsionModel on an evenly spaced (Va, delta_t) grid
+
+    Lookups interpolate bilinearly and clamp to the edge of the grid, the cell is found
+    arithmetically so a lookup costs the same regardless of the size of the grid.
+    """
+    def __init__(self, model: PropulsionModel, Va: npt.NDArray[Any], delta_t: npt.NDArray[Any]) -> None:
+        """Evaluates the model on the grid
+
+        Args:
+            model: Model to tabulate
+            Va: Evenly spaced, increasing airspeeds
+            delta_t: Evenly spaced, increasing throttle commands
+        """
+        self.axes = (np.asarray(Va, dtype=float), np.asarray(delta_t, dtype=float))
+        for axis in self.axes:
+            if axis.ndim != 1 or axis.size < 2 or np.any(np.diff(axis) <= 0.) or \
+                    not np.allclose(np.diff(axis), axis[1] - axis[0]):
+                raise ValueError("The axes of the surface need at least two evenly spaced, increasing values")
+        thrust, torque = model.thrust_torque(self.axes[0][:, np.newaxis], self.axes[1][np.newaxis, :])
+        self.data = np.stack((thrust, torque)) # (2, len(Va), len(delta_t))
+        self._start = [float(axis[0]) for axis in self.axes]
+        self._scale = [(axis.size - 1) / float(axis[-1] - axis[0]) for axis in self.axes]
+
+    def thrust_torque(self, Va: Operand, delta_t: Operand) -> tuple[Result, Result]:
+        """Interpolated thrust and torque, see PropulsionModel.thrust_torque"""
+        if np.ndim(Va) == 0 and np.ndim(delta_t) == 0:
+            Va_index, Va_weight = self._scalar_cell(0, float(Va))
+            dt_index, dt_weight = self._scalar_cell(1, float(delta_t))
+            corners = self.data[:, Va_index:Va_index + 2, dt_index:dt_index + 2].tolist()
+            thrust, torque = [(1. - Va_weight)*(low[0] + dt_weight*(low[1] - low[0])) +
+                              Va_weight*(high[0] + dt_weight*(high[1] - high[0])) for low, high in corners]
+            return thrust, torque
+
+        # corners of the cells in the flattened grid
+        Va_index, Va_weight = self._cell(0, Va)
+        dt_index, dt_weight = self._cell(1, delta_t)
+        flat = self.data.reshape((2, -1))
+        index = Va_index*self.axes[1].size + dt_index
+        lower = np.take(flat, index, axis=1)
+        lower = lower + dt_weight*(np.take(flat, index + 1, axis=1) - lower)
+        index = index + self.axes[1].size
+        upper = np.take(flat, index, axis=1)
+        upper = upper + dt_weight*(np.take(flat, index + 1, axis=1) - upper)
+        values = lower + Va_weight*(upper - lower)
+        return values[0], values[1]
+
+    def _cell(self, axis: int, value: Operand) -> tuple[Any, Any]:
+        """Index of the grid cell holding the values along an axis and the weight of its upper end"""
+        position = np.clip((value - self._start[axis]) * self._scale[axis], 0., self.axes[axis].size - 1.)
+        index = np.minimum(np.asarray(position).astype(np.intp), self.axes[axis].size - 2)
+        return index, position - index
+
+    def _scalar_cell(self, axis: int, value: float) -> tuple[int, float]:
+        """_cell of a single value"""
+        position = min(max((value - self._start[axis]) * self._scale[axis], 0.), self.axes[axis].size - 1.)
+        index = min(int(position), self.axes[axis].size - 2)
+        return index, float(position - index)
+
+@lru_cache(maxsize=8)
+def _cached_surface(model: PropulsionModel, Va_max: float, num_Va: int, num_delta_t: int) -> PropulsionSurface:
+    """Builds a surface of a model once per grid"""
+    return PropulsionSurface(model, np.linspace(0., Va_max, num_Va), np.linspace(0., 1., num_delta_t))
+
+_DEFAULT_MODEL: Optional[tuple[tuple[Any, ...], PropulsionModel]] = None
+
+def default_propulsion_model() -> PropulsionModel:
+    """Model of aerosonde_parameters, shared between calls. The model is rebuilt when one of the
+    PROPULSION_PARAMETERS changed since it was built, e.g., after MAV.V_max *= 2."""
+    global _DEFAULT_MODEL # pylint: disable=global-statement
+    values = tuple(getattr(MAV, name) for name in PROPULSION_PARAMETERS)
+    if _DEFAULT_MODEL is None or _DEFAULT_MODEL[0] != values:
+        _DEFAULT_MODEL = (values, PropulsionModel())
+    return _DEFAULT_MODEL[1]
@@ -7,26 +7,40 @@ run_sim.py
         12/21 - GND
 """
 
-from typing import Callable, Optional, cast
+from typing import TYPE_CHECKING, Callable, Optional, cast
 
-import mav_sim.parameters.simulation_parameters as SIM
 import numpy as np
-from mav_sim.chap2.mav_viewer import MavViewer
-from mav_sim.chap3.data_viewer import DataViewer
-from mav_sim.chap3.mav_dynamics import DynamicState
+from mav_sim.chap3.mav_dynamics import DynamicState, IntegratorType
 from mav_sim.chap4.mav_dynamics import MavDynamics
 from mav_sim.chap4.wind_simulation import WindSimulation
 from mav_sim.message_types.msg_delta import MsgDelta
 from mav_sim.message_types.msg_gust_params import MsgGustParams
 from mav_sim.message_types.msg_sim_params import MsgSimParams
 from mav_sim.tools import types
+from mav_sim.tools.events import Event
+from mav_sim.tools.random_streams import Seed, component_generators
+from mav_sim.tools.sim_trajectory import SimTrajectory, num_sim_steps
+from mav_sim.tools.trajectory_recorder import TrajectoryRecorder
+
+# The viewers are only imported when used so that the headless simulation does not need Qt
+if TYPE_CHECKING:
+    from mav_sim.chap2.mav_viewer import MavViewer
+    from mav_sim.chap3.data_viewer import DataViewer
+
+# pylint: disable=too-many-arguments
 
 DeltaTimeFunction = Callable[ [float], MsgDelta]
 
+def update_period(sim: MsgSimParams, integrator: int) -> float:
+    """Time between updates of the dynamics, sim.ts_control for the adaptive integrator and
+    sim.ts_simulation otherwise"""
+    return sim.ts_control if integrator == IntegratorType.dopri45 else sim.ts_simulation
+
 def run_sim(sim: MsgSimParams, delta_fnc: DeltaTimeFunction, init_state: Optional[DynamicState] = None, \
-        mav_view: Optional[MavViewer] = None, data_view: Optional[DataViewer] = None, \
-        use_wind: bool = False, gust_params: Optional[MsgGustParams] = None) \
-        -> tuple[MavViewer, DataViewer]:
+        mav_view: Optional['MavViewer'] = None, data_view: Optional['DataViewer'] = None, \
+        use_wind: bool = False, gust_params: Optional[MsgGustParams] = None, \
+        integrator: int = IntegratorType.rk4, recorder: Optional[TrajectoryRecorder] = None) \
+        -> tuple['MavViewer', 'DataViewer']:
     """Runs the chapter 4 simulation
 
     Args:
@@ -36,11 +50,20 @@ def run_sim(sim: MsgSimParams, delta_fnc: DeltaTimeFunction, init_state: Optiona
         mav_view: Viewing window to be used for the mav
         data_view: Viewing window to be used for the states
         use_wind: True => wind will be used, False => no wind
+        gust_params: Parameters of the gust model
+        integrator: Integration scheme of the dynamics. The fixed step schemes update every
+            sim.ts_simulation, IntegratorType.dopri45 only stops at the control instants sim.ts_control.
+            The loop records and plots at those stops only, the dense output (mav.integrator.state_at)
+            between them is not sampled
+        recorder: Stores every update of the dynamics when given
 
     Returns:
         mav_view: Viewing window to be used for the mav
         data_view: Viewing window to be used for the states
     """
+    # pylint: disable=import-outside-toplevel
+    from mav_sim.chap2.mav_viewer import MavViewer
+    from mav_sim.chap3.data_viewer import DataViewer
 
     # initialize the visualization
     if mav_view is None:
@@ -49,8 +72,9 @@ def run_sim(sim: MsgSimParams, delta_fnc: DeltaTimeFunction, init_state: Optiona
         data_view = DataViewer()  # initialize view of data plots
 
     # initialize elements of the architecture
-    wind = WindSimulation(SIM.ts_simulation, gust_params)
-    mav = MavDynamics(sim.ts_simulation, init_state)
+    ts_update = update_period(sim, integrator)
+    wind = WindSimulation(ts_update, gust_params)
+    mav = MavDynamics(sim.ts_simulation, init_state, integrator)
 
     # initialize the simulation time
     sim_time = sim.start_time
@@ -69,7 +93,10 @@ def run_sim(sim: MsgSimParams, delta_fnc: DeltaTimeFunction, init_state: Optiona
         delta = delta_fnc(sim_time)
 
         # -------physical system-------------
-        mav.update(delta, current_wind() )  # propagate the MAV dynamics
+        wind_vec = current_wind()
+        if recorder is not None:
+            recorder.record(sim_time, mav.true_state, delta, wind_vec)
+        mav.update(delta, wind_vec, ts_update)  # propagate the MAV dynamics
 
         # -------update viewer-------------
         if next_plot_time <= sim_time:
@@ -83,6 +110,49 @@ def run_sim(sim: MsgSimParams, delta_fnc: DeltaTimeFunction, init_state: Optiona
 
 
         # -------increment time-------------
-        sim_time += sim.ts_simulation
+        sim_time += ts_update
 
     return (mav_view, data_view)
+
+def run_sim_headless(sim: MsgSimParams, delta_fnc: DeltaTimeFunction, init_state: Optional[DynamicState] = None, \
+        use_wind: bool = False, gust_params: Optional[MsgGustParams] = None, \
+        integrator: int = IntegratorType.rk4, recorder: Optional[TrajectoryRecorder] = None, \
+        seed: Seed = None, events: Optional[list[Event]] = None) -> SimTrajectory:
+    """Runs the chapter 4 simulation without any viewers
+
+    Args:
+        sim: Timing and file parameters for the simulation
+        delta_fnc: Control surfaces as a function of time
+        init_state: Initial state of the MAV
+        use_wind: True => wind will be used, False => no wind
+        gust_params: Parameters of the gust model
+        integrator: Integration scheme of the dynamics, see run_sim
+        recorder: Also stores every update of the dynamics when given
+        seed: Seeds an independent generator for each random component, the global numpy state is used when None
+        events: Events watched by the integrator, the run stops after the update ended by a terminal event
+
+    Returns:
+        trajectory: States, inputs, and wind at every update of the dynamics
+    """
+    # initialize elements of the architecture
+    streams = component_generators(seed) if seed is not None else {}
+    ts_update = update_period(sim, integrator)
+    wind = WindSimulation(ts_update, gust_params, rng=streams.get("wind"))
+    mav = MavDynamics(sim.ts_simulation, init_state, integrator)
+    mav.integrator.events.extend(events or [])
+    num_steps = num_sim_steps(sim, ts_update)
+    trajectory = SimTrajectory(num_steps, commanded=False)
+
+    # main simulation loop
+    zero_wind = np.zeros([6,1])
+    for k in range(num_steps):
+        sim_time = sim.start_time + k*ts_update
+        delta = delta_fnc(sim_time)
+        current_wind = wind.update() if use_wind else zero_wind
+        trajectory.record(sim_time, mav.true_state, delta, current_wind)
+        if recorder is not None:
+            recorder.record(sim_time, mav.true_state, delta, current_wind)
+        if mav.update(delta, current_wind, ts_update):  # propagate the MAV dynamics
+            break  # a terminal event ended the flight
+
+    return trajectory
@@ -0,0 +1,200 @@
+"""
+wind_field
+    - Frozen turbulence: a wind field that is fixed to the air mass and stored on a regular
+      north-east-down grid, so every aircraft flying through the same air sees the same gusts
+    - The grid is kept in a .npy file that is memory mapped, only the pages around the sampled
+      positions are read, and is sampled by trilinear interpolation
+    - The air mass drifts with the mean wind (Taylor's frozen turbulence hypothesis)
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+import os
+from typing import Any, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+import scipy.signal
+from mav_sim.message_types.msg_gust_params import MsgGustParams
+from mav_sim.tools import types
+from mav_sim.tools.random_streams import get_rng
+
+# Type of the sizes and spacings of the grid axes, a scalar is used for all three axes
+GridSpec = Union[float, tuple[float, float, float], npt.NDArray[Any]]
+
+# Offsets of the eight corners of a grid cell, one column per corner
+_CORNERS = np.array([[(corner >> shift) & 1 for corner in range(8)] for shift in (2, 1, 0)])
+
+def grid_path(path: str) -> str:
+    """Name of the file holding the origin, spacing, and mean wind of the field stored in path"""
+    return os.path.splitext(path)[0] + "_grid.npz"
+
+class WindField:
+    """Turbulence on a regular north-east-down grid, plus a uniform mean wind
+
+    The turbulence is stored in a (3, n_north, n_east, n_down) array, the north, east, and down
+    components at every grid point. Positions outside of the grid are clamped to its edge.
+    """
+    def __init__(self, data: npt.NDArray[Any], origin: GridSpec, spacing: GridSpec,
+                 mean_wind: Optional[GridSpec] = None) -> None:
+        """Stores the grid, data is not copied so that memory mapped arrays stay on disk
+
+        Args:
+            data: (3, n_north, n_east, n_down) turbulence, every axis needs at least two points
+            origin: North, east, and down position of the first grid point
+            spacing: Distance between grid points along each axis
+            mean_wind: Uniform wind in the inertial frame that carries the turbulence along, zero when None
+        """
+        if data.ndim != 4 or data.shape[0] != 3 or min(data.shape[1:]) < 2:
+            raise ValueError("data must have shape (3, n_north, n_east, n_down) with at least two points per axis")
+        self.data = data
+        self.origin = _grid_vector(origin, "origin")
+        self.spacing = _grid_vector(spacing, "spacing")
+        if np.any(self.spacing <= 0.):
+            raise ValueError("spacing must be positive")
+        self.mean_wind = _grid_vector(0. if mean_wind is None else mean_wind, "mean_wind")
+        self._upper = np.array(data.shape[1:], dtype=float) - 1.
+
+    @staticmethod
+    def open(path: str) -> 'WindField':
+        """Memory maps a field written by generate_wind_field() or save()
+
+        Args:
+            path: Name of the .npy file holding the turbulence
+        """
+        with np.load(grid_path(path)) as archive:
+            origin, spacing, mean_wind = archive["origin"], archive["spacing"], archive["mean_wind"]
+        return WindField(np.load(path, mmap_mode="r"), origin, spacing, mean_wind)
+
+    def save(self, path: str) -> None:
+        """Writes the turbulence to a .npy file and the grid to grid_path(path)
+
+        Args:
+            path: Name of the .npy file to write
+        """
+        np.save(path, self.data)
+        _save_grid(path, self.origin, self.spacing, self.mean_wind)
+
+    def sample(self, positions: types.Points, time: float = 0.) -> types.Points:
+        """Interpolates the wind at a set of positions
+
+        Args:
+            positions: (3, N) north, east, and down positions
+            time: Simulation time, the turbulence has drifted by mean_wind*time
+
+        Returns:
+            wind: (3, N) wind in the inertial frame, the mean wind plus the turbulence
+        """
+        types.check_points(positions)
+        grid = (positions - (self.origin + time*self.mean_wind)[:, np.newaxis]) / self.spacing[:, np.newaxis]
+        grid = np.clip(grid, 0., self._upper[:, np.newaxis])
+        lower = np.minimum(grid.astype(int), self._upper[:, np.newaxis].astype(int) - 1)
+        weight = grid - lower
+
+        # blend the eight corners of each cell, gathered in one read of the grid
+        index = lower[:, np.newaxis, :] + _CORNERS[:, :, np.newaxis]
+        corner_weight = np.prod(np.where(_CORNERS[:, :, np.newaxis] == 1, weight[:, np.newaxis, :],
+                                         1. - weight[:, np.newaxis, :]), axis=0)
+        turbulence = np.sum(corner_weight*self.data[:, index[0], index[1], index[2]], axis=1)
+        wind: types.Points = turbulence + self.mean_wind[:, np.newaxis]
+        return wind
+
+    def wind(self, position: types.Vector, time: float = 0.) -> types.WindVector:
+        """Wind of a single aircraft in the format of WindSimulation.update()
+
+        Args:
+            position: North, east, and down position of the aircraft
+            time: Simulation time
+
+        Returns:
+            wind: Six vector, the interpolated wind in the inertial frame stacked on a zero body frame gust
+        """
+        return self.wind_batch(np.reshape(position, (3, 1)), time)
+
+    def wind_batch(self, positions: types.Points, time: float = 0.) -> npt.NDArray[Any]:
+        """Wind of N aircraft in the format of BatchMavDynamics.update()
+
+        Args:
+            positions: (3, N) north, east, and down positions
+            time: Simulation time
+
+        Returns:
+            winds: (6, N) interpolated wind in the inertial frame stacked on a zero body frame gust
+        """
+        return np.concatenate((self.sample(positions, time), np.zeros(positions.shape)))
+
+def generate_wind_field(path: str, shape: tuple[int, int, int], spacing: GridSpec, origin: GridSpec = 0.,
+                        gust_params: Optional[MsgGustParams] = None, mean_wind: Optional[GridSpec] = None,
+                        rng: Optional[np.random.Generator] = None, chunk: int = 16) -> WindField:
+    """Generates a frozen turbulence field directly into a memory mapped .npy file
+
+    Each component is white noise smoothed by a first order autoregressive filter along each axis,
+    which gives the Dryden-like spatial correlation exp(-(|dn| + |de| + |dd|)/L) and a standard
+    deviation of sigma. The north, east, and down components use the (sigma, L) of the u, v, and w
+    gusts of gust_params. The field is processed chunk planes at a time, so the memory needed does
+    not grow with the number of points along the filtered axis.
+
+    Args:
+        path: Name of the .npy file to write, the grid goes to grid_path(path)
+        shape: Number of grid points along the north, east, and down axes
+        spacing: Distance between grid points along each axis
+        origin: North, east, and down position of the first grid point
+        gust_params: Intensities and length scales of the turbulence
+        mean_wind: Uniform wind in the inertial frame that carries the turbulence along
+        rng: Generator of the white noise, the global numpy state is used when None
+        chunk: Number of grid planes processed at once
+
+    Returns:
+        field: The generated field, memory mapped from path in read only mode
+    """
+    if gust_params is None:
+        gust_params = MsgGustParams()
+    generator = get_rng(rng)
+    spacings = _grid_vector(spacing, "spacing")
+    if len(shape) != 3 or min(shape) < 2 or chunk < 1 or np.any(spacings <= 0.):
+        raise ValueError("shape needs three axes with at least two points, chunk and spacing must be positive")
+    n_north, n_east, n_down = shape
+
+    data = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(3,) + tuple(shape))
+    components = ((gust_params.sigma_u, gust_params.Lu), (gust_params.sigma_v, gust_params.Lv),
+                  (gust_params.sigma_w, gust_params.Lw))
+    for component, (sigma, length) in enumerate(components):
+        pole = np.exp(-spacings/length)
+        # smooth along north and east one slab of down planes at a time, the noise is drawn plane
+        # by plane so that the field does not depend on chunk
+        for start in range(0, n_down, chunk):
+            stop = min(start + chunk, n_down)
+            block = np.stack([generator.standard_normal((n_north, n_east)) for _ in range(start, stop)], axis=2)
+            block = _smooth(_smooth(block, pole[0], axis=0), pole[1], axis=1)
+            data[component, :, :, start:stop] = block
+        # then along down one slab of north planes at a time
+        for start in range(0, n_north, chunk):
+            stop = min(start + chunk, n_north)
+            data[component, start:stop] = sigma*_smooth(np.asarray(data[component, start:stop], dtype=float),
+                                                        pole[2], axis=2)
+    data.flush()
+    del data
+
+    _save_grid(path, _grid_vector(origin, "origin"), spacings, _grid_vector(0. if mean_wind is None else mean_wind,
+                                                                           "mean_wind"))
+    return WindField.open(path)
+
+def _smooth(values: npt.NDArray[Any], pole: float, axis: int) -> npt.NDArray[Any]:
+    """Applies y[k] = pole*y[k-1] + sqrt(1 - pole^2)*x[k] along an axis, starting from y[0] = x[0]
+
+    Unit variance white noise stays unit variance and becomes correlated by pole^|k - j|
+    """
+    gain = np.sqrt(1. - pole**2)
+    first = np.take(values, [0], axis=axis)
+    smoothed, _ = scipy.signal.lfilter([gain], [1., -pole], values, axis=axis, zi=(1. - gain)*first)
+    return np.asarray(smoothed)
+
+def _grid_vector(value: GridSpec, name: str) -> npt.NDArray[Any]:
+    """Converts a scalar or three element value to a float array with one element per axis"""
+    if np.size(value) not in (1, 3):
+        raise ValueError(name + " must be a scalar or have three elements")
+    return np.broadcast_to(np.asarray(value, dtype=float).ravel(), (3,)).copy()
+
+def _save_grid(path: str, origin: npt.NDArray[Any], spacing: npt.NDArray[Any], mean_wind: npt.NDArray[Any]) -> None:
+    """Writes the grid of the field stored in path"""
+    np.savez(grid_path(path), origin=origin, spacing=spacing, mean_wind=mean_wind)
@@ -2,64 +2,164 @@
 Class to determine wind velocity at any given moment,
 calculates a steady wind speed and uses a stochastic
 process to represent wind gusts. (Follows section 4.4 in uav book)
+
+DrydenGusts implements the same gust model with an exact zero-order-hold discretization, it
+can generate whole gust time series for many independent streams at once.
 """
-from typing import Optional
+from typing import Optional, Union
 
 import numpy as np
+import numpy.typing as npt
+import scipy.linalg
+import scipy.signal
 from mav_sim.message_types.msg_gust_params import MsgGustParams
 from mav_sim.tools import types
+from mav_sim.tools.random_streams import RandomSource, get_rng
 from mav_sim.tools.transfer_function import TransferFunction
 
 
+def dryden_transfer_functions(Ts: float, gust_params: Optional[MsgGustParams] = None, gust_flag: bool = True,
+                              Va: float = 25.) -> tuple[TransferFunction, TransferFunction, TransferFunction]:
+    """Creates the Dryden transfer functions of the u, v, and w gusts (page 61 of book)
+
+    Args:
+        Ts: Time step of the transfer functions
+        gust_params: Parameters of the Dryden gust model, the defaults of MsgGustParams are used when None
+        gust_flag: True => gusts are generated, False => the gains are zero
+        Va: Constant airspeed of the model
+
+    Returns:
+        u_w, v_w, w_w: Transfer functions from white noise to the gust along each body axis
+    """
+    # Initialize gust parameters if not passed in
+    if gust_params is None:
+        gust_params = MsgGustParams()
+
+    Lu = gust_params.Lu
+    Lv = gust_params.Lv
+    Lw = gust_params.Lw
+    if gust_flag:
+        sigma_u = gust_params.sigma_u
+        sigma_v = gust_params.sigma_v
+        sigma_w = gust_params.sigma_w
+    else:
+        sigma_u = 0.0
+        sigma_v = 0.0
+        sigma_w = 0.0
+    a1 = sigma_u*np.sqrt(2.*Va/(np.pi*Lu))
+    a2 = sigma_v*np.sqrt(3.*Va/(np.pi*Lv))
+    a3 = a2*Va/(np.sqrt(3)*Lv)
+    a4 = sigma_w*np.sqrt(3.*Va/(np.pi*Lw))
+    a5 = a4*Va/(np.sqrt(3)*Lw)
+    b1 = Va/Lu
+    b2 = Va/Lv
+    b3 = Va/Lw
+    u_w = TransferFunction(num=np.array([[a1]]),
+                           den=np.array([[1, b1]]),
+                           Ts=Ts)
+    v_w = TransferFunction(num=np.array([[a2, a3]]),
+                           den=np.array([[1, 2*b2, b2**2.0]]),
+                           Ts=Ts)
+    w_w = TransferFunction(num=np.array([[a4, a5]]),
+                           den=np.array([[1, 2*b3, b3**2.0]]),
+                           Ts=Ts)
+    return u_w, v_w, w_w
+
 class WindSimulation:
     """
     Class to determine wind velocity at any given moment,
     calculates a steady wind speed and uses a stochastic
     process to represent wind gusts. (Follows section 4.4 in uav book)
     """
-    def __init__(self, Ts: float, gust_params: Optional[MsgGustParams] = None, gust_flag: bool = True) -> None:
+    def __init__(self, Ts: float, gust_params: Optional[MsgGustParams] = None, gust_flag: bool = True,
+                 rng: Optional[np.random.Generator] = None) -> None:
         """Initialize steady-state and gust parameters
+
+        Args:
+            Ts: Time step of the gust model
+            gust_params: Parameters of the Dryden gust model
+            gust_flag: True => gusts are generated, False => only the steady wind
+            rng: Generator for the white noise driving the gusts, the global numpy state is used when None
         """
         # steady state wind defined in the inertial frame
         self._steady_state = np.array([[0., 0., 0.]]).T
         #self._steady_state = np.array([[0., 5., 0.]]).T
 
-        # Initialize gust parameters if not passed in
-        if gust_params is None:
-            gust_params = MsgGustParams()
-
         #   Dryden gust model parameters (page 61 of book)
         Va = 25 # must set Va to a constant value
-        #
-        Lu = gust_params.Lu
-        Lv = gust_params.Lv
-        Lw = gust_params.Lw
-        if gust_flag:
-            sigma_u = gust_params.sigma_u
-            sigma_v = gust_params.sigma_v
-            sigma_w = gust_params.sigma_w
-        else:
-            sigma_u = 0.0
-            sigma_v = 0.0
-            sigma_w = 0.0
-        a1 = sigma_u*np.sqrt(2.*Va/(np.pi*Lu))
-        a2 = sigma_v*np.sqrt(3.*Va/(np.pi*Lv))
-        a3 = a2*Va/(np.sqrt(3)*Lv)
-        a4 = sigma_w*np.sqrt(3.*Va/(np.pi*Lw))
-        a5 = a4*Va/(np.sqrt(3)*Lw)
-        b1 = Va/Lu
-        b2 = Va/Lv
-        b3 = Va/Lw
-        self.u_w = TransferFunction(num=np.array([[a1]]),
-                                     den=np.array([[1, b1]]),
-                                     Ts=Ts)
-        self.v_w = TransferFunction(num=np.array([[a2, a3]]),
-                                     den=np.array([[1, 2*b2, b2**2.0]]),
-                                     Ts=Ts)
-        self.w_w = TransferFunction(num=np.array([[a4, a5]]),
-                                     den=np.array([[1, 2*b3, b3**2.0]]),
-                                     Ts=Ts)
+        self.u_w, self.v_w, self.w_w = dryden_transfer_functions(Ts, gust_params, gust_flag, Va)
+        self._Ts = Ts
+        self._rng = get_rng(rng)
+
+    def update(self) -> types.WindVector:
+        """
+        returns a six vector.
+           The first three elements are the steady state wind in the inertial frame
+           The second three elements are the gust in the body frame
+        """
+        noise = self._rng.standard_normal(3)
+        gust = np.array([[self.u_w.update(noise[0])],
+                         [self.v_w.update(noise[1])],
+                         [self.w_w.update(noise[2])]])
+        return np.concatenate(( self._steady_state, gust ))
+
+class DrydenGusts:
+    """Dryden gust model discretized exactly with a zero-order hold on the white noise
+
+    The three transfer functions of WindSimulation are stacked into one five state system
+        x[k+1] = Ad x[k] + Bd n[k],    gust[k] = C x[k+1] + D n[k]
+    where n[k] is the standard normal noise of step k, held over the time step. Ad and Bd come
+    from the matrix exponential so the outputs equal those of WindSimulation up to the RK4 error
+    of its transfer functions, and a given rng produces the same noise in both.
+
+    update() is a drop-in replacement for WindSimulation.update(), series() filters the noise of a
+    whole time series, for any number of independent streams, in one call to scipy.signal.lfilter.
+    """
+    def __init__(self, Ts: float, gust_params: Optional[MsgGustParams] = None, gust_flag: bool = True,
+                 rng: Optional[np.random.Generator] = None, Va: float = 25.) -> None:
+        """Discretizes the gust model
+
+        Args:
+            Ts: Time step of the gust model
+            gust_params: Parameters of the Dryden gust model
+            gust_flag: True => gusts are generated, False => only the steady wind
+            rng: Generator for the white noise driving the gusts, the global numpy state is used when None
+            Va: Constant airspeed of the model
+        """
+        # steady state wind defined in the inertial frame
+        self._steady_state = np.array([[0., 0., 0.]]).T
         self._Ts = Ts
+        self._rng: RandomSource = get_rng(rng)
+
+        # continuous model, one block of states per axis
+        transfer_functions = dryden_transfer_functions(Ts, gust_params, gust_flag, Va)
+        A = scipy.linalg.block_diag(*[tf.A for tf in transfer_functions])
+        B = scipy.linalg.block_diag(*[tf.B for tf in transfer_functions])
+        self.C: types.NP_MAT = scipy.linalg.block_diag(*[tf.C for tf in transfer_functions])
+        self.D: types.NP_MAT = np.diag([tf.D for tf in transfer_functions])
+
+        # zero-order hold: expm([[A, B], [0, 0]]*Ts) = [[Ad, Bd], [0, I]]
+        n, m = B.shape
+        augmented = np.zeros((n + m, n + m))
+        augmented[:n, :n] = A
+        augmented[:n, n:] = B
+        discrete = scipy.linalg.expm(augmented*Ts)
+        self.Ad: types.NP_MAT = discrete[:n, :n]
+        self.Bd: types.NP_MAT = discrete[:n, n:]
+
+        # gust[k] = C Ad x[k] + (C Bd + D) n[k], as a discrete transfer function per axis
+        Cd = self.C @ self.Ad
+        Dd = self.C @ self.Bd + self.D
+        self._filters: list[tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]] = []
+        start = 0
+        for axis, tf in enumerate(transfer_functions):
+            block = slice(start, start + tf.A.shape[0])
+            num, den = scipy.signal.ss2tf(self.Ad[block, block], self.Bd[block, axis:axis+1],
+                                          Cd[axis:axis+1, block], Dd[axis:axis+1, axis:axis+1])
+            self._filters.append((num[0], den))
+            start = block.stop
+
+        self.state: types.NP_MAT = np.zeros((n, 1))
 
     def update(self) -> types.WindVector:
         """
@@ -67,7 +167,51 @@ class WindSimulation:
            The first three elements are the steady state wind in the inertial frame
            The second three elements are the gust in the body frame
         """
-        gust = np.array([[self.u_w.update(np.random.randn())],
-                         [self.v_w.update(np.random.randn())],
-                         [self.w_w.update(np.random.randn())]])
+        noise = self._rng.standard_normal(3).reshape((3, 1))
+        self.state = self.Ad @ self.state + self.Bd @ noise
+        gust = self.C @ self.state + self.D @ noise
         return np.concatenate(( self._steady_state, gust ))
+
+    def series(self, num_steps: int, num_streams: Optional[int] = None) -> npt.NDArray[np.float64]:
+        """Generates gust time series that start from a zero gust state
+
+        The noise is drawn from the rng in the order update() draws it, stream after stream, so the
+        first stream equals num_steps calls of update() on a new object with an identically seeded rng.
+        The state used by update() is not changed.
+
+        Args:
+            num_steps: Number of time steps of each series
+            num_streams: Number of independent streams, None => a single series without the stream axis
+
+        Returns:
+            gusts: Body frame gusts, (3, num_steps) when num_streams is None and
+                (num_streams, 3, num_steps) otherwise, column k is the gust of step k
+        """
+        streams = 1 if num_streams is None else num_streams
+        if num_steps < 0 or streams < 0:
+            raise ValueError("num_steps and num_streams cannot be negative")
+        noise = np.swapaxes(self._rng.standard_normal((streams, num_steps, 3)), 1, 2)
+        gusts = np.empty((streams, 3, num_steps))
+        for axis, (num, den) in enumerate(self._filters):
+            gusts[:, axis, :] = scipy.signal.lfilter(num, den, noise[:, axis, :], axis=-1)
+        if num_streams is None:
+            gusts = gusts.reshape((3, num_steps))
+        return gusts
+
+def gust_series(Ts: float, num_steps: int, num_streams: Optional[int] = None,
+                gust_params: Optional[MsgGustParams] = None,
+                rng: Union[None, int, np.random.Generator] = None) -> npt.NDArray[np.float64]:
+    """Generates Dryden gust tables, e.g., one per Monte Carlo case
+
+    Args:
+        Ts: Time step of the gust model
+        num_steps: Number of time steps of each series
+        num_streams: Number of independent streams, None => a single series without the stream axis
+        gust_params: Parameters of the Dryden gust model
+        rng: Generator or seed of the white noise, the global numpy state is used when None
+
+    Returns:
+        gusts: Body frame gusts, see DrydenGusts.series
+    """
+    generator = np.random.default_rng(rng) if isinstance(rng, int) else rng
+    return DrydenGusts(Ts, gust_params, rng=generator).series(num_steps, num_streams)
@@ -12,15 +12,13 @@ import mav_sim.parameters.aerosonde_parameters as MAV
 import numpy as np
 import numpy.typing as npt
 from mav_sim.chap3.mav_dynamics import IND, derivatives
-from mav_sim.chap4.mav_dynamics import (
-    forces_moments,
-    motor_thrust_torque,
-    update_velocity_data,
-)
+from mav_sim.chap3.mav_dynamics_euler import IND_EULER, DynamicStateEuler
+from mav_sim.chap4.mav_dynamics import forces_moments, update_velocity_data
+from mav_sim.chap4.propulsion_model import default_propulsion_model
 from mav_sim.message_types.msg_delta import MsgDelta
 from mav_sim.parameters.simulation_parameters import ts_simulation as Ts
 from mav_sim.tools import types
-from mav_sim.tools.rotations import Euler2Quaternion, Quaternion2Euler
+from mav_sim.tools.rotations import Euler2Quaternion, Euler2Rotation, Quaternion2Euler
 
 
 def compute_model(trim_state: types.DynamicState, trim_input: MsgDelta) -> None:
@@ -146,7 +144,7 @@ def compute_tf_model(trim_state: types.DynamicState, trim_input: MsgDelta) \
     return Va_trim, alpha_trim, theta_trim, a_phi1, a_phi2, a_theta1, a_theta2, a_theta3, a_V1, a_V2, a_V3
 
 
-def compute_ss_model(trim_state: types.DynamicState, trim_input: MsgDelta) \
+def compute_ss_model(trim_state: types.DynamicState, trim_input: MsgDelta, analytic: bool = True) \
     -> tuple[npt.NDArray[Any], ...]:
     """Computes the state space model resulting from linearizing about the
     trim trajectory and input
@@ -154,14 +152,18 @@ def compute_ss_model(trim_state: types.DynamicState, trim_input: MsgDelta) \
     Args:
         trim_state: state of the trim trajectory
         trim_input: inputs for the trim trajectory
+        analytic: True => closed form Jacobians (euler_jacobians), False => finite differences (df_dx, df_du)
 
     Returns:
         (A_lon, B_lon): Longitudinal model defined in (5.51)
         (A_lat, B_lat): Lateral model defined in (5.44)
     """
     x_euler = euler_state(trim_state)
-    A = df_dx(x_euler, trim_input)
-    B = df_du(x_euler, trim_input)
+    if analytic:
+        A, B = euler_jacobians(x_euler, trim_input)
+    else:
+        A = df_dx(x_euler, trim_input)
+        B = df_du(x_euler, trim_input)
     # extract longitudinal states (u, w, q, theta, pd)
     A_lon = A[np.ix_([3, 5, 10, 7, 2],[3, 5, 10, 7, 2])]
     B_lon = B[np.ix_([3, 5, 10, 7, 2],[0, 3])]
@@ -294,35 +296,194 @@ def df_du(x_euler: types.DynamicStateEuler, delta: MsgDelta) -> npt.NDArray[Any]
         B[:, i] = df_np[:, 0]
     return B
 
+def euler_jacobians(x_euler: types.DynamicStateEuler, delta: MsgDelta) -> tuple[npt.NDArray[Any], npt.NDArray[Any]]:
+    """
+    closed form partials of f_euler (no wind) with respect to x_euler and the input
+
+    The dynamics are differentiated through the Euler kinematics, the airspeed, angle of attack, and
+    side slip angle, and the aerodynamic and propulsion models of chapter 4.
+
+    Args:
+        x_euler: 12x1 Euler state at which the dynamics are linearized
+        delta: input at which the dynamics are linearized
+
+    Returns:
+        A: 12x12 partial of f_euler with respect to x_euler
+        B: 12x4 partial of f_euler with respect to (elevator, aileron, rudder, throttle)
+    """
+    st = DynamicStateEuler(x_euler)
+    u, v, w, p, q, r = st.u, st.v, st.w, st.p, st.q, st.r
+    uw2 = u**2 + w**2
+    if uw2 == 0.:
+        raise ValueError("The dynamics can only be linearized with a nonzero airspeed in the body x-z plane")
+    Va = np.sqrt(uw2 + v**2)
+    alpha = np.arctan2(w, u)
+    beta = np.arctan2(v, np.sqrt(uw2))
+
+    # partials of the forces and moments wrt (Va, alpha, beta, p, q, r) and the input
+    dfm_dy, dfm_ddelta = _forces_moments_partials(Va, alpha, beta, p, q, r, delta)
+
+    # chain rule through (Va, alpha, beta), which only depend on the body velocity
+    dy_dx = np.zeros((6, IND_EULER.NUM_STATES))
+    dy_dx[0, IND_EULER.VEL] = [u/Va, v/Va, w/Va]
+    dy_dx[1, IND_EULER.U] = -w/uw2
+    dy_dx[1, IND_EULER.W] = u/uw2
+    dy_dx[2, IND_EULER.VEL] = [-u*v/(Va**2*np.sqrt(uw2)), np.sqrt(uw2)/Va**2, -w*v/(Va**2*np.sqrt(uw2))]
+    dy_dx[3:6, IND_EULER.ANG_VEL] = np.eye(3)
+    dfm_dx = dfm_dy @ dy_dx
+
+    # gravity in the body frame, mg*(-s_theta, c_theta*s_phi, c_theta*c_phi)
+    sp, cp = np.sin(st.phi), np.cos(st.phi)
+    sth, cth = np.sin(st.theta), np.cos(st.theta)
+    sps, cps = np.sin(st.psi), np.cos(st.psi)
+    mg = MAV.mass * MAV.gravity
+    dfm_dx[0:3, IND_EULER.PHI] += [0., mg*cth*cp, -mg*cth*sp]
+    dfm_dx[0:3, IND_EULER.THETA] += [-mg*cth, -mg*sth*sp, -mg*sth*cp]
+
+    A = np.zeros((IND_EULER.NUM_STATES, IND_EULER.NUM_STATES))
+    B = np.zeros((IND_EULER.NUM_STATES, 4))
+
+    # position kinematics, R(phi, theta, psi) @ [u, v, w]
+    vel = x_euler[IND_EULER.VEL]
+    dR_dphi = np.array([[0., cp*sth*cps + sp*sps, -sp*sth*cps + cp*sps],
+                        [0., cp*sth*sps - sp*cps, -sp*sth*sps - cp*cps],
+                        [0., cp*cth, -sp*cth]])
+    dR_dtheta = np.array([[-sth*cps, sp*cth*cps, cp*cth*cps],
+                          [-sth*sps, sp*cth*sps, cp*cth*sps],
+                          [-cth, -sp*sth, -cp*sth]])
+    dR_dpsi = np.array([[-cth*sps, -sp*sth*sps - cp*cps, -cp*sth*sps + sp*cps],
+                        [cth*cps, sp*sth*cps - cp*sps, cp*sth*cps + sp*sps],
+                        [0., 0., 0.]])
+    A[0:3, IND_EULER.VEL] = Euler2Rotation(st.phi, st.theta, st.psi)
+    A[0:3, IND_EULER.PHI] = (dR_dphi @ vel)[:, 0]
+    A[0:3, IND_EULER.THETA] = (dR_dtheta @ vel)[:, 0]
+    A[0:3, IND_EULER.PSI] = (dR_dpsi @ vel)[:, 0]
+
+    # translational dynamics
+    A[IND_EULER.VEL, :] = dfm_dx[0:3] / MAV.mass
+    A[IND_EULER.U, [IND_EULER.V, IND_EULER.W, IND_EULER.Q, IND_EULER.R]] += [r, -q, -w, v]
+    A[IND_EULER.V, [IND_EULER.U, IND_EULER.W, IND_EULER.P, IND_EULER.R]] += [-r, p, w, -u]
+    A[IND_EULER.W, [IND_EULER.U, IND_EULER.V, IND_EULER.P, IND_EULER.Q]] += [q, -p, -v, u]
+    B[IND_EULER.VEL, :] = dfm_ddelta[0:3] / MAV.mass
+
+    # rotational kinematics
+    tth = sth / cth
+    A[IND_EULER.PHI, [IND_EULER.PHI, IND_EULER.THETA, IND_EULER.P, IND_EULER.Q, IND_EULER.R]] = \
+        [(q*cp - r*sp)*tth, (q*sp + r*cp)/cth**2, 1., sp*tth, cp*tth]
+    A[IND_EULER.THETA, [IND_EULER.PHI, IND_EULER.Q, IND_EULER.R]] = [-q*sp - r*cp, cp, -sp]
+    A[IND_EULER.PSI, [IND_EULER.PHI, IND_EULER.THETA, IND_EULER.Q, IND_EULER.R]] = \
+        [(q*cp - r*sp)/cth, (q*sp + r*cp)*sth/cth**2, sp/cth, cp/cth]
+
+    # rotational dynamics
+    A[IND_EULER.P, :] = MAV.gamma3*dfm_dx[3] + MAV.gamma4*dfm_dx[5]
+    A[IND_EULER.P, IND_EULER.ANG_VEL] += [MAV.gamma1*q, MAV.gamma1*p - MAV.gamma2*r, -MAV.gamma2*q]
+    A[IND_EULER.Q, :] = dfm_dx[4] / MAV.Jy
+    A[IND_EULER.Q, IND_EULER.ANG_VEL] += [MAV.gamma5*r - 2.*MAV.gamma6*p, 0., MAV.gamma5*p + 2.*MAV.gamma6*r]
+    A[IND_EULER.R, :] = MAV.gamma4*dfm_dx[3] + MAV.gamma8*dfm_dx[5]
+    A[IND_EULER.R, IND_EULER.ANG_VEL] += [MAV.gamma7*q, MAV.gamma7*p - MAV.gamma1*r, -MAV.gamma1*q]
+    B[IND_EULER.P, :] = MAV.gamma3*dfm_ddelta[3] + MAV.gamma4*dfm_ddelta[5]
+    B[IND_EULER.Q, :] = dfm_ddelta[4] / MAV.Jy
+    B[IND_EULER.R, :] = MAV.gamma4*dfm_ddelta[3] + MAV.gamma8*dfm_ddelta[5]
+    return A, B
+
+def _forces_moments_partials(Va: float, alpha: float, beta: float, p: float, q: float, r: float,
+                             delta: MsgDelta) -> tuple[npt.NDArray[Any], npt.NDArray[Any]]:
+    """
+    partials of the aerodynamic and propulsion forces and moments of forces_moments (without gravity)
+
+    Returns:
+        dfm_dy: 6x6 partial of (fx, fy, fz, l, m, n) wrt (Va, alpha, beta, p, q, r)
+        dfm_ddelta: 6x4 partial of (fx, fy, fz, l, m, n) wrt (elevator, aileron, rudder, throttle)
+    """
+    # pylint: disable=too-many-arguments,too-many-locals
+    k = 0.5 * MAV.rho * MAV.S_wing
+    ca = np.cos(alpha)
+    sa = np.sin(alpha)
+
+    # lift and drag coefficients (4.9 - 4.11) and their partials wrt alpha
+    tmp1 = np.exp(-MAV.M * (alpha - MAV.alpha0))
+    tmp2 = np.exp(MAV.M * (alpha + MAV.alpha0))
+    den = (1 + tmp1) * (1 + tmp2)
+    sigma = (1 + tmp1 + tmp2) / den
+    dsigma = (MAV.M*(tmp2 - tmp1)*den - (1 + tmp1 + tmp2)*MAV.M*(tmp2*(1 + tmp1) - tmp1*(1 + tmp2))) / den**2
+    CL_lin = MAV.C_L_0 + MAV.C_L_alpha * alpha
+    CL_plate = 2 * np.sign(alpha) * sa**2 * ca
+    CL = (1 - sigma) * CL_lin + sigma * CL_plate
+    dCL = -dsigma * CL_lin + (1 - sigma) * MAV.C_L_alpha + dsigma * CL_plate \
+        + sigma * 2 * np.sign(alpha) * (2 * sa * ca**2 - sa**3)
+    CD = MAV.C_D_p + CL_lin**2 / (np.pi * MAV.e * MAV.AR)
+    dCD = 2 * MAV.C_L_alpha * CL_lin / (np.pi * MAV.e * MAV.AR)
+
+    # lift, drag, and pitching moment as k*(Va^2*(C + C_de*elevator) + Va*C_q*q*c/2)
+    lift = k * (Va**2 * (CL + MAV.C_L_delta_e*delta.elevator) + Va*MAV.C_L_q*q*MAV.c/2)
+    drag = k * (Va**2 * (CD + MAV.C_D_delta_e*delta.elevator) + Va*MAV.C_D_q*q*MAV.c/2)
+    dlift = k * np.array([2*Va*(CL + MAV.C_L_delta_e*delta.elevator) + MAV.C_L_q*q*MAV.c/2,  # Va
+                          Va**2*dCL, Va*MAV.C_L_q*MAV.c/2, Va**2*MAV.C_L_delta_e])          # alpha, q, elevator
+    ddrag = k * np.array([2*Va*(CD + MAV.C_D_delta_e*delta.elevator) + MAV.C_D_q*q*MAV.c/2,
+                          Va**2*dCD, Va*MAV.C_D_q*MAV.c/2, Va**2*MAV.C_D_delta_e])
+    Cm = MAV.C_m_0 + MAV.C_m_alpha*alpha + MAV.C_m_delta_e*delta.elevator
+    dmoment = k * MAV.c * np.array([2*Va*Cm + MAV.C_m_q*q*MAV.c/2,
+                                    Va**2*MAV.C_m_alpha, Va*MAV.C_m_q*MAV.c/2, Va**2*MAV.C_m_delta_e])
+
+    # body forces fx = -ca*drag + sa*lift, fz = -sa*drag - ca*lift
+    dfx = -ca*ddrag + sa*dlift
+    dfz = -sa*ddrag - ca*dlift
+    dfx[1] += sa*drag + ca*lift
+    dfz[1] += -ca*drag + sa*lift
+
+    # lateral force and moments as k*scale*(Va^2*(C_0 + C_beta*beta + C_da*aileron + C_dr*rudder) + Va*b/2*(C_p*p + C_r*r))
+    def lateral(scale: float, C_0: float, C_beta: float, C_p: float, C_r: float, C_da: float, C_dr: float) \
+            -> npt.NDArray[Any]:
+        """partials wrt (Va, beta, p, r, aileron, rudder)"""
+        static = C_0 + C_beta*beta + C_da*delta.aileron + C_dr*delta.rudder
+        rates = C_p*p + C_r*r
+        return k * scale * np.array([2*Va*static + MAV.b/2*rates, Va**2*C_beta,
+                                     Va*MAV.b/2*C_p, Va*MAV.b/2*C_r, Va**2*C_da, Va**2*C_dr])
+    dfy = lateral(1., MAV.C_Y_0, MAV.C_Y_beta, MAV.C_Y_p, MAV.C_Y_r, MAV.C_Y_delta_a, MAV.C_Y_delta_r)
+    dell = lateral(MAV.b, MAV.C_ell_0, MAV.C_ell_beta, MAV.C_ell_p, MAV.C_ell_r, MAV.C_ell_delta_a, MAV.C_ell_delta_r)
+    dn = lateral(MAV.b, MAV.C_n_0, MAV.C_n_beta, MAV.C_n_p, MAV.C_n_r, MAV.C_n_delta_a, MAV.C_n_delta_r)
+
+    # propeller thrust along body x and torque about body x
+    dT_dVa_, dT_ddt, dQ_dVa, dQ_ddt = default_propulsion_model().partials(Va, delta.throttle)
+
+    #                    Va                  alpha     beta     p        q        r
+    dfm_dy = np.array([[dfx[0] + dT_dVa_,    dfx[1],   0.,      0.,      dfx[2],  0.],
+                       [dfy[0],              0.,       dfy[1],  dfy[2],  0.,      dfy[3]],
+                       [dfz[0],              dfz[1],   0.,      0.,      dfz[2],  0.],
+                       [dell[0] - dQ_dVa,    0.,       dell[1], dell[2], 0.,      dell[3]],
+                       [dmoment[0],          dmoment[1], 0.,    0.,      dmoment[2], 0.],
+                       [dn[0],               0.,       dn[1],   dn[2],   0.,      dn[3]]])
+    #                       elevator     aileron  rudder   throttle
+    dfm_ddelta = np.array([[dfx[3],      0.,      0.,      dT_ddt],
+                           [0.,          dfy[4],  dfy[5],  0.],
+                           [dfz[3],      0.,      0.,      0.],
+                           [0.,          dell[4], dell[5], -dQ_ddt],
+                           [dmoment[3],  0.,      0.,      0.],
+                           [0.,          dn[4],   dn[5],   0.]])
+    return dfm_dy, dfm_ddelta
 
 def dT_dVa(Va: float, delta_t: float) -> float:
     """
-    returns the numeric derivative of motor thrust with respect to Va
+    returns the derivative of motor thrust with respect to Va
 
     Args:
         Va: Airspeed
         delta_t: Throttle command
 
     Returns:
-        dT_dVa: numeric partial of motor thrust wrt Va
+        dT_dVa: closed form partial of motor thrust wrt Va
     """
-    eps = 0.01
-    T_eps, _ = motor_thrust_torque(Va+eps, delta_t)
-    T, _ = motor_thrust_torque(Va, delta_t)
-    return (T_eps - T) / eps
+    return float(default_propulsion_model().partials(Va, delta_t)[0])
 
 def dT_ddelta_t(Va: float, delta_t: float) -> float:
     """
-    returns the numeric derivative of motor thrust with respect to delta_t
+    returns the derivative of motor thrust with respect to delta_t
 
     Args:
         Va: Airspeed
         delta_t: Throttle command
 
     Returns:
-        dT_ddelta_t: numeric partial of motor thrust wrt delta_t
+        dT_ddelta_t: closed form partial of motor thrust wrt delta_t
     """
-    eps = 0.01
-    T_eps, _ = motor_thrust_torque(Va, delta_t+eps)
-    T, _ = motor_thrust_torque(Va, delta_t)
-    return (T_eps - T) / eps
+    return float(default_propulsion_model().partials(Va, delta_t)[1])
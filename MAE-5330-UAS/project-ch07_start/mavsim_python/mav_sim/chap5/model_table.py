@@ -0,0 +1,205 @@
+"""
+model_table
+    - Linearizes the trim points of a trim envelope in parallel
+    - Stores the state space models and transfer function coefficients of every point in one
+      contiguous table that is saved to a binary .npz file and interpolated at runtime
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
+
+import numpy as np
+import numpy.typing as npt
+from mav_sim.chap5.compute_models import compute_ss_model, compute_tf_model
+from mav_sim.chap5.trim_cache import airframe_hash
+from mav_sim.message_types.msg_delta import MsgDelta
+
+# Names of the transfer function coefficients, in the order returned by compute_tf_model
+TF_FIELDS: tuple[str, ...] = ("Va_trim", "alpha_trim", "theta_trim", "a_phi1", "a_phi2", "a_theta1", "a_theta2",
+                              "a_theta3", "a_V1", "a_V2", "a_V3")
+
+# Channels of each table entry, the matrices are stored row major
+CHANNELS: dict[str, slice] = {
+    "A_lon": slice(0, 25),
+    "B_lon": slice(25, 35),
+    "A_lat": slice(35, 60),
+    "B_lat": slice(60, 70),
+    "tf": slice(70, 70 + len(TF_FIELDS)),
+}
+NUM_CHANNELS = 70 + len(TF_FIELDS)
+
+def linearize_point(state: npt.NDArray[Any], delta: npt.NDArray[Any]) -> npt.NDArray[Any]:
+    """Computes the table entry of a single trim point
+
+    Args:
+        state: 13 element trim state
+        delta: trim input (elevator, aileron, rudder, throttle)
+
+    Returns:
+        channels: NUM_CHANNELS element entry, see CHANNELS
+    """
+    trim_state = np.reshape(state, (13, 1))
+    trim_input = MsgDelta(elevator=delta[0], aileron=delta[1], rudder=delta[2], throttle=delta[3])
+    A_lon, B_lon, A_lat, B_lat = compute_ss_model(trim_state, trim_input)
+    return np.concatenate((A_lon.ravel(), B_lon.ravel(), A_lat.ravel(), B_lat.ravel(),
+                           compute_tf_model(trim_state, trim_input)))
+
+def _linearize_points(states: npt.NDArray[Any], deltas: npt.NDArray[Any]) -> npt.NDArray[Any]:
+    """Computes the table entries of a block of trim points"""
+    return np.array([linearize_point(state, delta) for state, delta in zip(states, deltas)])
+
+class ModelTable:
+    """Linear models over a (Va, gamma, curvature) grid, where the curvature is 1/R
+
+    The entries are stored in a single (len(Va), len(gamma), len(curvature), NUM_CHANNELS) array.
+    Lookups interpolate multilinearly between the surrounding grid points and clamp to the edge
+    of the grid. On evenly spaced axes the cell is found arithmetically, so a lookup costs the same
+    regardless of the size of the table. Points whose trim did not converge hold NaN.
+    """
+    def __init__(self, Va: npt.NDArray[Any], gamma: npt.NDArray[Any], curvature: npt.NDArray[Any],
+                 data: npt.NDArray[Any], airframe: Optional[str] = None) -> None:
+        """Stores the table
+
+        Args:
+            Va: Increasing air speeds of the grid
+            gamma: Increasing flight path angles of the grid
+            curvature: Increasing curvatures (1/R) of the grid, 0 corresponds to a straight line
+            data: Table entries, see CHANNELS
+            airframe: Hash of the airframe the table was computed for, defaults to airframe_hash()
+        """
+        self.axes = tuple(np.asarray(axis, dtype=float) for axis in (Va, gamma, curvature))
+        if data.shape != tuple(axis.size for axis in self.axes) + (NUM_CHANNELS,):
+            raise ValueError("data must have shape (len(Va), len(gamma), len(curvature), " + str(NUM_CHANNELS) + ")")
+        for axis in self.axes:
+            if axis.ndim != 1 or axis.size == 0 or np.any(np.diff(axis) <= 0.):
+                raise ValueError("The axes of the table must be non-empty and increasing")
+        self.data = np.ascontiguousarray(data, dtype=float)
+        self.airframe = airframe if airframe is not None else airframe_hash()
+
+        # spacing of evenly spaced axes, zero for uneven axes
+        self._spacing = [0. if axis.size < 2 or not np.allclose(np.diff(axis), axis[1] - axis[0]) else
+                         float(axis[1] - axis[0]) for axis in self.axes]
+
+    @property
+    def Va(self) -> npt.NDArray[Any]:
+        """Air speeds of the grid"""
+        return self.axes[0]
+
+    @property
+    def gamma(self) -> npt.NDArray[Any]:
+        """Flight path angles of the grid"""
+        return self.axes[1]
+
+    @property
+    def curvature(self) -> npt.NDArray[Any]:
+        """Curvatures (1/R) of the grid"""
+        return self.axes[2]
+
+    def interpolate(self, Va: float, gamma: float = 0., R: float = np.inf) -> npt.NDArray[Any]:
+        """Interpolates the table entry at a flight condition
+
+        Args:
+            Va: air speed
+            gamma: flight path angle
+            R: radius - np.inf corresponds to a straight line
+
+        Returns:
+            channels: NUM_CHANNELS element entry, see CHANNELS
+        """
+        entry = self.data
+        for axis, spacing, value in zip(self.axes, self._spacing, (Va, gamma, 1./R)):
+            index, weight = _cell(axis, spacing, value)
+            # blend the two neighboring slices of the leading axis, leaving the remaining axes
+            entry = entry[index] if weight == 0. else (1. - weight)*entry[index] + weight*entry[index + 1]
+        return entry
+
+    def ss_model(self, Va: float, gamma: float = 0., R: float = np.inf) -> tuple[npt.NDArray[Any], ...]:
+        """Interpolates the state space models, see compute_ss_model
+
+        Returns:
+            A_lon, B_lon, A_lat, B_lat
+        """
+        entry = self.interpolate(Va, gamma, R)
+        return (np.reshape(entry[CHANNELS["A_lon"]], (5, 5)), np.reshape(entry[CHANNELS["B_lon"]], (5, 2)),
+                np.reshape(entry[CHANNELS["A_lat"]], (5, 5)), np.reshape(entry[CHANNELS["B_lat"]], (5, 2)))
+
+    def tf_model(self, Va: float, gamma: float = 0., R: float = np.inf) -> dict[str, float]:
+        """Interpolates the transfer function coefficients, see compute_tf_model
+
+        Returns:
+            coefficients: Coefficients keyed by the names in TF_FIELDS
+        """
+        entry = self.interpolate(Va, gamma, R)[CHANNELS["tf"]]
+        return {name: float(value) for name, value in zip(TF_FIELDS, entry)}
+
+    def save(self, path: str) -> None:
+        """Writes the axes and the entries to an uncompressed .npz file
+
+        Args:
+            path: Name of the file to write
+        """
+        np.savez(path, Va=self.Va, gamma=self.gamma, curvature=self.curvature, data=self.data,
+                 airframe=np.array(self.airframe))
+
+    @staticmethod
+    def load(path: str) -> 'ModelTable':
+        """Reads a table written by save()
+
+        Args:
+            path: Name of the file to read
+        """
+        with np.load(path) as archive:
+            return ModelTable(archive["Va"], archive["gamma"], archive["curvature"], archive["data"],
+                              str(archive["airframe"]))
+
+def _cell(axis: npt.NDArray[Any], spacing: float, value: float) -> tuple[int, float]:
+    """Returns the index of the grid cell holding the value and the weight of its upper corner,
+    values outside of the axis are clamped to its ends"""
+    if axis.size == 1 or value <= axis[0]:
+        return 0, 0.
+    if value >= axis[-1]:
+        return axis.size - 1, 0.
+    if spacing > 0.:
+        index = min(int((value - axis[0]) / spacing), axis.size - 2)
+    else:
+        index = int(np.searchsorted(axis, value, side="right")) - 1
+    return index, float((value - axis[index]) / (axis[index + 1] - axis[index]))
+
+def linearize_envelope(envelope: npt.NDArray[Any], max_workers: Optional[int] = None) -> ModelTable:
+    """Linearizes every converged point of a trim envelope
+
+    Args:
+        envelope: Result of trim_envelope with increasing Va and gamma axes
+        max_workers: Number of worker processes, defaults to the number of cores. With one worker the
+            points are linearized in the calling process.
+
+    Returns:
+        table: Linear models over the grid of the envelope
+    """
+    Va = envelope["Va"][:, 0, 0]
+    gamma = envelope["gamma"][0, :, 0]
+    curvature = 1. / envelope["R"][0, 0, :]
+
+    # order the turns by curvature, the straight line has zero curvature
+    order = np.argsort(curvature)
+    envelope = envelope[:, :, order]
+    curvature = curvature[order]
+
+    points = envelope.reshape(-1)
+    converged = np.flatnonzero(points["converged"])
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers == 1 or converged.size < 2:
+        entries = _linearize_points(points["state"][converged], points["delta"][converged])
+    else:
+        blocks = np.array_split(converged, min(max_workers*4, converged.size))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            entries = np.concatenate(list(executor.map(_linearize_points, [points["state"][block] for block in blocks],
+                                                       [points["delta"][block] for block in blocks])))
+
+    data = np.full((points.size, NUM_CHANNELS), np.nan)
+    data[converged] = entries
+    return ModelTable(Va, gamma, curvature, data.reshape(envelope.shape + (NUM_CHANNELS,)))
@@ -16,10 +16,20 @@ from mav_sim.chap3.mav_dynamics_euler import (
     quat_state_to_euler_state,
 )
 from mav_sim.chap4.mav_dynamics import forces_moments, update_velocity_data
+from mav_sim.chap5.compute_models import euler_jacobians
 from mav_sim.message_types.msg_delta import MsgDelta
 from mav_sim.tools import types
-from scipy.optimize import Bounds, minimize
+from scipy.optimize import Bounds, OptimizeResult, minimize
 
+# Weights on the squared dynamics error of trim_objective_fun, the x-y position is neglected and
+# the weight on psi is given by the psi_weight argument
+TRIM_WEIGHTS: npt.NDArray[Any] = np.ones((IND_EULER.NUM_STATES, ))
+TRIM_WEIGHTS[IND_EULER.NORTH] = 0.
+TRIM_WEIGHTS[IND_EULER.EAST] = 0.
+
+# Revision of the trim solver, increase it whenever compute_trim can return a different solution
+# (objective, constraints, bounds, or optimizer settings) so that stored solutions are not reused
+TRIM_SOLVER_VERSION = 1
 
 def compute_trim(state0: types.DynamicState, Va: float, gamma: float, R: float = np.inf) -> tuple[types.DynamicState, MsgDelta]:
     """Compute the trim equilibrium given the airspeed and flight path angle
@@ -62,6 +72,30 @@ def compute_trim_euler(state0: types.DynamicStateEuler, Va: float, gamma: float,
     delta0 = MsgDelta(elevator=0., aileron=0., rudder=0., throttle=0.5)
     x0 = np.concatenate((state0, delta0.to_array()), axis=0)
 
+    # solve the minimization problem to find the trim states and inputs
+    res = solve_trim(x0=x0, Va=Va, gamma=gamma, R=R)
+
+    # extract trim state and input and return
+    trim_state, trim_input = extract_state_input(res.x)
+    return np.array([trim_state]).T, trim_input
+
+def solve_trim(x0: types.NP_MAT, Va: float, gamma: float, R: float, analytic_gradient: bool = True) -> OptimizeResult:
+    """Solves for the trim equilibrium starting from a guess of both the state and the input
+
+    Args:
+        x0: Initial guess of the Euler state and inputs combined into a single vector
+            [pn, pe, pd, u, v, w, phi, theta, psi, p, q, r, delta_e, delta_a, delta_r, delta_t].
+            The position and heading of the guess are kept fixed.
+        Va: air speed
+        gamma: flight path angle
+        R: radius - np.inf corresponds to a straight line
+        analytic_gradient: True => trim_objective_jac is passed to SLSQP, False => SLSQP uses finite differences
+
+    Returns:
+        res: Result of the optimization, res.x is the trim state and input as a single vector
+    """
+    x0 = np.reshape(x0, (-1,))
+
     # define equality constraints
     cons = ({'type': 'eq',
              'fun': lambda x: np.array([
@@ -74,20 +108,14 @@ def compute_trim_euler(state0: types.DynamicStateEuler, Va: float, gamma: float,
              })
     # Define the bounds
     eps = 1e-12 # Small number to force equality constraint to be feasible during optimization (bug in scipy)
-    lb, ub = variable_bounds(state0=state0, eps=eps)
+    lb, ub = variable_bounds(state0=np.reshape(x0[0:IND_EULER.NUM_STATES], (-1, 1)), eps=eps)
 
     # solve the minimization problem to find the trim states and inputs
     psi_weight = 100000. # Weight on convergence of psi
-    res = minimize(trim_objective_fun, x0[:,0], method='SLSQP', args=(Va, gamma, R, psi_weight), bounds=Bounds(lb=lb, ub=ub),
-                   constraints=cons, options={'ftol': 1e-10, 'disp': False})
-
-    # extract trim state and input and return
-    trim_state = np.array([res.x[0:12]]).T
-    trim_input = MsgDelta(elevator=res.x.item(12),
-                          aileron=res.x.item(13),
-                          rudder=res.x.item(14),
-                          throttle=res.x.item(15))
-    return trim_state, trim_input
+    res: OptimizeResult = minimize(trim_objective_fun, x0, method='SLSQP', args=(Va, gamma, R, psi_weight),
+                                   jac=trim_objective_jac if analytic_gradient else None, bounds=Bounds(lb=lb, ub=ub),
+                                   constraints=cons, options={'ftol': 1e-10, 'disp': False})
+    return res
 
 def extract_state_input(x: types.NP_MAT) -> tuple[types.NP_MAT, MsgDelta]:
     """Extracts a state vector and control message from the aggregate vector
@@ -182,14 +210,63 @@ def trim_objective_fun(x: types.NP_MAT, Va: float, gamma: float, R: float, psi_w
     Returns:
         J: resulting cost of the current parameters
     """
+    # Calculate the difference between the desired and actual dynamics
+    error, _, _ = trim_dynamics_error(x, Va, gamma, R)
+
+    # Calculate the weighted square of the difference (neglecting pn and pe)
+    # Put an emphasis on the \dot{psi} to get to desired radius
+    weighted = TRIM_WEIGHTS * error
+    weighted[IND_EULER.PSI] *= psi_weight
+    return float(weighted @ error)
+
+def trim_objective_jac(x: types.NP_MAT, Va: float, gamma: float, R: float, psi_weight: float) -> npt.NDArray[Any]:
+    """Calculates the gradient of trim_objective_fun with respect to x
+
+    The desired dynamics do not depend on x, so the gradient is -2 (Q e)^T [df/dx, df/du] where e is
+    the dynamics error and df/dx, df/du are the closed form Jacobians of euler_jacobians
+
+    Args:
+        x: current state and inputs combined into a single vector
+            [pn, pe, pd, u, v, w, phi, theta, psi, p, q, r, delta_e, delta_a, delta_r, delta_t]
+        Va: relative wind vector magnitude
+        gamma: flight path angle
+        R: radius - np.inf corresponds to a straight line
+
+    Returns:
+        dJ_dx: 16 element gradient of the cost
+    """
+    error, state, delta = trim_dynamics_error(x, Va, gamma, R)
+    A, B = euler_jacobians(state, delta)
+    weighted = TRIM_WEIGHTS * error
+    weighted[IND_EULER.PSI] *= psi_weight
+    gradient: npt.NDArray[Any] = -2. * np.concatenate((weighted @ A, weighted @ B))
+    return gradient
+
+def trim_dynamics_error(x: types.NP_MAT, Va: float, gamma: float, R: float) \
+        -> tuple[npt.NDArray[Any], types.NP_MAT, MsgDelta]:
+    """Calculates the desired trim trajectory dynamics subtract the actual dynamics
+
+    Args:
+        x: current state and inputs combined into a single vector
+            [pn, pe, pd, u, v, w, phi, theta, psi, p, q, r, delta_e, delta_a, delta_r, delta_t]
+        Va: relative wind vector magnitude
+        gamma: flight path angle
+        R: radius - np.inf corresponds to a straight line
+
+    Returns:
+        error: 12 element difference of the dynamics
+        state: Euler state extracted from x
+        delta: Control command extracted from x
+    """
     # Extract the state and input
     state, delta = extract_state_input(x)
+    state = np.reshape(state, (IND_EULER.NUM_STATES, 1))
 
     # Calculate the desired trim trajectory dynamics
-    desired_trim_state_dot = np.zeros((IND_EULER.NUM_STATES,1))
-    desired_trim_state_dot[IND_EULER.DOWN,0] = -Va*np.sin(gamma)
+    desired_trim_state_dot = np.zeros((IND_EULER.NUM_STATES, ))
+    desired_trim_state_dot[IND_EULER.DOWN] = -Va*np.sin(gamma)
     if not np.isinf(R):
-        desired_trim_state_dot[IND_EULER.PSI,0] = Va/R*np.cos(gamma)
+        desired_trim_state_dot[IND_EULER.PSI] = Va/R*np.cos(gamma)
 
     # Calculate forces
     state_quat = euler_state_to_quat_state(state)
@@ -198,16 +275,4 @@ def trim_objective_fun(x: types.NP_MAT, Va: float, gamma: float, R: float, psi_w
 
     # Calculate the dynamics based upon the current state and input
     f = derivatives_euler(state, forces_moments_vec)
-
-    # Calculate the difference between the desired and actual
-    delta: npt.NDArray[Any] = np.reshape(desired_trim_state_dot - f, (IND_EULER.NUM_STATES,1))
-
-    # Calculate the square of the difference (neglecting pn and pe)
-    # Put an emphasis on the \dot{psi} to get to desired radius
-    q = np.ones((IND_EULER.NUM_STATES, ))
-    q[IND_EULER.NORTH] = 0.
-    q[IND_EULER.EAST] = 0.
-    q[IND_EULER.PSI] = psi_weight
-    Q = np.diag(q)
-    J = delta.transpose() @ Q @ delta
-    return float( J )
+    return desired_trim_state_dot - f[:, 0], state, delta
@@ -0,0 +1,202 @@
+"""
+trim_cache
+    - Stores the results of compute_trim in memory (LRU) and, optionally, on disk
+    - Entries are keyed by the flight condition, the initial guess, a hash of the
+      aerosonde_parameters values, and a tag of the solver so that changing the airframe,
+      compute_trim, or scipy invalidates the cache
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+import hashlib
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from types import ModuleType
+from typing import Optional
+
+import mav_sim.parameters.aerosonde_parameters as MAV
+import numpy as np
+import scipy
+from mav_sim.chap5.trim import TRIM_SOLVER_VERSION, compute_trim
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.tools import types
+
+TrimKey = tuple[str, str, float, float, float, str] # (solver tag, airframe hash, Va, gamma, R, initial guess hash)
+TrimEntry = tuple[types.DynamicState, MsgDelta]
+
+def solver_tag() -> str:
+    """Identifies the solver behind compute_trim, the revision of compute_trim and the scipy version"""
+    return "compute_trim " + str(TRIM_SOLVER_VERSION) + ", scipy " + str(scipy.__version__)
+
+def airframe_hash(params: ModuleType = MAV) -> str:
+    """Hashes the numeric values of a parameter module
+
+    Args:
+        params: Module defining the airframe, defaults to aerosonde_parameters
+
+    Returns:
+        sha256 hex digest of the sorted (name, value) pairs
+    """
+    digest = hashlib.sha256()
+    for name in sorted(vars(params)):
+        value = getattr(params, name)
+        if name.startswith("_") or isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float, np.number)):
+            digest.update((name + "=" + repr(float(value)) + ";").encode())
+        elif isinstance(value, np.ndarray):
+            digest.update((name + "=").encode())
+            digest.update(np.ascontiguousarray(value, dtype=float).tobytes())
+    return digest.hexdigest()
+
+class TrimCacheStats:
+    """Counts of the cache lookups and the time spent solving for trim
+    """
+    def __init__(self) -> None:
+        self.hits: int = 0 # Lookups answered from memory
+        self.disk_hits: int = 0 # Lookups answered from the on-disk store
+        self.misses: int = 0 # Lookups that required a solve
+        self.solve_time: float = 0. # Total time spent in compute_trim (s)
+        self.last_solve_time: float = 0. # Time of the most recent solve (s)
+
+    def __str__(self) -> str:
+        """Create a one line summary of the counts"""
+        return "trim cache: hits = " + str(self.hits) + ", disk hits = " + str(self.disk_hits) + \
+            ", misses = " + str(self.misses) + ", solve time = " + f"{self.solve_time:.3f}" + " s"
+
+class TrimCache:
+    """Caches trim solutions of compute_trim
+
+    Lookups check an in-memory LRU store and then, when a directory is given, one .npz file per
+    entry in that directory. Misses are solved with compute_trim and written to both.
+    """
+    def __init__(self, maxsize: int = 128, directory: Optional[str] = None, airframe: Optional[str] = None,
+                 solver: Optional[str] = None) -> None:
+        """Creates an empty cache
+
+        Args:
+            maxsize: Number of entries kept in memory
+            directory: Directory of the on-disk store, entries are only kept in memory when None
+            airframe: Hash identifying the airframe, defaults to airframe_hash()
+            solver: Tag identifying the solver, defaults to solver_tag()
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.directory = directory
+        self.airframe = airframe if airframe is not None else airframe_hash()
+        self.solver = solver if solver is not None else solver_tag()
+        self.stats = TrimCacheStats()
+        self._entries: OrderedDict[TrimKey, TrimEntry] = OrderedDict()
+
+    def compute_trim(self, state0: types.DynamicState, Va: float, gamma: float, R: float = np.inf) \
+            -> tuple[types.DynamicState, MsgDelta]:
+        """Cached version of compute_trim, see mav_sim.chap5.trim.compute_trim
+
+        Args:
+            state0: An initial guess at the state
+            Va: air speed
+            gamma: flight path angle
+            R: radius - np.inf corresponds to a straight line
+
+        Returns:
+            trim_state: The resulting trim trajectory state
+            trim_input: The resulting trim trajectory inputs
+        """
+        key = self.key(state0, Va, gamma, R)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return _copy_entry(entry)
+
+        entry = self._load(key)
+        if entry is not None:
+            self.stats.disk_hits += 1
+        else:
+            start = time.perf_counter()
+            entry = compute_trim(state0, Va, gamma, R)
+            self.stats.last_solve_time = time.perf_counter() - start
+            self.stats.solve_time += self.stats.last_solve_time
+            self.stats.misses += 1
+            self._save(key, entry)
+
+        self._entries[key] = _copy_entry(entry)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def key(self, state0: types.DynamicState, Va: float, gamma: float, R: float) -> TrimKey:
+        """Creates the key of a trim solution, the initial guess enters through a hash as it
+        defines the bounds on position and heading"""
+        guess = hashlib.sha256(np.ascontiguousarray(state0, dtype=float).tobytes()).hexdigest()
+        return (self.solver, self.airframe, float(Va), float(gamma), float(R), guess)
+
+    def clear(self) -> None:
+        """Removes the entries held in memory, the on-disk store is left untouched"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        """Number of entries held in memory"""
+        return len(self._entries)
+
+    def _path(self, key: TrimKey) -> Optional[str]:
+        """File of the on-disk entry, None without a directory"""
+        if self.directory is None:
+            return None
+        name = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, name + ".npz")
+
+    def _load(self, key: TrimKey) -> Optional[TrimEntry]:
+        """Reads an entry from disk, unreadable or mismatched files count as a miss"""
+        path = self._path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if str(data["key"]) != repr(key):
+                    return None
+                trim_state = np.array(data["trim_state"])
+                trim_input = np.array(data["trim_input"])
+        except (OSError, ValueError, KeyError):
+            return None
+        return trim_state, MsgDelta(elevator=trim_input.item(0), aileron=trim_input.item(1),
+                                    rudder=trim_input.item(2), throttle=trim_input.item(3))
+
+    def _save(self, key: TrimKey, entry: TrimEntry) -> None:
+        """Writes an entry to disk, the file is replaced atomically so concurrent readers never
+        see a partial entry"""
+        path = self._path(key)
+        if path is None or self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        handle, tmp_path = tempfile.mkstemp(suffix=".npz", dir=self.directory)
+        try:
+            with os.fdopen(handle, "wb") as file:
+                np.savez(file, key=np.array(repr(key)), trim_state=entry[0], trim_input=entry[1].to_array()[:, 0],
+                         solve_time=np.array(self.stats.last_solve_time))
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+def _copy_entry(entry: TrimEntry) -> TrimEntry:
+    """Copies an entry so callers cannot modify the cached values"""
+    trim_state, trim_input = entry
+    return np.array(trim_state), MsgDelta(elevator=trim_input.elevator, aileron=trim_input.aileron,
+                                          rudder=trim_input.rudder, throttle=trim_input.throttle)
+
+_DEFAULT_CACHE: Optional[TrimCache] = None
+
+def default_trim_cache() -> TrimCache:
+    """Returns the cache shared within the process. Entries are stored on disk in the directory
+    given by the MAV_SIM_TRIM_CACHE environment variable, or in ~/.cache/mav_sim/trim by default.
+    Setting MAV_SIM_TRIM_CACHE to an empty string keeps the entries in memory only."""
+    global _DEFAULT_CACHE # pylint: disable=global-statement
+    if _DEFAULT_CACHE is None:
+        directory: Optional[str] = os.environ.get("MAV_SIM_TRIM_CACHE",
+                                                  os.path.join(os.path.expanduser("~"), ".cache", "mav_sim", "trim"))
+        _DEFAULT_CACHE = TrimCache(directory=directory if directory else None)
+    return _DEFAULT_CACHE
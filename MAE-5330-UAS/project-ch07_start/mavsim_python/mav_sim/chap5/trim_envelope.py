@@ -0,0 +1,130 @@
+"""
+trim_envelope
+    - Computes trim solutions over a grid of airspeed, flight path angle, and turn radius
+    - Each strip of constant (gamma, R) is solved by continuation in airspeed, warm starting
+      every solve from its neighbor, and the strips are spread across a process pool
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Optional
+
+import numpy as np
+import numpy.typing as npt
+from mav_sim.chap3.mav_dynamics import DynamicState
+from mav_sim.chap3.mav_dynamics_euler import (
+    IND_EULER,
+    euler_state_to_quat_state,
+    quat_state_to_euler_state,
+)
+from mav_sim.chap5.trim import solve_trim
+from mav_sim.tools import types
+from scipy.optimize import OptimizeResult
+
+# Fields of each grid point
+TRIM_DTYPE = np.dtype([
+    ("Va", float),              # air speed (m/s)
+    ("gamma", float),           # flight path angle (rad)
+    ("R", float),               # turn radius (m), np.inf for a straight line
+    ("state", float, (13,)),    # trim state, see IND
+    ("delta", float, (4,)),     # trim input (elevator, aileron, rudder, throttle)
+    ("cost", float),            # value of trim_objective_fun at the solution
+    ("iterations", int),        # SLSQP iterations
+    ("converged", bool),        # True => the optimizer succeeded with cost below cost_tol
+])
+
+def trim_envelope(Va: npt.ArrayLike, gamma: npt.ArrayLike, R: npt.ArrayLike = (np.inf,),
+                  state0: Optional[types.DynamicState] = None, cost_tol: float = 1e-3,
+                  max_workers: Optional[int] = None) -> npt.NDArray[Any]:
+    """Computes the trim solution at every point of the (Va, gamma, R) grid
+
+    Args:
+        Va: Air speeds of the grid, in any order
+        gamma: Flight path angles of the grid
+        R: Turn radii of the grid, np.inf corresponds to a straight line
+        state0: Initial guess of the first solve of each strip, also fixes the position and heading
+        cost_tol: Largest trim cost considered converged. Straight line trims reach ~1e-10, turns are
+            only approximately trimmed as variable_bounds fixes p and q to zero.
+        max_workers: Number of worker processes, defaults to the number of cores. With one worker the
+            strips are solved in the calling process.
+
+    Returns:
+        envelope: Structured array of shape (len(Va), len(gamma), len(R)), see TRIM_DTYPE
+    """
+    Va_values = np.asarray(Va, dtype=float)
+    if Va_values.ndim != 1 or Va_values.size == 0 or np.any(Va_values <= 0.):
+        raise ValueError("Va must be a non-empty sequence of positive air speeds")
+    if state0 is None:
+        state0 = DynamicState().convert_to_numpy()
+    gamma_values = np.atleast_1d(np.asarray(gamma, dtype=float))
+    R_values = np.atleast_1d(np.asarray(R, dtype=float))
+    strips = [(float(g), float(r)) for g in gamma_values for r in R_values]
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers == 1 or len(strips) == 1:
+        rows = [trim_strip(Va_values, g, r, state0, cost_tol) for g, r in strips]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rows = list(executor.map(trim_strip, repeat(Va_values), [s[0] for s in strips], [s[1] for s in strips],
+                                     repeat(state0), repeat(cost_tol)))
+
+    envelope = np.zeros((Va_values.size, gamma_values.size, R_values.size), dtype=TRIM_DTYPE)
+    for index, strip in enumerate(rows):
+        envelope[:, index // R_values.size, index % R_values.size] = strip
+    return envelope
+
+def trim_strip(Va: npt.NDArray[Any], gamma: float, R: float, state0: types.DynamicState, cost_tol: float = 1e-3) \
+        -> npt.NDArray[Any]:
+    """Solves for trim along the air speeds of a single (gamma, R) strip by continuation
+
+    The strip starts at the air speed closest to that of state0 and proceeds outward in both
+    directions through the sorted air speeds, each solve starting from the solution of its
+    neighbor. A point that does not converge from its neighbor is retried from state0.
+
+    Args:
+        Va: Air speeds of the strip, in any order. The strip keeps the given order.
+        gamma: flight path angle
+        R: radius - np.inf corresponds to a straight line
+        state0: Initial guess of the first solve
+        cost_tol: Largest trim cost considered converged
+
+    Returns:
+        strip: Structured array with one element per air speed, see TRIM_DTYPE
+    """
+    x_cold = np.concatenate((quat_state_to_euler_state(state0)[:, 0], [0., 0., 0., 0.5]))
+    Va0 = np.linalg.norm(x_cold[IND_EULER.VEL])
+    ascending = np.argsort(Va, kind="stable") # neighbors in the continuation are neighbors in air speed
+    start = int(np.argmin(np.abs(Va[ascending] - Va0)))
+
+    strip = np.zeros(Va.size, dtype=TRIM_DTYPE)
+    x_start = x_cold # the downward walk starts again from the solution at the first point
+    for order in (range(start, Va.size), range(start - 1, -1, -1)):
+        x_guess = x_start
+        for index in order:
+            point = int(ascending[index])
+            res = _solve_point(x_guess, x_cold, Va.item(point), gamma, R, cost_tol)
+            converged = _converged(res, cost_tol)
+            strip[point] = (Va.item(point), gamma, R, euler_state_to_quat_state(np.reshape(res.x[0:12], (-1, 1)))[:, 0],
+                            res.x[12:16], res.fun, res.nit, converged)
+            x_guess = res.x if converged else x_cold
+            if index == start:
+                x_start = x_guess
+    return strip
+
+def _solve_point(x_guess: npt.NDArray[Any], x_cold: npt.NDArray[Any], Va: float, gamma: float, R: float,
+                 cost_tol: float) -> OptimizeResult:
+    """Solves a single grid point from the warm start, falling back to the cold start"""
+    res = solve_trim(x0=x_guess, Va=Va, gamma=gamma, R=R)
+    if not _converged(res, cost_tol) and x_guess is not x_cold:
+        res_cold = solve_trim(x0=x_cold, Va=Va, gamma=gamma, R=R)
+        if _converged(res_cold, cost_tol) or res_cold.fun < res.fun:
+            res = res_cold
+    return res
+
+def _converged(res: OptimizeResult, cost_tol: float) -> bool:
+    """True when the optimizer succeeded and the trim cost is small"""
+    return bool(res.success) and float(res.fun) <= cost_tol
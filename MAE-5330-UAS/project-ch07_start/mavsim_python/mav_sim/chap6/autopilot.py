@@ -28,7 +28,7 @@ class SequentialLoopClosureParameters:
         # Roll from aileron
         self.roll_kp=AP.roll_kp         # Proportional gain
         self.roll_kd=AP.roll_kd         # Derivative gain
-        self.roll_limit=np.radians(45)  # Limit on roll angle (radians)
+        self.roll_limit=np.radians(45)  # Limit on aileron deflection (radians)
 
         # Course from roll
         self.course_kp=AP.course_kp         # Proportional gain
@@ -76,7 +76,7 @@ class Autopilot:
         self.roll_from_aileron = PDControlWithRate( # Section 6.1.1.1
                         kp=gains.roll_kp,
                         kd=gains.roll_kd,
-                        limit=np.radians(45))
+                        limit=gains.roll_limit)
         self.course_from_roll = PIControl( # Section 6.1.1.2
                         kp=gains.course_kp,
                         ki=gains.course_ki,
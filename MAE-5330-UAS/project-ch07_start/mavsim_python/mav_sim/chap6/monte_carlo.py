@@ -0,0 +1,189 @@
+"""
+monte_carlo
+    - Runs the chapter 6 autopilot loop over many gust realizations and initial states
+    - The cases are spread across a process pool and summarized in a single metrics table
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Optional
+
+import mav_sim.parameters.aerosonde_parameters as MAV
+import numpy as np
+import numpy.typing as npt
+from mav_sim.chap3.mav_dynamics import DynamicState
+from mav_sim.chap6.autopilot import SequentialLoopClosureParameters
+from mav_sim.chap6.run_sim import run_sim_headless
+from mav_sim.message_types.msg_gust_params import MsgGustParams
+from mav_sim.message_types.msg_sim_params import MsgSimParams
+from mav_sim.tools.signals import Signals
+from mav_sim.tools.sim_trajectory import SimTrajectory
+
+# Default commands, the square waves of the chapter 6 assignment
+Va_command_mc = Signals(dc_offset=MAV.Va0, amplitude=3.0, start_time=2.0, frequency=0.01)
+altitude_command_mc = Signals(dc_offset=-MAV.down0, amplitude=20.0, start_time=0.0, frequency=0.02)
+course_command_mc = Signals(dc_offset=np.radians(180), amplitude=np.radians(45), start_time=5.0, frequency=0.015)
+
+# Columns of the metrics table
+METRICS_DTYPE = np.dtype([
+    ("case", int),                  # index of the case
+    ("seed", np.uint32),            # seed of the random number generators
+    ("airspeed_rms", float),        # RMS airspeed tracking error (m/s)
+    ("course_rms", float),          # RMS course tracking error (rad)
+    ("altitude_rms", float),        # RMS altitude tracking error (m)
+    ("max_altitude_error", float),  # largest absolute altitude error (m)
+    ("saturation_time", float),     # time with at least one control surface at its limit (s)
+])
+
+class MonteCarloCase:
+    """Defines a single run of the Monte Carlo analysis
+    """
+    def __init__(self, index: int, seed: int, init_state: Optional[DynamicState] = None,
+                 gust_params: Optional[MsgGustParams] = None, Va_command: Optional[Signals] = None,
+                 altitude_command: Optional[Signals] = None, course_command: Optional[Signals] = None) -> None:
+        """Store the case, the default commands and gusts are used for anything that is None
+
+        Args:
+            index: Index of the case in the results table
+            seed: Seed of the random number generators of the run
+            init_state: Initial state of the MAV
+            gust_params: Parameters of the gust model
+            Va_command: Airspeed command signal
+            altitude_command: Altitude command signal
+            course_command: Course command signal
+        """
+        self.index = index
+        self.seed = seed
+        self.init_state = init_state if init_state is not None else DynamicState()
+        self.gust_params = gust_params if gust_params is not None else MsgGustParams()
+        self.Va_command = Va_command if Va_command is not None else Va_command_mc
+        self.altitude_command = altitude_command if altitude_command is not None else altitude_command_mc
+        self.course_command = course_command if course_command is not None else course_command_mc
+
+def generate_cases(num_cases: int, seed: int = 0, altitude_sigma: float = 5., airspeed_sigma: float = 1.,
+                   attitude_sigma: float = np.radians(5.), gust_scale: tuple[float, float] = (0.5, 2.)) \
+                   -> list[MonteCarloCase]:
+    """Creates cases with perturbed initial states and gust intensities
+
+    Each case gets an independent stream from np.random.SeedSequence(seed), so the cases are
+    reproducible and do not depend on how they are distributed over the workers.
+
+    Args:
+        num_cases: Number of cases to create
+        seed: Seed of the whole analysis
+        altitude_sigma: Standard deviation of the initial altitude (m)
+        airspeed_sigma: Standard deviation of the initial body-x velocity (m/s)
+        attitude_sigma: Standard deviation of the initial Euler angles (rad)
+        gust_scale: Range of the uniform scaling applied to the nominal turbulence intensities
+
+    Returns:
+        cases: The perturbed cases
+    """
+    cases: list[MonteCarloCase] = []
+    for index, child in enumerate(np.random.SeedSequence(seed).spawn(num_cases)):
+        rng = np.random.default_rng(child)
+
+        init_state = DynamicState()
+        init_state.down += rng.normal(0., altitude_sigma)
+        init_state.u += rng.normal(0., airspeed_sigma)
+        phi, theta, psi = init_state.extract_euler()
+        d_phi, d_theta, d_psi = rng.normal(0., attitude_sigma, 3)
+        init_state.set_attitude_euler(phi + d_phi, theta + d_theta, psi + d_psi)
+
+        gust_params = MsgGustParams()
+        scale = rng.uniform(gust_scale[0], gust_scale[1])
+        gust_params.sigma_u *= scale
+        gust_params.sigma_v *= scale
+        gust_params.sigma_w *= scale
+
+        cases.append(MonteCarloCase(index, int(child.generate_state(1)[0]), init_state, gust_params))
+    return cases
+
+def compute_metrics(trajectory: SimTrajectory, ts_simulation: float,
+                    gains: Optional[SequentialLoopClosureParameters] = None) -> tuple[float, ...]:
+    """Computes the tracking and saturation metrics of a single run
+
+    Args:
+        trajectory: Trajectory of the run, including commanded states
+        ts_simulation: Time step of the trajectory
+        gains: Autopilot parameters defining the control limits
+
+    Returns:
+        metrics: (airspeed_rms, course_rms, altitude_rms, max_altitude_error, saturation_time)
+    """
+    if gains is None:
+        gains = SequentialLoopClosureParameters()
+    airspeed_error = trajectory.state("Va") - trajectory.command("Va")
+    course_error = trajectory.state("chi") - trajectory.command("chi")
+    course_error = np.arctan2(np.sin(course_error), np.cos(course_error))
+    altitude_error = trajectory.state("altitude") - trajectory.command("altitude")
+
+    # A surface is saturated when it is at the limit enforced by the autopilot
+    tol = 1e-6
+    saturated = (np.abs(trajectory.input("elevator")) >= gains.pitch_limit - tol) | \
+        (np.abs(trajectory.input("aileron")) >= gains.roll_limit - tol) | \
+        (np.abs(trajectory.input("rudder")) >= gains.yaw_limit - tol) | \
+        (trajectory.input("throttle") <= tol) | (trajectory.input("throttle") >= 1. - tol)
+
+    return (float(np.sqrt(np.mean(airspeed_error**2))),
+            float(np.sqrt(np.mean(course_error**2))),
+            float(np.sqrt(np.mean(altitude_error**2))),
+            float(np.max(np.abs(altitude_error))),
+            float(np.count_nonzero(saturated)*ts_simulation))
+
+def run_case(sim: MsgSimParams, case: MonteCarloCase) -> tuple[Any, ...]:
+    """Runs a single case headless and returns its row of the metrics table
+
+    Args:
+        sim: Timing parameters for the simulation
+        case: The case to be run
+
+    Returns:
+        row: Entries of the metrics table, see METRICS_DTYPE
+    """
+    # The signals keep track of their last switch, so each run gets its own copy
+    Va_command, altitude_command, course_command = \
+        copy.deepcopy((case.Va_command, case.altitude_command, case.course_command))
+
+    trajectory = run_sim_headless(sim, init_state=copy.deepcopy(case.init_state), use_wind=True,
+                                  gust_params=case.gust_params, Va_command=Va_command, altitude_command=altitude_command,
+                                  course_command=course_command, seed=case.seed)
+    return (case.index, case.seed) + compute_metrics(trajectory, sim.ts_simulation)
+
+def run_monte_carlo(sim: MsgSimParams, cases: list[MonteCarloCase], max_workers: Optional[int] = None) \
+        -> npt.NDArray[Any]:
+    """Runs all of the cases across a process pool
+
+    Args:
+        sim: Timing parameters shared by all of the cases
+        cases: Cases to be run
+        max_workers: Number of worker processes, defaults to the number of cores. With one worker the
+            cases are run in the calling process.
+
+    Returns:
+        results: Structured array with one row per case, see METRICS_DTYPE
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers == 1:
+        rows = [run_case(sim, case) for case in cases]
+    else:
+        # A few chunks per worker keeps the pool busy without paying the dispatch cost for every case
+        chunksize = max(1, len(cases) // (4*max_workers))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rows = list(executor.map(run_case, repeat(sim), cases, chunksize=chunksize))
+    return np.array(rows, dtype=METRICS_DTYPE)
+
+def format_table(results: npt.NDArray[Any]) -> str:
+    """Creates a printable table of the results followed by the mean and worst case of each metric"""
+    names = results.dtype.names if results.dtype.names is not None else ()
+    lines = ["".join(f"{name:>20s}" for name in names)]
+    for row in results:
+        lines.append(f"{row['case']:>20d}{row['seed']:>20d}" + "".join(f"{row[name]:>20.4f}" for name in names[2:]))
+    lines.append(f"{'mean':>40s}" + "".join(f"{np.mean(results[name]):>20.4f}" for name in names[2:]))
+    lines.append(f"{'max':>40s}" + "".join(f"{np.max(results[name]):>20.4f}" for name in names[2:]))
+    return "\n".join(lines)
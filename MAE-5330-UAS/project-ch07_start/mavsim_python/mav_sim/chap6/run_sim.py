@@ -6,22 +6,31 @@ mavsim_python
         1/22 - GND
 """
 
-from typing import Optional, cast
+from typing import TYPE_CHECKING, Optional, cast
 
 import mav_sim.parameters.aerosonde_parameters as MAV
 import mav_sim.parameters.simulation_parameters as SIM
 import numpy as np
-from mav_sim.chap2.mav_viewer import MavViewer
-from mav_sim.chap3.data_viewer import DataViewer
 from mav_sim.chap3.mav_dynamics import DynamicState
 from mav_sim.chap4.mav_dynamics import MavDynamics
 from mav_sim.chap4.wind_simulation import WindSimulation
 from mav_sim.chap6.autopilot import Autopilot
 from mav_sim.message_types.msg_autopilot import MsgAutopilot
+from mav_sim.message_types.msg_delta import MsgDelta
 from mav_sim.message_types.msg_gust_params import MsgGustParams
 from mav_sim.message_types.msg_sim_params import MsgSimParams
+from mav_sim.message_types.msg_state import MsgState
 from mav_sim.tools import types
+from mav_sim.tools.random_streams import Seed, component_generators
+from mav_sim.tools.scheduler import simulation_schedule
 from mav_sim.tools.signals import Signals
+from mav_sim.tools.sim_trajectory import SimTrajectory
+from mav_sim.tools.trajectory_recorder import TrajectoryRecorder
+
+# The viewers are only imported when used so that the headless simulation does not need Qt
+if TYPE_CHECKING:
+    from mav_sim.chap2.mav_viewer import MavViewer
+    from mav_sim.chap3.data_viewer import DataViewer
 
 # pylint: disable=too-many-arguments
 
@@ -40,11 +49,11 @@ course_command_nom = Signals(dc_offset=MAV.psi0,
                         frequency=0.015)
 
 def run_sim(sim: MsgSimParams, init_state: Optional[DynamicState] = None, \
-        mav_view: Optional[MavViewer] = None, data_view: Optional[DataViewer] = None, \
+        mav_view: Optional['MavViewer'] = None, data_view: Optional['DataViewer'] = None, \
         use_wind: bool = False, gust_params: Optional[MsgGustParams] = None, \
         Va_command: Signals = Va_command_nom, altitude_command: Signals = altitude_command_nom, \
-        course_command: Signals = course_command_nom) \
-        -> tuple[MavViewer, DataViewer]:
+        course_command: Signals = course_command_nom, recorder: Optional[TrajectoryRecorder] = None) \
+        -> tuple['MavViewer', 'DataViewer']:
     """Runs the chapter 6 simulation
 
     Args:
@@ -53,11 +62,15 @@ def run_sim(sim: MsgSimParams, init_state: Optional[DynamicState] = None, \
         mav_view: Viewing window to be used for the mav
         data_view: Viewing window to be used for the states
         use_wind: True => wind will be used, False => no wind
+        recorder: Stores every simulation step when given
 
     Returns:
         mav_view: Viewing window to be used for the mav
         data_view: Viewing window to be used for the states
     """
+    # pylint: disable=import-outside-toplevel
+    from mav_sim.chap2.mav_viewer import MavViewer
+    from mav_sim.chap3.data_viewer import DataViewer
 
     # initialize the visualization
     if mav_view is None:
@@ -68,12 +81,10 @@ def run_sim(sim: MsgSimParams, init_state: Optional[DynamicState] = None, \
     # initialize elements of the architecture
     wind = WindSimulation(SIM.ts_simulation, gust_params)
     mav = MavDynamics(sim.ts_simulation, init_state)
-    autopilot = Autopilot(SIM.ts_simulation)
-
-    # initialize the simulation time
-    sim_time = sim.start_time
-    next_plot_time = sim.ts_plotting
+    autopilot = Autopilot(sim.ts_control)
 
+    # schedule of the components, each runs once every whole number of simulation steps
+    schedule = simulation_schedule(sim)
 
     # Create the default wind
     def current_wind() -> types.WindVector:
@@ -85,23 +96,33 @@ def run_sim(sim: MsgSimParams, init_state: Optional[DynamicState] = None, \
     # autopilot commands
     commands = MsgAutopilot()
 
+    # outputs of the components that run slower than the dynamics, held between their updates
+    delta = MsgDelta()
+    commanded_state = MsgState()
+    estimated_state = mav.true_state
+
     # main simulation loop
-    while sim_time < sim.end_time:
+    for k in range(schedule.num_ticks(sim.end_time)):
+        sim_time = schedule.time(k)
+
         # -------autopilot commands-------------
         commands.airspeed_command = Va_command.square(sim_time)
         commands.course_command = course_command.square(sim_time)
         commands.altitude_command = altitude_command.square(sim_time)
 
         # -------autopilot-------------
-        estimated_state = mav.true_state  # uses true states in the control
-        delta, commanded_state = autopilot.update(commands, estimated_state)
+        if schedule.due("control", k):
+            estimated_state = mav.true_state  # uses true states in the control
+            delta, commanded_state = autopilot.update(commands, estimated_state)
 
         # -------physical system-------------
-        mav.update(delta, current_wind() )  # propagate the MAV dynamics
+        wind_vec = current_wind()
+        if recorder is not None:
+            recorder.record(sim_time, mav.true_state, delta, wind_vec, commanded_state)
+        mav.update(delta, wind_vec)  # propagate the MAV dynamics
 
         # -------update viewer-------------
-        if next_plot_time <= sim_time:
-            next_plot_time += sim.ts_plotting
+        if schedule.due("plot", k):
             mav_view.update(mav.true_state)  # plot body of MAV
             data_view.update(mav.true_state,  # true states
                             estimated_state,  # estimated states
@@ -109,8 +130,65 @@ def run_sim(sim: MsgSimParams, init_state: Optional[DynamicState] = None, \
                             delta,  # input to aircraft
                             sim.ts_plotting)
 
+    return (mav_view, data_view)
 
-        # -------increment time-------------
-        sim_time += sim.ts_simulation
+def run_sim_headless(sim: MsgSimParams, init_state: Optional[DynamicState] = None, \
+        use_wind: bool = False, gust_params: Optional[MsgGustParams] = None, \
+        Va_command: Signals = Va_command_nom, altitude_command: Signals = altitude_command_nom, \
+        course_command: Signals = course_command_nom, recorder: Optional[TrajectoryRecorder] = None, \
+        seed: Seed = None) \
+        -> SimTrajectory:
+    """Runs the chapter 6 simulation without any viewers
 
-    return (mav_view, data_view)
+    Args:
+        sim: Timing and file parameters for the simulation
+        init_state: Initial state of the MAV
+        use_wind: True => wind will be used, False => no wind
+        gust_params: Parameters of the gust model
+        Va_command: Airspeed command signal
+        altitude_command: Altitude command signal
+        course_command: Course command signal
+        recorder: Also stores every simulation step when given
+        seed: Seeds an independent generator for each random component, the global numpy state is used when None
+
+    Returns:
+        trajectory: True and commanded states, inputs, and wind at every simulation step
+    """
+    # initialize elements of the architecture
+    streams = component_generators(seed) if seed is not None else {}
+    wind = WindSimulation(SIM.ts_simulation, gust_params, rng=streams.get("wind"))
+    mav = MavDynamics(sim.ts_simulation, init_state)
+    autopilot = Autopilot(sim.ts_control)
+    schedule = simulation_schedule(sim)
+    num_steps = schedule.num_ticks(sim.end_time)
+    trajectory = SimTrajectory(num_steps)
+
+    # autopilot commands
+    commands = MsgAutopilot()
+
+    # outputs of the components that run slower than the dynamics, held between their updates
+    delta = MsgDelta()
+    commanded_state = MsgState()
+
+    # main simulation loop
+    zero_wind = np.zeros([6,1])
+    for k in range(num_steps):
+        sim_time = schedule.time(k)
+
+        # -------autopilot commands-------------
+        commands.airspeed_command = Va_command.square(sim_time)
+        commands.course_command = course_command.square(sim_time)
+        commands.altitude_command = altitude_command.square(sim_time)
+
+        # -------autopilot-------------
+        if schedule.due("control", k):
+            delta, commanded_state = autopilot.update(commands, mav.true_state)
+
+        # -------physical system-------------
+        current_wind = wind.update() if use_wind else zero_wind
+        trajectory.record(sim_time, mav.true_state, delta, current_wind, commanded_state)
+        if recorder is not None:
+            recorder.record(sim_time, mav.true_state, delta, current_wind, commanded_state)
+        mav.update(delta, current_wind)  # propagate the MAV dynamics
+
+    return trajectory
@@ -16,7 +16,13 @@ import numpy as np
 import numpy.typing as npt
 
 # load mav dynamics from previous chapter
-from mav_sim.chap3.mav_dynamics import IND, DynamicState, derivatives
+from mav_sim.chap3.mav_dynamics import (
+    IND,
+    DynamicsIntegrator,
+    DynamicState,
+    IntegratorType,
+)
+from mav_sim.chap4.aero_model import AeroTable
 from mav_sim.chap4.mav_dynamics import forces_moments, update_velocity_data
 from mav_sim.message_types.msg_delta import MsgDelta
 from mav_sim.message_types.msg_sensors import MsgSensors
@@ -24,12 +30,22 @@ from mav_sim.message_types.msg_sensors import MsgSensors
 # load message types
 from mav_sim.message_types.msg_state import MsgState
 from mav_sim.tools import types
+from mav_sim.tools.random_streams import BlockNoise, NoiseSource, get_rng
 from mav_sim.tools.rotations import (
     Euler2Rotation,
     Quaternion2Euler,
     Quaternion2Rotation,
 )
 
+# Number of noise values drawn by calculate_sensor_readings in a step that updates the gps
+SENSOR_NOISE_CHANNELS = 19
+
+# Elements of the MsgSensors array written by each sensor
+GYRO_FIELDS = slice(MsgSensors.gyro_x.index, MsgSensors.gyro_z.index + 1)
+ACCEL_FIELDS = slice(MsgSensors.accel_x.index, MsgSensors.accel_z.index + 1)
+MAG_FIELDS = slice(MsgSensors.mag_x.index, MsgSensors.mag_z.index + 1)
+PRESSURE_FIELDS = slice(MsgSensors.abs_pressure.index, MsgSensors.diff_pressure.index + 1)
+GPS_FIELDS = slice(MsgSensors.gps_n.index, MsgSensors.gps_course.index + 1)
 
 class GpsTransient:
     """Struct for storing the gps transient (represent a Guass-Markov process)
@@ -75,13 +91,19 @@ class MavDynamics:
     """Implements the dynamics of the MAV using vehicle inputs and wind
     """
 
-    def __init__(self, Ts: float, state: Optional[DynamicState] = None):
+    def __init__(self, Ts: float, state: Optional[DynamicState] = None, integrator: int = IntegratorType.rk4,
+                 rng: Optional[NoiseSource] = None, aero: Optional[AeroTable] = None):
         self._ts_simulation = Ts
+        self._aero = aero # table of the aerodynamic coefficients, the analytic model is used when None
+        # source of the sensor noise, a generator is wrapped in a BlockNoise and the global numpy state is used when None
+        self._rng = sensor_noise(rng) if isinstance(rng, np.random.Generator) else rng
+        self._integrator = DynamicsIntegrator(integrator) # integration scheme, see IntegratorType
+        self._terminated = False # True => a terminal event stopped the integration
         # set initial states based on parameter file
         # _state is the 13x1 internal state of the aircraft that is being propagated:
         # _state = [pn, pe, pd, u, v, w, e0, e1, e2, e3, p, q, r]
         # We will also need a variety of other elements that are functions of the _state and the wind.
-        # self.true_state is a 19x1 vector that is estimated and used by the autopilot to control the aircraft:
+        # true_state is a 19x1 vector that is estimated and used by the autopilot to control the aircraft:
         # true_state = [pn, pe, h, Va, alpha, beta, phi, theta, chi, p, q, r, Vg, wn, we, psi, gyro_bx, gyro_by, gyro_bz]
         if state is None:
             self._state = DynamicState().convert_to_numpy()
@@ -97,8 +119,9 @@ class MavDynamics:
         self._alpha: float = 0
         self._beta: float = 0
 
-        # initialize true_state message
-        self.true_state = MsgState()
+        # initialize true_state message, it is filled on first access after an update
+        self._true_state = MsgState()
+        self._true_state_stale = False
 
         # initialize the sensors message
         self._sensors = MsgSensors()
@@ -107,69 +130,91 @@ class MavDynamics:
         self._gps_nu_n: float = 0.
         self._gps_nu_e: float = 0.
         self._gps_nu_h: float = 0.
-        # timer so that gps only updates every ts_gps seconds
-        self._t_gps = 999.  # large value ensures gps updates at initial time.
+        # time since the start in integer nanoseconds so that gps updates every ts_gps seconds without drift,
+        # the gps is measured on the first call to sensors() and then once per gps period
+        self._elapsed_ns = 0
+        self._gps_period_ns = max(1, int(round(SENSOR.ts_gps*1e9)))
+        self._gps_pending = True
 
         # update velocity data
         (self._Va, self._alpha, self._beta, self._wind) = update_velocity_data(self._state)
 
         # Update forces and moments data
-        forces_moments_vec = forces_moments(self._state, MsgDelta(), self._Va, self._beta, self._alpha)
+        forces_moments_vec = forces_moments(self._state, MsgDelta(), self._Va, self._beta, self._alpha, self._aero)
         self._forces[0] = forces_moments_vec.item(0)
         self._forces[1] = forces_moments_vec.item(1)
         self._forces[2] = forces_moments_vec.item(2)
 
 
+    @property
+    def true_state(self) -> MsgState:
+        """True state message. The derived quantities (Euler angles, ground speed, flight path and
+        course angles) are computed on the first access after an update and then reused, so steps
+        whose true state is never read skip that work. The same message object is always returned."""
+        if self._true_state_stale:
+            self._update_true_state()
+        return self._true_state
+
+    @property
+    def integrator(self) -> DynamicsIntegrator:
+        """Getter for the integrator (tolerances, step statistics, dense output, and events)"""
+        return self._integrator
+
+    @property
+    def terminated(self) -> bool:
+        """True once a terminal event of the integrator has stopped an update. Later updates leave
+        the state at the event and return True until a new state is loaded with external_set_state"""
+        return self._terminated
+
     ###################################
     # public functions
-    def update(self, delta: MsgDelta, wind: types.WindVector) -> None:
+    def update(self, delta: MsgDelta, wind: types.WindVector, time_step: Optional[float] = None) -> bool:
         """
         Integrate the differential equations defining dynamics, update sensors
 
         Args:
             delta : (delta_a, delta_e, delta_r, delta_t) are the control inputs
             wind: the wind vector in inertial coordinates
+            time_step: Length of the update, defaults to ts_simulation
+
+        Returns:
+            terminated: True when a terminal event stopped the integration, see terminated
         """
+        if self._terminated:
+            return True
+
         # get forces and moments acting on rigid bod
-        forces_moments_vec = forces_moments(self._state, delta, self._Va, self._beta, self._alpha)
+        forces_moments_vec = forces_moments(self._state, delta, self._Va, self._beta, self._alpha, self._aero)
         self._forces[0] = forces_moments_vec.item(0)
         self._forces[1] = forces_moments_vec.item(1)
         self._forces[2] = forces_moments_vec.item(2)
 
-        # Integrate ODE using Runge-Kutta RK4 algorithm
-        time_step = self._ts_simulation
-        k1 = derivatives(self._state, forces_moments_vec)
-        k2 = derivatives(self._state + time_step/2.*k1, forces_moments_vec)
-        k3 = derivatives(self._state + time_step/2.*k2, forces_moments_vec)
-        k4 = derivatives(self._state + time_step*k3, forces_moments_vec)
-        self._state += time_step/6 * (k1 + 2*k2 + 2*k3 + k4)
-
-        # normalize the quaternion
-        e0 = self._state.item(IND.E0)
-        e1 = self._state.item(IND.E1)
-        e2 = self._state.item(IND.E2)
-        e3 = self._state.item(IND.E3)
-        norm_e = np.sqrt(e0**2+e1**2+e2**2+e3**2)
-        self._state[IND.E0][0] = self._state.item(IND.E0)/norm_e
-        self._state[IND.E1][0] = self._state.item(IND.E1)/norm_e
-        self._state[IND.E2][0] = self._state.item(IND.E2)/norm_e
-        self._state[IND.E3][0] = self._state.item(IND.E3)/norm_e
+        # Integrate ODE and normalize the quaternion
+        if time_step is None:
+            time_step = self._ts_simulation
+        def forces_fnc(state: types.DynamicState) -> types.ForceMoment:
+            (Va, alpha, beta, _) = update_velocity_data(state, wind)
+            return forces_moments(state, delta, Va, beta, alpha, self._aero)
+        integrated = self._integrator.step(self._state, forces_moments_vec, time_step, forces_fnc)
+        self._terminated = self._integrator.terminated
 
         # update the airspeed, angle of attack, and side slip angles using new state
         (self._Va, self._alpha, self._beta, self._wind) = update_velocity_data(self._state, wind)
 
-        # update the message class for the true state
-        self._update_true_state()
+        # the message class for the true state is updated when next read
+        self._true_state_stale = True
 
-        # update the gps timer
-        if self._t_gps >= SENSOR.ts_gps:
-            self._t_gps = 0.
-        else:
-            self._t_gps += self._ts_simulation
+        # update the gps timer, a new gps measurement is due when the update crosses a gps period
+        gps_periods = self._elapsed_ns // self._gps_period_ns
+        self._elapsed_ns += int(round(integrated*1e9))
+        if self._elapsed_ns // self._gps_period_ns > gps_periods:
+            self._gps_pending = True
+        return self._terminated
 
     def sensors(self, noise_scale: float = 1.) -> MsgSensors:
         """ Return the values of the sensors given the current state. Note that GPS
-        is only updated periodically according to the period SENSOR.ts_gps
+        is only updated periodically according to the period SENSOR.ts_gps. A gps period that
+        elapses between calls produces a single new gps measurement on the next call.
 
         Args:
             noise_scale: Scaling on the random white noise
@@ -182,7 +227,8 @@ class MavDynamics:
 
         # Calculate sensor readings
         self._sensors, nu_update = calculate_sensor_readings(self._state, self._forces, \
-            nu, self._Va, self._sensors, self._t_gps == 0., noise_scale)
+            nu, self._Va, self._sensors, self._gps_pending, noise_scale, self._rng)
+        self._gps_pending = False
 
         # Extract values and return sensor readings
         self._gps_nu_n = nu_update.n
@@ -191,9 +237,12 @@ class MavDynamics:
         return self._sensors
 
     def external_set_state(self, new_state: types.DynamicState) -> None:
-        """Loads a new state
+        """Loads a new state, the true state keeps the values of the previous state until the next update
         """
+        if self._true_state_stale:
+            self._update_true_state()
         self._state = new_state
+        self._terminated = False
 
     def get_state(self) -> types.DynamicState:
         """Returns the state
@@ -210,30 +259,34 @@ class MavDynamics:
         phi, theta, psi = Quaternion2Euler(self._state[IND.QUAT])
         quat = self._state[IND.QUAT]
         pdot = Quaternion2Rotation(quat) @ self._state[IND.VEL]
-        self.true_state.north = self._state.item(IND.NORTH)
-        self.true_state.east = self._state.item(IND.EAST)
-        self.true_state.altitude = -self._state.item(IND.DOWN)
-        self.true_state.Va = self._Va
-        self.true_state.alpha = self._alpha
-        self.true_state.beta = self._beta
-        self.true_state.phi = phi
-        self.true_state.theta = theta
-        self.true_state.psi = psi
-        self.true_state.Vg = cast(float, np.linalg.norm(pdot))
-        self.true_state.gamma = np.arcsin(pdot.item(2) / self.true_state.Vg)
-        self.true_state.chi = np.arctan2(pdot.item(1), pdot.item(0))
-        self.true_state.p = self._state.item(IND.P)
-        self.true_state.q = self._state.item(IND.Q)
-        self.true_state.r = self._state.item(IND.R)
-        self.true_state.wn = self._wind.item(0)
-        self.true_state.we = self._wind.item(1)
-        self.true_state.bx = SENSOR.gyro_x_bias
-        self.true_state.by = SENSOR.gyro_y_bias
-        self.true_state.bz = SENSOR.gyro_z_bias
+        Vg = cast(float, np.linalg.norm(pdot))
+        gamma = np.arcsin(pdot.item(2) / Vg) if Vg != 0. else 0.
+        chi = np.arctan2(pdot.item(1), pdot.item(0))
+
+        # written in the order of MsgState.FIELDS
+        self._true_state_stale = False
+        self._true_state.as_array()[:] = (
+            self._state.item(IND.NORTH), self._state.item(IND.EAST), -self._state.item(IND.DOWN),
+            phi, theta, psi, self._Va, self._alpha, self._beta,
+            self._state.item(IND.P), self._state.item(IND.Q), self._state.item(IND.R),
+            Vg, gamma, chi,
+            self._wind.item(0), self._wind.item(1), SENSOR.gyro_x_bias, SENSOR.gyro_y_bias, SENSOR.gyro_z_bias)
+
+def sensor_noise(rng: Optional[np.random.Generator] = None, block_steps: int = 10000) -> BlockNoise:
+    """Creates a source of sensor noise that pre-generates block_steps steps of every sensor channel at a time
+
+    Args:
+        rng: Generator used to fill the blocks
+        block_steps: Number of sensor updates covered by each block
+
+    Returns:
+        noise: Noise source to be passed as the rng of the sensor functions
+    """
+    return BlockNoise(rng, block_steps*SENSOR_NOISE_CHANNELS)
 
 def calculate_sensor_readings(state: types.DynamicState, forces: types.NP_MAT, \
-    nu: GpsTransient, Va: float, sensors_prev: MsgSensors, update_gps: bool, noise_scale: float = 1.) -> \
-    tuple[MsgSensors, GpsTransient]:
+    nu: GpsTransient, Va: float, sensors_prev: MsgSensors, update_gps: bool, noise_scale: float = 1.,
+    rng: Optional[NoiseSource] = None) -> tuple[MsgSensors, GpsTransient]:
     """ Calculates the sensor readings. This involves calculating the sensor data without
         noise and then adding in the noise.
 
@@ -248,13 +301,15 @@ def calculate_sensor_readings(state: types.DynamicState, forces: types.NP_MAT, \
             sensors_prev: previous readings of the sensors
             update_gps: true - update the gps sensor, false - use the previous gps reading
             noise_scale: Scaling on the random white noise
+            rng: Source of the sensor noise, the global numpy state is used when None
 
         Returns:
             sensors: The resulting sensor readings
             nu_update: The updated gps transients
     """
-    # Intialize the sensor reading
+    # Intialize the sensor reading, the readings are written directly into its array
     sensors = MsgSensors()
+    readings = sensors.as_array()
     
     # Extract state components
     dyn_state = DynamicState(state)
@@ -264,43 +319,39 @@ def calculate_sensor_readings(state: types.DynamicState, forces: types.NP_MAT, \
     quat = np.array([[dyn_state.e0], [dyn_state.e1], [dyn_state.e2], [dyn_state.e3]], dtype=float)
     
     # Calculate accelerometer readings
-    sensors.accel_x, sensors.accel_y, sensors.accel_z = accelerometer(phi, theta, forces, noise_scale)
+    readings[ACCEL_FIELDS] = accelerometer(phi, theta, forces, noise_scale, rng=rng)
     
     # Calculate gyro readings
-    sensors.gyro_x, sensors.gyro_y, sensors.gyro_z = gyro(dyn_state.p, dyn_state.q, dyn_state.r, noise_scale)
+    readings[GYRO_FIELDS] = gyro(dyn_state.p, dyn_state.q, dyn_state.r, noise_scale, rng=rng)
     
     # Calculate pressure sensor readings
-    sensors.abs_pressure, sensors.diff_pressure = pressure(dyn_state.down, Va, noise_scale)
+    readings[PRESSURE_FIELDS] = pressure(dyn_state.down, Va, noise_scale, rng=rng)
     
     # Calculate magnetometer readings
-    sensors.mag_x, sensors.mag_y, sensors.mag_z = magnetometer(quat, noise_scale)
+    readings[MAG_FIELDS] = magnetometer(quat, noise_scale, rng=rng)
 
     # Populate all other sensors
     # simulate GPS sensor
     if update_gps:
         # Update the gps transient bias
-        nu_update = gps_error_trans_update(nu, noise_scale)
+        nu_update = gps_error_trans_update(nu, noise_scale, rng=rng)
 
         # Calculate the gps
         position = np.array([[dyn_state.north], [dyn_state.east], [dyn_state.down]], dtype=float)
         V_g_b = np.array([[dyn_state.u], [dyn_state.v], [dyn_state.w]], dtype=float)
-        sensors.gps_n, sensors.gps_e, sensors.gps_h, sensors.gps_Vg, sensors.gps_course = \
-            gps(position, V_g_b, quat, nu_update, noise_scale)
+        readings[GPS_FIELDS] = gps(position, V_g_b, quat, nu_update, noise_scale, rng=rng)
 
     else:
         # Output previous values
         nu_update = GpsTransient(nu.n, nu.e, nu.h)
 
-        sensors.gps_n = sensors_prev.gps_n
-        sensors.gps_e = sensors_prev.gps_e
-        sensors.gps_h = sensors_prev.gps_h
-        sensors.gps_Vg = sensors_prev.gps_Vg
-        sensors.gps_course = sensors_prev.gps_course
+        readings[GPS_FIELDS] = sensors_prev.as_array()[GPS_FIELDS]
 
     return sensors, nu_update
 
 def accelerometer(phi: float, theta: float, forces: types.NP_MAT, noise_scale: float,
-                  accel_sigma: float = SENSOR.accel_sigma ) -> tuple[float, float, float] :
+                  accel_sigma: float = SENSOR.accel_sigma, rng: Optional[NoiseSource] = None
+                 ) -> tuple[float, float, float] :
     """Calculates the accelerometer measurement based upon the current state data
 
         Args:
@@ -309,6 +360,7 @@ def accelerometer(phi: float, theta: float, forces: types.NP_MAT, noise_scale: f
             forces: 3x1 forces vector acting on UAV (in body frame)
             noise_scale: Scaling on the random white noise
             accel_sigma: The standard deviation of the accelerometer
+            rng: Source of the noise, the global numpy state is used when None
 
         Returns:
             accel_x, accel_y, accel_z: body frame x-y-z acceleration measurements
@@ -319,17 +371,19 @@ def accelerometer(phi: float, theta: float, forces: types.NP_MAT, noise_scale: f
     fz = forces.item(2)
     
     # Calculate accelerations by dividing forces by mass
-    accel_x = fx / MAV.mass + MAV.gravity * np.sin(theta) + noise_scale * np.random.normal(0., accel_sigma)
-    accel_y = fy / MAV.mass - MAV.gravity * np.sin(phi) * np.cos(theta) + noise_scale * np.random.normal(0., accel_sigma)
-    accel_z = fz / MAV.mass - MAV.gravity * np.cos(phi) * np.cos(theta) + noise_scale * np.random.normal(0., accel_sigma)
+    noise = get_rng(rng).standard_normal(3)
+    accel_x = fx / MAV.mass + MAV.gravity * np.sin(theta) + noise_scale * accel_sigma * noise[0]
+    accel_y = fy / MAV.mass - MAV.gravity * np.sin(phi) * np.cos(theta) + noise_scale * accel_sigma * noise[1]
+    accel_z = fz / MAV.mass - MAV.gravity * np.cos(phi) * np.cos(theta) + noise_scale * accel_sigma * noise[2]
 
     return accel_x, accel_y, accel_z
 
-def gyro(p: float, q: float, r: float, noise_scale: float = 1.,
+def gyro(p: float, q: float, r: float, noise_scale: float = 1., # pylint: disable=too-many-arguments
          gyro_sigma: float = SENSOR.gyro_sigma,
          gyro_x_bias: float = SENSOR.gyro_x_bias,
          gyro_y_bias: float = SENSOR.gyro_y_bias,
-         gyro_z_bias: float = SENSOR.gyro_z_bias
+         gyro_z_bias: float = SENSOR.gyro_z_bias,
+         rng: Optional[NoiseSource] = None
          ) -> tuple[float, float, float] :
     """Calculates the gyro measurement based upon the current state data
 
@@ -340,13 +394,15 @@ def gyro(p: float, q: float, r: float, noise_scale: float = 1.,
             gyro_x_bias: bias in the body x direction
             gyro_y_bias: bias in the body y direction
             gyro_z_bias: bias in the body z direction
+            rng: Source of the noise, the global numpy state is used when None
 
         Returns:
             gyro_x, gyro_y, gyro_z: body frame x-y-z gyro measurements
     """
-    gyro_x = p + gyro_x_bias + noise_scale * np.random.normal(0., gyro_sigma)
-    gyro_y = q + gyro_y_bias + noise_scale * np.random.normal(0., gyro_sigma)
-    gyro_z = r + gyro_z_bias + noise_scale * np.random.normal(0., gyro_sigma)
+    noise = get_rng(rng).standard_normal(3)
+    gyro_x = p + gyro_x_bias + noise_scale * gyro_sigma * noise[0]
+    gyro_y = q + gyro_y_bias + noise_scale * gyro_sigma * noise[1]
+    gyro_z = r + gyro_z_bias + noise_scale * gyro_sigma * noise[2]
 
     return gyro_x, gyro_y, gyro_z
 
@@ -354,7 +410,8 @@ def pressure(down: float, Va: float, noise_scale: float = 1.,
              abs_pres_bias: float = SENSOR.abs_pres_bias,
              abs_pres_sigma: float = SENSOR.abs_pres_sigma,
              diff_pres_bias: float = SENSOR.diff_pres_bias,
-             diff_pres_sigma: float = SENSOR.diff_pres_sigma
+             diff_pres_sigma: float = SENSOR.diff_pres_sigma,
+             rng: Optional[NoiseSource] = None
             ) -> tuple[float, float] :
     """Calculates the pressure sensor measurement based upon the current state data
 
@@ -366,26 +423,30 @@ def pressure(down: float, Va: float, noise_scale: float = 1.,
             abs_pres_sigma: standard deviation in the absolute pressure measurement
             diff_pres_bias: bias in the differential pressure measurement
             diff_pres_sigma: standard deviation in the differential pressure measurement
+            rng: Source of the noise, the global numpy state is used when None
 
         Returns:
             abs_pressure: Absolute pressure measurement
             diff_pressure: Differential pressure measurement
     """
+    noise = get_rng(rng).standard_normal(2)
+
     # Absolute pressure measurement using barometric formula
     # P = P0 * exp(-g*h / (R*T))
     # Simplified model: P = P0 - rho*g*h
-    abs_pressure = MAV.rho * MAV.gravity * (-down) + abs_pres_bias + noise_scale * np.random.normal(0., abs_pres_sigma)
+    abs_pressure = MAV.rho * MAV.gravity * (-down) + abs_pres_bias + noise_scale * abs_pres_sigma * noise[0]
     
     # Differential pressure measurement (dynamic pressure)
     # q = 0.5 * rho * Va^2
-    diff_pressure = 0.5 * MAV.rho * Va**2 + diff_pres_bias + noise_scale * np.random.normal(0., diff_pres_sigma)
+    diff_pressure = 0.5 * MAV.rho * Va**2 + diff_pres_bias + noise_scale * diff_pres_sigma * noise[1]
 
     return abs_pressure, diff_pressure
 
 def magnetometer(quat_b_to_i: types.Quaternion, noise_scale: float = 1.,
                  mag_inc: float = SENSOR.mag_inc,
                  mag_dec: float = SENSOR.mag_dec,
-                 mag_sigma: float = SENSOR.mag_sigma
+                 mag_sigma: float = SENSOR.mag_sigma,
+                 rng: Optional[NoiseSource] = None
                 ) -> tuple[float, float, float] :
     """Calculates the magnetometer measurement based upon the current state. The resulting
     output is a magnetometer reading in the body frame with additive noise. Note that this
@@ -397,6 +458,7 @@ def magnetometer(quat_b_to_i: types.Quaternion, noise_scale: float = 1.,
             mag_inc: Inclination of the magnetic to inertial frame
             mag_dec: Declination of the magnetic to inertial frame
             mag_sigma: Standard deviation of the magnetic sensor measurement
+            rng: Source of the noise, the global numpy state is used when None
 
         Returns:
             mag_x, mag_y, mag_z: body frame x-y-z magnetometer measurements
@@ -415,9 +477,10 @@ def magnetometer(quat_b_to_i: types.Quaternion, noise_scale: float = 1.,
     mag_body = R_i_to_b.T @ R_inertial_to_mag.T @ mag_inertial
     
     # Extract components and add noise
-    mag_x = mag_body.item(0) + noise_scale * np.random.normal(0., mag_sigma)
-    mag_y = mag_body.item(1) + noise_scale * np.random.normal(0., mag_sigma)
-    mag_z = mag_body.item(2) + noise_scale * np.random.normal(0., mag_sigma)
+    noise = get_rng(rng).standard_normal(3)
+    mag_x = mag_body.item(0) + noise_scale * mag_sigma * noise[0]
+    mag_y = mag_body.item(1) + noise_scale * mag_sigma * noise[1]
+    mag_z = mag_body.item(2) + noise_scale * mag_sigma * noise[2]
 
     return mag_x, mag_y, mag_z
 
@@ -426,7 +489,8 @@ def gps_error_trans_update(nu: GpsTransient, noise_scale: float = 1.,
                            ts_gps: float = SENSOR.ts_gps,
                            gps_n_sigma: float = SENSOR.gps_n_sigma,
                            gps_e_sigma: float = SENSOR.gps_e_sigma,
-                           gps_h_sigma: float = SENSOR.gps_h_sigma
+                           gps_h_sigma: float = SENSOR.gps_h_sigma,
+                           rng: Optional[NoiseSource] = None
                           ) -> GpsTransient :
     """Calculates the transient update of the gps error which is based upon a Gauss-Markov process
 
@@ -438,6 +502,7 @@ def gps_error_trans_update(nu: GpsTransient, noise_scale: float = 1.,
             gps_n_sigma: Standard deviation of the north gps measurement
             gps_e_sigma: Standard deviation of the east gps measurement
             gps_h_sigma: Standard deviation of the altitude gps measurement
+            rng: Source of the noise, the global numpy state is used when None
 
         Returns:
             nu: Updated GPS transient
@@ -448,16 +513,18 @@ def gps_error_trans_update(nu: GpsTransient, noise_scale: float = 1.,
     exp_factor = np.exp(-gps_k * ts_gps)
     noise_factor = np.sqrt(1.0 - np.exp(-2.0 * gps_k * ts_gps))
     
-    nu_n = exp_factor * nu.n + noise_factor * gps_n_sigma * noise_scale * np.random.normal(0., 1.)
-    nu_e = exp_factor * nu.e + noise_factor * gps_e_sigma * noise_scale * np.random.normal(0., 1.)
-    nu_h = exp_factor * nu.h + noise_factor * gps_h_sigma * noise_scale * np.random.normal(0., 1.)
+    noise = get_rng(rng).standard_normal(3)
+    nu_n = exp_factor * nu.n + noise_factor * gps_n_sigma * noise_scale * noise[0]
+    nu_e = exp_factor * nu.e + noise_factor * gps_e_sigma * noise_scale * noise[1]
+    nu_h = exp_factor * nu.h + noise_factor * gps_h_sigma * noise_scale * noise[2]
 
     return GpsTransient(nu_n, nu_e, nu_h)
 
 def gps(position: types.NP_MAT, V_g_b: types.NP_MAT, e_quat: types.Quaternion, nu: GpsTransient, \
     noise_scale: float = 1.,
     gps_Vg_sigma: float = SENSOR.gps_Vg_sigma,
-    gps_course_sigma: float = SENSOR.gps_course_sigma
+    gps_course_sigma: float = SENSOR.gps_course_sigma,
+    rng: Optional[NoiseSource] = None
      ) -> tuple[float, float, float, float, float] :
     """Calculates the transient update of the gps error which is based upon a Gauss-Markov process
 
@@ -469,6 +536,7 @@ def gps(position: types.NP_MAT, V_g_b: types.NP_MAT, e_quat: types.Quaternion, n
             noise_scale: Scaling on the random white noise
             gps_Vg_sigma: Standard deviation of the ground velocity measurement
             gps_course_sigma: Standard deviation of the course angle measurement
+            rng: Source of the noise, the global numpy state is used when None
 
         Returns:
             (gps_n, gps_e, gps_h): (n,e,-d) measurement of position
@@ -479,11 +547,12 @@ def gps(position: types.NP_MAT, V_g_b: types.NP_MAT, e_quat: types.Quaternion, n
     n = position.item(0)
     e = position.item(1)
     d = position.item(2)
+    noise = get_rng(rng).standard_normal(5)
     
     # Add GPS transient errors to position measurements
-    gps_n = n + nu.n + noise_scale * np.random.normal(0., SENSOR.gps_n_sigma)
-    gps_e = e + nu.e + noise_scale * np.random.normal(0., SENSOR.gps_e_sigma)
-    gps_h = -d + nu.h + noise_scale * np.random.normal(0., SENSOR.gps_h_sigma)
+    gps_n = n + nu.n + noise_scale * SENSOR.gps_n_sigma * noise[0]
+    gps_e = e + nu.e + noise_scale * SENSOR.gps_e_sigma * noise[1]
+    gps_h = -d + nu.h + noise_scale * SENSOR.gps_h_sigma * noise[2]
     
     # Calculate ground velocity from inertial velocity
     # Rotate body velocity to inertial frame
@@ -495,9 +564,9 @@ def gps(position: types.NP_MAT, V_g_b: types.NP_MAT, e_quat: types.Quaternion, n
     V_e = V_inertial.item(1)
     
     # Calculate ground speed (magnitude of velocity in NED plane)
-    gps_Vg = np.sqrt(V_n**2 + V_e**2) + noise_scale * np.random.normal(0., gps_Vg_sigma)
+    gps_Vg = np.sqrt(V_n**2 + V_e**2) + noise_scale * gps_Vg_sigma * noise[3]
     
     # Calculate course angle (atan2 of east velocity over north velocity)
-    gps_course = np.arctan2(V_e, V_n) + noise_scale * np.random.normal(0., gps_course_sigma)
+    gps_course = np.arctan2(V_e, V_n) + noise_scale * gps_course_sigma * noise[4]
 
     return gps_n, gps_e, gps_h, gps_Vg, gps_course
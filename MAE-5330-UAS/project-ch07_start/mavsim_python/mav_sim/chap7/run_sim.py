@@ -6,23 +6,34 @@ mavsim_python
         1/22 - GND
 """
 
-from typing import Optional, cast
+from typing import TYPE_CHECKING, Optional, cast
 
 import mav_sim.parameters.aerosonde_parameters as MAV
 import mav_sim.parameters.simulation_parameters as SIM
 import numpy as np
-from mav_sim.chap2.mav_viewer import MavViewer
-from mav_sim.chap3.data_viewer import DataViewer
 from mav_sim.chap3.mav_dynamics import DynamicState
 from mav_sim.chap4.wind_simulation import WindSimulation
 from mav_sim.chap6.autopilot import Autopilot
 from mav_sim.chap7.mav_dynamics import MavDynamics
-from mav_sim.chap7.sensor_viewer import SensorViewer
 from mav_sim.message_types.msg_autopilot import MsgAutopilot
+from mav_sim.message_types.msg_delta import MsgDelta
 from mav_sim.message_types.msg_gust_params import MsgGustParams
+from mav_sim.message_types.msg_sensors import MsgSensors
 from mav_sim.message_types.msg_sim_params import MsgSimParams
+from mav_sim.message_types.msg_state import MsgState
 from mav_sim.tools import types
+from mav_sim.tools.events import Event
+from mav_sim.tools.random_streams import Seed, component_generators
+from mav_sim.tools.scheduler import simulation_schedule
 from mav_sim.tools.signals import Signals
+from mav_sim.tools.sim_trajectory import SimTrajectory
+from mav_sim.tools.trajectory_recorder import TrajectoryRecorder
+
+# The viewers are only imported when used so that the headless simulation does not need Qt
+if TYPE_CHECKING:
+    from mav_sim.chap2.mav_viewer import MavViewer
+    from mav_sim.chap3.data_viewer import DataViewer
+    from mav_sim.chap7.sensor_viewer import SensorViewer
 
 # pylint: disable=too-many-arguments
 
@@ -41,12 +52,12 @@ course_command_nom = Signals(dc_offset=MAV.psi0,
                         frequency=0.015)
 
 def run_sim(sim: MsgSimParams, init_state: Optional[DynamicState] = None, \
-        mav_view: Optional[MavViewer] = None, data_view: Optional[DataViewer] = None, \
-        sensor_view: Optional[SensorViewer] = None,
+        mav_view: Optional['MavViewer'] = None, data_view: Optional['DataViewer'] = None, \
+        sensor_view: Optional['SensorViewer'] = None,
         use_wind: bool = False, gust_params: Optional[MsgGustParams] = None, \
         Va_command: Signals = Va_command_nom, altitude_command: Signals = altitude_command_nom, \
-        course_command: Signals = course_command_nom) \
-        -> tuple[MavViewer, DataViewer, SensorViewer]:
+        course_command: Signals = course_command_nom, recorder: Optional[TrajectoryRecorder] = None) \
+        -> tuple['MavViewer', 'DataViewer', 'SensorViewer']:
     """Runs the chapter 6 simulation
 
     Args:
@@ -55,11 +66,16 @@ def run_sim(sim: MsgSimParams, init_state: Optional[DynamicState] = None, \
         mav_view: Viewing window to be used for the mav
         data_view: Viewing window to be used for the states
         use_wind: True => wind will be used, False => no wind
+        recorder: Stores every simulation step when given
 
     Returns:
         mav_view: Viewing window to be used for the mav
         data_view: Viewing window to be used for the states
     """
+    # pylint: disable=import-outside-toplevel
+    from mav_sim.chap2.mav_viewer import MavViewer
+    from mav_sim.chap3.data_viewer import DataViewer
+    from mav_sim.chap7.sensor_viewer import SensorViewer
 
     # initialize the visualization
     if mav_view is None:
@@ -72,11 +88,10 @@ def run_sim(sim: MsgSimParams, init_state: Optional[DynamicState] = None, \
     # initialize elements of the architecture
     wind = WindSimulation(SIM.ts_simulation, gust_params)
     mav = MavDynamics(sim.ts_simulation, init_state)
-    autopilot = Autopilot(SIM.ts_simulation)
+    autopilot = Autopilot(sim.ts_control)
 
-    # initialize the simulation time
-    sim_time = sim.start_time
-    next_plot_time = sim.ts_plotting
+    # schedule of the components, each runs once every whole number of simulation steps
+    schedule = simulation_schedule(sim)
 
     # Create the default wind
     def current_wind() -> types.WindVector:
@@ -88,26 +103,38 @@ def run_sim(sim: MsgSimParams, init_state: Optional[DynamicState] = None, \
     # autopilot commands
     commands = MsgAutopilot()
 
+    # outputs of the components that run slower than the dynamics, held between their updates
+    delta = MsgDelta()
+    commanded_state = MsgState()
+    estimated_state = mav.true_state
+    measurements = MsgSensors()
+
     # main simulation loop
-    while sim_time < sim.end_time:
+    for k in range(schedule.num_ticks(sim.end_time)):
+        sim_time = schedule.time(k)
+
         # -------autopilot commands-------------
         commands.airspeed_command = Va_command.square(sim_time)
         commands.course_command = course_command.square(sim_time)
         commands.altitude_command = altitude_command.square(sim_time)
 
         # -------autopilot-------------
-        measurements = mav.sensors()  # get sensor measurements
-        estimated_state = mav.true_state  # uses true states in the control
-        delta, commanded_state = autopilot.update(commands, estimated_state)
+        if schedule.due("sensors", k):
+            measurements = mav.sensors()  # get sensor measurements
+        if schedule.due("control", k):
+            estimated_state = mav.true_state  # uses true states in the control
+            delta, commanded_state = autopilot.update(commands, estimated_state)
 
         # -------physical system-------------
-        mav.update(delta, current_wind() )  # propagate the MAV dynamics
+        wind_vec = current_wind()
+        if recorder is not None:
+            recorder.record(sim_time, mav.true_state, delta, wind_vec, commanded_state, measurements)
+        mav.update(delta, wind_vec)  # propagate the MAV dynamics
 
         # -------update viewer-------------
         sensor_view.update(measurements,  # sensor values
-                       SIM.ts_simulation)
-        if next_plot_time <= sim_time:
-            next_plot_time += sim.ts_plotting
+                       sim.ts_simulation)
+        if schedule.due("plot", k):
             mav_view.update(mav.true_state)  # plot body of MAV
             data_view.update(mav.true_state,  # true states
                             estimated_state,  # estimated states
@@ -115,8 +142,71 @@ def run_sim(sim: MsgSimParams, init_state: Optional[DynamicState] = None, \
                             delta,  # input to aircraft
                             sim.ts_plotting)
 
+    return (mav_view, data_view, sensor_view)
 
-        # -------increment time-------------
-        sim_time += sim.ts_simulation
+def run_sim_headless(sim: MsgSimParams, init_state: Optional[DynamicState] = None, \
+        use_wind: bool = False, gust_params: Optional[MsgGustParams] = None, \
+        Va_command: Signals = Va_command_nom, altitude_command: Signals = altitude_command_nom, \
+        course_command: Signals = course_command_nom, recorder: Optional[TrajectoryRecorder] = None, \
+        seed: Seed = None, events: Optional[list[Event]] = None) \
+        -> SimTrajectory:
+    """Runs the chapter 7 simulation without any viewers
 
-    return (mav_view, data_view, sensor_view)
+    Args:
+        sim: Timing and file parameters for the simulation
+        init_state: Initial state of the MAV
+        use_wind: True => wind will be used, False => no wind
+        gust_params: Parameters of the gust model
+        Va_command: Airspeed command signal
+        altitude_command: Altitude command signal
+        course_command: Course command signal
+        recorder: Also stores every simulation step when given
+        seed: Seeds an independent generator for each random component, the global numpy state is used when None
+        events: Events watched by the integrator, the run stops after the update ended by a terminal event
+
+    Returns:
+        trajectory: True and commanded states, inputs, wind, and sensors at every simulation step
+    """
+    # initialize elements of the architecture
+    streams = component_generators(seed) if seed is not None else {}
+    wind = WindSimulation(SIM.ts_simulation, gust_params, rng=streams.get("wind"))
+    mav = MavDynamics(sim.ts_simulation, init_state, rng=streams.get("sensors"))
+    mav.integrator.events.extend(events or [])
+    autopilot = Autopilot(sim.ts_control)
+    schedule = simulation_schedule(sim)
+    num_steps = schedule.num_ticks(sim.end_time)
+    trajectory = SimTrajectory(num_steps, sensors=True)
+
+    # autopilot commands
+    commands = MsgAutopilot()
+
+    # outputs of the components that run slower than the dynamics, held between their updates
+    delta = MsgDelta()
+    commanded_state = MsgState()
+    measurements = MsgSensors()
+
+    # main simulation loop
+    zero_wind = np.zeros([6,1])
+    for k in range(num_steps):
+        sim_time = schedule.time(k)
+
+        # -------autopilot commands-------------
+        commands.airspeed_command = Va_command.square(sim_time)
+        commands.course_command = course_command.square(sim_time)
+        commands.altitude_command = altitude_command.square(sim_time)
+
+        # -------autopilot-------------
+        if schedule.due("sensors", k):
+            measurements = mav.sensors()  # get sensor measurements
+        if schedule.due("control", k):
+            delta, commanded_state = autopilot.update(commands, mav.true_state)
+
+        # -------physical system-------------
+        current_wind = wind.update() if use_wind else zero_wind
+        trajectory.record(sim_time, mav.true_state, delta, current_wind, commanded_state, measurements)
+        if recorder is not None:
+            recorder.record(sim_time, mav.true_state, delta, current_wind, commanded_state, measurements)
+        if mav.update(delta, current_wind):  # propagate the MAV dynamics
+            break  # a terminal event ended the flight
+
+    return trajectory
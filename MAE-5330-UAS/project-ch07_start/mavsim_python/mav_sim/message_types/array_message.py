@@ -0,0 +1,84 @@
+"""
+array_message
+    - Base class of the messages whose fields are stored in a single numpy array
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+from typing import Any, Optional, TypeVar, Union, overload
+
+import numpy as np
+import numpy.typing as npt
+
+Message = TypeVar('Message', bound='ArrayMessage')
+
+class ArrayField:
+    """Attribute of an ArrayMessage stored in element index of the message array
+    """
+    __slots__ = ("index",)
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+    @overload
+    def __get__(self, obj: None, owner: Optional[type] = None) -> 'ArrayField': ...
+    @overload
+    def __get__(self, obj: 'ArrayMessage', owner: Optional[type] = None) -> float: ...
+    def __get__(self, obj: Optional['ArrayMessage'], owner: Optional[type] = None) -> Union[float, 'ArrayField']:
+        """Returns the field as a float, or the field itself when accessed on the class"""
+        if obj is None:
+            return self
+        value: float = obj._data.item(self.index) # pylint: disable=protected-access
+        return value
+
+    def __set__(self, obj: 'ArrayMessage', value: float) -> None:
+        """Stores the value in the message array"""
+        obj._data[self.index] = value # pylint: disable=protected-access
+
+class ArrayMessage:
+    """Message with one float per field, the fields are the elements of a single array
+
+    Subclasses list their field names in FIELDS and declare an ArrayField with the matching index
+    for each, so the fields are read and written as ordinary attributes while as_array() gives
+    vectorized consumers the values without copying.
+    """
+    __slots__ = ("_data",)
+    FIELDS: tuple[str, ...] = ()
+
+    def __init__(self, values: Optional[npt.ArrayLike] = None) -> None:
+        """Stores the values of the fields, in the order of FIELDS, zero when None"""
+        if values is None:
+            self._data: npt.NDArray[Any] = np.zeros(len(self.FIELDS))
+        else:
+            self._data = np.array(values, dtype=float).reshape(len(self.FIELDS))
+
+    def as_array(self) -> npt.NDArray[Any]:
+        """Returns the array holding the fields in the order of FIELDS. This is a view, so writing to
+        it changes the message."""
+        return self._data
+
+    def to_array(self) -> npt.NDArray[Any]:
+        """Returns a copy of the fields as a column vector"""
+        return self._data.reshape((-1, 1)).copy()
+
+    def __copy__(self: Message) -> Message:
+        """Copies the message, the copy does not share the array"""
+        msg_copy = object.__new__(type(self))
+        msg_copy._data = self._data.copy()
+        return msg_copy
+
+    def __deepcopy__(self: Message, memo: dict[int, Any]) -> Message:
+        """Copies the message, the copy does not share the array"""
+        return self.__copy__()
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Pickles the fields by name"""
+        return dict(zip(self.FIELDS, self._data.tolist()))
+
+    def __setstate__(self, state: Any) -> None:
+        """Restores the fields, also accepting the states pickled by the attribute based messages"""
+        if isinstance(state, tuple): # (__dict__, slots)
+            state = {**(state[0] or {}), **(state[1] or {})}
+        self._data = np.zeros(len(self.FIELDS))
+        for name, value in state.items():
+            setattr(self, name, value)
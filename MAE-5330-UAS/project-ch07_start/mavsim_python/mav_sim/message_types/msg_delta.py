@@ -8,15 +8,23 @@ part of mavsim_python
         2/27/2020 - RWB
         12/2021 - GND
 """
-from typing import Any, Type, TypeVar
+from typing import Any
 
 import numpy as np
 import numpy.typing as npt
+from mav_sim.message_types.array_message import ArrayField, ArrayMessage
 
-Entity = TypeVar('Entity', bound='MsgDelta')
-class MsgDelta:
+
+class MsgDelta(ArrayMessage):
     """Message inputs for the aircraft
     """
+    __slots__ = ()
+    FIELDS = ("elevator", "aileron", "rudder", "throttle")
+    elevator = ArrayField(0)  # elevator command
+    aileron = ArrayField(1)  # aileron command
+    rudder = ArrayField(2)  # rudder command
+    throttle = ArrayField(3)  # throttle command
+
     def __init__(self,
                  elevator: float =0.0,
                  aileron: float =0.0,
@@ -24,12 +32,9 @@ class MsgDelta:
                  throttle: float =0.5) -> None:
         """Set the commands to default values
         """
-        self.elevator: float = elevator  # elevator command
-        self.aileron: float = aileron  # aileron command
-        self.rudder: float = rudder  # rudder command
-        self.throttle: float = throttle  # throttle command
+        super().__init__((elevator, aileron, rudder, throttle))
 
-    def copy(self, msg: Type[Entity]) -> None:
+    def copy(self, msg: 'MsgDelta') -> None:
         """
         Initializes the command message from the input
         """
@@ -38,21 +43,10 @@ class MsgDelta:
         self.rudder = msg.rudder
         self.throttle = msg.throttle
 
-    def to_array(self) -> npt.NDArray[Any]:
-        """Convert the command to a numpy array
-        """
-        return np.array([[self.elevator],
-                         [self.aileron],
-                         [self.rudder],
-                         [self.throttle]])
-
     def from_array(self, u: npt.NDArray[Any]) -> None:
         """Extract the commands from a numpy array
         """
-        self.elevator = u.item(0)
-        self.aileron = u.item(1)
-        self.rudder = u.item(2)
-        self.throttle = u.item(3)
+        self._data[:] = np.ravel(u)[0:4]
 
     def print(self) -> None:
         """Print the commands to the console
@@ -7,15 +7,48 @@ part of mavsim_python
         12/21 - GND
 """
 
-from typing import Any
+from mav_sim.message_types.array_message import ArrayField, ArrayMessage
 
-import numpy as np
-import numpy.typing as npt
 
-
-class MsgSensors:
+class MsgSensors(ArrayMessage):
     """Defines the sensor message."""
 
+    __slots__ = ()
+    FIELDS = (
+        "gyro_x",
+        "gyro_y",
+        "gyro_z",
+        "accel_x",
+        "accel_y",
+        "accel_z",
+        "mag_x",
+        "mag_y",
+        "mag_z",
+        "abs_pressure",
+        "diff_pressure",
+        "gps_n",
+        "gps_e",
+        "gps_h",
+        "gps_Vg",
+        "gps_course",
+    )
+    gyro_x = ArrayField(0)  # gyroscope along body x axis
+    gyro_y = ArrayField(1)  # gyroscope along body y axis
+    gyro_z = ArrayField(2)  # gyroscope along body z axis
+    accel_x = ArrayField(3)  # specific acceleration along body x axis
+    accel_y = ArrayField(4)  # specific acceleration along body y axis
+    accel_z = ArrayField(5)  # specific acceleration along body z axis
+    mag_x = ArrayField(6)  # magnetic field along body x axis
+    mag_y = ArrayField(7)  # magnetic field along body y axis
+    mag_z = ArrayField(8)  # magnetic field along body z axis
+    abs_pressure = ArrayField(9)  # absolute pressure
+    diff_pressure = ArrayField(10)  # differential pressure
+    gps_n = ArrayField(11)  # gps north
+    gps_e = ArrayField(12)  # gps east
+    gps_h = ArrayField(13)  # gps altitude
+    gps_Vg = ArrayField(14)  # gps ground speed
+    gps_course = ArrayField(15)  # gps course angle
+
     # pylint: disable=too-many-arguments
     def __init__(
         self,
@@ -36,46 +69,8 @@ class MsgSensors:
         gps_Vg: float = 0,
         gps_course: float = 0,
     ) -> None:
-        self.gyro_x: float = gyro_x  # gyroscope along body x axis
-        self.gyro_y: float = gyro_y  # gyroscope along body y axis
-        self.gyro_z: float = gyro_z  # gyroscope along body z axis
-        self.accel_x: float = accel_x  # specific acceleration along body x axis
-        self.accel_y: float = accel_y  # specific acceleration along body y axis
-        self.accel_z: float = accel_z  # specific acceleration along body z axis
-        self.mag_x: float = mag_x  # magnetic field along body x axis
-        self.mag_y: float = mag_y  # magnetic field along body y axis
-        self.mag_z: float = mag_z  # magnetic field along body z axis
-        self.abs_pressure: float = abs_pressure  # absolute pressure
-        self.diff_pressure: float = diff_pressure  # differential pressure
-        self.gps_n: float = gps_n  # gps north
-        self.gps_e: float = gps_e  # gps east
-        self.gps_h: float = gps_h  # gps altitude
-        self.gps_Vg: float = gps_Vg  # gps ground speed
-        self.gps_course: float = gps_course  # gps course angle
-
-    def to_array(self) -> npt.NDArray[Any]:
-        """Convert the command to a numpy array."""
-        return np.array(
-            [
-                [self.gyro_x],
-                [self.gyro_y],
-                [self.gyro_z],
-                [self.accel_x],
-                [self.accel_y],
-                [self.accel_z],
-                [self.mag_x],
-                [self.mag_y],
-                [self.mag_z],
-                [self.abs_pressure],
-                [self.diff_pressure],
-                [self.gps_n],
-                [self.gps_e],
-                [self.gps_h],
-                [self.gps_Vg],
-                [self.gps_course],
-            ],
-            dtype=float,
-        )
+        super().__init__((gyro_x, gyro_y, gyro_z, accel_x, accel_y, accel_z, mag_x, mag_y, mag_z, abs_pressure,
+                          diff_pressure, gps_n, gps_e, gps_h, gps_Vg, gps_course))
 
     def print(self) -> None:
         """Print the commands to the console."""
@@ -10,7 +10,8 @@ class MsgSimParams:
     Provides parameters for running a simulation
     """
     def __init__(self, ts_simulation: float = 0.01, start_time: float = 0., end_time: float = 100., \
-            ts_plotting: float = 0.1, ts_control: Optional[float] = None ) -> None:
+            ts_plotting: float = 0.1, ts_control: Optional[float] = None, ts_sensors: Optional[float] = None, \
+            ts_path: Optional[float] = None, ts_observer: Optional[float] = None) -> None:
         """ Store parameters
         """
         self.ts_simulation: float = ts_simulation   # smallest time step for simulation
@@ -21,3 +22,15 @@ class MsgSimParams:
         self.ts_control: float = ts_simulation      # sample rate for the controller
         if ts_control is not None:
             self.ts_control = ts_control
+
+        self.ts_sensors: float = ts_simulation      # sample rate for the sensors
+        if ts_sensors is not None:
+            self.ts_sensors = ts_sensors
+
+        self.ts_path: float = self.ts_control       # sample rate for the path manager and follower
+        if ts_path is not None:
+            self.ts_path = ts_path
+
+        self.ts_observer: float = self.ts_control   # sample rate for the state observer
+        if ts_observer is not None:
+            self.ts_observer = ts_observer
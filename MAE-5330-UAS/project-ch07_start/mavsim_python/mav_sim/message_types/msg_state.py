@@ -6,16 +6,16 @@ part of mavPySim
         1/9/2019 - RWB
         12/21 - GND
 """
-from typing import Any
+import copy
 
-import numpy as np
-import numpy.typing as npt
+from mav_sim.message_types.array_message import ArrayField, ArrayMessage
 
 
-class MsgState:
+class MsgState(ArrayMessage):
     """Defines the state of the aircraft."""
 
-    __slots__ = [
+    __slots__ = ()
+    FIELDS = (
         "north",
         "east",
         "altitude",
@@ -36,7 +36,28 @@ class MsgState:
         "bx",
         "by",
         "bz",
-    ]
+    )
+    north = ArrayField(0)  # inertial north position in meters
+    east = ArrayField(1)  # inertial east position in meters
+    altitude = ArrayField(2)  # inertial altitude in meters
+    phi = ArrayField(3)  # roll angle in radians
+    theta = ArrayField(4)  # pitch angle in radians
+    psi = ArrayField(5)  # yaw angle in radians
+    Va = ArrayField(6)  # airspeed in meters/sec
+    alpha = ArrayField(7)  # angle of attack in radians
+    beta = ArrayField(8)  # sideslip angle in radians
+    p = ArrayField(9)  # roll rate in radians/sec
+    q = ArrayField(10)  # pitch rate in radians/sec
+    r = ArrayField(11)  # yaw rate in radians/sec
+    Vg = ArrayField(12)  # groundspeed in meters/sec
+    gamma = ArrayField(13)  # flight path angle in radians
+    chi = ArrayField(14)  # course angle in radians
+    wn = ArrayField(15)  # inertial windspeed in north direction in meters/sec
+    we = ArrayField(16)  # inertial windspeed in east direction in meters/sec
+    bx = ArrayField(17)  # gyro bias along roll axis in radians/sec
+    by = ArrayField(18)  # gyro bias along pitch axis in radians/sec
+    bz = ArrayField(19)  # gyro bias along yaw axis in radians/sec
+
     # pylint: disable=too-many-arguments
     def __init__(
         self,
@@ -61,79 +82,12 @@ class MsgState:
         by: float = 0.,
         bz: float = 0.,
     ) -> None:
-        self.north: float = north  # inertial north position in meters
-        self.east: float = east  # inertial east position in meters
-        self.altitude: float = altitude  # inertial altitude in meters
-        self.phi: float = phi  # roll angle in radians
-        self.theta: float = theta  # pitch angle in radians
-        self.psi: float = psi  # yaw angle in radians
-        self.Va: float = Va  # airspeed in meters/sec
-        self.alpha: float = alpha  # angle of attack in radians
-        self.beta: float = beta  # sideslip angle in radians
-        self.p: float = p  # roll rate in radians/sec
-        self.q: float = q  # pitch rate in radians/sec
-        self.r: float = r  # yaw rate in radians/sec
-        self.Vg: float = Vg  # groundspeed in meters/sec
-        self.gamma: float = gamma  # flight path angle in radians
-        self.chi: float = chi  # course angle in radians
-        self.wn: float = wn  # inertial windspeed in north direction in meters/sec
-        self.we: float = we  # inertial windspeed in east direction in meters/sec
-        self.bx: float = bx  # gyro bias along roll axis in radians/sec
-        self.by: float = by  # gyro bias along pitch axis in radians/sec
-        self.bz: float = bz  # gyro bias along yaw axis in radians/sec
-
-    def to_array(self) -> npt.NDArray[Any]:
-        """Convert the command to a numpy array."""
-        return np.array(
-            [
-                [self.north],
-                [self.east],
-                [self.altitude],
-                [self.phi],
-                [self.theta],
-                [self.psi],
-                [self.Va],
-                [self.alpha],
-                [self.beta],
-                [self.p],
-                [self.q],
-                [self.r],
-                [self.Vg],
-                [self.gamma],
-                [self.chi],
-                [self.wn],
-                [self.we],
-                [self.bx],
-                [self.by],
-                [self.bz],
-            ],
-            dtype=float,
-        )
+        super().__init__((north, east, altitude, phi, theta, psi, Va, alpha, beta, p, q, r, Vg, gamma, chi,
+                          wn, we, bx, by, bz))
 
     def copy(self) -> 'MsgState':
         """Returns a copy of all of the variables"""
-        msg_copy = MsgState()
-        msg_copy.north = self.north
-        msg_copy.east = self.east
-        msg_copy.altitude = self.altitude
-        msg_copy.phi = self.phi
-        msg_copy.theta = self.theta
-        msg_copy.psi = self.psi
-        msg_copy.Va = self.Va
-        msg_copy.alpha = self.alpha
-        msg_copy.beta = self.beta
-        msg_copy.p = self.p
-        msg_copy.q = self.q
-        msg_copy.r = self.r
-        msg_copy.Vg = self.Vg
-        msg_copy.gamma = self.gamma
-        msg_copy.chi = self.chi
-        msg_copy.wn = self.wn
-        msg_copy.we = self.we
-        msg_copy.bx = self.bx
-        msg_copy.by = self.by
-        msg_copy.bz = self.bz
-        return msg_copy
+        return copy.copy(self)
 
     def print(self) -> None:
         """Print the commands to the console."""
@@ -11,6 +11,7 @@ from typing import Optional
 
 import mav_sim.parameters.planner_parameters as PLAN
 import numpy as np
+from mav_sim.tools.random_streams import get_rng
 from mav_sim.tools.types import NP_MAT
 
 
@@ -19,7 +20,7 @@ class MsgWorldMap:
     """
     def __init__(self, city_width: float = PLAN.city_width, num_city_blocks: int = PLAN.num_blocks, \
         building_max_height: float = PLAN.building_height, street_width: float = PLAN.street_width, \
-        building_heights: Optional[NP_MAT] = None) -> None:
+        building_heights: Optional[NP_MAT] = None, rng: Optional[np.random.Generator] = None) -> None:
         """Initializes the map to default parameters with random initialization for building heights
 
         Args:
@@ -28,6 +29,7 @@ class MsgWorldMap:
             building_max_height: The maximum height of the buildings
             street_width: The width of the streets
             building_heights: Heights of each building. If no heights are provided then they will be randomly generated
+            rng: Generator of the random building heights, the global numpy state is used when None
         """
         ### Independent Parameters for generating city ###
         # flag to indicate if the map has changed
@@ -56,18 +58,19 @@ class MsgWorldMap:
         ### Randomly generated variables ###
         # an array of building heights
         self.building_height: NP_MAT
-        self.set_heights(building_heights=building_heights)
+        self.set_heights(building_heights=building_heights, rng=rng)
 
 
-    def set_heights(self, building_heights: Optional[NP_MAT] = None) -> None:
+    def set_heights(self, building_heights: Optional[NP_MAT] = None, rng: Optional[np.random.Generator] = None) -> None:
         """ Sets the building heights. If no heights are provided then they are produced randomly.
 
         Args:
             building_heights: Heights of each building. If no heights are provided then they will be randomly generated
+            rng: Generator of the random building heights, the global numpy state is used when None
         """
         # Set the building heights
         if building_heights is None:
-            self.building_height = self.building_max_height * np.random.rand(self.num_city_blocks, self.num_city_blocks)
+            self.building_height = self.building_max_height * get_rng(rng).random((self.num_city_blocks, self.num_city_blocks))
         else:
             self.building_height = building_heights
 
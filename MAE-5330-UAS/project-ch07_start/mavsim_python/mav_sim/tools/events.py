@@ -0,0 +1,85 @@
+"""
+events
+    - Zero crossings of scalar functions of the 13x1 dynamic state, watched by the integrators
+    - Factories for the common ground contact and geofence events
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+from typing import Callable
+
+import numpy as np
+from mav_sim.tools import types
+
+EventFunction = Callable[[types.DynamicState], float]
+
+# Rows of the north, east, and down position in the 13x1 state
+NORTH: int = 0
+EAST: int = 1
+DOWN: int = 2
+POSITION = slice(NORTH, DOWN + 1)
+
+class Event:
+    """Zero crossing of a scalar function g(x) of the state, watched by a DynamicsIntegrator
+    """
+    def __init__(self, name: str, function: EventFunction, terminal: bool = False, direction: int = 0) -> None:
+        """Defines the event
+
+        Args:
+            name: Name reported with each crossing
+            function: g(x) of the 13x1 state, the event occurs where it crosses zero
+            terminal: True => the integration stops at the crossing
+            direction: 1 => only crossings from negative to positive, -1 => only from positive to
+                negative, 0 => both
+        """
+        if direction not in (-1, 0, 1):
+            raise ValueError("direction must be -1, 0, or 1")
+        self.name = name
+        self.function = function
+        self.terminal = terminal
+        self.direction = direction
+
+    def crossed(self, start_value: float, end_value: float) -> bool:
+        """True when g changes sign from start_value to end_value in an allowed direction. A start
+        value of exactly zero is not a crossing, so a step that starts on an event does not repeat it."""
+        if start_value < 0. <= end_value:
+            return self.direction >= 0
+        if start_value > 0. >= end_value:
+            return self.direction <= 0
+        return False
+
+class EventCrossing:
+    """Record of an event found by a DynamicsIntegrator
+    """
+    def __init__(self, event: Event, time: float, state: types.DynamicState) -> None:
+        self.event = event # The event that occurred
+        self.time = time # Integrated time at the crossing, within event_tol past the root
+        self.state = state # 13x1 state at time
+
+    def __str__(self) -> str:
+        """Create a string from the crossing"""
+        return self.event.name + " at " + str(self.time)
+
+def ground_contact_event(ground_altitude: float = 0., terminal: bool = True) -> Event:
+    """Event of the aircraft descending through an altitude
+
+    Args:
+        ground_altitude: Altitude of the ground
+        terminal: True => the integration stops at the contact
+    """
+    return Event("ground contact", lambda state: -state.item(DOWN) - ground_altitude, terminal, -1)
+
+def geofence_event(north: float, east: float, radius: float, terminal: bool = True) -> Event:
+    """Event of the aircraft leaving a vertical cylinder
+
+    Args:
+        north: North position of the axis of the cylinder
+        east: East position of the axis of the cylinder
+        radius: Radius of the cylinder
+        terminal: True => the integration stops at the exit
+    """
+    if radius <= 0.:
+        raise ValueError("The radius of the geofence must be positive")
+    return Event("geofence exit",
+                 lambda state: radius - float(np.hypot(state.item(NORTH) - north, state.item(EAST) - east)),
+                 terminal, -1)
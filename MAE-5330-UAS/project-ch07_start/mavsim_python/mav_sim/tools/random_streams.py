@@ -0,0 +1,122 @@
+"""
+random_streams
+    - Independent random number generators for the stochastic components of the simulation
+    - Each component (wind, sensors, world map) gets its own stream spawned from a single SeedSequence
+      so that runs are reproducible regardless of the process they run in
+    - BlockNoise hands out normal noise that is pre-generated in large blocks
+    - GlobalRandom draws from the global numpy state for the components that are not given a generator
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+from typing import Any, Optional, TypeVar, Union, overload
+
+import numpy as np
+import numpy.typing as npt
+
+# Components that draw random numbers, the position of each name fixes its child of the SeedSequence
+COMPONENTS: tuple[str, ...] = ("wind", "sensors", "world_map")
+
+# Anything that can seed a SeedSequence, None draws fresh entropy from the operating system
+Seed = Union[None, int, np.random.SeedSequence]
+
+class GlobalRandom:
+    """Draws from the global numpy random state through the public np.random functions
+
+    Provides the random(), normal() and standard_normal() calls of np.random.Generator, so that
+    np.random.seed() keeps controlling the components that are not given a generator.
+    """
+    @staticmethod
+    def random(size: Any = None) -> Any:
+        """Returns uniform values in [0, 1), see np.random.random"""
+        return np.random.random(size)
+
+    @staticmethod
+    def standard_normal(size: Any = None) -> Any:
+        """Returns standard normal values, see np.random.standard_normal"""
+        return np.random.standard_normal(size)
+
+    @staticmethod
+    def normal(loc: Any = 0., scale: Any = 1., size: Any = None) -> Any:
+        """Returns normal values with mean loc and standard deviation scale, see np.random.normal"""
+        return np.random.normal(loc, scale, size)
+
+# Generator of the random draws, either a component stream or the global state
+RandomSource = Union[np.random.Generator, GlobalRandom]
+
+class BlockNoise:
+    """Source of normal noise that is pre-generated in blocks
+
+    Standard normal values are drawn from the generator block_size at a time and handed out in
+    order, so each draw costs a slice instead of a call into the generator. Provides the normal()
+    and standard_normal() calls of np.random.Generator with an integer size. Values left over at
+    the end of a block are discarded, which leaves the draws independent and identically distributed.
+    """
+    def __init__(self, rng: Optional[np.random.Generator] = None, block_size: int = 100000) -> None:
+        """Allocates the block, it is filled on the first draw
+
+        Args:
+            rng: Generator used to fill the blocks, a generator seeded from the operating system is used when None
+            block_size: Number of values generated at once
+        """
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        self._rng = rng if rng is not None else np.random.default_rng()
+        self._block: npt.NDArray[np.float64] = np.empty(block_size)
+        self._index = block_size # Index of the next value to hand out
+        self.refills = 0 # Number of blocks generated
+
+    def standard_normal(self, size: int = 1) -> npt.NDArray[np.float64]:
+        """Returns the next size standard normal values
+
+        The returned array is a view of the block that is overwritten at the next refill, copy it to keep it.
+        """
+        if self._index + size > self._block.size:
+            if size > self._block.size:
+                raise ValueError("Cannot draw more than block_size values at once")
+            self._rng.standard_normal(out=self._block)
+            self._index = 0
+            self.refills += 1
+        values = self._block[self._index:self._index + size]
+        self._index += size
+        return values
+
+    def normal(self, loc: float = 0., scale: Any = 1., size: int = 1) -> npt.NDArray[np.float64]:
+        """Returns size normal values with mean loc and standard deviation scale (a scalar or one per value)"""
+        values: npt.NDArray[np.float64] = np.multiply(scale, self.standard_normal(size))
+        return loc + values
+
+_GLOBAL_RANDOM = GlobalRandom()
+
+# Source of the noise of a component
+NoiseSource = Union[np.random.Generator, BlockNoise]
+_Source = TypeVar("_Source", np.random.Generator, BlockNoise)
+
+def component_generators(seed: Seed = None) -> dict[str, np.random.Generator]:
+    """Spawns one generator per simulation component
+
+    Args:
+        seed: Seed of the whole run
+
+    Returns:
+        generators: Generator of each name in COMPONENTS
+    """
+    sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    children = sequence.spawn(len(COMPONENTS))
+    return {name: np.random.default_rng(child) for name, child in zip(COMPONENTS, children)}
+
+@overload
+def get_rng(rng: None = None) -> GlobalRandom:
+    ...
+
+@overload
+def get_rng(rng: _Source) -> _Source:
+    ...
+
+def get_rng(rng: Optional[NoiseSource] = None) -> Union[RandomSource, BlockNoise]:
+    """Returns rng, or the global numpy random state when rng is None so that np.random.seed()
+    keeps controlling the components that are not given a generator
+    """
+    if rng is not None:
+        return rng
+    return _GLOBAL_RANDOM
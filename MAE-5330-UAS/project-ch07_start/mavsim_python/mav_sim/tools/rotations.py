@@ -2,13 +2,15 @@
 various tools to be used in mavPySim
 
 Conversions between different orientation representations
+
+The *_batch functions convert many attitudes at once, with one attitude per column of the
+input and stacked (N, 3, 3) rotation matrices
 """
 from typing import cast
 
 import numpy as np
-from mav_sim.chap2.transforms import rot_b_to_v
+from mav_sim.chap2.transforms import rot_b_to_v, rot_b_to_v_batch
 from mav_sim.tools import types
-from scipy import linalg
 
 
 def Quaternion2Euler(quaternion: types.Quaternion) -> tuple[float, float, float]: \
@@ -55,10 +57,13 @@ def Euler2Rotation(phi: float, theta: float, psi: float) -> types.RotMat: \
 
     return rot_b_to_v(psi, theta, phi)
 
-def Quaternion2Rotation(quaternion: types.Quaternion) -> types.RotMat: \
+def Quaternion2Rotation(quaternion: types.Quaternion, unit: bool = False) -> types.RotMat: \
     # pylint: disable=invalid-name
     """
     converts a quaternion attitude to a rotation matrix
+
+    The matrix is divided by its determinant, |e|^6, unless the caller guarantees a unit
+    quaternion with unit=True
     """
     # Check input
     types.check_quaternion(quaternion)
@@ -73,10 +78,104 @@ def Quaternion2Rotation(quaternion: types.Quaternion) -> types.RotMat: \
     R = np.array([[e1 ** 2.0 + e0 ** 2.0 - e2 ** 2.0 - e3 ** 2.0, 2.0 * (e1 * e2 - e3 * e0), 2.0 * (e1 * e3 + e2 * e0)],
                   [2.0 * (e1 * e2 + e3 * e0), e2 ** 2.0 + e0 ** 2.0 - e1 ** 2.0 - e3 ** 2.0, 2.0 * (e2 * e3 - e1 * e0)],
                   [2.0 * (e1 * e3 - e2 * e0), 2.0 * (e2 * e3 + e1 * e0), e3 ** 2.0 + e0 ** 2.0 - e1 ** 2.0 - e2 ** 2.0]])
-    R = cast(types.RotMat, R/linalg.det(R))
+    if not unit:
+        norm_sq = e0*e0 + e1*e1 + e2*e2 + e3*e3
+        R = cast(types.RotMat, R/(norm_sq*norm_sq*norm_sq))
 
     return R
 
+def quaternion_rotation_elements(quaternions: types.Quaternions, unit: bool = False) -> tuple[types.NP_MAT, ...]:
+    """Computes the nine elements of the body to inertial rotation matrix of each quaternion
+
+    Args:
+        quaternions: (4, N) array with one quaternion per column
+        unit: True when the quaternions are known to be unit length, which skips the scaling by
+            1/det(R) applied by Quaternion2Rotation
+
+    Returns:
+        r11, r12, r13, r21, r22, r23, r31, r32, r33: each an N element array
+    """
+    e0, e1, e2, e3 = quaternions[0], quaternions[1], quaternions[2], quaternions[3]
+    e00, e11, e22, e33 = e0*e0, e1*e1, e2*e2, e3*e3
+    elements = (e11 + e00 - e22 - e33, 2.*(e1*e2 - e3*e0), 2.*(e1*e3 + e2*e0),
+                2.*(e1*e2 + e3*e0), e22 + e00 - e11 - e33, 2.*(e2*e3 - e1*e0),
+                2.*(e1*e3 - e2*e0), 2.*(e2*e3 + e1*e0), e33 + e00 - e11 - e22)
+    if unit:
+        return elements
+    scale = 1. / (e00 + e11 + e22 + e33)**3  # det(R) = |e|^6
+    return tuple(element*scale for element in elements)
+
+def Quaternion2Rotation_batch(quaternions: types.Quaternions, unit: bool = False) -> types.RotMats: \
+    # pylint: disable=invalid-name
+    """
+    converts quaternion attitudes to rotation matrices, see Quaternion2Rotation
+
+    Args:
+        quaternions: (4, N) array with one quaternion per column
+        unit: True when the quaternions are known to be unit length
+
+    Returns:
+        R: (N, 3, 3) rotation matrices from body to inertial
+    """
+    types.check_quaternions(quaternions)
+    quaternions = np.asarray(quaternions, dtype=float)
+    return np.stack(quaternion_rotation_elements(quaternions, unit), axis=-1).reshape(-1, 3, 3)
+
+def Quaternion2Euler_batch(quaternions: types.Quaternions) -> types.EulerAngles: # pylint: disable=invalid-name
+    """
+    converts quaternion attitudes to euler angles, see Quaternion2Euler
+
+    The argument of the pitch arcsin is clipped to [-1, 1] so that rounding near theta = +/- pi/2
+    does not produce nan
+
+    Args:
+        quaternions: (4, N) array with one unit quaternion per column
+
+    Returns:
+        euler: (3, N) array of (phi, theta, psi) columns
+    """
+    types.check_quaternions(quaternions)
+    e0, e1, e2, e3 = np.asarray(quaternions, dtype=float)
+    e00, e11, e22, e33 = e0*e0, e1*e1, e2*e2, e3*e3
+    euler = np.empty((3, e0.size))
+    euler[0] = np.arctan2(2.0 * (e0 * e1 + e2 * e3), e00 + e33 - e11 - e22)
+    euler[1] = np.arcsin(np.clip(2.0 * (e0 * e2 - e1 * e3), -1., 1.))
+    euler[2] = np.arctan2(2.0 * (e0 * e3 + e1 * e2), e00 + e11 - e22 - e33)
+    return euler
+
+def Euler2Quaternion_batch(euler: types.EulerAngles) -> types.Quaternions: # pylint: disable=invalid-name
+    """
+    converts euler angle attitudes to quaternions, see Euler2Quaternion
+
+    Args:
+        euler: (3, N) array of (phi, theta, psi) columns
+
+    Returns:
+        quaternions: (4, N) array with one unit quaternion per column
+    """
+    types.check_points(euler)
+    half = 0.5*np.asarray(euler, dtype=float)
+    c_phi, c_theta, c_psi = np.cos(half)
+    s_phi, s_theta, s_psi = np.sin(half)
+    return np.array([c_psi*c_theta*c_phi + s_psi*s_theta*s_phi,
+                     c_psi*c_theta*s_phi - s_psi*s_theta*c_phi,
+                     c_psi*s_theta*c_phi + s_psi*c_theta*s_phi,
+                     s_psi*c_theta*c_phi - c_psi*s_theta*s_phi])
+
+def Euler2Rotation_batch(euler: types.EulerAngles) -> types.RotMats: # pylint: disable=invalid-name
+    """
+    converts euler angle attitudes to rotation matrices (R_b^i), see Euler2Rotation
+
+    Args:
+        euler: (3, N) array of (phi, theta, psi) columns
+
+    Returns:
+        R: (N, 3, 3) rotation matrices from body to inertial
+    """
+    types.check_points(euler)
+    euler = np.asarray(euler, dtype=float)
+    return rot_b_to_v_batch(euler[2], euler[1], euler[0])
+
 def Rotation2Quaternion(R: types.RotMat) -> types.Quaternion: # pylint: disable=invalid-name
     """
     converts a rotation matrix to a unit quaternion
@@ -0,0 +1,103 @@
+"""
+scheduler
+    - Runs each component of a simulation at its own rate, an integer number of base time steps
+    - Periods are converted to ticks once, component times are start_time + tick*ts_base, so the
+      schedule does not drift the way an accumulated floating point timer does
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+import numpy as np
+from mav_sim.message_types.msg_sim_params import MsgSimParams
+
+
+def period_ticks(period: float, ts_base: float, exact: bool = True) -> int:
+    """Converts a period to a number of base time steps
+
+    Args:
+        period: Period of the component
+        ts_base: Base time step of the simulation
+        exact: True => the period must be an integer multiple of ts_base, False => the period is
+            rounded to the nearest multiple
+
+    Returns:
+        ticks: Number of base time steps per period, at least one
+    """
+    ticks = int(round(period / ts_base))
+    if exact and (ticks < 1 or abs(ticks*ts_base - period) > 1e-9*max(1., abs(period))):
+        raise ValueError("period " + str(period) + " is not a positive integer multiple of the time step " + str(ts_base))
+    return max(1, ticks)
+
+class RateScheduler:
+    """Schedule of components that run at integer multiples of a base time step
+
+    Every component runs on tick zero and then once every period, e.g., with ts_base = 0.01 a
+    component added with period 0.02 is due on ticks 0, 2, 4, ...
+    """
+    def __init__(self, ts_base: float, start_time: float = 0.) -> None:
+        """Creates a schedule without any components
+
+        Args:
+            ts_base: Base time step, the period of a tick
+            start_time: Time of tick zero
+        """
+        if ts_base <= 0.:
+            raise ValueError("ts_base must be positive")
+        self.ts_base = ts_base
+        self.start_time = start_time
+        self._ticks: dict[str, int] = {}
+
+    def add(self, name: str, period: float, exact: bool = True) -> int:
+        """Adds or replaces a component
+
+        Args:
+            name: Name of the component
+            period: Period of the component, see period_ticks
+            exact: False => the period is rounded to the nearest multiple of ts_base
+
+        Returns:
+            ticks: Number of ticks per period of the component
+        """
+        self._ticks[name] = period_ticks(period, self.ts_base, exact)
+        return self._ticks[name]
+
+    def ticks(self, name: str) -> int:
+        """Number of ticks per period of a component"""
+        return self._ticks[name]
+
+    def period(self, name: str) -> float:
+        """Period of a component after rounding to the base time step"""
+        return self._ticks[name]*self.ts_base
+
+    def due(self, name: str, tick: int) -> bool:
+        """True when the component runs on the tick"""
+        return tick % self._ticks[name] == 0
+
+    def time(self, tick: int) -> float:
+        """Simulation time of a tick"""
+        return self.start_time + tick*self.ts_base
+
+    def num_ticks(self, end_time: float) -> int:
+        """Number of ticks needed to go from start_time to end_time"""
+        return max(0, int(np.ceil((end_time - self.start_time) / self.ts_base - 1e-9)))
+
+def simulation_schedule(sim: MsgSimParams) -> RateScheduler:
+    """Creates the schedule of the run_sim loops from the simulation parameters
+
+    The dynamics advance on every tick. The components are "sensors" (ts_sensors), "observer"
+    (ts_observer), "control" (ts_control), "path" (ts_path), and "plot" (ts_plotting, rounded to
+    the nearest tick)
+
+    Args:
+        sim: Timing parameters of the simulation
+
+    Returns:
+        schedule: Schedule with a tick of ts_simulation
+    """
+    schedule = RateScheduler(sim.ts_simulation, sim.start_time)
+    schedule.add("sensors", sim.ts_sensors)
+    schedule.add("observer", sim.ts_observer)
+    schedule.add("control", sim.ts_control)
+    schedule.add("path", sim.ts_path)
+    schedule.add("plot", sim.ts_plotting, exact=False)
+    return schedule
@@ -0,0 +1,108 @@
+"""
+sim_trajectory
+    - Storage of the signals of a headless simulation run in preallocated arrays
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+from typing import Any, Optional
+
+import numpy as np
+import numpy.typing as npt
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.message_types.msg_sensors import MsgSensors
+from mav_sim.message_types.msg_sim_params import MsgSimParams
+from mav_sim.message_types.msg_state import MsgState
+from mav_sim.tools import types
+from mav_sim.tools.scheduler import RateScheduler
+
+# Row names of each of the arrays
+STATE_FIELDS: tuple[str, ...] = MsgState.FIELDS
+DELTA_FIELDS: tuple[str, ...] = MsgDelta.FIELDS
+WIND_FIELDS: tuple[str, ...] = ("wn", "we", "wd", "u_gust", "v_gust", "w_gust")
+SENSOR_FIELDS: tuple[str, ...] = MsgSensors.FIELDS
+
+def num_sim_steps(sim: MsgSimParams, time_step: Optional[float] = None) -> int:
+    """Returns the number of steps needed to go from sim.start_time to sim.end_time, the number of
+    ticks of a RateScheduler with a tick of time_step
+
+    Args:
+        sim: Timing parameters of the simulation
+        time_step: Length of each step, defaults to sim.ts_simulation
+    """
+    if time_step is None:
+        time_step = sim.ts_simulation
+    return RateScheduler(time_step, sim.start_time).num_ticks(sim.end_time)
+
+class SimTrajectory:
+    """Time history of a simulation stored column-wise, one column per simulation step
+
+    Column k holds the true state, commanded state, and sensor readings at time[k] along with the
+    control surfaces and wind applied over the step that starts at time[k]. The commanded state
+    and sensors are None when the simulation does not produce them.
+    """
+    def __init__(self, num_samples: int, commanded: bool = True, sensors: bool = False) -> None:
+        """Allocates the arrays for the whole run
+
+        Args:
+            num_samples: Number of columns to allocate
+            commanded: True => store commanded states
+            sensors: True => store sensor readings
+        """
+        self.num_samples = 0 # Number of columns that have been filled
+        self.time: npt.NDArray[Any] = np.zeros(num_samples)
+        self.true_state: types.NP_MAT = np.zeros((len(STATE_FIELDS), num_samples))
+        self.commanded_state: Optional[types.NP_MAT] = None
+        if commanded:
+            self.commanded_state = np.zeros((len(STATE_FIELDS), num_samples))
+        self.delta: types.NP_MAT = np.zeros((len(DELTA_FIELDS), num_samples))
+        self.wind: types.NP_MAT = np.zeros((len(WIND_FIELDS), num_samples))
+        self.sensors: Optional[types.NP_MAT] = None
+        if sensors:
+            self.sensors = np.zeros((len(SENSOR_FIELDS), num_samples))
+
+    def record(self, time: float, true_state: MsgState, delta: MsgDelta, wind: types.WindVector,
+               commanded_state: Optional[MsgState] = None, sensors: Optional[MsgSensors] = None) -> None:
+        """Stores the signals of a single step in the next column
+
+        Args:
+            time: Simulation time of the step
+            true_state: True state at the start of the step
+            delta: Control surfaces applied over the step
+            wind: 6x1 wind vector (steady inertial and body gust) applied over the step
+            commanded_state: Commanded state, only stored when allocated
+            sensors: Sensor readings, only stored when allocated
+        """
+        k = self.num_samples
+        if k >= self.time.size:
+            raise ValueError("Trajectory is full, " + str(self.time.size) + " columns were allocated")
+
+        self.time[k] = time
+        self.true_state[:, k] = true_state.as_array()
+        self.delta[:, k] = delta.as_array()
+        self.wind[:, k] = wind[:, 0]
+        if self.commanded_state is not None and commanded_state is not None:
+            self.commanded_state[:, k] = commanded_state.as_array()
+        if self.sensors is not None and sensors is not None:
+            self.sensors[:, k] = sensors.as_array()
+        self.num_samples += 1
+
+    def state(self, field: str) -> npt.NDArray[Any]:
+        """Returns the recorded history of a single MsgState field, e.g. state("altitude")"""
+        return self.true_state[STATE_FIELDS.index(field), :self.num_samples]
+
+    def command(self, field: str) -> npt.NDArray[Any]:
+        """Returns the recorded history of a single commanded MsgState field"""
+        if self.commanded_state is None:
+            raise ValueError("Commanded states were not recorded")
+        return self.commanded_state[STATE_FIELDS.index(field), :self.num_samples]
+
+    def input(self, field: str) -> npt.NDArray[Any]:
+        """Returns the recorded history of a single MsgDelta field, e.g. input("elevator")"""
+        return self.delta[DELTA_FIELDS.index(field), :self.num_samples]
+
+    def sensor(self, field: str) -> npt.NDArray[Any]:
+        """Returns the recorded history of a single MsgSensors field, e.g. sensor("gps_n")"""
+        if self.sensors is None:
+            raise ValueError("Sensors were not recorded")
+        return self.sensors[SENSOR_FIELDS.index(field), :self.num_samples]
@@ -0,0 +1,231 @@
+"""
+trajectory_recorder
+    - Records the signals of a simulation into fixed size columnar buffers
+    - Full buffers are spilled to a memory-mapped file so memory use does not grow with the run
+    - Recordings can be exported to .npz or, when h5py is installed, HDF5
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+import os
+import tempfile
+import zipfile
+from types import TracebackType
+from typing import Any, Iterator, Optional
+
+import numpy as np
+import numpy.typing as npt
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.message_types.msg_sensors import MsgSensors
+from mav_sim.message_types.msg_state import MsgState
+from mav_sim.tools import types
+from mav_sim.tools.sim_trajectory import (
+    DELTA_FIELDS,
+    SENSOR_FIELDS,
+    STATE_FIELDS,
+    WIND_FIELDS,
+)
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+class TrajectoryRecorder:
+    """Records time, true state, commanded state, delta, wind, and sensors one step at a time
+
+    Each signal is stored as a row of a (num_channels, chunk_size) buffer. When the buffer is full
+    it is appended to the spill file and reused, so recording costs the same at every step and
+    the memory in use is fixed by chunk_size. The spilled chunks are read back through np.memmap.
+    Read and export before close(), a closed recorder raises ValueError. Signals that are recorded
+    but not given to record() are stored as NaN.
+
+    Groups and the names of their rows:
+        time: ("time",)
+        true_state, commanded_state: MsgState fields
+        delta: MsgDelta fields
+        wind: ("wn", "we", "wd", "u_gust", "v_gust", "w_gust")
+        sensors: MsgSensors fields
+    """
+    def __init__(self, commanded: bool = True, sensors: bool = False, chunk_size: int = 10000,
+                 spill_path: Optional[str] = None) -> None:
+        """Allocates the buffer
+
+        Args:
+            commanded: True => record the commanded state
+            sensors: True => record the sensor readings
+            chunk_size: Number of steps held in memory before spilling to file
+            spill_path: File used for the spilled chunks, a temporary file is used when None
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+
+        # Determine the rows of each group
+        self.groups: dict[str, tuple[str, ...]] = {"time": ("time",), "true_state": STATE_FIELDS}
+        if commanded:
+            self.groups["commanded_state"] = STATE_FIELDS
+        self.groups["delta"] = DELTA_FIELDS
+        self.groups["wind"] = WIND_FIELDS
+        if sensors:
+            self.groups["sensors"] = SENSOR_FIELDS
+        self._rows: dict[str, slice] = {}
+        num_channels = 0
+        for group, fields in self.groups.items():
+            self._rows[group] = slice(num_channels, num_channels + len(fields))
+            num_channels += len(fields)
+
+        self.chunk_size = chunk_size
+        self._buffer: types.NP_MAT = np.zeros((num_channels, chunk_size))
+        self._count = 0 # Number of samples in the buffer
+        self._num_spilled = 0 # Number of chunks in the spill file
+
+        self._spill_path = spill_path
+        self._temporary = spill_path is None
+        self._spill_file: Optional[Any] = None
+        self._closed = False
+
+    @property
+    def num_samples(self) -> int:
+        """Number of recorded steps"""
+        return self._num_spilled*self.chunk_size + self._count
+
+    def record(self, time: float, true_state: MsgState, delta: MsgDelta, wind: types.WindVector,
+               commanded_state: Optional[MsgState] = None, sensors: Optional[MsgSensors] = None) -> None:
+        """Stores the signals of a single step
+
+        Args:
+            time: Simulation time of the step
+            true_state: True state at the start of the step
+            delta: Control surfaces applied over the step
+            wind: 6x1 wind vector (steady inertial and body gust) applied over the step
+            commanded_state: Commanded state, only stored when recording commanded states
+            sensors: Sensor readings, only stored when recording sensors
+        """
+        self._check_open()
+        k = self._count
+        buffer = self._buffer
+        buffer[0, k] = time
+        buffer[self._rows["true_state"], k] = true_state.as_array()
+        if "commanded_state" in self._rows:
+            buffer[self._rows["commanded_state"], k] = np.nan if commanded_state is None else commanded_state.as_array()
+        buffer[self._rows["delta"], k] = delta.as_array()
+        buffer[self._rows["wind"], k] = wind[:, 0]
+        if "sensors" in self._rows:
+            buffer[self._rows["sensors"], k] = np.nan if sensors is None else sensors.as_array()
+
+        self._count += 1
+        if self._count == self.chunk_size:
+            self._spill()
+
+    def get(self, group: str, field: Optional[str] = None) -> npt.NDArray[Any]:
+        """Returns the recorded history of a group (one row per field) or a single field
+
+        Args:
+            group: Name of the group, e.g. "true_state"
+            field: Name of a field in the group, e.g. "altitude". The whole group is returned when None
+        """
+        self._check_open()
+        rows = self._group_rows(group, field)
+        out = np.empty((rows.stop - rows.start, self.num_samples))
+        start = 0
+        for chunk in self._chunks(rows):
+            out[:, start:start + chunk.shape[1]] = chunk
+            start += chunk.shape[1]
+        return out[0] if field is not None else out
+
+    def save_npz(self, path: str) -> None:
+        """Writes one (num_fields, num_samples) array per group, plus the field names of each group,
+        to an uncompressed .npz file. The arrays are streamed chunk by chunk.
+
+        Args:
+            path: Name of the file to write
+        """
+        self._check_open()
+        with zipfile.ZipFile(path, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for group, fields in self.groups.items():
+                rows = self._rows[group]
+                with archive.open(group + ".npy", mode="w", force_zip64=True) as file:
+                    header = {"descr": np.lib.format.dtype_to_descr(np.dtype(float)), "fortran_order": False,
+                              "shape": (len(fields), self.num_samples)}
+                    np.lib.format.write_array_header_2_0(file, header)
+                    for row in range(rows.start, rows.stop):
+                        for chunk in self._chunks(slice(row, row + 1)):
+                            file.write(np.ascontiguousarray(chunk).tobytes())
+                with archive.open(group + "_fields.npy", mode="w") as file:
+                    np.lib.format.write_array(file, np.array(fields))
+
+    def save_hdf5(self, path: str) -> None:
+        """Writes one (num_fields, num_samples) dataset per group to an HDF5 file, the field names
+        are stored in the "fields" attribute of each dataset. Requires h5py.
+
+        Args:
+            path: Name of the file to write
+        """
+        if h5py is None:
+            raise ImportError("h5py is required to export HDF5 files")
+        self._check_open()
+        with h5py.File(path, "w") as file:
+            for group, fields in self.groups.items():
+                dataset = file.create_dataset(group, shape=(len(fields), self.num_samples), dtype=float)
+                dataset.attrs["fields"] = list(fields)
+                start = 0
+                for chunk in self._chunks(self._rows[group]):
+                    dataset[:, start:start + chunk.shape[1]] = chunk
+                    start += chunk.shape[1]
+
+    def close(self) -> None:
+        """Closes the spill file, a temporary spill file is deleted. The recording can no longer be
+        read or extended afterwards."""
+        self._closed = True
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+            if self._temporary and self._spill_path is not None:
+                os.remove(self._spill_path)
+                self._spill_path = None
+
+    def __enter__(self) -> 'TrajectoryRecorder':
+        """Use the recorder as a context manager that closes the spill file on exit"""
+        return self
+
+    def __exit__(self, exc_type: Optional[type[BaseException]], exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        """Close the recorder"""
+        self.close()
+
+    def _check_open(self) -> None:
+        """Raises once the recorder is closed, the spilled chunks are no longer available"""
+        if self._closed:
+            raise ValueError("The recorder is closed")
+
+    def _group_rows(self, group: str, field: Optional[str]) -> slice:
+        """Returns the buffer rows of a group or field"""
+        if group not in self._rows:
+            raise ValueError("Group " + group + " is not recorded")
+        rows = self._rows[group]
+        if field is None:
+            return rows
+        row = rows.start + self.groups[group].index(field)
+        return slice(row, row + 1)
+
+    def _spill(self) -> None:
+        """Appends the full buffer to the spill file"""
+        if self._spill_file is None:
+            if self._spill_path is None:
+                handle, self._spill_path = tempfile.mkstemp(suffix=".dat", prefix="mav_sim_trajectory_")
+                os.close(handle)
+            self._spill_file = open(self._spill_path, "wb") # pylint: disable=consider-using-with
+        self._spill_file.write(self._buffer.tobytes())
+        self._spill_file.flush()
+        self._num_spilled += 1
+        self._count = 0
+
+    def _chunks(self, rows: slice) -> Iterator[types.NP_MAT]:
+        """Iterates over the recorded data of the given rows, one chunk at a time"""
+        if self._num_spilled > 0 and self._spill_path is not None:
+            spilled = np.memmap(self._spill_path, dtype=float, mode="r",
+                                shape=(self._num_spilled, self._buffer.shape[0], self.chunk_size))
+            for chunk in spilled:
+                yield chunk[rows]
+        if self._count > 0:
+            yield self._buffer[rows, :self._count]
@@ -1,8 +1,14 @@
 """types.py Defines several types used throughout the code
+
+The check_* functions validate the shapes of their arguments. The checks run on every call by
+default and can be disabled for production runs with set_validation_level(ValidationLevel.none)
+or by setting the MAV_SIM_VALIDATION environment variable to "none" before importing mav_sim.
 """
 
+import os
 import typing
-from typing import Any, Callable, TypeAlias, Union
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, TypeAlias, Union
 
 import numpy as np
 import numpy.typing as npt
@@ -78,6 +84,9 @@ Vector: TypeAlias = npt.NDArray[Any] # 3x1 vector
 Points: TypeAlias = npt.NDArray[Any] # 3xn vector
 Quaternion: TypeAlias = npt.NDArray[Any] # 4x1 quaternion
 RotMat: TypeAlias = npt.NDArray[Any] # 3x3 rotation matrix
+Quaternions: TypeAlias = npt.NDArray[Any] # 4xn quaternions, one per column
+EulerAngles: TypeAlias = npt.NDArray[Any] # 3xn euler angles (phi, theta, psi), one attitude per column
+RotMats: TypeAlias = npt.NDArray[Any] # nx3x3 stacked rotation matrices
 SkewSymMat: TypeAlias = npt.NDArray[Any] # 3x3 skew symmetric matrix
 DynamicState: TypeAlias = npt.NDArray[Any] # 13x1 array of state elements assuming quaternion attitude
 DynamicStateEuler: TypeAlias = npt.NDArray[Any] # 12x1 array \
@@ -88,6 +97,52 @@ WindVector: TypeAlias = npt.NDArray[Any] # 6x1 array of wind -
     #   The second three elements are the gust in the body frame
 NP_MAT: TypeAlias = npt.NDArray[Any]
 
+class ValidationLevel:
+    """Defines how much checking the check_* functions perform
+    """
+    none = 0 # No checks, for production runs
+    full = 1 # Every check, for debugging and tests
+
+VALIDATION_LEVELS = {"none": ValidationLevel.none, "full": ValidationLevel.full}
+
+def _level_from_environment() -> int:
+    """Reads the validation level named by MAV_SIM_VALIDATION, full when it is not set"""
+    name = os.environ.get("MAV_SIM_VALIDATION", "full").strip().lower()
+    if name not in VALIDATION_LEVELS:
+        raise ValueError("MAV_SIM_VALIDATION should be one of " + ", ".join(VALIDATION_LEVELS))
+    return VALIDATION_LEVELS[name]
+
+_validation_level: int = _level_from_environment()
+
+def set_validation_level(level: int) -> None:
+    """Sets the validation level of the check_* functions for the whole process
+
+    Args:
+        level: One of the ValidationLevel values
+    """
+    global _validation_level # pylint: disable=global-statement
+    if level not in VALIDATION_LEVELS.values():
+        raise ValueError("level should be one of the ValidationLevel values")
+    _validation_level = level
+
+def get_validation_level() -> int:
+    """Returns the current validation level, see ValidationLevel"""
+    return _validation_level
+
+@contextmanager
+def validation_level(level: int) -> Iterator[None]:
+    """Sets the validation level within a with block, restoring the previous level on exit
+
+    Args:
+        level: One of the ValidationLevel values
+    """
+    previous = _validation_level
+    set_validation_level(level)
+    try:
+        yield
+    finally:
+        set_validation_level(previous)
+
 def check_valid_dimensions(mat: npt.NDArray[Any], rows: int = -1, cols: int = -1) -> None:
     """Checks matrix dimensions.
 
@@ -98,6 +153,9 @@ def check_valid_dimensions(mat: npt.NDArray[Any], rows: int = -1, cols: int = -1
         rows: Number of rows that it should have (-1 if the # of rows is not needed)
         cols: Number of columns that the matrix should have (-1 if the # of cols is not needed)
     """
+    if _validation_level == ValidationLevel.none:
+        return
+
     # Extract the shape
     shape = np.shape(mat)
 
@@ -118,6 +176,8 @@ def check_vector_size(vec: npt.NDArray[Any], size: int) -> None:
         vec: Vector to be checked
         size: number of elements that the vector should have
     """
+    if _validation_level == ValidationLevel.none:
+        return
 
     if size != np.size(vec):
         raise ValueError("Number of elements should be " + str(size))
@@ -142,6 +202,11 @@ def check_quaternion(quat: Quaternion) -> None:
     """
     check_vector_size( quat , 4)
 
+def check_quaternions(quats: Quaternions) -> None:
+    """Checks that quaternions have four rows and any number of columns
+    """
+    check_valid_dimensions( quats, rows=4 )
+
 def check_points(points: Points) -> None:
     """Checks that points have three rows and any number of columns
     """
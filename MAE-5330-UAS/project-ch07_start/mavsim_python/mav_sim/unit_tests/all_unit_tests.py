@@ -1,15 +1,34 @@
 """ Runs the unit tests for all chapters. Note that the unpickling struggles if the tests are not imported. That is why all tests are imported here even if they are not used directly.
 """
+from mav_sim.unit_tests.ch2_batch_rotations_test import (
+    run_all_tests as run_02_batch_rotations_tests,
+)
 from mav_sim.unit_tests.ch2_transforms_tests import (  # pylint: disable=unused-import
     SimpleRotationTest,
     ThreeRotationTest,
     TransformTest,
 )
 from mav_sim.unit_tests.ch2_transforms_tests import run_all_tests as run_02_tests
+from mav_sim.unit_tests.ch2_validation_test import (
+    run_all_tests as run_02_validation_tests,
+)
 from mav_sim.unit_tests.ch3_derivatives_test import (  # pylint: disable=unused-import
     DynamicsResults,
 )
 from mav_sim.unit_tests.ch3_derivatives_test import run_tests as run_03_tests
+from mav_sim.unit_tests.ch3_integrator_test import (
+    run_all_tests as run_03_integrator_tests,
+)
+from mav_sim.unit_tests.ch3_message_types_test import (
+    run_all_tests as run_03_message_types_tests,
+)
+from mav_sim.unit_tests.ch4_aero_table_test import (
+    run_all_tests as run_04_aero_table_tests,
+)
+from mav_sim.unit_tests.ch4_batch_dynamics_test import (
+    run_all_tests as run_04_batch_tests,
+)
+from mav_sim.unit_tests.ch4_dryden_test import run_all_tests as run_04_dryden_tests
 from mav_sim.unit_tests.ch4_dynamics_test import (  # pylint: disable=unused-import
     ForcesMomentsTest,
     GravitationalForceTest,
@@ -20,6 +39,19 @@ from mav_sim.unit_tests.ch4_dynamics_test import (  # pylint: disable=unused-imp
     WindSimulationTest,
 )
 from mav_sim.unit_tests.ch4_dynamics_test import run_all_tests as run_04_tests
+from mav_sim.unit_tests.ch4_headless_test import run_all_tests as run_04_headless_tests
+from mav_sim.unit_tests.ch4_propulsion_test import (
+    run_all_tests as run_04_propulsion_tests,
+)
+from mav_sim.unit_tests.ch4_trajectory_recorder_test import (
+    run_all_tests as run_04_trajectory_recorder_tests,
+)
+from mav_sim.unit_tests.ch4_true_state_test import (
+    run_all_tests as run_04_true_state_tests,
+)
+from mav_sim.unit_tests.ch4_wind_field_test import (
+    run_all_tests as run_04_wind_field_tests,
+)
 from mav_sim.unit_tests.ch5_dynamics_test import (  # pylint: disable=unused-import
     TrimObjectiveFunTest,
     VariableBoundsTest,
@@ -27,6 +59,16 @@ from mav_sim.unit_tests.ch5_dynamics_test import (  # pylint: disable=unused-imp
     VelocityConstraintTest,
 )
 from mav_sim.unit_tests.ch5_dynamics_test import run_auto_tests as run_05_tests
+from mav_sim.unit_tests.ch5_jacobian_test import run_all_tests as run_05_jacobian_tests
+from mav_sim.unit_tests.ch5_model_table_test import (
+    run_all_tests as run_05_model_table_tests,
+)
+from mav_sim.unit_tests.ch5_trim_cache_test import (
+    run_all_tests as run_05_trim_cache_tests,
+)
+from mav_sim.unit_tests.ch5_trim_envelope_test import (
+    run_all_tests as run_05_trim_envelope_tests,
+)
 from mav_sim.unit_tests.ch6_feedback_control_test import (  # pylint: disable=unused-import
     AutopilotTest,
     PDControlWithRateTest,
@@ -34,6 +76,15 @@ from mav_sim.unit_tests.ch6_feedback_control_test import (  # pylint: disable=un
     TFControlTest,
 )
 from mav_sim.unit_tests.ch6_feedback_control_test import run_all_tests as run_06_tests
+from mav_sim.unit_tests.ch6_monte_carlo_test import (
+    run_all_tests as run_06_monte_carlo_tests,
+)
+from mav_sim.unit_tests.ch7_random_streams_test import (
+    run_all_tests as run_07_random_streams_tests,
+)
+from mav_sim.unit_tests.ch7_scheduler_test import (
+    run_all_tests as run_07_scheduler_tests,
+)
 from mav_sim.unit_tests.ch7_sensors_test import (
     run_all_tests as run_07_tests,  # pylint: disable=unused-import
 )
@@ -49,16 +100,35 @@ from mav_sim.unit_tests.ch12_straight_line_rrt_test import run_tests as run_12_t
 if __name__ == '__main__':
     print("\n\nRunning Chapter 2 Unit Tests")
     run_02_tests()
+    run_02_batch_rotations_tests()
+    run_02_validation_tests()
     print("\n\nRunning Chapter 3 Unit Tests")
     run_03_tests()
+    run_03_integrator_tests()
+    run_03_message_types_tests()
     print("\n\nRunning Chapter 4 Unit Tests")
     run_04_tests()
+    run_04_batch_tests()
+    run_04_headless_tests()
+    run_04_trajectory_recorder_tests()
+    run_04_true_state_tests()
+    run_04_dryden_tests()
+    run_04_wind_field_tests()
+    run_04_aero_table_tests()
+    run_04_propulsion_tests()
     print("\n\nRunning Chapter 5 Unit Tests")
     run_05_tests()
+    run_05_jacobian_tests()
+    run_05_trim_cache_tests()
+    run_05_trim_envelope_tests()
+    run_05_model_table_tests()
     print("\n\nRunning Chapter 6 Unit Tests")
     run_06_tests()
+    run_06_monte_carlo_tests()
     print("\n\nRunning Chapter 7 Unit Tests")
     run_07_tests()
+    run_07_random_streams_tests()
+    run_07_scheduler_tests()
     print("\n\nRunning Chapter 10 Unit Tests")
     run_10_tests()
     print("\n\nRunning Chapter 11a Unit Tests")
@@ -0,0 +1,105 @@
+"""ch2_batch_rotations_test.py: Compares the batch rotation functions with their scalar counterparts."""
+
+import numpy as np
+from mav_sim.chap2.transforms import (
+    rot_b_to_s,
+    rot_b_to_s_batch,
+    rot_b_to_v,
+    rot_b_to_v_batch,
+    rot_s_to_w,
+    rot_s_to_w_batch,
+    rot_v1_to_v2,
+    rot_v1_to_v2_batch,
+    rot_v2_to_b,
+    rot_v2_to_b_batch,
+    rot_v_to_b,
+    rot_v_to_b_batch,
+    rot_v_to_v1,
+    rot_v_to_v1_batch,
+)
+from mav_sim.tools.rotations import (
+    Euler2Quaternion,
+    Euler2Quaternion_batch,
+    Euler2Rotation,
+    Euler2Rotation_batch,
+    Quaternion2Euler,
+    Quaternion2Euler_batch,
+    Quaternion2Rotation,
+    Quaternion2Rotation_batch,
+)
+
+
+def random_euler(num: int, seed: int = 15) -> np.ndarray:
+    """Random (phi, theta, psi) columns away from the pitch singularity"""
+    rng = np.random.default_rng(seed)
+    return np.vstack((rng.uniform(-np.pi, np.pi, num), rng.uniform(-1.5, 1.5, num), rng.uniform(-np.pi, np.pi, num)))
+
+def transforms_batch_test(num: int = 50) -> bool:
+    """Compares the batch rot_* functions of chap2.transforms with the scalar versions"""
+    print("\nStarting batch transforms test")
+    euler = random_euler(num)
+    success = True
+    for single, batch in ((rot_v_to_v1, rot_v_to_v1_batch), (rot_v1_to_v2, rot_v1_to_v2_batch),
+                          (rot_v2_to_b, rot_v2_to_b_batch), (rot_b_to_s, rot_b_to_s_batch),
+                          (rot_s_to_w, rot_s_to_w_batch)):
+        expected = np.array([single(angle) for angle in euler[0]])
+        success = success and np.allclose(batch(euler[0]), expected, rtol=0., atol=1e-15)
+    for single3, batch3 in ((rot_v_to_b, rot_v_to_b_batch), (rot_b_to_v, rot_b_to_v_batch)):
+        expected = np.array([single3(psi, theta, phi) for phi, theta, psi in euler.T])
+        success = success and np.allclose(batch3(euler[2], euler[1], euler[0]), expected, rtol=0., atol=1e-15)
+
+    if success:
+        print("Passed batch transforms test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def rotations_batch_test(num: int = 50) -> bool:
+    """Compares the batch conversions of tools.rotations with the scalar versions, including
+    quaternions that are not unit length"""
+    print("\nStarting batch rotations test")
+    euler = random_euler(num)
+    quats = Euler2Quaternion_batch(euler)
+    success = quats.shape == (4, num) and np.allclose(np.linalg.norm(quats, axis=0), 1.)
+    success = success and np.allclose(quats, np.hstack([Euler2Quaternion(*angles) for angles in euler.T]))
+    success = success and np.allclose(Quaternion2Euler_batch(quats), np.array([Quaternion2Euler(q) for q in quats.T]).T)
+    success = success and np.allclose(Euler2Rotation_batch(euler), np.array([Euler2Rotation(*angles) for angles in euler.T]))
+
+    # the unit path skips the scaling by 1/det(R), which only matters off the unit sphere
+    rotations = Quaternion2Rotation_batch(quats, unit=True)
+    success = success and np.allclose(rotations, np.array([Quaternion2Rotation(q) for q in quats.T])) and \
+        np.allclose(rotations, Euler2Rotation_batch(euler)) and \
+        np.allclose(rotations @ rotations.transpose(0, 2, 1), np.eye(3))
+    scaled = quats * np.linspace(0.9, 1.1, num)
+    success = success and np.allclose(Quaternion2Rotation_batch(scaled),
+                                      np.array([Quaternion2Rotation(q) for q in scaled.T]), rtol=0., atol=1e-14) and \
+        np.allclose(Quaternion2Rotation(scaled[:, 0], unit=True), Quaternion2Rotation_batch(scaled, unit=True)[0])
+
+    # a diverging quaternion overflows to inf in the scaling, as the batch version does, instead of raising
+    diverged = np.array([[1e60], [0.], [1e60], [0.]])
+    with np.errstate(over="ignore"):
+        success = success and np.array_equal(Quaternion2Rotation(diverged), Quaternion2Rotation_batch(diverged)[0])
+
+    # the pitch singularity does not produce nan when rounding pushes the arcsin argument past one
+    success = success and not np.any(np.isnan(Quaternion2Euler_batch(np.array([[1.], [0.], [1.], [0.]]) / np.sqrt(2.))))
+
+    try:
+        Quaternion2Rotation_batch(np.zeros((3, num)))
+        success = False
+    except ValueError:
+        pass
+
+    if success:
+        print("Passed batch rotations test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = transforms_batch_test() and rotations_batch_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,73 @@
+"""ch2_validation_test.py: Tests the validation level of the shape checks in mav_sim.tools.types."""
+
+import os
+import subprocess
+import sys
+from typing import Callable
+
+import numpy as np
+from mav_sim.tools import types
+from mav_sim.tools.rotations import Quaternion2Rotation, hat
+
+
+def raises_value_error(func: Callable[[], object]) -> bool:
+    """True when calling func raises a ValueError"""
+    try:
+        func()
+    except ValueError:
+        return True
+    return False
+
+def validation_level_test() -> bool:
+    """Checks that malformed inputs are rejected only while validation is enabled"""
+    print("\nStarting validation level test")
+    bad_quaternion = np.zeros((3, 1))
+    bad_vector = np.zeros((2, 1))
+    success = types.get_validation_level() == types.ValidationLevel.full and \
+        raises_value_error(lambda: Quaternion2Rotation(bad_quaternion)) and \
+        raises_value_error(lambda: types.check_points(np.zeros((2, 5))))
+
+    with types.validation_level(types.ValidationLevel.none):
+        success = success and types.get_validation_level() == types.ValidationLevel.none and \
+            not raises_value_error(lambda: types.check_quaternion(bad_quaternion)) and \
+            not raises_value_error(lambda: types.check_vector(bad_vector)) and \
+            not raises_value_error(lambda: types.check_points(np.zeros((2, 5)))) and \
+            np.array_equal(hat(np.array([[1.], [2.], [3.]])), np.array([[0., -3., 2.], [3., 0., -1.], [-2., 1., 0.]]))
+
+    # the previous level is restored, and unknown levels are rejected
+    success = success and types.get_validation_level() == types.ValidationLevel.full and \
+        raises_value_error(lambda: types.check_vector(bad_vector)) and \
+        raises_value_error(lambda: types.set_validation_level(5))
+
+    if success:
+        print("Passed validation level test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def environment_test() -> bool:
+    """Checks that MAV_SIM_VALIDATION sets the level at import"""
+    print("\nStarting validation environment variable test")
+    script = "from mav_sim.tools import types; print(types.get_validation_level())"
+    levels = []
+    for name in ("none", "Full"):
+        env = dict(os.environ, MAV_SIM_VALIDATION=name)
+        result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=False)
+        levels.append(result.stdout.strip())
+    success = levels == [str(types.ValidationLevel.none), str(types.ValidationLevel.full)]
+
+    if success:
+        print("Passed validation environment variable test")
+    else:
+        print("\n\nFailed test!")
+        print("levels: ", levels)
+    return success
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = validation_level_test() and environment_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,243 @@
+"""ch3_integrator_test.py: Compares the integration schemes available to MavDynamics."""
+
+import mav_sim.chap3.mav_dynamics as chap3
+import mav_sim.parameters.aerosonde_parameters as MAV
+import numpy as np
+from mav_sim.chap3.mav_dynamics import (
+    IND,
+    DynamicsIntegrator,
+    DynamicState,
+    IntegratorType,
+    derivatives,
+    derivatives_into,
+)
+from mav_sim.chap4.batch_dynamics import BatchMavDynamics
+from mav_sim.chap4.mav_dynamics import MavDynamics
+from mav_sim.chap11.path_manager_utilities import HalfSpaceParams, half_space_event
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.tools import types
+from mav_sim.tools.events import POSITION, Event, geofence_event, ground_contact_event
+from mav_sim.unit_tests.random_test_data import random_states
+
+
+def derivatives_into_test(num: int = 25) -> bool:
+    """Compares derivatives_into() with derivatives() for random states and non-unit quaternions"""
+    print("\nStarting derivatives_into test")
+    rng = np.random.default_rng(3)
+    states = random_states(num, rng)
+    states[IND.E0:IND.E3+1] *= rng.uniform(0.8, 1.2, num) # the rk4 stages evaluate non-unit quaternions
+    x_dot = np.zeros((13, 1))
+
+    success = True
+    for i in range(num):
+        state = states[:, i:i+1]
+        forces_moments = rng.normal(0., 5., (6, 1))
+        derivatives_into(x_dot, state, forces_moments)
+        expected = derivatives(state, forces_moments)
+        if not np.allclose(x_dot, expected, rtol=1e-12, atol=1e-12):
+            print("\n\nFailed test!")
+            print("state = \n", state, "\nexpected: \n", expected, "\nreceived: \n", x_dot)
+            success = False
+            break
+
+    if success:
+        print("Passed derivatives_into test")
+    return success
+
+def workspace_step_test(num: int = 10, steps: int = 100) -> bool:
+    """Steps the rk4 and rk4_workspace integrators side by side"""
+    print("\nStarting workspace step test")
+    rng = np.random.default_rng(4)
+    states = random_states(num, rng)
+    rk4 = DynamicsIntegrator(IntegratorType.rk4)
+    workspace = DynamicsIntegrator(IntegratorType.rk4_workspace)
+
+    success = True
+    for i in range(num):
+        state_rk4 = states[:, i:i+1].copy()
+        state_ws = states[:, i:i+1].copy()
+        for _ in range(steps):
+            forces_moments = rng.normal(0., 5., (6, 1))
+            rk4.step(state_rk4, forces_moments, 0.01)
+            workspace.step(state_ws, forces_moments, 0.01)
+        if not np.allclose(state_rk4, state_ws, rtol=1e-10, atol=1e-10):
+            print("\n\nFailed test!")
+            print("expected: \n", state_rk4, "\nreceived: \n", state_ws)
+            success = False
+            break
+
+    if success:
+        print("Passed workspace step test")
+    return success
+
+def mav_dynamics_test(steps: int = 500) -> bool:
+    """Propagates the chapter 4 dynamics with each integrator"""
+    print("\nStarting MavDynamics integrator test")
+    delta = MsgDelta(elevator=-0.1248, aileron=0.001836, rudder=-0.0003026, throttle=0.6768)
+    wind = np.array([[1.], [-2.], [0.], [0.1], [0.], [0.]])
+    mav_rk4 = MavDynamics(0.01, DynamicState(), integrator=IntegratorType.rk4)
+    mav_ws = MavDynamics(0.01, DynamicState(), integrator=IntegratorType.rk4_workspace)
+    for _ in range(steps):
+        mav_rk4.update(delta, wind)
+        mav_ws.update(delta, wind)
+
+    success = np.allclose(mav_rk4.get_state(), mav_ws.get_state(), rtol=1e-9, atol=1e-9)
+    if success:
+        print("Passed MavDynamics integrator test")
+    else:
+        print("\n\nFailed test!")
+        print("expected: \n", mav_rk4.get_state(), "\nreceived: \n", mav_ws.get_state())
+    return bool(success)
+
+def fine_rk4(state: types.DynamicState, forces_moments: types.ForceMoment, time: float,
+             time_step: float = 1e-4) -> types.DynamicState:
+    """Reference solution with the forces and moments held constant"""
+    state = state.copy()
+    rk4 = DynamicsIntegrator(IntegratorType.rk4_workspace)
+    for _ in range(int(round(time/time_step))):
+        rk4.step(state, forces_moments, time_step)
+    return state
+
+def dopri45_test(num: int = 5) -> bool:
+    """Compares the adaptive integrator and its dense output against a fine rk4 solution"""
+    print("\nStarting dopri45 test")
+    rng = np.random.default_rng(5)
+    states = random_states(num, rng)
+    dopri = DynamicsIntegrator(IntegratorType.dopri45, rtol=1e-9, atol=1e-9)
+
+    success = True
+    for i in range(num):
+        state = states[:, i:i+1].copy()
+        forces_moments = rng.normal(0., 5., (6, 1))
+        dopri.step(state, forces_moments, 1.)
+        for time in (0., 0.37, 1.):
+            expected = fine_rk4(states[:, i:i+1], forces_moments, time)
+            if not np.allclose(dopri.state_at(time), expected, rtol=1e-6, atol=1e-6):
+                print("\n\nFailed test!")
+                print("time = ", time, "\nexpected: \n", expected, "\nreceived: \n", dopri.state_at(time))
+                success = False
+        if not success or not np.allclose(state, dopri.state_at(1.)):
+            success = False
+            break
+
+    # the step size is adapted, so one second takes fewer than the 100 steps of the default rk4
+    if success and dopri.stats.accepted_steps >= 100*num:
+        print("\n\nFailed test!")
+        print("Too many steps: ", dopri.stats)
+        success = False
+
+    if success:
+        print("Passed dopri45 test")
+    return success
+
+def rkmk4_test(num: int = 5) -> bool:
+    """Checks the geometric integrator against a fine rk4 solution, its order, and its batched form"""
+    print("\nStarting rkmk4 test")
+    rng = np.random.default_rng(6)
+    states = random_states(num, rng)
+    states[IND.P:IND.R+1] += rng.normal(0., 2., (3, num)) # fast rotations
+    rkmk4 = DynamicsIntegrator(IntegratorType.rkmk4)
+
+    success = True
+    for i in range(num):
+        forces_moments = rng.normal(0., 5., (6, 1))
+        expected = fine_rk4(states[:, i:i+1], forces_moments, 1.)
+        errors = []
+        for time_step in (0.02, 0.01):
+            state = states[:, i:i+1].copy()
+            for _ in range(int(round(1./time_step))):
+                rkmk4.step(state, forces_moments, time_step)
+            errors.append(np.linalg.norm(state - expected))
+        # fourth order, halving the step divides the error by about 16
+        if not np.allclose(state, expected, rtol=1e-4, atol=1e-4) or errors[0] < 10.*errors[1] or \
+                abs(np.linalg.norm(state[IND.QUAT]) - 1.) > 1e-12:
+            print("\n\nFailed test!")
+            print("errors = ", errors, "\nexpected: \n", expected, "\nreceived: \n", state)
+            success = False
+            break
+
+    # the batched dynamics match the scalar dynamics
+    delta = MsgDelta(elevator=-0.1248, aileron=0.01, rudder=-0.0003026, throttle=0.6768)
+    wind = np.array([[1.], [-2.], [0.], [0.1], [0.], [0.]])
+    mav = MavDynamics(0.05, DynamicState(), integrator=IntegratorType.rkmk4)
+    batch = BatchMavDynamics(0.05, DynamicState().convert_to_numpy(), integrator=IntegratorType.rkmk4)
+    for _ in range(100):
+        mav.update(delta, wind)
+        batch.update(delta.to_array(), wind)
+    if success and not np.allclose(batch.get_states(), mav.get_state(), rtol=1e-9, atol=1e-9):
+        print("\n\nFailed test!")
+        print("expected: \n", mav.get_state(), "\nreceived: \n", batch.get_states())
+        success = False
+
+    if success:
+        print("Passed rkmk4 test")
+    return success
+
+def events_test(time_step: float = 0.5) -> bool:
+    """Finds the crossings of a level fall with long steps, where the exact times are known"""
+    print("\nStarting integrator events test")
+    forces_moments = np.array([[0.], [0.], [MAV.mass*MAV.gravity], [0.], [0.], [0.]])
+    # down(t) = -100 + 2 t + g t^2/2 and north(t) = 20 t are integrated exactly by every scheme
+    ground_time = (-2. + np.sqrt(4. + 200.*MAV.gravity)) / MAV.gravity
+
+    # the events address the position by the same rows as the dynamics
+    success = POSITION == slice(IND.NORTH, IND.DOWN + 1)
+    for integrator in (IntegratorType.rk4, IntegratorType.rkmk4, IntegratorType.dopri45):
+        state = np.zeros((13, 1))
+        state[IND.DOWN], state[IND.U], state[IND.W], state[IND.E0] = -100., 20., 2., 1.
+        half_space = HalfSpaceParams(normal=np.array([[1.], [0.], [0.]]), point=np.array([[31.], [0.], [0.]]))
+        events = [ground_contact_event(), geofence_event(0., 0., 47.3, terminal=False), half_space_event(half_space),
+                  Event("climb", lambda x: -x.item(IND.DOWN) - 50., direction=1)] # never crossed upwards
+        stepper = DynamicsIntegrator(integrator, events=events)
+        times = [stepper.step(state, forces_moments, time_step) for _ in range(20) if not stepper.terminated]
+
+        names = [crossing.event.name for crossing in stepper.crossings]
+        expected_times = [31./20., 47.3/20., ground_time]
+        # the fall ends inside the last step, at the ground
+        stopped = abs(state.item(IND.DOWN)) < 1e-6 and abs(stepper.time - ground_time) < 1e-8 and \
+            times[-1] < time_step and len(times) == int(ground_time/time_step) + 1
+        if names != ["half-space entry", "geofence exit", "ground contact"] or not stopped or \
+                not np.allclose([crossing.time for crossing in stepper.crossings], expected_times, rtol=0., atol=1e-8):
+            print("\n\nFailed test!")
+            print("integrator = ", integrator, "\ncrossings: ", [str(crossing) for crossing in stepper.crossings],
+                  "\nexpected: ", expected_times, "\nfinal state: \n", state)
+            success = False
+            break
+
+    if success:
+        print("Passed integrator events test")
+    return success
+
+def terminated_test(time_step: float = 0.5) -> bool:
+    """Falls to the ground with the chapter 3 dynamics, which stay there until a new state is loaded"""
+    print("\nStarting MavDynamics termination test")
+    forces_moments = np.array([[0.], [0.], [MAV.mass*MAV.gravity], [0.], [0.], [0.]])
+    state = np.zeros((13, 1))
+    state[IND.DOWN], state[IND.U], state[IND.E0] = -100., 20., 1.
+    mav = chap3.MavDynamics(time_step, DynamicState(state))
+    mav.integrator.events.append(ground_contact_event())
+    updates = [mav.update(forces_moments) for _ in range(20)]
+    ground = np.copy(mav.get_state().convert_to_numpy())
+    success = mav.terminated and updates.count(False) == int(np.sqrt(200./MAV.gravity)/time_step) and \
+        all(updates[updates.index(True):]) and abs(ground.item(IND.DOWN)) < 1e-6
+
+    # a new state clears the termination and the integration continues from it
+    mav.external_set_state(np.copy(state))
+    success = success and not mav.terminated and not mav.update(forces_moments) and \
+        mav.get_state().convert_to_numpy().item(IND.DOWN) > state.item(IND.DOWN)
+    if success:
+        print("Passed MavDynamics termination test")
+    else:
+        print("\n\nFailed test!")
+        print("updates: ", updates, "\nground state: \n", ground)
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = derivatives_into_test() and workspace_step_test() and mav_dynamics_test() and dopri45_test() and \
+        rkmk4_test() and events_test() and terminated_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
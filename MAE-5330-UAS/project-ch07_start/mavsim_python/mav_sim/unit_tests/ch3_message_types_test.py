@@ -0,0 +1,81 @@
+"""ch3_message_types_test.py: Checks the array backed MsgState, MsgSensors, and MsgDelta messages."""
+
+import copy
+import pickle
+
+import numpy as np
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.message_types.msg_sensors import MsgSensors
+from mav_sim.message_types.msg_state import MsgState
+
+
+def fields_test() -> bool:
+    """The attributes and the array are the same storage"""
+    print("\nStarting message fields test")
+    success = True
+    for msg_type in (MsgState, MsgSensors, MsgDelta):
+        values = np.arange(1., len(msg_type.FIELDS) + 1.)
+        msg = msg_type(*values)
+        data = msg.as_array()
+        success = success and np.array_equal(data, values) and \
+            np.array_equal(msg.to_array(), values.reshape((-1, 1))) and \
+            all(getattr(msg, field) == values[i] for i, field in enumerate(msg_type.FIELDS)) and \
+            all(getattr(msg_type, field).index == i for i, field in enumerate(msg_type.FIELDS))
+
+        # writes through either the attributes or the array are seen by the other
+        setattr(msg, msg_type.FIELDS[-1], -1.)
+        data[0] = -2.
+        success = success and data[-1] == -1. and getattr(msg, msg_type.FIELDS[0]) == -2. and \
+            msg.as_array() is data and isinstance(getattr(msg, msg_type.FIELDS[0]), float)
+
+        # only the fields can be set
+        try:
+            setattr(msg, "not_a_field", 0.)
+            success = False
+        except AttributeError:
+            pass
+
+    delta = MsgDelta()
+    delta.from_array(np.array([[0.1], [0.2], [0.3], [0.4]]))
+    success = success and delta.throttle == 0.4 and MsgDelta().throttle == 0.5
+
+    if success:
+        print("Passed message fields test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def copy_test() -> bool:
+    """Copies and pickles do not share the array, and states pickled by the attribute based
+    messages can be loaded"""
+    print("\nStarting message copy test")
+    state = MsgState(north=1., Va=25., bz=0.1)
+    success = True
+    for state_copy in (state.copy(), copy.copy(state), copy.deepcopy(state), pickle.loads(pickle.dumps(state))):
+        success = success and isinstance(state_copy, MsgState) and \
+            np.array_equal(state_copy.as_array(), state.as_array()) and \
+            state_copy.as_array() is not state.as_array()
+        state_copy.north = 5.
+    success = success and state.north == 1.
+
+    legacy_state = MsgState.__new__(MsgState)
+    legacy_state.__setstate__((None, {"north": 3., "Va": 20.}))
+    legacy_delta = MsgDelta.__new__(MsgDelta)
+    legacy_delta.__setstate__({"elevator": -0.1, "aileron": 0., "rudder": 0., "throttle": 0.7})
+    success = success and legacy_state.north == 3. and legacy_state.Va == 20. and legacy_state.east == 0. and \
+        legacy_delta.elevator == -0.1 and legacy_delta.throttle == 0.7
+
+    if success:
+        print("Passed message copy test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = fields_test() and copy_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,143 @@
+"""ch4_aero_table_test.py: Compares the tabulated aerodynamic coefficients against the analytic model."""
+
+import mav_sim.parameters.aerosonde_parameters as MAV
+import numpy as np
+from mav_sim.chap3.mav_dynamics import DynamicState
+from mav_sim.chap4.aero_model import (
+    AERO_FIELDS,
+    C_M_Q,
+    NUM_AERO_FIELDS,
+    AeroTable,
+    analytic_coefficients,
+    default_aero_table,
+)
+from mav_sim.chap4.batch_dynamics import BatchMavDynamics, forces_moments_batch
+from mav_sim.chap4.mav_dynamics import MavDynamics, forces_moments, update_velocity_data
+from mav_sim.message_types.msg_delta import MsgDelta
+
+DELTA = MsgDelta(elevator=-0.1248, aileron=0.01, rudder=-0.0003026, throttle=0.6768)
+
+def coefficients_test() -> bool:
+    """Checks the interpolated coefficients of single angles and arrays of angles"""
+    print("\nStarting aero table coefficients test")
+    table = default_aero_table()
+    alpha = np.random.default_rng(3).uniform(-np.pi, np.pi, 5000)
+    batch = table.coefficients(alpha)
+    success = table is default_aero_table() and batch.shape == (NUM_AERO_FIELDS, alpha.size) and \
+        np.allclose(batch, analytic_coefficients(alpha), rtol=0., atol=1e-6) and \
+        np.allclose(table.coefficients(alpha[7]), batch[:, 7], rtol=0., atol=1e-14) and \
+        np.allclose(table.coefficient_list(0.1), analytic_coefficients(0.1), rtol=0., atol=1e-8)
+
+    # the grid points are exact and angles beyond the grid are clamped to its ends
+    coarse = AeroTable(num_points=11, alpha_min=-0.5, alpha_max=0.5)
+    success = success and np.allclose(coarse.coefficients(coarse.alpha), analytic_coefficients(coarse.alpha)) and \
+        np.array_equal(coarse.coefficients(2.), coarse.coefficients(0.5)) and \
+        np.array_equal(coarse.coefficients(np.array([-3.])), coarse.coefficients(np.array([-0.5])))
+    try:
+        AeroTable(num_points=1)
+        success = False
+    except ValueError:
+        pass
+
+    if success:
+        print("Passed aero table coefficients test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def data_test() -> bool:
+    """Builds tables from sampled coefficients and checks that the table is the only source of them"""
+    print("\nStarting aero table data test")
+    alpha = np.linspace(-0.6, 0.6, 2401)
+    analytic = analytic_coefficients(alpha)
+    data = {name: analytic[AERO_FIELDS.index(name)] for name in ("C_L", "C_D", "C_m")}
+    table = AeroTable.from_data(alpha, data)
+    points = np.random.default_rng(4).uniform(-0.6, 0.6, 1000)
+    success = np.allclose(table.coefficients(points), analytic_coefficients(points), rtol=0., atol=1e-4) and \
+        np.allclose(table.coefficients(alpha), analytic, rtol=0., atol=1e-5) and \
+        np.array_equal(table.coefficients(1.), table.coefficients(0.6))
+
+    # the pitching moment follows the pitch damping of the table
+    state = DynamicState(state=np.array([[0.], [0.], [-100.], [24.], [1.], [3.], [1.], [0.], [0.], [0.],
+                                         [0.1], [0.4], [0.05]])).convert_to_numpy()
+    Va, alpha_state, beta, _ = update_velocity_data(state)
+    damped = AeroTable.from_data(alpha, dict(data, C_m_q=2.*MAV.C_m_q), num_points=1001)
+    moments = [forces_moments(state, DELTA, Va, beta, alpha_state, aero).item(4) for aero in (table, damped)]
+    difference = 0.5*MAV.rho*Va**2*MAV.S_wing*MAV.c * MAV.C_m_q * state.item(11)*MAV.c/(2.*Va)
+    success = success and np.allclose(damped.coefficients(alpha)[C_M_Q], 2.*MAV.C_m_q) and \
+        np.isclose(moments[1] - moments[0], difference, rtol=1e-6)
+
+    for bad_alpha, bad_data in ((alpha, {"C_L": data["C_L"], "C_D": data["C_D"]}), (alpha, dict(data, C_Y=0.)),
+                                (alpha[::-1], data), (alpha, dict(data, C_L=data["C_L"][:-1]))):
+        try:
+            AeroTable.from_data(bad_alpha, bad_data)
+            success = False
+        except ValueError:
+            pass
+
+    if success:
+        print("Passed aero table data test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def parameter_change_test() -> bool:
+    """Checks that the shared table follows a change of the airframe parameters"""
+    print("\nStarting aero table parameter change test")
+    table = default_aero_table()
+    nominal = table.coefficient_list(0.1)
+    C_L_alpha = MAV.C_L_alpha
+    try:
+        MAV.C_L_alpha *= 1.1
+        changed = default_aero_table()
+        success = changed is not table and changed is default_aero_table() and \
+            changed.coefficient_list(0.1)[0] > nominal[0] and \
+            np.allclose(changed.coefficient_list(0.1), analytic_coefficients(0.1), rtol=0., atol=1e-8)
+    finally:
+        MAV.C_L_alpha = C_L_alpha
+    success = success and default_aero_table().coefficient_list(0.1) == nominal
+
+    if success:
+        print("Passed aero table parameter change test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def dynamics_test(steps: int = 500) -> bool:
+    """Compares the forces and the flight of the tabulated model against the analytic model"""
+    print("\nStarting aero table dynamics test")
+    table = default_aero_table()
+    state = DynamicState(state=np.array([[0.], [0.], [-100.], [24.], [1.], [3.], [1.], [0.], [0.], [0.],
+                                         [0.1], [-0.2], [0.05]])).convert_to_numpy()
+    Va, alpha, beta, _ = update_velocity_data(state)
+    analytic = forces_moments(state, DELTA, Va, beta, alpha)
+    tabulated = forces_moments(state, DELTA, Va, beta, alpha, table)
+    batch = forces_moments_batch(state, DELTA.to_array(), np.array([Va]), np.array([alpha]), np.array([beta]), table)
+    success = np.allclose(tabulated, analytic, rtol=1e-6, atol=1e-6) and np.allclose(batch, tabulated)
+
+    mav = MavDynamics(0.01)
+    mav_table = MavDynamics(0.01, aero=table)
+    batch_table = BatchMavDynamics(0.01, num_aircraft=2, aero=table)
+    wind = np.array([[1.], [-1.], [0.], [0.2], [0.], [0.1]])
+    for _ in range(steps):
+        mav.update(DELTA, wind)
+        mav_table.update(DELTA, wind)
+        batch_table.update(DELTA.to_array(), wind)
+    success = success and np.allclose(mav_table.get_state(), mav.get_state(), rtol=0., atol=1e-4) and \
+        not np.array_equal(mav_table.get_state(), mav.get_state()) and \
+        np.allclose(batch_table.get_states(), np.hstack([mav_table.get_state()]*2), rtol=0., atol=1e-8)
+
+    if success:
+        print("Passed aero table dynamics test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = coefficients_test() and data_test() and parameter_change_test() and dynamics_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,121 @@
+"""ch4_batch_dynamics_test.py: Compares the batched dynamics against the scalar chapter 4 dynamics."""
+
+import mav_sim.parameters.aerosonde_parameters as MAV
+import numpy as np
+from mav_sim.chap3.mav_dynamics import IND, DynamicState, derivatives
+from mav_sim.chap4.aero_model import C_L, C_M, analytic_coefficients
+from mav_sim.chap4.batch_dynamics import (
+    BatchMavDynamics,
+    deltas_from_msgs,
+    derivatives_batch,
+    forces_moments_batch,
+    forces_moments_grid,
+    update_velocity_data_batch,
+)
+from mav_sim.chap4.mav_dynamics import MavDynamics, forces_moments, update_velocity_data
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.tools.rotations import Euler2Quaternion
+from mav_sim.unit_tests.random_test_data import random_deltas, random_states
+
+
+def single_evaluation_test(num: int = 25) -> bool:
+    """Compares derivatives, forces/moments and velocity data for a batch of random states"""
+    print("\nStarting batch single evaluation test")
+    rng = np.random.default_rng(1)
+    states = random_states(num, rng)
+    deltas = random_deltas(num, rng)
+    winds = rng.normal(0., 2., (6, num))
+
+    Va, alpha, beta, wind_i = update_velocity_data_batch(states, winds)
+    fm = forces_moments_batch(states, deltas_from_msgs(deltas), Va, alpha, beta)
+    x_dot = derivatives_batch(states, fm)
+
+    success = True
+    for i in range(num):
+        state = states[:, i:i+1]
+        Va_s, alpha_s, beta_s, wind_s = update_velocity_data(state, winds[:, i:i+1])
+        fm_s = forces_moments(state, deltas[i], Va_s, beta_s, alpha_s)
+        x_dot_s = derivatives(state, fm_s)
+        if not np.allclose([Va[i], alpha[i], beta[i]], [Va_s, alpha_s, beta_s]) or \
+            not np.allclose(wind_i[:, i:i+1], wind_s) or \
+            not np.allclose(fm[:, i:i+1], fm_s) or \
+            not np.allclose(x_dot[:, i:i+1], x_dot_s):
+            print("\n\nFailed test!")
+            print("state = \n", state, "\ndelta = ", deltas[i], "\nexpected: \n", x_dot_s,
+                  "\nreceived: \n", x_dot[:, i:i+1])
+            success = False
+            break
+
+    if success:
+        print("Passed batch single evaluation test")
+    return success
+
+def update_test(num: int = 10, steps: int = 200) -> bool:
+    """Propagates a batch and the scalar dynamics side by side and compares the states"""
+    print("\nStarting batch update test")
+    rng = np.random.default_rng(2)
+    Ts = 0.01
+    states = random_states(num, rng)
+    batch = BatchMavDynamics(Ts, states)
+    scalar = []
+    for i in range(num):
+        mav = MavDynamics(Ts, DynamicState(states[:, i:i+1]))
+        scalar.append(mav)
+
+    success = True
+    for _ in range(steps):
+        deltas = random_deltas(num, rng)
+        winds = rng.normal(0., 1., (6, num))
+        batch.update(deltas_from_msgs(deltas), winds)
+        for i, mav in enumerate(scalar):
+            mav.update(deltas[i], winds[:, i:i+1])
+
+    for i, mav in enumerate(scalar):
+        if not np.allclose(batch.get_states()[:, i:i+1], mav.get_state(), rtol=1e-9, atol=1e-9):
+            print("\n\nFailed test!")
+            print("expected: \n", mav.get_state(), "\nreceived: \n", batch.get_states()[:, i:i+1])
+            success = False
+            break
+
+    if success:
+        print("Passed batch update test")
+    return success
+
+def grid_test() -> bool:
+    """Compares a swept force map against the scalar forces and moments and the analytic coefficients"""
+    print("\nStarting batch force map test")
+    alpha = np.linspace(-0.3, 0.3, 7)
+    elevator = np.array([-0.2, 0., 0.2])
+    force_map = forces_moments_grid({"alpha": alpha, "elevator": elevator, "Va": np.array([20., 30.]),
+                                     "theta": 0.1, "p": 0.05}, chunk=5)
+
+    success = force_map.shape == (7, 3, 2) and force_map.fixed["theta"] == 0.1
+    for i, j, k in [(0, 0, 0), (3, 1, 1), (6, 2, 0)]:
+        Va = force_map.axes["Va"][k]
+        state = DynamicState().convert_to_numpy()
+        state[IND.U:IND.W+1] = [[Va*np.cos(alpha[i])], [0.], [Va*np.sin(alpha[i])]]
+        state[IND.E0:IND.E3+1] = Euler2Quaternion(0., 0.1, 0.)
+        state[IND.P:IND.R+1] = [[0.05], [0.], [0.]]
+        expected = forces_moments(state, MsgDelta(elevator=elevator[j]), Va, 0., alpha[i])
+        success = success and np.allclose(force_map.data[0:6, i, j, k], expected[:, 0])
+
+    # with q = 0, the lift and pitching moment coefficients are the analytic ones plus the elevator terms
+    coefficients = analytic_coefficients(alpha)
+    for field, row, elevator_gain in (("C_L", C_L, MAV.C_L_delta_e), ("C_m", C_M, MAV.C_m_delta_e)):
+        expected = coefficients[row][:, np.newaxis] + elevator_gain*elevator[np.newaxis, :]
+        success = success and np.allclose(force_map.field(field)[:, :, 1], expected)
+
+    if success:
+        print("Passed batch force map test")
+    else:
+        print("\n\nFailed test!")
+    return success
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = single_evaluation_test() and update_test() and grid_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,72 @@
+"""ch4_dryden_test.py: Compares the exactly discretized Dryden gusts against WindSimulation."""
+
+import numpy as np
+from mav_sim.chap4.wind_simulation import DrydenGusts, WindSimulation, gust_series
+from mav_sim.message_types.msg_gust_params import MsgGustParams
+
+
+def update_test(steps: int = 2000) -> bool:
+    """Checks that DrydenGusts.update matches WindSimulation.update for the same noise"""
+    print("\nStarting Dryden gust update test")
+    success = True
+    for Ts in (0.01, 0.1):
+        wind = WindSimulation(Ts, rng=np.random.default_rng(4))
+        gusts = DrydenGusts(Ts, rng=np.random.default_rng(4))
+        expected = np.hstack([wind.update() for _ in range(steps)])
+        actual = np.hstack([gusts.update() for _ in range(steps)])
+        success = success and actual.shape == (6, steps) and np.all(actual[0:3] == 0.) and \
+            np.allclose(actual, expected, rtol=0., atol=1e-6) and np.std(actual[3:], axis=1).min() > 0.
+
+    # no gusts without the gust flag
+    calm = DrydenGusts(0.01, gust_flag=False, rng=np.random.default_rng(4))
+    success = success and not np.any([calm.update() for _ in range(10)])
+
+    if success:
+        print("Passed Dryden gust update test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def series_test(steps: int = 3000, streams: int = 6) -> bool:
+    """Checks the vectorized series against the step by step update and the statistics of the streams"""
+    print("\nStarting Dryden gust series test")
+    gusts = DrydenGusts(0.05, rng=np.random.default_rng(8))
+    stepped = np.hstack([gusts.update() for _ in range(steps)])[3:]
+    single = DrydenGusts(0.05, rng=np.random.default_rng(8)).series(steps)
+    batch = gust_series(0.05, steps, streams, rng=8)
+    success = single.shape == (3, steps) and batch.shape == (streams, 3, steps) and \
+        np.allclose(single, stepped, rtol=0., atol=1e-9) and np.allclose(batch[0], stepped, rtol=0., atol=1e-9) and \
+        not np.allclose(batch[1], batch[2])
+
+    # the spread across many streams follows the model, the w gust is the shortest and weakest one
+    params = MsgGustParams()
+    table = gust_series(0.05, 400, 2000, params, rng=np.random.default_rng(9))
+    spread = np.std(table[:, :, -1], axis=0)
+    success = success and spread[2] < spread[0] and np.all(np.abs(np.mean(table[:, :, -1], axis=0)) < 0.2*spread) and \
+        gust_series(0.05, 0, 3).shape == (3, 3, 0)
+
+    # without a generator np.random.seed controls the series
+    np.random.seed(3)
+    first = gust_series(0.05, 50, 2)
+    np.random.seed(3)
+    success = success and np.array_equal(first, gust_series(0.05, 50, 2))
+    try:
+        gust_series(0.05, -1)
+        success = False
+    except ValueError:
+        pass
+
+    if success:
+        print("Passed Dryden gust series test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = update_test() and series_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,122 @@
+"""ch4_headless_test.py: Checks the headless simulation runs against the dynamics they wrap."""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+from mav_sim.chap4.mav_dynamics import MavDynamics
+from mav_sim.chap4.run_sim import run_sim_headless
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.message_types.msg_sim_params import MsgSimParams
+from mav_sim.tools.events import geofence_event
+from mav_sim.tools.trajectory_recorder import TrajectoryRecorder
+
+
+def trim(time: float) -> MsgDelta: # pylint: disable=unused-argument
+    """Constant trim command"""
+    return MsgDelta(elevator=-0.1248, aileron=0.001836, rudder=-0.0003026, throttle=0.6768)
+
+def no_qt_test() -> bool:
+    """Imports every run_sim module in a fresh interpreter and checks that no Qt module was loaded"""
+    print("\nStarting headless import test")
+    code = "import sys\n" + \
+        "".join("import mav_sim." + chap + ".run_sim\n" for chap in
+                ("chap3", "chap4", "chap6", "chap7", "chap10", "chap11", "chap12")) + \
+        "print([m for m in sys.modules if m.startswith(('pyqtgraph', 'PyQt', 'PySide'))])"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=False)
+    success = result.returncode == 0 and result.stdout.strip().endswith("[]")
+    if success:
+        print("Passed headless import test")
+    else:
+        print("\n\nFailed test!")
+        print(result.stdout, result.stderr)
+    return success
+
+def trajectory_test() -> bool:
+    """Compares the recorded trajectory with a direct propagation of the dynamics"""
+    print("\nStarting headless trajectory test")
+    sim = MsgSimParams(end_time=2.)
+    trajectory = run_sim_headless(sim, trim)
+
+    mav = MavDynamics(sim.ts_simulation)
+    expected = np.zeros((3, 200))
+    for k in range(200):
+        expected[:, k] = [mav.true_state.north, mav.true_state.altitude, mav.true_state.Va]
+        mav.update(trim(k*sim.ts_simulation), np.zeros((6, 1)))
+
+    received = np.array([trajectory.state("north"), trajectory.state("altitude"), trajectory.state("Va")])
+    success = trajectory.num_samples == 200 and np.allclose(trajectory.time, np.arange(200)*sim.ts_simulation) \
+        and np.allclose(received, expected) and np.allclose(trajectory.input("throttle"), 0.6768)
+    if success:
+        print("Passed headless trajectory test")
+    else:
+        print("\n\nFailed test!")
+        print("expected: \n", expected[:, -1], "\nreceived: \n", received[:, -1])
+    return bool(success)
+
+def recorder_test() -> bool:
+    """Records a run through several spilled chunks and compares the recording and its export
+    with the trajectory returned by the headless run"""
+    print("\nStarting trajectory recorder test")
+    sim = MsgSimParams(end_time=2.)
+    with tempfile.TemporaryDirectory() as directory:
+        with TrajectoryRecorder(commanded=False, chunk_size=64, spill_path=os.path.join(directory, "spill.dat")) \
+                as recorder:
+            trajectory = run_sim_headless(sim, trim, use_wind=True, recorder=recorder)
+            success = recorder.num_samples == trajectory.num_samples and \
+                np.array_equal(recorder.get("time", "time"), trajectory.time) and \
+                np.array_equal(recorder.get("true_state"), trajectory.true_state) and \
+                np.array_equal(recorder.get("delta"), trajectory.delta) and \
+                np.array_equal(recorder.get("wind"), trajectory.wind) and \
+                np.array_equal(recorder.get("true_state", "altitude"), trajectory.state("altitude"))
+
+            npz_path = os.path.join(directory, "run.npz")
+            recorder.save_npz(npz_path)
+            with np.load(npz_path) as data:
+                success = success and np.array_equal(data["true_state"], trajectory.true_state) and \
+                    np.array_equal(data["wind"], trajectory.wind) and \
+                    list(data["delta_fields"]) == list(recorder.groups["delta"])
+
+    if success:
+        print("Passed trajectory recorder test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def terminal_event_test(radius: float = 20.) -> bool:
+    """Flies out of a geofence, the dynamics stay at the exit and the headless run stops there"""
+    print("\nStarting headless terminal event test")
+    sim = MsgSimParams(end_time=2.)
+    mav = MavDynamics(sim.ts_simulation)
+    mav.integrator.events.append(geofence_event(0., 0., radius))
+    updates = [mav.update(trim(0.), np.zeros((6, 1))) for _ in range(200)]
+    exit_state = np.copy(mav.get_state())
+    num_updates = updates.index(True) + 1
+
+    # every update after the exit reports it and leaves the state in place, a new state clears it
+    success = mav.terminated and not any(updates[:num_updates - 1]) and all(updates[num_updates:]) and \
+        abs(np.hypot(exit_state.item(0), exit_state.item(1)) - radius) < 1e-6 and \
+        mav.update(trim(0.), np.zeros((6, 1))) and np.array_equal(mav.get_state(), exit_state)
+    mav.external_set_state(np.copy(exit_state))
+    success = success and not mav.terminated
+
+    trajectory = run_sim_headless(sim, trim, events=[geofence_event(0., 0., radius)])
+    success = success and trajectory.num_samples == num_updates and \
+        bool(np.hypot(trajectory.state("north")[-1], trajectory.state("east")[-1]) < radius)
+    if success:
+        print("Passed headless terminal event test")
+    else:
+        print("\n\nFailed test!")
+        print("updates: ", num_updates, "\nsamples: ", trajectory.num_samples, "\nexit state: \n", exit_state)
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = no_qt_test() and trajectory_test() and recorder_test() and terminal_event_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,104 @@
+"""ch4_propulsion_test.py: Tests the folded propulsion model, its partials, and its cached surface."""
+
+import mav_sim.parameters.aerosonde_parameters as MAV
+import numpy as np
+from mav_sim.chap4.batch_dynamics import motor_thrust_torque_batch
+from mav_sim.chap4.mav_dynamics import motor_thrust_torque
+from mav_sim.chap4.propulsion_model import (
+    PropulsionModel,
+    PropulsionSurface,
+    default_propulsion_model,
+)
+from mav_sim.chap5.compute_models import dT_ddelta_t, dT_dVa
+
+
+def model_test() -> bool:
+    """Compares the model against the reference values and central differences"""
+    print("\nStarting propulsion model test")
+    model = default_propulsion_model()
+    # reference values of motor_thrust_torque from ch4_dynamics_test
+    success = np.allclose(model.thrust_torque(27.39323489287441, 0.5), (-17.91352683604895, -0.7758235361365506)) and \
+        np.allclose(motor_thrust_torque(1., 0.), (-0.033654137677838994, -0.002823682854958359))
+
+    rng = np.random.default_rng(6)
+    Va = rng.uniform(5., 40., 50)
+    delta_t = rng.uniform(0., 1., 50)
+    thrust, torque = model.thrust_torque(Va, delta_t)
+    batch_thrust, batch_torque = motor_thrust_torque_batch(Va, delta_t)
+    success = success and np.array_equal(thrust, batch_thrust) and np.array_equal(torque, batch_torque) and \
+        np.allclose(thrust[3], motor_thrust_torque(Va[3], delta_t[3])[0], rtol=1e-14, atol=0.)
+
+    # closed form partials against central differences
+    eps = 1e-6
+    partials = np.array(model.partials(Va, delta_t))
+    dVa = (np.array(model.thrust_torque(Va + eps, delta_t)) - np.array(model.thrust_torque(Va - eps, delta_t))) / (2*eps)
+    ddt = (np.array(model.thrust_torque(Va, delta_t + eps)) - np.array(model.thrust_torque(Va, delta_t - eps))) / (2*eps)
+    success = success and np.allclose(partials, [dVa[0], ddt[0], dVa[1], ddt[1]], rtol=1e-6, atol=1e-6) and \
+        np.isclose(dT_dVa(Va[0], delta_t[0]), partials[0, 0]) and np.isclose(dT_ddelta_t(Va[0], delta_t[0]), partials[1, 0])
+
+    if success:
+        print("Passed propulsion model test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def parameter_change_test() -> bool:
+    """Checks that the shared model follows a change of the airframe parameters"""
+    print("\nStarting propulsion parameter change test")
+    model = default_propulsion_model()
+    nominal = motor_thrust_torque(25., 0.7)
+    V_max = MAV.V_max
+    try:
+        MAV.V_max *= 2.
+        changed = default_propulsion_model()
+        success = changed is not model and changed is default_propulsion_model() and \
+            changed.c_delta_t == 2.*model.c_delta_t and motor_thrust_torque(25., 0.7)[0] > nominal[0] and \
+            np.array_equal(motor_thrust_torque_batch(np.array([25.]), np.array([0.7]))[0],
+                           [motor_thrust_torque(25., 0.7)[0]]) and \
+            np.array_equal(changed.thrust_torque(25., 0.7), PropulsionModel().thrust_torque(25., 0.7))
+    finally:
+        MAV.V_max = V_max
+    success = success and default_propulsion_model().c_delta_t == model.c_delta_t and \
+        motor_thrust_torque(25., 0.7) == nominal
+
+    if success:
+        print("Passed propulsion parameter change test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def surface_test() -> bool:
+    """Checks the interpolation, clamping, and caching of the propulsion surface"""
+    print("\nStarting propulsion surface test")
+    model = PropulsionModel()
+    surface = model.surface()
+    rng = np.random.default_rng(7)
+    Va = rng.uniform(0., 50., 1000)
+    delta_t = rng.uniform(0., 1., 1000)
+    thrust, torque = model.thrust_torque(Va, delta_t)
+    interpolated = surface.thrust_torque(Va, delta_t)
+    success = surface is model.surface() and surface is not model.surface(num_Va=101) and \
+        np.allclose(interpolated[0], thrust, rtol=0., atol=1e-3) and np.allclose(interpolated[1], torque, rtol=0., atol=1e-4) and \
+        np.allclose(surface.thrust_torque(Va[5], delta_t[5]), (interpolated[0][5], interpolated[1][5]), rtol=1e-12) and \
+        np.allclose(surface.thrust_torque(60., 1.2), surface.thrust_torque(50., 1.)) and \
+        np.allclose(surface.thrust_torque(np.array([20.]), 0.5), model.thrust_torque(np.array([20.]), 0.5))
+    try:
+        PropulsionSurface(model, np.array([0., 1., 3.]), np.linspace(0., 1., 5))
+        success = False
+    except ValueError:
+        pass
+
+    if success:
+        print("Passed propulsion surface test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = model_test() and parameter_change_test() and surface_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,92 @@
+"""ch4_trajectory_recorder_test.py: Tests the chunked trajectory recorder and its spill file."""
+
+import os
+import tempfile
+
+import numpy as np
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.message_types.msg_sensors import MsgSensors
+from mav_sim.message_types.msg_state import MsgState
+from mav_sim.tools.trajectory_recorder import TrajectoryRecorder
+
+
+def record_samples(recorder: TrajectoryRecorder, num_samples: int) -> None:
+    """Records samples whose values are the sample index, the commanded state and the sensors
+    are only given at even samples"""
+    for k in range(num_samples):
+        recorder.record(0.01*k, MsgState(north=k), MsgDelta(throttle=k), np.full((6, 1), k),
+                        commanded_state=MsgState(north=-k) if k % 2 == 0 else None,
+                        sensors=MsgSensors(gyro_x=k) if k % 2 == 0 else None)
+
+def raises_closed(recorder: TrajectoryRecorder, path: str) -> bool:
+    """Checks that reading, exporting and recording all raise on a closed recorder"""
+    calls = (lambda: recorder.get("true_state"), lambda: recorder.save_npz(path),
+             lambda: record_samples(recorder, 1))
+    for call in calls:
+        try:
+            call()
+            return False
+        except ValueError:
+            pass
+    return not os.path.exists(path)
+
+def spill_test() -> bool:
+    """Records across several spilled chunks and checks the recording and the missing rows"""
+    print("\nStarting trajectory recorder spill test")
+    with tempfile.TemporaryDirectory() as directory:
+        with TrajectoryRecorder(sensors=True, chunk_size=3, spill_path=os.path.join(directory, "spill.dat")) \
+                as recorder:
+            record_samples(recorder, 8)
+            expected = np.arange(8.)
+            missing = np.where(expected % 2 == 0, 1., np.nan)
+            success = recorder.num_samples == 8 and \
+                np.array_equal(recorder.get("time", "time"), 0.01*expected) and \
+                np.array_equal(recorder.get("true_state", "north"), expected) and \
+                np.array_equal(recorder.get("delta", "throttle"), expected) and \
+                np.array_equal(recorder.get("wind"), np.tile(expected, (6, 1))) and \
+                np.array_equal(recorder.get("commanded_state", "north"), -expected*missing, equal_nan=True) and \
+                np.array_equal(recorder.get("sensors", "gyro_x"), expected*missing, equal_nan=True) and \
+                bool(np.all(np.isnan(recorder.get("sensors")[:, 1::2])))
+
+            npz_path = os.path.join(directory, "run.npz")
+            recorder.save_npz(npz_path)
+            with np.load(npz_path) as data:
+                success = success and np.array_equal(data["sensors"], recorder.get("sensors"), equal_nan=True) and \
+                    data["true_state"].shape == (len(recorder.groups["true_state"]), 8)
+
+        # a given spill file is kept, the recording is no longer readable
+        success = success and os.path.exists(os.path.join(directory, "spill.dat")) and \
+            raises_closed(recorder, os.path.join(directory, "closed.npz"))
+    if success:
+        print("Passed trajectory recorder spill test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def close_test() -> bool:
+    """Checks that a temporary spill file is removed on close and the recorder can no longer be used"""
+    print("\nStarting trajectory recorder close test")
+    recorder = TrajectoryRecorder(chunk_size=4)
+    record_samples(recorder, 10)
+    spill_path = recorder._spill_path # pylint: disable=protected-access
+    success = spill_path is not None and os.path.exists(spill_path) and \
+        np.array_equal(recorder.get("true_state", "north"), np.arange(10.))
+    recorder.close()
+    recorder.close()
+    with tempfile.TemporaryDirectory() as directory:
+        success = success and spill_path is not None and not os.path.exists(spill_path) and \
+            recorder.num_samples == 10 and raises_closed(recorder, os.path.join(directory, "closed.npz"))
+    if success:
+        print("Passed trajectory recorder close test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = spill_test() and close_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,64 @@
+"""ch4_true_state_test.py: Checks that the lazily computed true state matches one read after every step."""
+
+import numpy as np
+from mav_sim.chap3.mav_dynamics import DynamicState
+from mav_sim.chap4.mav_dynamics import MavDynamics
+from mav_sim.chap7.mav_dynamics import MavDynamics as SensorMavDynamics
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.tools.rotations import Euler2Quaternion
+
+DELTA = MsgDelta(elevator=-0.1248, aileron=0.01, rudder=-0.0003026, throttle=0.6768)
+WIND = np.array([[1.], [-2.], [0.], [0.1], [0.], [0.]])
+
+def lazy_true_state_test(steps: int = 50) -> bool:
+    """Compares a true state read once at the end of a run with one read after every step"""
+    print("\nStarting lazy true state test")
+    success = True
+    for dynamics in (MavDynamics, SensorMavDynamics):
+        eager = dynamics(0.01)
+        lazy = dynamics(0.01)
+        message = lazy.true_state
+        for _ in range(steps):
+            eager.update(DELTA, WIND)
+            eager.true_state.as_array()
+            lazy.update(DELTA, WIND)
+        success = success and lazy.true_state is message and \
+            np.array_equal(lazy.true_state.as_array(), eager.true_state.as_array()) and \
+            lazy.true_state.Vg > 0. and lazy.true_state.phi != 0.
+
+        # a new state only shows up in the true state after the next update
+        new_state = DynamicState().convert_to_numpy()
+        new_state[6:10] = Euler2Quaternion(0.3, 0.1, 1.)
+        eager.update(DELTA, WIND)
+        eager.true_state.as_array()
+        lazy.update(DELTA, WIND)
+        for mav in (eager, lazy):
+            mav.external_set_state(new_state.copy())
+        success = success and np.array_equal(lazy.true_state.as_array(), eager.true_state.as_array())
+        for mav in (eager, lazy):
+            mav.update(DELTA, WIND)
+        success = success and np.array_equal(lazy.true_state.as_array(), eager.true_state.as_array()) and \
+            abs(lazy.true_state.psi - 1.) < 0.1
+
+        # without ground speed the flight path angle is zero instead of nan
+        still_state = DynamicState()
+        still_state.u = 0.
+        still = dynamics(0.01, still_state)
+        with np.errstate(all="raise"):
+            still._update_true_state() # pylint: disable=protected-access
+        success = success and still.true_state.Vg == 0. and still.true_state.gamma == 0.
+
+    if success:
+        print("Passed lazy true state test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = lazy_true_state_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
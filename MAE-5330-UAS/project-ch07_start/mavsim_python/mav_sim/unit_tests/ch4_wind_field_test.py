@@ -0,0 +1,83 @@
+"""ch4_wind_field_test.py: Tests the memory mapped frozen turbulence wind field."""
+
+import os
+import tempfile
+
+import numpy as np
+from mav_sim.chap4.wind_field import WindField, generate_wind_field
+from mav_sim.message_types.msg_gust_params import MsgGustParams
+from scipy.interpolate import RegularGridInterpolator
+
+
+def interpolation_test() -> bool:
+    """Compares the trilinear interpolation against scipy and checks the drift and clamping"""
+    print("\nStarting wind field interpolation test")
+    rng = np.random.default_rng(5)
+    data = rng.normal(0., 1., (3, 6, 5, 4))
+    field = WindField(data, origin=(-50., 20., -30.), spacing=(10., 5., 10.), mean_wind=(2., -1., 0.))
+    axes = [origin + spacing*np.arange(n) for origin, spacing, n in zip((-50., 20., -30.), (10., 5., 10.), data.shape[1:])]
+    positions = np.vstack([rng.uniform(axis[0], axis[-1], 200) for axis in axes])
+    expected = np.vstack([RegularGridInterpolator(axes, data[i])(positions.T) for i in range(3)])
+    success = np.allclose(field.sample(positions) - np.array([[2.], [-1.], [0.]]), expected) and \
+        np.allclose(field.sample(positions + np.array([[6.], [-3.], [0.]]), time=3.), field.sample(positions)) and \
+        np.allclose(field.sample(np.array([[-50.], [20.], [-30.]])), data[:, 0:1, 0, 0] + np.array([[2.], [-1.], [0.]]))
+
+    # outside of the grid the wind is clamped to the edge
+    success = success and np.allclose(field.sample(np.array([[1000.], [20.], [-30.]])),
+                                      field.sample(np.array([[0.], [20.], [-30.]]))) and \
+        field.wind(np.array([[0.], [30.], [-10.]])).shape == (6, 1) and \
+        not np.any(field.wind_batch(positions)[3:6])
+
+    if success:
+        print("Passed wind field interpolation test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def generation_test() -> bool:
+    """Checks the statistics of a generated field and that it is read back memory mapped"""
+    print("\nStarting wind field generation test")
+    params = MsgGustParams()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "field.npy")
+        field = generate_wind_field(path, (120, 100, 30), 10., origin=(0., 0., -300.), gust_params=params,
+                                    mean_wind=(3., 0., 0.), rng=np.random.default_rng(2), chunk=7)
+        opened = WindField.open(path)
+        spread = np.std(np.asarray(opened.data).reshape((3, -1)), axis=1)
+        north = np.asarray(opened.data[0], dtype=float)
+        correlation = np.mean(north[1:]*north[:-1]) / np.mean(north*north)
+        success = isinstance(opened.data, np.memmap) and np.array_equal(opened.mean_wind, [3., 0., 0.]) and \
+            np.allclose(spread, [params.sigma_u, params.sigma_v, params.sigma_w], rtol=0.15) and \
+            abs(correlation - np.exp(-10./params.Lu)) < 0.02
+
+        # two aircraft at the same spot see the same wind, the same seed gives the same field
+        positions = np.array([[100., 100., 400.], [200., 200., 50.], [-100., -100., -250.]])
+        winds = opened.wind_batch(positions, time=1.)
+        again = generate_wind_field(os.path.join(directory, "again.npy"), (120, 100, 30), 10.,
+                                    origin=(0., 0., -300.), gust_params=params, rng=np.random.default_rng(2))
+        success = success and np.array_equal(winds[:, 0], winds[:, 1]) and not np.array_equal(winds[:, 0], winds[:, 2]) \
+            and np.array_equal(np.asarray(again.data), np.asarray(field.data))
+
+        # without a generator np.random.seed controls the field
+        np.random.seed(4)
+        first = np.array(generate_wind_field(os.path.join(directory, "first.npy"), (8, 6, 4), 10.).data)
+        np.random.seed(4)
+        second = np.array(generate_wind_field(os.path.join(directory, "second.npy"), (8, 6, 4), 10.).data)
+        success = success and np.array_equal(first, second)
+        del field, opened, again
+
+    if success:
+        print("Passed wind field generation test")
+    else:
+        print("\n\nFailed test!")
+        print("spread: ", spread, "correlation: ", correlation)
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = interpolation_test() and generation_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,146 @@
+"""ch5_jacobian_test.py: Compares the closed form Jacobians of the Euler dynamics with finite differences."""
+
+import numpy as np
+from mav_sim.chap3.mav_dynamics import DynamicState
+from mav_sim.chap3.mav_dynamics_euler import (
+    derivatives_euler,
+    euler_state_to_quat_state,
+)
+from mav_sim.chap4.mav_dynamics import forces_moments, update_velocity_data
+from mav_sim.chap5.compute_models import (
+    compute_ss_model,
+    df_du,
+    df_dx,
+    euler_jacobians,
+    euler_state,
+)
+from mav_sim.chap5.trim import (
+    compute_trim,
+    solve_trim,
+    trim_objective_fun,
+    trim_objective_jac,
+)
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.tools import types
+
+DELTA_FIELDS = ("elevator", "aileron", "rudder", "throttle")
+
+def f_no_wind(x_euler: types.NP_MAT, delta: MsgDelta) -> types.NP_MAT:
+    """Euler state dynamics without wind"""
+    x_quat = euler_state_to_quat_state(x_euler)
+    Va, alpha, beta, _ = update_velocity_data(x_quat)
+    return derivatives_euler(x_euler, forces_moments(x_quat, delta, Va, beta, alpha))
+
+def central_differences(x_euler: types.NP_MAT, delta: MsgDelta, eps: float = 1e-6) \
+        -> tuple[types.NP_MAT, types.NP_MAT]:
+    """Reference Jacobians from central differences"""
+    A = np.zeros((12, 12))
+    for i in range(12):
+        dx = np.zeros((12, 1))
+        dx[i] = eps
+        A[:, i] = ((f_no_wind(x_euler + dx, delta) - f_no_wind(x_euler - dx, delta)) / (2.*eps))[:, 0]
+    B = np.zeros((12, 4))
+    for i, field in enumerate(DELTA_FIELDS):
+        delta_p = MsgDelta(delta.elevator, delta.aileron, delta.rudder, delta.throttle)
+        delta_m = MsgDelta(delta.elevator, delta.aileron, delta.rudder, delta.throttle)
+        setattr(delta_p, field, getattr(delta, field) + eps)
+        setattr(delta_m, field, getattr(delta, field) - eps)
+        B[:, i] = ((f_no_wind(x_euler, delta_p) - f_no_wind(x_euler, delta_m)) / (2.*eps))[:, 0]
+    return A, B
+
+def central_differences_test(num: int = 10) -> bool:
+    """Compares euler_jacobians() with central differences at a trim point and perturbed states"""
+    print("\nStarting euler_jacobians central differences test")
+    trim_state, trim_input = compute_trim(DynamicState().convert_to_numpy(), 25., np.radians(3.), 150.)
+    rng = np.random.default_rng(9)
+    points = [(euler_state(trim_state), trim_input)]
+    for _ in range(num):
+        x_euler = euler_state(trim_state) + rng.normal(0., 0.1, (12, 1))
+        x_euler[3] += rng.normal(0., 3.)
+        delta = MsgDelta(elevator=trim_input.elevator + rng.normal(0., 0.05), aileron=rng.normal(0., 0.05),
+                         rudder=rng.normal(0., 0.05), throttle=rng.uniform(0.2, 1.))
+        points.append((x_euler, delta))
+
+    success = True
+    for x_euler, delta in points:
+        A, B = euler_jacobians(x_euler, delta)
+        A_ref, B_ref = central_differences(x_euler, delta)
+        if not np.allclose(A, A_ref, rtol=1e-6, atol=1e-6) or not np.allclose(B, B_ref, rtol=1e-6, atol=1e-6):
+            print("\n\nFailed test!")
+            print("x_euler = \n", x_euler, "\nA error: \n", A - A_ref, "\nB error: \n", B - B_ref)
+            success = False
+            break
+
+    if success:
+        print("Passed euler_jacobians central differences test")
+    return success
+
+def ss_model_test() -> bool:
+    """Compares the analytic and finite difference state space models, the forward differences of
+    df_dx and df_du use a step of 0.01 so they only agree to about one percent"""
+    print("\nStarting compute_ss_model analytic test")
+    trim_state, trim_input = compute_trim(DynamicState().convert_to_numpy(), 25., 0., np.inf)
+    x_euler = euler_state(trim_state)
+    A, B = euler_jacobians(x_euler, trim_input)
+    success = np.max(np.abs(A - df_dx(x_euler, trim_input))) <= 0.01*np.max(np.abs(A)) and \
+        np.max(np.abs(B - df_du(x_euler, trim_input))) <= 0.01*np.max(np.abs(B))
+
+    analytic = compute_ss_model(trim_state, trim_input)
+    finite = compute_ss_model(trim_state, trim_input, analytic=False)
+    for mat_analytic, mat_finite in zip(analytic, finite):
+        success = success and mat_analytic.shape == mat_finite.shape and \
+            np.max(np.abs(mat_analytic - mat_finite)) <= 0.01*np.max(np.abs(mat_analytic))
+
+    # the angle of attack is undefined without airspeed
+    try:
+        euler_jacobians(np.zeros((12, 1)), trim_input)
+        success = False
+    except ValueError:
+        pass
+
+    if success:
+        print("Passed compute_ss_model analytic test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def trim_gradient_test(num: int = 10) -> bool:
+    """Compares trim_objective_jac() with central differences of trim_objective_fun() and checks that
+    SLSQP finds the same trim with either gradient"""
+    print("\nStarting trim objective gradient test")
+    rng = np.random.default_rng(12)
+    x_trim = solve_trim(np.concatenate((euler_state(DynamicState().convert_to_numpy())[:, 0], [0., 0., 0., 0.5])),
+                        25., np.radians(3.), 300.).x
+    success = True
+    for _ in range(num):
+        x = x_trim + rng.normal(0., 0.05, 16)
+        args = (25., np.radians(3.), 300., 1e5)
+        expected = np.zeros(16)
+        for i in range(16):
+            dx = np.zeros(16)
+            dx[i] = 1e-6
+            expected[i] = (trim_objective_fun(x + dx, *args) - trim_objective_fun(x - dx, *args)) / 2e-6
+        if not np.allclose(trim_objective_jac(x, *args), expected, rtol=1e-5, atol=1e-4):
+            print("\n\nFailed test!")
+            print("expected: \n", expected, "\nreceived: \n", trim_objective_jac(x, *args))
+            success = False
+            break
+
+    x0 = np.concatenate((euler_state(DynamicState().convert_to_numpy())[:, 0], [0., 0., 0., 0.5]))
+    analytic = solve_trim(x0, 22., np.radians(-2.), np.inf)
+    finite = solve_trim(x0, 22., np.radians(-2.), np.inf, analytic_gradient=False)
+    success = success and analytic.success and np.allclose(analytic.x, finite.x, atol=1e-4) and \
+        analytic.nfev < finite.nfev
+
+    if success:
+        print("Passed trim objective gradient test")
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = central_differences_test() and ss_model_test() and trim_gradient_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,88 @@
+"""ch5_model_table_test.py: Checks the linear model table against compute_ss_model and compute_tf_model."""
+
+import os
+import tempfile
+
+import numpy as np
+from mav_sim.chap5.compute_models import compute_ss_model, compute_tf_model
+from mav_sim.chap5.model_table import (
+    NUM_CHANNELS,
+    TF_FIELDS,
+    ModelTable,
+    linearize_envelope,
+)
+from mav_sim.chap5.trim_envelope import trim_envelope
+from mav_sim.message_types.msg_delta import MsgDelta
+
+
+def grid_test() -> bool:
+    """The table reproduces the models at the grid points and is linear between them"""
+    print("\nStarting model table grid test")
+    envelope = trim_envelope([20., 25., 30.], [0., np.radians(4.)], [np.inf, 400.], max_workers=1)
+    table = linearize_envelope(envelope, max_workers=1)
+    success = table.data.shape == (3, 2, 2, NUM_CHANNELS) and np.array_equal(table.curvature, [0., 1./400.])
+
+    for i, j, k in ((0, 0, 0), (2, 1, 1), (1, 0, 1)):
+        point = envelope[i, j, k]
+        trim_state = np.reshape(point["state"], (13, 1))
+        trim_input = MsgDelta(*point["delta"])
+        expected = compute_ss_model(trim_state, trim_input)
+        received = table.ss_model(point["Va"], point["gamma"], point["R"])
+        success = success and all(np.allclose(e, r) for e, r in zip(expected, received)) and \
+            np.allclose(list(table.tf_model(point["Va"], point["gamma"], point["R"]).values()),
+                        compute_tf_model(trim_state, trim_input))
+
+    # halfway between grid points the entry is the mean of the neighbors, outside it is clamped
+    success = success and np.allclose(table.interpolate(22.5), 0.5*(table.data[0, 0, 0] + table.data[1, 0, 0])) and \
+        np.allclose(table.interpolate(27.5, np.radians(2.), 800.), np.mean(table.data[1:3, :, :], axis=(0, 1, 2))) and \
+        np.array_equal(table.interpolate(50., np.radians(-10.)), table.data[2, 0, 0]) and \
+        abs(table.tf_model(23.)["Va_trim"] - 23.) < 1e-9 and len(table.tf_model(23.)) == len(TF_FIELDS)
+
+    # unevenly spaced axes are searched
+    uneven = ModelTable(np.array([20., 21., 30.]), table.gamma, table.curvature, table.data)
+    success = success and np.allclose(uneven.interpolate(25.5), 0.5*(table.data[1, 0, 0] + table.data[2, 0, 0]))
+
+    if success:
+        print("Passed model table grid test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def storage_test() -> bool:
+    """Tables survive a round trip to disk, the parallel linearization matches the serial one,
+    and points without a trim are NaN"""
+    print("\nStarting model table storage test")
+    envelope = trim_envelope([25., 45.], [0., np.radians(15.)], max_workers=1)
+    serial = linearize_envelope(envelope, max_workers=1)
+    parallel = linearize_envelope(envelope, max_workers=2)
+    success = np.array_equal(serial.data, parallel.data, equal_nan=True) and \
+        bool(np.all(np.isnan(serial.data[1, 1, 0]))) and not np.any(np.isnan(serial.data[0, 0, 0]))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "table.npz")
+        serial.save(path)
+        loaded = ModelTable.load(path)
+        success = success and loaded.airframe == serial.airframe and \
+            np.array_equal(loaded.data, serial.data, equal_nan=True) and \
+            all(np.array_equal(a, b) for a, b in zip(loaded.axes, serial.axes))
+
+    try:
+        ModelTable(np.array([25., 20.]), serial.gamma, serial.curvature, serial.data)
+        success = False
+    except ValueError:
+        pass
+
+    if success:
+        print("Passed model table storage test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = grid_test() and storage_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,87 @@
+"""ch5_trim_cache_test.py: Checks that the trim cache returns the solutions of compute_trim."""
+
+import tempfile
+
+import mav_sim.parameters.aerosonde_parameters as MAV
+import numpy as np
+from mav_sim.chap3.mav_dynamics import DynamicState
+from mav_sim.chap5.trim import compute_trim
+from mav_sim.chap5.trim_cache import TrimCache, airframe_hash, solver_tag
+
+
+def memory_test() -> bool:
+    """Solves once, then answers repeated lookups from memory and evicts the oldest entry"""
+    print("\nStarting trim cache memory test")
+    state0 = DynamicState().convert_to_numpy()
+    cache = TrimCache(maxsize=2)
+    trim_state, trim_input = cache.compute_trim(state0, 25., 0.)
+    expected_state, expected_input = compute_trim(state0, 25., 0.)
+    success = np.allclose(trim_state, expected_state) and \
+        np.allclose(trim_input.to_array(), expected_input.to_array())
+
+    # a repeated lookup does not solve, and modifying the result does not modify the cache
+    trim_state[0] = 1000.
+    cached_state, cached_input = cache.compute_trim(state0, 25., 0.)
+    success = success and cache.stats.hits == 1 and cache.stats.misses == 1 and \
+        np.allclose(cached_state, expected_state) and cached_input.throttle == trim_input.throttle
+
+    # the least recently used entry is evicted
+    cache.compute_trim(state0, 25., 0.05)
+    cache.compute_trim(state0, 25., 0., 200.)
+    cache.compute_trim(state0, 25., 0.)
+    success = success and len(cache) == 2 and cache.stats.misses == 4 and cache.stats.solve_time > 0.
+
+    if success:
+        print("Passed trim cache memory test")
+    else:
+        print("\n\nFailed test!")
+        print(cache.stats)
+    return bool(success)
+
+def disk_test() -> bool:
+    """A new cache sharing the directory skips the solve, a different airframe or solver does not"""
+    print("\nStarting trim cache disk test")
+    state0 = DynamicState().convert_to_numpy()
+    with tempfile.TemporaryDirectory() as directory:
+        first = TrimCache(directory=directory)
+        trim_state, trim_input = first.compute_trim(state0, 25., np.radians(2.), 150.)
+
+        second = TrimCache(directory=directory)
+        cached_state, cached_input = second.compute_trim(state0, 25., np.radians(2.), 150.)
+        success = second.stats.disk_hits == 1 and second.stats.misses == 0 and \
+            np.array_equal(cached_state, trim_state) and \
+            np.array_equal(cached_input.to_array(), trim_input.to_array())
+
+        other = TrimCache(directory=directory, airframe="other airframe")
+        other.compute_trim(state0, 25., np.radians(2.), 150.)
+        success = success and other.stats.disk_hits == 0 and other.stats.misses == 1
+
+        solver = TrimCache(directory=directory, solver="other solver")
+        solver.compute_trim(state0, 25., np.radians(2.), 150.)
+        success = success and solver.stats.disk_hits == 0 and solver.stats.misses == 1 and \
+            solver.solver != first.solver and solver_tag() == first.solver
+
+    # the airframe hash follows the parameter values
+    nominal = airframe_hash()
+    mass = MAV.mass
+    try:
+        MAV.mass = mass + 1.
+        success = success and airframe_hash() != nominal
+    finally:
+        MAV.mass = mass
+    success = success and airframe_hash() == nominal
+
+    if success:
+        print("Passed trim cache disk test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = memory_test() and disk_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
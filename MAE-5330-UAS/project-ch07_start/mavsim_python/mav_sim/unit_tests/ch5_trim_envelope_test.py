@@ -0,0 +1,70 @@
+"""ch5_trim_envelope_test.py: Checks the trim envelope against individual trim solutions."""
+
+import numpy as np
+from mav_sim.chap3.mav_dynamics import DynamicState
+from mav_sim.chap5.trim import compute_trim
+from mav_sim.chap5.trim_envelope import TRIM_DTYPE, trim_envelope
+
+
+def envelope_test() -> bool:
+    """Compares the continuation solution with cold compute_trim solves"""
+    print("\nStarting trim envelope test")
+    Va = [20., 25., 30.]
+    gamma = [0., np.radians(5.)]
+    envelope = trim_envelope(Va, gamma, max_workers=1)
+    success = envelope.dtype == TRIM_DTYPE and envelope.shape == (3, 2, 1) and bool(np.all(envelope["converged"]))
+
+    state0 = DynamicState().convert_to_numpy()
+    for i, Va_i in enumerate(Va):
+        for j, gamma_j in enumerate(gamma):
+            point = envelope[i, j, 0]
+            trim_state, trim_input = compute_trim(state0, Va_i, gamma_j)
+            success = success and point["Va"] == Va_i and point["gamma"] == gamma_j and \
+                np.allclose(point["state"], trim_state[:, 0], atol=1e-3) and \
+                np.allclose(point["delta"], trim_input.to_array()[:, 0], atol=1e-3)
+
+    # unordered air speeds are solved in ascending order and returned in the given order
+    shuffled = trim_envelope([30., 20., 25.], gamma, max_workers=1)
+    success = success and all(np.array_equal(shuffled[name], envelope[[2, 0, 1]][name])
+                              for name in ("Va", "state", "delta", "converged"))
+
+    if success:
+        print("Passed trim envelope test")
+    else:
+        print("\n\nFailed test!")
+        print(envelope)
+    return bool(success)
+
+def parallel_test() -> bool:
+    """The strips give the same results in worker processes, and infeasible points are flagged"""
+    print("\nStarting trim envelope parallel test")
+    Va = [25., 45.]
+    gamma = [0., np.radians(15.)]
+    serial = trim_envelope(Va, gamma, max_workers=1)
+    parallel = trim_envelope(Va, gamma, max_workers=2)
+    success = all(np.array_equal(serial[name], parallel[name]) for name in ("state", "delta", "converged"))
+
+    # climbing at 15 degrees and 45 m/s needs more than full throttle
+    success = success and not serial[1, 1, 0]["converged"] and serial[0, 0, 0]["converged"]
+
+    try:
+        trim_envelope([0., 25.], gamma)
+        success = False
+    except ValueError:
+        pass
+
+    if success:
+        print("Passed trim envelope parallel test")
+    else:
+        print("\n\nFailed test!")
+        print(serial["converged"], parallel["converged"])
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = envelope_test() and parallel_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
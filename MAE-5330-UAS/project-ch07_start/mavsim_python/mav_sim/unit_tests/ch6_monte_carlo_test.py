@@ -0,0 +1,73 @@
+"""ch6_monte_carlo_test.py: Checks the Monte Carlo runner against direct headless runs."""
+
+import numpy as np
+from mav_sim.chap6.monte_carlo import (
+    compute_metrics,
+    generate_cases,
+    run_case,
+    run_monte_carlo,
+)
+from mav_sim.chap6.run_sim import run_sim_headless
+from mav_sim.message_types.msg_sim_params import MsgSimParams
+
+
+def cases_test() -> bool:
+    """Checks that the cases are reproducible and differ from each other"""
+    print("\nStarting Monte Carlo cases test")
+    first = generate_cases(3, seed=7)
+    second = generate_cases(3, seed=7)
+    success = all(a.seed == b.seed and a.init_state.down == b.init_state.down and
+                  a.gust_params.sigma_u == b.gust_params.sigma_u for a, b in zip(first, second)) and \
+        len({case.seed for case in first}) == 3 and len({case.init_state.down for case in first}) == 3
+    if success:
+        print("Passed Monte Carlo cases test")
+    else:
+        print("\n\nFailed test!")
+    return success
+
+def metrics_test() -> bool:
+    """Compares the metrics of a case with a direct run using the same seed"""
+    print("\nStarting Monte Carlo metrics test")
+    sim = MsgSimParams(end_time=3.)
+    case = generate_cases(1, seed=3)[0]
+    row = run_case(sim, case)
+    repeat = run_case(sim, case) # the command signals must not carry state between runs
+
+    trajectory = run_sim_headless(sim, init_state=case.init_state, use_wind=True, gust_params=case.gust_params,
+                                  Va_command=case.Va_command, altitude_command=case.altitude_command,
+                                  course_command=case.course_command, seed=case.seed)
+    expected = compute_metrics(trajectory, sim.ts_simulation)
+
+    success = row == repeat and row[0] == 0 and row[1] == case.seed and np.allclose(row[2:], expected) \
+        and row[5] >= row[4] > 0.
+    if success:
+        print("Passed Monte Carlo metrics test")
+    else:
+        print("\n\nFailed test!")
+        print("expected: \n", expected, "\nreceived: \n", row[2:])
+    return bool(success)
+
+def parallel_test() -> bool:
+    """Runs the same cases in the calling process and across a process pool"""
+    print("\nStarting Monte Carlo parallel test")
+    sim = MsgSimParams(end_time=2.)
+    cases = generate_cases(4, seed=11)
+    serial = run_monte_carlo(sim, cases, max_workers=1)
+    parallel = run_monte_carlo(sim, cases, max_workers=2)
+    success = serial.shape == (4,) and np.array_equal(serial["case"], np.arange(4)) and \
+        np.array_equal(serial, parallel)
+    if success:
+        print("Passed Monte Carlo parallel test")
+    else:
+        print("\n\nFailed test!")
+        print("expected: \n", serial, "\nreceived: \n", parallel)
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = cases_test() and metrics_test() and parallel_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
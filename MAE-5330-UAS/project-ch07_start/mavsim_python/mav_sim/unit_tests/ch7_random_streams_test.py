@@ -0,0 +1,148 @@
+"""ch7_random_streams_test.py: Checks the random number generators threaded through the stochastic components."""
+
+from typing import Optional
+
+import mav_sim.parameters.sensor_parameters as SENSOR
+import numpy as np
+import numpy.typing as npt
+from mav_sim.chap4.wind_simulation import WindSimulation
+from mav_sim.chap7 import mav_dynamics
+from mav_sim.chap7.run_sim import run_sim_headless
+from mav_sim.message_types.msg_sim_params import MsgSimParams
+from mav_sim.message_types.msg_world_map import MsgWorldMap
+from mav_sim.tools.random_streams import (
+    BlockNoise,
+    GlobalRandom,
+    component_generators,
+    get_rng,
+)
+
+
+def sensor_draws(rng: Optional[np.random.Generator]) -> npt.NDArray[np.float64]:
+    """Returns the readings of every sensor function for a fixed state"""
+    forces = np.array([[1.], [-2.], [3.]])
+    quat = np.array([[1.], [0.], [0.], [0.]])
+    nu = mav_dynamics.GpsTransient(0.1, 0.2, 0.3)
+    readings = mav_dynamics.accelerometer(0.1, 0.2, forces, 1., rng=rng) + \
+        mav_dynamics.gyro(0.1, 0.2, 0.3, rng=rng) + \
+        mav_dynamics.pressure(-100., 25., rng=rng) + \
+        mav_dynamics.magnetometer(quat, rng=rng) + \
+        tuple(mav_dynamics.gps_error_trans_update(nu, rng=rng).to_array()[:, 0]) + \
+        mav_dynamics.gps(np.zeros((3, 1)), np.array([[25.], [0.], [0.]]), quat, nu, rng=rng)
+    return np.array(readings, dtype=float)
+
+def global_state_test() -> bool:
+    """Checks that np.random.seed keeps controlling the components when no generator is given"""
+    print("\nStarting global random state test")
+    np.random.seed(5)
+    first = sensor_draws(None)
+    wind_first = WindSimulation(0.01).update()
+    heights_first = MsgWorldMap().building_height
+    np.random.seed(5)
+    second = sensor_draws(None)
+    wind_second = WindSimulation(0.01).update()
+    heights_second = MsgWorldMap().building_height
+
+    # the bulk draws give the same numbers as the scalar draws they replaced
+    np.random.seed(5)
+    gyro = mav_dynamics.gyro(0., 0., 0., gyro_x_bias=0., gyro_y_bias=0., gyro_z_bias=0.)
+    np.random.seed(5)
+    scalar = [np.random.normal(0., SENSOR.gyro_sigma) for _ in range(3)]
+
+    # the global source draws the numbers of the np.random functions
+    np.random.seed(5)
+    source = get_rng()
+    draws = np.concatenate((source.standard_normal(3), source.normal(1., 2., 2), source.random(2)))
+    np.random.seed(5)
+    expected = np.concatenate((np.random.standard_normal(3), np.random.normal(1., 2., 2), np.random.random(2)))
+
+    success = isinstance(source, GlobalRandom) and np.array_equal(draws, expected) and \
+        np.array_equal(first, second) and np.array_equal(wind_first, wind_second) and \
+        np.array_equal(heights_first, heights_second) and not np.array_equal(first, sensor_draws(None)) and \
+        np.array_equal(gyro, scalar)
+    if success:
+        print("Passed global random state test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def generator_test() -> bool:
+    """Checks that the generators reproduce the draws without touching the global state"""
+    print("\nStarting component generator test")
+    np.random.seed(1)
+
+    first = component_generators(3)
+    second = component_generators(np.random.SeedSequence(3))
+    success = np.array_equal(sensor_draws(first["sensors"]), sensor_draws(second["sensors"])) and \
+        np.array_equal(WindSimulation(0.01, rng=first["wind"]).update(),
+                       WindSimulation(0.01, rng=second["wind"]).update()) and \
+        np.array_equal(MsgWorldMap(rng=first["world_map"]).building_height,
+                       MsgWorldMap(rng=second["world_map"]).building_height)
+
+    # each component has its own stream
+    streams = component_generators(3)
+    success = success and not np.array_equal(streams["wind"].random(4), streams["sensors"].random(4))
+
+    # the global state was not advanced
+    value = np.random.random()
+    np.random.seed(1)
+    success = success and value == np.random.random()
+    if success:
+        print("Passed component generator test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def block_noise_test() -> bool:
+    """Checks the statistics and reproducibility of the pre-generated noise across refills"""
+    print("\nStarting block noise test")
+    noise = BlockNoise(np.random.default_rng(8), block_size=1000)
+    draws = np.concatenate([noise.normal(1., 2., 7).copy() for _ in range(20000)])
+    repeat = BlockNoise(np.random.default_rng(8), block_size=1000)
+    repeated = np.concatenate([repeat.normal(1., 2., 7).copy() for _ in range(20000)])
+
+    # per-channel scales and sensor readings through MavDynamics
+    scaled = BlockNoise(np.random.default_rng(9), block_size=10).normal(0., (1., 0., 3.), 3)
+    sensors = [mav_dynamics.MavDynamics(0.01, rng=np.random.default_rng(10)).sensors().gyro_x for _ in range(2)]
+
+    success = abs(np.mean(draws) - 1.) < 0.02 and abs(np.std(draws) - 2.) < 0.02 and \
+        np.array_equal(draws, repeated) and noise.refills == int(np.ceil(20000 / (1000 // 7))) and scaled[1] == 0. and sensors[0] == sensors[1]
+    try:
+        noise.standard_normal(1001)
+        success = False
+    except ValueError:
+        pass
+    if success:
+        print("Passed block noise test")
+    else:
+        print("\n\nFailed test!")
+        print("mean: ", np.mean(draws), "std: ", np.std(draws), "refills: ", noise.refills)
+    return bool(success)
+
+def headless_test() -> bool:
+    """Runs the seeded chapter 7 simulation twice with the global state disturbed in between"""
+    print("\nStarting seeded headless test")
+    sim = MsgSimParams(end_time=1.)
+    first = run_sim_headless(sim, use_wind=True, seed=42)
+    np.random.seed(0)
+    np.random.normal(size=10)
+    second = run_sim_headless(sim, use_wind=True, seed=42)
+    other = run_sim_headless(sim, use_wind=True, seed=43)
+
+    assert first.sensors is not None and second.sensors is not None and other.sensors is not None
+    success = np.array_equal(first.true_state, second.true_state) and np.array_equal(first.wind, second.wind) \
+        and np.array_equal(first.sensors, second.sensors) and not np.array_equal(first.sensors, other.sensors)
+    if success:
+        print("Passed seeded headless test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = global_state_test() and generator_test() and block_noise_test() and headless_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
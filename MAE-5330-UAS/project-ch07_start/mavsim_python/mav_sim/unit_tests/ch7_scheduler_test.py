@@ -0,0 +1,108 @@
+"""ch7_scheduler_test.py: Checks the multi-rate schedule of the simulation loops and the gps timing."""
+
+import mav_sim.parameters.sensor_parameters as SENSOR
+import numpy as np
+from mav_sim.chap7.mav_dynamics import MavDynamics
+from mav_sim.chap7.run_sim import run_sim_headless
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.message_types.msg_sim_params import MsgSimParams
+from mav_sim.tools.scheduler import RateScheduler, simulation_schedule
+
+
+def scheduler_test() -> bool:
+    """Checks the ticks, times, and due components of a schedule"""
+    print("\nStarting rate scheduler test")
+    schedule = RateScheduler(0.01, start_time=2.)
+    success = schedule.add("control", 0.02) == 2 and schedule.add("gps", 0.2) == 20 and \
+        schedule.add("plot", 0.033, exact=False) == 3 and np.isclose(schedule.period("plot"), 0.03)
+    success = success and [k for k in range(45) if schedule.due("gps", k)] == [0, 20, 40] and \
+        [k for k in range(7) if schedule.due("control", k)] == [0, 2, 4, 6]
+
+    # the time of a tick does not depend on the ticks before it
+    accumulated = 2.
+    for _ in range(100000):
+        accumulated += 0.01
+    success = success and schedule.time(100000) == 2. + 100000*0.01 and schedule.time(100000) != accumulated and \
+        abs(schedule.time(100000) - 1002.) < 1e-9 and schedule.num_ticks(3.) == 100
+
+    for period in (0.015, 0., -0.01):
+        try:
+            schedule.add("bad", period)
+            success = False
+        except ValueError:
+            pass
+
+    sim = MsgSimParams(end_time=1., ts_control=0.02, ts_sensors=0.05)
+    schedule = simulation_schedule(sim)
+    success = success and schedule.ts_base == sim.ts_simulation and schedule.ticks("control") == 2 and \
+        schedule.ticks("sensors") == 5 and schedule.ticks("path") == 2 and schedule.ticks("plot") == 10 and \
+        schedule.ticks("observer") == 2
+    schedule = simulation_schedule(MsgSimParams(ts_control=0.02, ts_observer=0.04))
+    success = success and schedule.ticks("observer") == 4 and schedule.ticks("control") == 2
+
+    if success:
+        print("Passed rate scheduler test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def gps_timing_test() -> bool:
+    """Checks that the gps is measured at t = 0 and then exactly once every ts_gps"""
+    print("\nStarting gps timing test")
+    delta = MsgDelta(elevator=-0.1248, aileron=0.001836, rudder=-0.0003026, throttle=0.6768)
+    success = True
+    for time_step, sensor_every in ((0.01, 1), (0.01, 3), (0.05, 1)):
+        mav = MavDynamics(0.01, rng=np.random.default_rng(3))
+        num_updates = int(round(10. / time_step))
+        previous = np.nan
+        gps_times = []
+        for k in range(num_updates):
+            if k % sensor_every == 0:
+                gps_n = mav.sensors().gps_n
+                if gps_n != previous:
+                    gps_times.append(k*time_step)
+                previous = gps_n
+            mav.update(delta, np.zeros((6, 1)), time_step)
+
+        # a gps period is reported by the first sensor call at or after its start
+        periods = np.arange(0., num_updates*time_step - 1e-9, SENSOR.ts_gps)
+        sensor_period = sensor_every*time_step
+        expected = np.ceil(periods/sensor_period - 1e-9)*sensor_period
+        expected = np.unique(expected[expected < num_updates*time_step - 1e-9])
+        success = success and np.allclose(gps_times, expected, atol=1e-9)
+        if not success:
+            print("time step", time_step, "gps times", gps_times[-5:], "expected", expected[-5:])
+            break
+
+    if success:
+        print("Passed gps timing test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def multirate_test() -> bool:
+    """Checks that the autopilot holds its output between control updates"""
+    print("\nStarting multi-rate simulation test")
+    sim = MsgSimParams(end_time=4., ts_control=0.02, ts_sensors=0.05)
+    trajectory = run_sim_headless(sim, seed=7)
+    delta = trajectory.delta
+    sensors = trajectory.sensors
+    success = sensors is not None and np.array_equal(delta[:, 0::2], delta[:, 1::2]) and \
+        np.any(np.diff(delta[:, 0::2], axis=1) != 0.) and \
+        all(np.array_equal(sensors[:, k], sensors[:, k - k % 5]) for k in range(sensors.shape[1])) and \
+        np.all(np.isfinite(trajectory.true_state))
+
+    if success:
+        print("Passed multi-rate simulation test")
+    else:
+        print("\n\nFailed test!")
+    return bool(success)
+
+def run_all_tests() -> None:
+    """Run all tests."""
+    succ = scheduler_test() and gps_timing_test() and multirate_test()
+    if not succ:
+        raise ValueError("Tests failed")
+
+if __name__ == "__main__":
+    run_all_tests()
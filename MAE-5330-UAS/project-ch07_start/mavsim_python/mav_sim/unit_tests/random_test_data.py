@@ -0,0 +1,22 @@
+"""random_test_data.py: Random states and control inputs shared by the unit tests."""
+
+import numpy as np
+from mav_sim.chap3.mav_dynamics import IND, DynamicState
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.tools import types
+
+
+def random_states(num: int, rng: np.random.Generator) -> types.NP_MAT:
+    """Creates a (13, num) array of perturbed states about the default state"""
+    states = np.tile(DynamicState().convert_to_numpy(), (1, num))
+    states[IND.NORTH:IND.DOWN+1] += rng.normal(0., 10., (3, num))
+    states[IND.U:IND.W+1] += rng.normal(0., 3., (3, num))
+    states[IND.E0:IND.E3+1] += rng.normal(0., 0.3, (4, num))
+    states[IND.E0:IND.E3+1] /= np.linalg.norm(states[IND.E0:IND.E3+1], axis=0)
+    states[IND.P:IND.R+1] += rng.normal(0., 0.2, (3, num))
+    return states
+
+def random_deltas(num: int, rng: np.random.Generator) -> list[MsgDelta]:
+    """Creates num random control messages"""
+    return [MsgDelta(elevator=rng.uniform(-0.3, 0.3), aileron=rng.uniform(-0.1, 0.1),
+                     rudder=rng.uniform(-0.1, 0.1), throttle=rng.uniform(0.2, 1.)) for _ in range(num)]
@@ -0,0 +1,95 @@
+"""
+benchmark_aero_table
+    - Compares the tabulated aerodynamic coefficients of mav_sim.chap4.aero_model against the
+      analytic model, the error of the coefficients, of the forces and moments, and of a
+      simulated trajectory, and the time of the scalar and batched force evaluations
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+from mav_sim.chap3.mav_dynamics import DynamicState
+from mav_sim.chap4.aero_model import AERO_FIELDS, AeroTable, analytic_coefficients
+from mav_sim.chap4.batch_dynamics import (
+    forces_moments_batch,
+    update_velocity_data_batch,
+)
+from mav_sim.chap4.mav_dynamics import MavDynamics, forces_moments, update_velocity_data
+from mav_sim.message_types.msg_delta import MsgDelta
+
+
+def best_time(func: Callable[[], object], calls: int, repeats: int) -> float:
+    """Returns the best time per call over the repeats, in microseconds"""
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+def main() -> None:
+    """Print the accuracy and the time per call of the analytic and tabulated models"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=2**16 + 1, help="number of alpha grid points of the table")
+    parser.add_argument("--batch", type=int, default=1000, help="number of aircraft of the batched evaluation")
+    parser.add_argument("--calls", type=int, default=20000, help="number of scalar calls per repeat")
+    parser.add_argument("--repeats", type=int, default=5, help="number of repeats, the best is reported")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    start = time.perf_counter()
+    table = AeroTable(args.points)
+    print(f"table of {args.points} points built in {(time.perf_counter() - start)*1e3:.1f} ms")
+
+    # error of the coefficients over every angle of attack
+    alpha = rng.uniform(-np.pi, np.pi, 200000)
+    error = np.max(np.abs(table.coefficients(alpha) - analytic_coefficients(alpha)), axis=1)
+    print("max coefficient error: " + ", ".join(f"{name} {value:.1e}" for name, value in zip(AERO_FIELDS, error)))
+
+    # error of the forces and moments over perturbed flight conditions
+    states = np.tile(DynamicState().convert_to_numpy(), (1, args.batch))
+    states[3:6] += rng.normal(0., 5., (3, args.batch))
+    deltas = np.tile(MsgDelta(elevator=-0.1248, aileron=0.001836, rudder=-0.0003026, throttle=0.6768).to_array(),
+                     (1, args.batch))
+    Va, alpha, beta, _ = update_velocity_data_batch(states)
+    analytic = forces_moments_batch(states, deltas, Va, alpha, beta)
+    tabulated = forces_moments_batch(states, deltas, Va, alpha, beta, table)
+    relative = np.max(np.abs(tabulated - analytic)) / np.max(np.abs(analytic))
+    print(f"max force/moment error relative to the largest force: {relative:.1e}")
+
+    # trajectory after 20 s of open loop flight
+    delta = MsgDelta(elevator=-0.1248, aileron=0.01, rudder=-0.0003026, throttle=0.6768)
+    wind = np.zeros((6, 1))
+    mavs = (MavDynamics(0.01), MavDynamics(0.01, aero=table))
+    for _ in range(2000):
+        for mav in mavs:
+            mav.update(delta, wind)
+    drift = np.linalg.norm(mavs[0].get_state()[0:3] - mavs[1].get_state()[0:3])
+    print(f"position difference after 20 s: {drift:.1e} m")
+
+    # time per call
+    state = DynamicState().convert_to_numpy()
+    Va_1, alpha_1, beta_1, _ = update_velocity_data(state)
+    functions: dict[str, tuple[Callable[[], object], Callable[[], object]]] = {
+        "coefficients": (lambda: analytic_coefficients(alpha_1), lambda: table.coefficients(alpha_1)),
+        "forces_moments": (lambda: forces_moments(state, delta, Va_1, beta_1, alpha_1),
+                           lambda: forces_moments(state, delta, Va_1, beta_1, alpha_1, table)),
+        "MavDynamics.update": (lambda: mavs[0].update(delta, wind), lambda: mavs[1].update(delta, wind)),
+        f"forces_moments_batch ({args.batch})": (lambda: forces_moments_batch(states, deltas, Va, alpha, beta),
+                                                 lambda: forces_moments_batch(states, deltas, Va, alpha, beta, table)),
+    }
+    print(f"{'function':<34s}{'analytic (us)':>15s}{'table (us)':>12s}{'speedup':>9s}")
+    for name, (analytic_func, table_func) in functions.items():
+        calls = args.calls if "batch" not in name else max(1, args.calls // 100)
+        analytic_time = best_time(analytic_func, calls, args.repeats)
+        table_time = best_time(table_func, calls, args.repeats)
+        print(f"{name:<34s}{analytic_time:15.2f}{table_time:12.2f}{analytic_time/table_time:8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+benchmark_integrators
+    - Microbenchmark of the MavDynamics integration schemes
+    - Reports the number of simulation steps per second for each IntegratorType
+    - Reports the steps chosen by the adaptive integrator over a chapter 4 scenario
+    - Reports the attitude error of rk4 and of the geometric rkmk4 scheme against the step size
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+from mav_sim.chap3.mav_dynamics import (
+    IND,
+    DynamicsIntegrator,
+    DynamicState,
+    IntegratorType,
+)
+from mav_sim.chap4.mav_dynamics import MavDynamics
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.tools import types
+from mav_sim.tools.rotations import Quaternion2Rotation
+
+INTEGRATORS = {"rk4": IntegratorType.rk4, "rk4_workspace": IntegratorType.rk4_workspace,
+               "rkmk4": IntegratorType.rkmk4}
+
+def steps_per_second(func: Callable[[int, int], None], integrator: int, steps: int, repeats: int) -> float:
+    """Returns the best steps per second over the repeats of calling func(integrator, steps)"""
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(integrator, steps)
+        best = min(best, time.perf_counter() - start)
+    return steps / best
+
+def integrator_only(integrator: int, steps: int) -> None:
+    """Steps the bare integrator with constant forces and moments"""
+    stepper = DynamicsIntegrator(integrator)
+    state = DynamicState().convert_to_numpy()
+    forces_moments = np.array([[1.], [0.1], [-2.], [0.01], [0.02], [0.01]])
+    for _ in range(steps):
+        stepper.step(state, forces_moments, 0.01)
+
+def full_update(integrator: int, steps: int) -> None:
+    """Runs the chapter 4 MavDynamics.update loop at trim"""
+    mav = MavDynamics(0.01, integrator=integrator)
+    delta = MsgDelta(elevator=-0.1248, aileron=0.001836, rudder=-0.0003026, throttle=0.6768)
+    wind = np.zeros((6, 1))
+    for _ in range(steps):
+        mav.update(delta, wind)
+
+def step_counts(end_time: float, ts_update: float) -> None:
+    """Simulates an elevator perturbation and prints the work done by each integrator"""
+    def delta_fnc(sim_time: float) -> MsgDelta:
+        delta = MsgDelta(elevator=-0.1248, aileron=0.001836, rudder=-0.0003026, throttle=0.6768)
+        if sim_time >= 5.:
+            delta.elevator += 5*np.pi/180.
+        return delta
+
+    wind = np.array([[1.], [-2.], [0.], [0.], [0.], [0.]])
+    for name, integrator, time_step in (("rk4", IntegratorType.rk4, 0.01),
+                                        ("dopri45", IntegratorType.dopri45, ts_update)):
+        mav = MavDynamics(0.01, integrator=integrator)
+        start = time.perf_counter()
+        for k in range(int(round(end_time/time_step))):
+            mav.update(delta_fnc(k*time_step), wind, time_step)
+        elapsed = time.perf_counter() - start
+        stats = mav.integrator.stats
+        print(f"    {name:<10s}updates every {time_step:5.3f} s: {stats.accepted_steps:6d} accepted, "
+              f"{stats.rejected_steps:4d} rejected, {stats.derivative_evaluations:7d} evaluations, {elapsed:6.3f} s")
+
+def attitude_error(state: types.DynamicState, reference: types.DynamicState) -> float:
+    """Angle of the rotation between the attitudes of two states, in radians"""
+    rotation = Quaternion2Rotation(reference[IND.QUAT]).T @ Quaternion2Rotation(state[IND.QUAT])
+    # the skew part holds the sine and the trace the cosine, precise for small angles unlike arccos
+    return float(np.arctan2(np.linalg.norm(rotation - rotation.T)/(2.*np.sqrt(2.)), (np.trace(rotation) - 1.)/2.))
+
+def tumble(integrator: int, time_step: float, end_time: float) -> types.DynamicState:
+    """Steps the bare integrator through a fast tumble with constant forces and moments"""
+    stepper = DynamicsIntegrator(integrator)
+    state = DynamicState().convert_to_numpy()
+    state[IND.P:IND.R+1] = [[2.], [-1.], [1.5]]
+    forces_moments = np.array([[1.], [0.1], [-2.], [0.3], [0.2], [-0.2]])
+    for _ in range(int(round(end_time/time_step))):
+        stepper.step(state, forces_moments, time_step)
+    return state
+
+def roll_maneuver(integrator: int, time_step: float, end_time: float) -> types.DynamicState:
+    """Flies the chapter 4 dynamics with full aileron, the forces are evaluated once per step"""
+    mav = MavDynamics(time_step, integrator=integrator)
+    delta = MsgDelta(elevator=-0.1248, aileron=0.1, rudder=-0.0003026, throttle=0.6768)
+    wind = np.zeros((6, 1))
+    for _ in range(int(round(end_time/time_step))):
+        mav.update(delta, wind)
+    return mav.get_state()
+
+def accuracy(end_time: float, time_steps: list[float]) -> None:
+    """Prints the attitude error of rk4 and rkmk4 against a rk4 solution with a 0.5 ms step"""
+    for label, func in (("tumble with constant forces", tumble), ("chapter 4 roll maneuver", roll_maneuver)):
+        print(f"{label}, attitude error after {end_time:.0f} s")
+        reference = func(IntegratorType.rk4, 5e-4, end_time)
+        print(f"    {'step (s)':<10s}{'rk4 (rad)':>12s}{'rkmk4 (rad)':>14s}")
+        for time_step in time_steps:
+            errors = []
+            for integrator in (IntegratorType.rk4, IntegratorType.rkmk4):
+                try:
+                    with np.errstate(all="raise"):
+                        errors.append(f"{attitude_error(func(integrator, time_step, end_time), reference):.2e}")
+                except (OverflowError, FloatingPointError):
+                    errors.append("diverged")
+            print(f"    {time_step:<10.3f}{errors[0]:>12s}{errors[1]:>14s}")
+
+def main() -> None:
+    """Print the steps per second of each integrator"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=5000, help="number of steps per repeat")
+    parser.add_argument("--repeats", type=int, default=5, help="number of repeats, the best is reported")
+    parser.add_argument("--ts-update", type=float, default=0.1, help="update period of the adaptive integrator")
+    parser.add_argument("--accuracy-time", type=float, default=10., help="length of the accuracy runs in seconds")
+    parser.add_argument("--accuracy-steps", type=float, nargs="+", default=[0.005, 0.01, 0.02, 0.04, 0.08],
+                        help="step sizes of the accuracy runs")
+    args = parser.parse_args()
+
+    for label, func in (("integrator step", integrator_only), ("MavDynamics.update", full_update)):
+        print(label)
+        baseline = 0.
+        for name, integrator in INTEGRATORS.items():
+            rate = steps_per_second(func, integrator, args.steps, args.repeats)
+            baseline = baseline if baseline > 0. else rate
+            print(f"    {name:<16s}{rate:12.0f} steps/s  ({rate/baseline:.2f}x)")
+
+    print("20 s elevator perturbation")
+    step_counts(20., args.ts_update)
+
+    accuracy(args.accuracy_time, args.accuracy_steps)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+benchmark_sensor_noise
+    - Microbenchmark of the noise sources of the chapter 7 sensors
+    - Reports the time per step of drawing the sensor noise and of calculate_sensor_readings for
+      the global numpy state, a numpy Generator, and a BlockNoise source
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+
+import argparse
+import time
+from typing import Callable, Optional
+
+import mav_sim.parameters.sensor_parameters as SENSOR
+import numpy as np
+from mav_sim.chap3.mav_dynamics import DynamicState
+from mav_sim.chap7.mav_dynamics import (
+    GpsTransient,
+    calculate_sensor_readings,
+    sensor_noise,
+)
+from mav_sim.message_types.msg_sensors import MsgSensors
+from mav_sim.tools.random_streams import NoiseSource, get_rng
+
+
+def seconds_per_step(func: Callable[[], None], steps: int, repeats: int) -> float:
+    """Returns the best time per call over the repeats"""
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(steps):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / steps
+
+def scalar_draws() -> None:
+    """The noise of one gps step drawn one value at a time, as the sensors originally did"""
+    for sigma in (SENSOR.accel_sigma,)*3 + (SENSOR.gyro_sigma,)*3 + (SENSOR.abs_pres_sigma, SENSOR.diff_pres_sigma) + \
+            (SENSOR.mag_sigma,)*3 + (1.,)*3 + (SENSOR.gps_n_sigma, SENSOR.gps_e_sigma, SENSOR.gps_h_sigma,
+                                               SENSOR.gps_Vg_sigma, SENSOR.gps_course_sigma):
+        np.random.normal(0., sigma)
+
+def bulk_draws(rng: Optional[NoiseSource]) -> Callable[[], None]:
+    """The noise of one gps step drawn with one call per sensor"""
+    source = get_rng(rng)
+    def draw() -> None:
+        for size in (3, 3, 2, 3, 3, 5): # accelerometer, gyro, pressure, magnetometer, gps transient, gps
+            source.standard_normal(size)
+    return draw
+
+def sensor_step(rng: Optional[NoiseSource]) -> Callable[[], None]:
+    """One call of calculate_sensor_readings that updates the gps"""
+    state = DynamicState().convert_to_numpy()
+    forces = np.array([[1.], [-2.], [3.]])
+    nu = GpsTransient(0., 0., 0.)
+    sensors = MsgSensors()
+    def step() -> None:
+        calculate_sensor_readings(state, forces, nu, 25., sensors, True, 1., rng)
+    return step
+
+def main() -> None:
+    """Print the time per step of each noise source"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=20000, help="number of steps per repeat")
+    parser.add_argument("--repeats", type=int, default=5, help="number of repeats, the best is reported")
+    args = parser.parse_args()
+
+    sources: dict[str, Optional[NoiseSource]] = {"global state": None, "Generator": np.random.default_rng(0),
+                                                 "BlockNoise": sensor_noise(np.random.default_rng(0))}
+
+    print("sensor noise per step")
+    baseline = seconds_per_step(scalar_draws, args.steps, args.repeats)
+    print(f"    {'scalar draws':<16s}{baseline*1e6:10.2f} us")
+    for name, rng in sources.items():
+        elapsed = seconds_per_step(bulk_draws(rng), args.steps, args.repeats)
+        print(f"    {name:<16s}{elapsed*1e6:10.2f} us  ({baseline/elapsed:.2f}x)")
+
+    print("calculate_sensor_readings with a gps update")
+    baseline = 0.
+    for name, rng in sources.items():
+        elapsed = seconds_per_step(sensor_step(rng), args.steps, args.repeats)
+        baseline = baseline if baseline > 0. else elapsed
+        print(f"    {name:<16s}{elapsed*1e6:10.2f} us  ({baseline/elapsed:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+benchmark_trim
+    - Counts the forces_moments and euler_jacobians evaluations and the time of each trim solve with
+      the analytic gradient of trim_objective_fun and with the finite difference gradient estimated by SLSQP
+    - The two gradients do different work per evaluation, so they are compared by wall time
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+
+import argparse
+import time
+from typing import Any, Optional
+
+import numpy as np
+from mav_sim.chap3.mav_dynamics import DynamicState
+from mav_sim.chap3.mav_dynamics_euler import quat_state_to_euler_state
+from mav_sim.chap4.aero_model import AeroTable
+from mav_sim.chap5 import trim
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.tools import types
+
+# flight conditions (Va, gamma, R) of the benchmark
+CONDITIONS = ((25., 0., np.inf), (25., np.radians(5.), np.inf), (18., np.radians(-3.), np.inf),
+              (32., np.radians(2.), np.inf), (25., 0., 300.), (20., np.radians(3.), 500.))
+
+class CountedForcesMoments:
+    """Wraps forces_moments and counts its calls"""
+    def __init__(self) -> None:
+        self.calls = 0
+        self._forces_moments = trim.forces_moments
+
+    def __call__(self, state: types.DynamicState, delta: MsgDelta, Va: float, beta: float, alpha: float,
+                 aero: Optional[AeroTable] = None) -> Any:
+        """Counts the call and evaluates forces_moments"""
+        self.calls += 1
+        return self._forces_moments(state, delta, Va, beta, alpha, aero)
+
+class CountedJacobians:
+    """Wraps euler_jacobians and counts its calls"""
+    def __init__(self) -> None:
+        self.calls = 0
+        self._euler_jacobians = trim.euler_jacobians
+
+    def __call__(self, x_euler: types.DynamicStateEuler, delta: MsgDelta) -> Any:
+        """Counts the call and evaluates euler_jacobians"""
+        self.calls += 1
+        return self._euler_jacobians(x_euler, delta)
+
+def main() -> None:
+    """Print the evaluations and time of each trim solve"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    counter = CountedForcesMoments()
+    trim.forces_moments = counter
+    jacobians = CountedJacobians()
+    trim.euler_jacobians = jacobians
+    state0 = quat_state_to_euler_state(DynamicState().convert_to_numpy())
+    x0 = np.concatenate((state0, MsgDelta(throttle=0.5).to_array()), axis=0)
+
+    print(f"{'Va':>6s}{'gamma':>8s}{'R':>8s}  {'gradient':<10s}{'evals':>8s}{'jacobians':>11s}{'iters':>8s}"
+          f"{'time (ms)':>12s}{'cost':>12s}")
+    totals = {"finite": [0, 0, 0.], "analytic": [0, 0, 0.]}
+    for Va, gamma, R in CONDITIONS:
+        for name, analytic in (("finite", False), ("analytic", True)):
+            counter.calls = 0
+            jacobians.calls = 0
+            start = time.perf_counter()
+            res = trim.solve_trim(x0, Va, gamma, R, analytic_gradient=analytic)
+            elapsed = time.perf_counter() - start
+            totals[name][0] += counter.calls
+            totals[name][1] += jacobians.calls
+            totals[name][2] += elapsed
+            print(f"{Va:6.1f}{np.degrees(gamma):8.1f}{R:8.0f}  {name:<10s}{counter.calls:8d}{jacobians.calls:11d}"
+                  f"{res.nit:8d}{elapsed*1e3:12.1f}{res.fun:12.2e}")
+
+    summary = [f"{name} {total[0]/len(CONDITIONS):.0f} forces_moments and {total[1]/len(CONDITIONS):.0f} "
+               f"euler_jacobians evaluations, {total[2]/len(CONDITIONS)*1e3:.1f} ms" for name, total in totals.items()]
+    print("\nper trim: " + "; ".join(summary) +
+          f" ({totals['finite'][2]/totals['analytic'][2]:.1f}x faster with the analytic gradient)")
+
+if __name__ == "__main__":
+    main()
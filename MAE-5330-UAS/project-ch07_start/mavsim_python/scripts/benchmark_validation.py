@@ -0,0 +1,62 @@
+"""
+benchmark_validation
+    - Times derivatives, forces_moments, and MavDynamics.update with the shape checks of
+      mav_sim.tools.types enabled and disabled
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+from mav_sim.chap3.mav_dynamics import DynamicState, derivatives
+from mav_sim.chap4.mav_dynamics import MavDynamics, forces_moments, update_velocity_data
+from mav_sim.message_types.msg_delta import MsgDelta
+from mav_sim.tools import types
+from mav_sim.tools.rotations import Quaternion2Rotation
+
+
+def best_time(func: Callable[[], object], calls: int, repeats: int) -> float:
+    """Returns the best time per call over the repeats, in microseconds"""
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+def main() -> None:
+    """Print the time per call of each function at each validation level"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000, help="number of calls per repeat")
+    parser.add_argument("--repeats", type=int, default=5, help="number of repeats, the best is reported")
+    args = parser.parse_args()
+
+    state = DynamicState().convert_to_numpy()
+    delta = MsgDelta(elevator=-0.1248, aileron=0.001836, rudder=-0.0003026, throttle=0.6768)
+    Va, alpha, beta, _ = update_velocity_data(state)
+    fm = forces_moments(state, delta, Va, beta, alpha)
+    mav = MavDynamics(0.01)
+    wind = np.zeros((6, 1))
+    functions: dict[str, Callable[[], object]] = {
+        "Quaternion2Rotation": lambda: Quaternion2Rotation(state[6:10]),
+        "derivatives": lambda: derivatives(state, fm),
+        "forces_moments": lambda: forces_moments(state, delta, Va, beta, alpha),
+        "MavDynamics.update": lambda: mav.update(delta, wind),
+    }
+
+    print(f"{'function':<22s}{'full (us)':>12s}{'none (us)':>12s}{'removed':>10s}")
+    for name, func in functions.items():
+        times = {}
+        for level_name, level in types.VALIDATION_LEVELS.items():
+            with types.validation_level(level):
+                times[level_name] = best_time(func, args.calls, args.repeats)
+        removed = times["full"] - times["none"]
+        print(f"{name:<22s}{times['full']:12.2f}{times['none']:12.2f}{removed/times['full']*100.:9.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+gain_schedule_table
+    - Trims the MAV over a grid of air speed, flight path angle, and turn radius, linearizes
+      every trim point, and saves the resulting ModelTable for use at runtime
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+
+import argparse
+import time
+
+import numpy as np
+from mav_sim.chap5.model_table import linearize_envelope
+from mav_sim.chap5.trim_envelope import trim_envelope
+
+
+def main() -> None:
+    """Compute and save the table"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", help="name of the .npz file to write")
+    parser.add_argument("--Va", type=float, nargs=3, default=(15., 35., 9), metavar=("MIN", "MAX", "NUM"),
+                        help="evenly spaced air speeds (m/s)")
+    parser.add_argument("--gamma", type=float, nargs=3, default=(-10., 10., 5), metavar=("MIN", "MAX", "NUM"),
+                        help="evenly spaced flight path angles (deg)")
+    parser.add_argument("--R", type=float, nargs="*", default=[np.inf], help="turn radii (m), inf for a straight line")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    args = parser.parse_args()
+
+    Va = np.linspace(args.Va[0], args.Va[1], int(args.Va[2]))
+    gamma = np.radians(np.linspace(args.gamma[0], args.gamma[1], int(args.gamma[2])))
+
+    start = time.perf_counter()
+    envelope = trim_envelope(Va, gamma, args.R, max_workers=args.workers)
+    trimmed = time.perf_counter()
+    table = linearize_envelope(envelope, max_workers=args.workers)
+    linearized = time.perf_counter()
+    table.save(args.output)
+
+    print(f"trimmed {envelope.size} points in {trimmed - start:.2f} s, "
+          f"{np.count_nonzero(envelope['converged'])} converged")
+    print(f"linearized in {linearized - trimmed:.2f} s, table of {table.data.nbytes/1024:.1f} kB written to {args.output}")
+
+if __name__ == "__main__":
+    main()
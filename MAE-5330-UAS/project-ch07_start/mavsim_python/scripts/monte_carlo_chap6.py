@@ -0,0 +1,50 @@
+"""
+monte_carlo_chap6
+    - Runs the chapter 6 autopilot Monte Carlo analysis and prints the metrics table
+    - Optionally repeats the analysis with 1, 2, 4, ... workers to report how it scales with core count
+
+part of mavsim_python
+    - Beard & McLain, PUP, 2012
+"""
+
+import argparse
+import os
+import time
+
+from mav_sim.chap6.monte_carlo import format_table, generate_cases, run_monte_carlo
+from mav_sim.message_types.msg_sim_params import MsgSimParams
+
+
+def main() -> None:
+    """Run the analysis and print the results"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=16, help="number of cases")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the analysis")
+    parser.add_argument("--end-time", type=float, default=50., help="length of each run (s)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes, defaults to the core count")
+    parser.add_argument("--scaling", action="store_true", help="time the analysis for increasing worker counts")
+    args = parser.parse_args()
+
+    sim = MsgSimParams(end_time=args.end_time)
+    cases = generate_cases(args.cases, seed=args.seed)
+
+    start = time.perf_counter()
+    results = run_monte_carlo(sim, cases, max_workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(format_table(results))
+    print(f"\n{args.cases} cases in {elapsed:.2f} s")
+
+    if args.scaling:
+        print("\nworkers     time (s)   speedup")
+        workers = 1
+        baseline = 0.
+        while workers <= (os.cpu_count() or 1):
+            start = time.perf_counter()
+            run_monte_carlo(sim, cases, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline if baseline > 0. else elapsed
+            print(f"{workers:7d}{elapsed:13.2f}{baseline/elapsed:10.2f}x")
+            workers *= 2
+
+if __name__ == "__main__":
+    main()